@@ -182,9 +182,22 @@ AWS_S3_OBJECT_PARAMETERS = {
     # See https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3.html#S3.Client.put_object
     "StorageClass": os.environ.get("AWS_S3_DEFAULT_STORAGE_CLASS", "STANDARD")
 }
+# The part size and number of parallel requests used to copy large objects
+# between buckets with UploadPartCopy. The part size is that of the boto3
+# managed copy that was used before, as the checksums of objects copied in
+# parts depend on it and are used to find duplicate container images.
+AWS_S3_COPY_PART_SIZE = 8 * MEGABYTE
+AWS_S3_COPY_MAX_CONCURRENCY = int(
+    os.environ.get("AWS_S3_COPY_MAX_CONCURRENCY", 16)
+)
 AWS_CLOUDWATCH_REGION_NAME = os.environ.get("AWS_CLOUDWATCH_REGION_NAME")
 AWS_CODEBUILD_REGION_NAME = os.environ.get("AWS_CODEBUILD_REGION_NAME")
 AWS_SES_REGION_NAME = os.environ.get("AWS_SES_REGION_NAME")
+AWS_SES_SEND_MAX_WORKERS = int(os.environ.get("AWS_SES_SEND_MAX_WORKERS", 8))
+AWS_SES_SEND_BATCH_SIZE = int(os.environ.get("AWS_SES_SEND_BATCH_SIZE", 100))
+AWS_SES_SEND_STATUS_BATCH_SIZE = int(
+    os.environ.get("AWS_SES_SEND_STATUS_BATCH_SIZE", 10)
+)
 
 # This is for storing files that should not be served to the public
 PRIVATE_S3_STORAGE_KWARGS = {
@@ -248,6 +261,18 @@ CLOUDFRONT_PRIVATE_KEY_BASE64 = os.environ.get(
 CLOUDFRONT_URL_EXPIRY_SECONDS = int(
     os.environ.get("CLOUDFRONT_URL_EXPIRY_SECONDS", "300")  # 5 mins
 )
+# How long a user's permission to view an image is cached for when serving
+# its files, revoked permissions take effect once this has expired
+SERVING_PERMISSION_CACHE_TIMEOUT = int(
+    os.environ.get("SERVING_PERMISSION_CACHE_TIMEOUT", "60")
+)
+# Buffer the download records and create them in batches
+SERVING_BUFFER_DOWNLOADS = strtobool(
+    os.environ.get("SERVING_BUFFER_DOWNLOADS", "True")
+)
+SERVING_DOWNLOADS_BATCH_SIZE = int(
+    os.environ.get("SERVING_DOWNLOADS_BATCH_SIZE", "1000")
+)
 
 ##############################################################################
 #
@@ -1092,6 +1117,37 @@ COMPONENTS_CPU_SHARES = int(
 )
 COMPONENTS_CPUSET_CPUS = str(os.environ.get("COMPONENTS_CPUSET_CPUS", ""))
 COMPONENTS_DOCKER_RUNTIME = os.environ.get("COMPONENTS_DOCKER_RUNTIME", None)
+COMPONENTS_DOCKER_CLIENT = os.environ.get(
+    "COMPONENTS_DOCKER_CLIENT",
+    "grandchallenge.components.backends.docker_engine.DockerEngineAPIClient",
+)
+COMPONENTS_DOCKER_SOCKET = os.environ.get(
+    "COMPONENTS_DOCKER_SOCKET", "/var/run/docker.sock"
+)
+COMPONENTS_DOCKER_API_VERSION = os.environ.get(
+    "COMPONENTS_DOCKER_API_VERSION", "1.41"
+)
+COMPONENTS_DOCKER_CONNECTION_POOL_SIZE = int(
+    os.environ.get("COMPONENTS_DOCKER_CONNECTION_POOL_SIZE", "4")
+)
+# Timeouts in seconds for requests to the docker daemon
+COMPONENTS_DOCKER_TIMEOUT = int(
+    os.environ.get("COMPONENTS_DOCKER_TIMEOUT", "60")
+)
+COMPONENTS_DOCKER_IMAGE_TIMEOUT = int(
+    os.environ.get("COMPONENTS_DOCKER_IMAGE_TIMEOUT", "1800")
+)
+# Buffer the events from event driven backends and handle them in batches
+COMPONENTS_BATCH_EVENTS = strtobool(
+    os.environ.get("COMPONENTS_BATCH_EVENTS", "True")
+)
+COMPONENTS_EVENT_BATCH_SIZE = int(
+    os.environ.get("COMPONENTS_EVENT_BATCH_SIZE", "128")
+)
+# The maximum number of points per series in the runtime metrics charts
+COMPONENTS_RUNTIME_METRICS_CHART_POINTS = int(
+    os.environ.get("COMPONENTS_RUNTIME_METRICS_CHART_POINTS", "500")
+)
 COMPONENTS_NVIDIA_VISIBLE_DEVICES = os.environ.get(
     "COMPONENTS_NVIDIA_VISIBLE_DEVICES", "void"
 )
@@ -1203,6 +1259,10 @@ CELERY_BEAT_SCHEDULE = {
         "task": "grandchallenge.uploads.tasks.delete_old_user_uploads",
         "schedule": crontab(hour=2, minute=0),
     },
+    "reconcile_user_upload_storage_usage": {
+        "task": "grandchallenge.uploads.tasks.reconcile_user_upload_storage_usage",
+        "schedule": crontab(hour=3, minute=15),
+    },
     "remove_inactive_container_images": {
         "task": "grandchallenge.components.tasks.remove_inactive_container_images",
         "schedule": crontab(hour=2, minute=30),
@@ -1225,7 +1285,7 @@ CELERY_BEAT_SCHEDULE = {
     },
     "update_compute_costs_and_storage_size": {
         "task": "grandchallenge.challenges.tasks.update_compute_costs_and_storage_size",
-        "schedule": crontab(hour="5,11,17,23", minute=0),
+        "schedule": crontab(hour=5, minute=0),
     },
     "update_site_statistics": {
         "task": "grandchallenge.statistics.tasks.update_site_statistics_cache",
@@ -1243,6 +1303,14 @@ CELERY_BEAT_SCHEDULE = {
         "task": "grandchallenge.emails.tasks.send_raw_emails",
         "schedule": timedelta(seconds=30),
     },
+    "handle_buffered_events": {
+        "task": "grandchallenge.components.tasks.handle_buffered_events",
+        "schedule": timedelta(seconds=10),
+    },
+    "create_buffered_downloads": {
+        "task": "grandchallenge.serving.tasks.create_buffered_downloads",
+        "schedule": timedelta(seconds=30),
+    },
     **{
         f"stop_expired_services_{region}": {
             "task": "grandchallenge.components.tasks.stop_expired_services",
@@ -1395,8 +1463,62 @@ CASES_POST_PROCESSORS = os.environ.get(
     "CASES_POST_PROCESSORS", "panimg.post_processors.tiff_to_dzi"
 ).split(",")
 
+# The number of concurrent downloads and archive extraction processes
+# when provisioning the files of an upload session
+CASES_PROVISIONING_MAX_WORKERS = int(
+    os.environ.get("CASES_PROVISIONING_MAX_WORKERS", "8")
+)
+CASES_EXTRACTION_MAX_WORKERS = int(
+    os.environ.get("CASES_EXTRACTION_MAX_WORKERS", "4")
+)
+# The number of processes used to convert the files of an upload session,
+# the files are converted serially in the worker process by default
+CASES_CONVERSION_MAX_WORKERS = int(
+    os.environ.get("CASES_CONVERSION_MAX_WORKERS", "1")
+)
+# The number of concurrent transfers when storing the imported images or
+# when downloading them for post processing, and the number of images that
+# are post processed by each task
+CASES_STORAGE_MAX_WORKERS = int(
+    os.environ.get("CASES_STORAGE_MAX_WORKERS", "8")
+)
+CASES_POST_PROCESSING_CHUNK_SIZE = int(
+    os.environ.get("CASES_POST_PROCESSING_CHUNK_SIZE", "10")
+)
+# How long the files uploaded by a post processing task are recorded, so
+# that a retried task does not need to process the image again
+CASES_POST_PROCESSING_CHECKPOINT_TIMEOUT = 24 * 60 * 60
+# How long the claim on an image that is being post processed lasts, it is
+# extended while the task is running
+CASES_POST_PROCESSING_LOCK_TIMEOUT = 60
+# The number of images whose view permissions are updated per transaction
+CASES_PERMISSIONS_UPDATE_CHUNK_SIZE = int(
+    os.environ.get("CASES_PERMISSIONS_UPDATE_CHUNK_SIZE", "1000")
+)
+# How long the serialized metadata of images are cached for, they are also
+# invalidated when an image or its files change
+CASES_IMAGE_METADATA_CACHE_TIMEOUT = int(
+    os.environ.get("CASES_IMAGE_METADATA_CACHE_TIMEOUT", str(60 * 60))
+)
+# The number of concurrent uploads of the tiles of DZI files, and whether
+# to pack the tiles into a single object that is read with ranged requests
+CASES_TILE_UPLOAD_MAX_WORKERS = int(
+    os.environ.get("CASES_TILE_UPLOAD_MAX_WORKERS", "16")
+)
+CASES_PACK_DZI_TILES = strtobool(
+    os.environ.get("CASES_PACK_DZI_TILES", "False")
+)
+
 # Maximum file size in bytes to be opened by SimpleITK.ReadImage in Image.sitk_image
 MAX_SITK_FILE_SIZE = 256 * MEGABYTE
+# The size of and number of concurrent ranged reads when streaming images
+CASES_IMAGE_READ_CHUNK_SIZE = 8 * MEGABYTE
+CASES_IMAGE_READ_MAX_WORKERS = int(
+    os.environ.get("CASES_IMAGE_READ_MAX_WORKERS", "8")
+)
+# The number of voxels that are scanned at a time when finding segments,
+# np.bincount uses 8 bytes of memory per voxel
+CASES_SEGMENTS_BLOCK_SIZE = 8 * MEGABYTE
 
 # The maximum size of all the files in an upload session in bytes
 UPLOAD_SESSION_MAX_BYTES = 10 * GIGABYTE
@@ -31,6 +31,7 @@ from grandchallenge.components.models import (
     ComponentImage,
     ComponentInterface,
     ComponentJob,
+    ComponentJobLogChunk,
     ComponentJobManager,
     ImportStatusChoices,
     Tarball,
@@ -933,6 +934,15 @@ class Job(UUIDModel, ComponentJob):
         return display_set
 
 
+class JobLogChunk(ComponentJobLogChunk):
+    job = models.ForeignKey(
+        Job, on_delete=models.CASCADE, related_name="log_chunks"
+    )
+
+    class Meta(ComponentJobLogChunk.Meta):
+        unique_together = (("job", "sequence"),)
+
+
 class JobUserObjectPermission(UserObjectPermissionBase):
     content_object = models.ForeignKey(Job, on_delete=models.CASCADE)
 
@@ -3,6 +3,7 @@ from django.dispatch import receiver
 from guardian.shortcuts import assign_perm, remove_perm
 
 from grandchallenge.algorithms.models import Job
+from grandchallenge.cases.models import update_viewer_groups_permissions
 from grandchallenge.components.models import ComponentInterfaceValue
 
 
@@ -62,11 +63,11 @@ def update_input_image_permissions(
 def _update_image_permissions(
     *, jobs, component_interface_values, exclude_jobs: bool
 ):
-    for civ in component_interface_values:
-        # image__isnull=False is used above so we know that civ.image exists
-        civ.image.update_viewer_groups_permissions(
-            exclude_jobs=jobs if exclude_jobs else None
-        )
+    # image__isnull=False is used above so we know that civ.image exists
+    update_viewer_groups_permissions(
+        image_pks={civ.image_id for civ in component_interface_values},
+        exclude_jobs=jobs if exclude_jobs else None,
+    )
 
 
 @receiver(m2m_changed, sender=Job.viewer_groups.through)
@@ -96,9 +97,7 @@ def update_group_permissions(
         for group in groups:
             operation("view_job", group, job)
 
-    queryset = ComponentInterfaceValue.objects.filter(
-        image__isnull=False
-    ).select_related("image")
+    queryset = ComponentInterfaceValue.objects.filter(image__isnull=False)
 
     input_civs = queryset.filter(algorithms_jobs_as_input__in=jobs)
     output_civs = queryset.filter(algorithms_jobs_as_output__in=jobs)
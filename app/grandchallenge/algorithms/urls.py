@@ -24,6 +24,7 @@ from grandchallenge.algorithms.views import (
     EditorsUpdate,
     JobCreate,
     JobDetail,
+    JobLogs,
     JobProgressDetail,
     JobsList,
     JobUpdate,
@@ -101,6 +102,7 @@ urlpatterns = [
     path(
         "<slug>/jobs/<uuid:pk>/update/", JobUpdate.as_view(), name="job-update"
     ),
+    path("<slug>/jobs/<uuid:pk>/logs/", JobLogs.as_view(), name="job-logs"),
     path(
         "<slug>/jobs/<uuid:pk>/display-set/create/",
         DisplaySetFromJobCreate.as_view(),
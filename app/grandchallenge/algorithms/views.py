@@ -77,6 +77,7 @@ from grandchallenge.components.models import (
     ImportStatusChoices,
 )
 from grandchallenge.components.tasks import upload_to_registry_and_sagemaker
+from grandchallenge.components.views import JobLogsBaseView
 from grandchallenge.core.filters import FilterMixin
 from grandchallenge.core.forms import UserFormKwargsMixin
 from grandchallenge.core.guardian import (
@@ -735,6 +736,11 @@ class JobDetail(ObjectPermissionRequiredMixin, DetailView):
         return context
 
 
+class JobLogs(LoginRequiredMixin, JobLogsBaseView):
+    model = Job
+    permission_required = "algorithms.view_logs"
+
+
 class JobUpdate(LoginRequiredMixin, ObjectPermissionRequiredMixin, UpdateView):
     model = Job
     form_class = JobForm
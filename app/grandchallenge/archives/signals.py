@@ -5,6 +5,9 @@ from django.dispatch import receiver
 from grandchallenge.algorithms.tasks import create_algorithm_jobs_for_archive
 from grandchallenge.archives.models import Archive, ArchiveItem
 from grandchallenge.cases.models import Image
+from grandchallenge.cases.tasks import (
+    schedule_viewer_groups_permissions_update,
+)
 
 
 @receiver(m2m_changed, sender=ArchiveItem.values.through)
@@ -21,32 +24,27 @@ def update_permissions_on_archive_item_changed(
         if pk_set is None:
             # When using a _clear action, pk_set is None
             # https://docs.djangoproject.com/en/2.2/ref/signals/#m2m-changed
-            images = [
-                civ.image
-                for civ in instance.values.filter(image__isnull=False)
-            ]
+            images = Image.objects.filter(
+                componentinterfacevalue__in=instance.values.all()
+            )
         else:
             images = Image.objects.filter(
                 componentinterfacevalue__pk__in=pk_set
             )
 
-    def update_permissions():
-        for image in images:
-            image.update_viewer_groups_permissions()
-
-    on_commit(update_permissions)
+    schedule_viewer_groups_permissions_update(
+        image_pks=images.values_list("pk", flat=True)
+    )
 
 
 @receiver(pre_delete, sender=ArchiveItem)
 @receiver(post_save, sender=ArchiveItem)
 def update_view_image_permissions(*_, instance: ArchiveItem, **__):
-    images = [civ.image for civ in instance.values.filter(image__isnull=False)]
-
-    def update_permissions():
-        for image in images:
-            image.update_viewer_groups_permissions()
-
-    on_commit(update_permissions)
+    schedule_viewer_groups_permissions_update(
+        image_pks=instance.values.filter(image__isnull=False).values_list(
+            "image", flat=True
+        )
+    )
 
 
 @receiver(m2m_changed, sender=ArchiveItem.values.through)
@@ -1,4 +1,9 @@
-from django_filters import FilterSet, ModelMultipleChoiceFilter
+from django_filters import (
+    BaseInFilter,
+    FilterSet,
+    ModelMultipleChoiceFilter,
+    UUIDFilter,
+)
 from django_select2.forms import Select2MultipleWidget
 from drf_spectacular.utils import extend_schema_field
 
@@ -14,7 +19,17 @@ class UUIDModelMultipleChoiceFilter(ModelMultipleChoiceFilter):
     pass
 
 
+class UUIDInFilter(BaseInFilter, UUIDFilter):
+    pass
+
+
 class ImageFilterSet(FilterSet):
+    pk__in = UUIDInFilter(
+        field_name="pk",
+        lookup_expr="in",
+        label="Images",
+        help_text="Filter images by a comma separated list of primary keys",
+    )
     archive = UUIDModelMultipleChoiceFilter(
         queryset=Archive.objects.all(),
         widget=Select2MultipleWidget,
@@ -55,6 +70,7 @@ class ImageFilterSet(FilterSet):
     class Meta:
         model = Image
         fields = (
+            "pk__in",
             "origin",
             "job_input",
             "job_output",
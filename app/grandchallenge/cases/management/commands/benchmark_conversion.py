@@ -0,0 +1,82 @@
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import SimpleITK
+from django.core.management import BaseCommand
+
+from grandchallenge.cases.tasks import _convert_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time taken to convert a directory of synthetic "
+        "images with different numbers of worker processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--files",
+            type=int,
+            default=200,
+            help="The number of images to convert",
+        )
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=128,
+            help="The length of each side of the synthetic volumes",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            nargs="+",
+            default=sorted({1, 2, 4, os.cpu_count() or 1}),
+            help="The numbers of worker processes to compare",
+        )
+
+    def handle(self, *args, **options):
+        with TemporaryDirectory() as tmp_dir:
+            input_directory = Path(tmp_dir) / "input"
+            input_directory.mkdir()
+
+            self._create_images(
+                directory=input_directory,
+                n_files=options["files"],
+                size=options["size"],
+            )
+
+            baseline = None
+
+            for max_workers in options["workers"]:
+                start = time.monotonic()
+                result = _convert_images(
+                    input_directory=input_directory,
+                    output_directory=Path(tmp_dir) / f"output-{max_workers}",
+                    max_workers=max_workers,
+                )
+                duration = time.monotonic() - start
+
+                if baseline is None:
+                    baseline = duration
+
+                self.stdout.write(
+                    f"{max_workers} worker(s): converted "
+                    f"{len(result.new_images)} images in {duration:.2f} s "
+                    f"({options['files'] / duration:.1f} images/s, "
+                    f"speedup {baseline / duration:.2f}x)"
+                )
+
+    @staticmethod
+    def _create_images(*, directory, n_files, size):
+        rng = np.random.default_rng(seed=42)
+
+        for idx in range(n_files):
+            image = SimpleITK.GetImageFromArray(
+                rng.integers(0, 4096, size=(size,) * 3, dtype=np.int16)
+            )
+            SimpleITK.WriteImage(
+                image, str(directory / f"image{idx}.mha"), useCompression=True
+            )
@@ -0,0 +1,96 @@
+import resource
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from grandchallenge.cases.models import Image
+from grandchallenge.cases.segments import count_voxel_values
+
+GIGABYTE = 1024**3
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time and peak memory used to find the segments "
+        "of a synthetic label map, or of a stored image"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size-gb",
+            type=float,
+            default=4,
+            help="The size of the synthetic label map",
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            default=settings.CASES_SEGMENTS_BLOCK_SIZE,
+        )
+        parser.add_argument(
+            "--image",
+            type=str,
+            help="The pk of a stored image to use instead",
+        )
+
+    def handle(self, *args, **options):
+        if options["image"]:
+            image = Image.objects.get(pk=options["image"])
+
+            start = time.monotonic()
+            image.update_segments()
+            self._report(
+                n_bytes=sum(f.size_in_storage for f in image.files.all()),
+                duration=time.monotonic() - start,
+                result=image.segment_voxel_counts,
+            )
+        else:
+            n_bytes = int(options["size_gb"] * GIGABYTE)
+
+            with TemporaryDirectory() as tmp_dir:
+                pixel_data = self._create_label_map(
+                    path=Path(tmp_dir) / "labels.raw",
+                    n_bytes=n_bytes,
+                    block_size=options["block_size"],
+                )
+
+                start = time.monotonic()
+                counts = count_voxel_values(
+                    pixel_data=pixel_data, block_size=options["block_size"]
+                )
+                self._report(
+                    n_bytes=n_bytes,
+                    duration=time.monotonic() - start,
+                    result=counts,
+                )
+
+    @staticmethod
+    def _create_label_map(*, path, n_bytes, block_size):
+        pixel_data = np.memmap(path, dtype=np.uint8, mode="w+", shape=n_bytes)
+        rng = np.random.default_rng(seed=42)
+
+        for start in range(0, n_bytes, block_size):
+            end = min(start + block_size, n_bytes)
+            pixel_data[start:end] = rng.integers(
+                0, 8, size=end - start, dtype=np.uint8
+            )
+
+        pixel_data.flush()
+
+        return np.memmap(path, dtype=np.uint8, mode="r", shape=n_bytes)
+
+    def _report(self, *, n_bytes, duration, result):
+        # ru_maxrss is reported in kilobytes on Linux, and includes
+        # the pages of the memory mapped files that were resident
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+        self.stdout.write(
+            f"Scanned {n_bytes / GIGABYTE:.2f} GB in {duration:.2f} s "
+            f"({n_bytes / GIGABYTE / duration:.2f} GB/s), "
+            f"peak resident memory {peak_memory / GIGABYTE:.2f} GB"
+        )
+        self.stdout.write(f"Segment voxel counts: {result}")
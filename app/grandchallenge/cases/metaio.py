@@ -0,0 +1,363 @@
+"""
+Streamed loading of MetaImage files from the object store
+
+The header of an MHA or MHD file is read with a single ranged GET request.
+The pixel data are then streamed into a memory mapped file in a temporary
+directory, either with concurrent ranged GET requests when the data are
+uncompressed, or by decompressing the response as it arrives. A plain
+MHD header pointing at the memory mapped file is written alongside it, so
+that the image can be opened with SimpleITK or used as a NumPy array
+without the whole image being held in memory.
+"""
+
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from math import prod
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from panimg.exceptions import ValidationError
+from panimg.image_builders.metaio_utils import extract_key_value_pairs
+
+# The number of bytes fetched with the first request, which usually
+# contains the whole header
+HEADER_READ_SIZE = 64 * 1024
+# Matches the limits of the header parser in panimg
+MAX_HEADER_LINES = 10000
+MAX_HEADER_LINE_LENGTH = 10000
+
+# See MET_ValueTypeSize in MetaIO
+METAIO_DTYPES = {
+    "MET_CHAR": "i1",
+    "MET_UCHAR": "u1",
+    "MET_SHORT": "i2",
+    "MET_USHORT": "u2",
+    "MET_INT": "i4",
+    "MET_UINT": "u4",
+    "MET_LONG": "i4",
+    "MET_ULONG": "u4",
+    "MET_LONG_LONG": "i8",
+    "MET_ULONG_LONG": "u8",
+    "MET_FLOAT": "f4",
+    "MET_DOUBLE": "f8",
+}
+
+# The fields that are rewritten in the header of the local copy
+_DATA_FIELDS = {"CompressedData", "CompressedDataSize", "ElementDataFile"}
+
+
+class MetaImageHeader(NamedTuple):
+    fields: dict[str, str]
+    lines: list[bytes]
+    size: int
+
+    @property
+    def is_local(self):
+        return self.fields["ElementDataFile"] == "LOCAL"
+
+    @property
+    def is_compressed(self):
+        return self.fields.get("CompressedData", "False") == "True"
+
+    @property
+    def dtype(self):
+        element_type = self.fields.get("ElementType", "").removesuffix(
+            "_ARRAY"
+        )
+
+        try:
+            dtype = np.dtype(METAIO_DTYPES[element_type])
+        except KeyError:
+            raise ValidationError(f"Unsupported element type {element_type}")
+
+        big_endian = "True" in (
+            self.fields.get("BinaryDataByteOrderMSB"),
+            self.fields.get("ElementByteOrderMSB"),
+        )
+
+        return dtype.newbyteorder(">" if big_endian else "<")
+
+    @property
+    def shape(self):
+        """The shape of the pixel data in NumPy ordering"""
+        try:
+            shape = [int(d) for d in reversed(self.fields["DimSize"].split())]
+            channels = int(self.fields.get("ElementNumberOfChannels", "1"))
+        except (KeyError, ValueError):
+            raise ValidationError("Invalid image dimensions")
+
+        if channels > 1:
+            shape.append(channels)
+
+        if not shape or any(d < 1 for d in shape):
+            raise ValidationError("Invalid image dimensions")
+
+        return tuple(shape)
+
+    @property
+    def n_bytes(self):
+        """The size of the uncompressed pixel data"""
+        return prod(self.shape) * self.dtype.itemsize
+
+    def as_raw_header(self, *, element_data_file):
+        """The header for a copy of the image with uncompressed data"""
+        lines = [
+            line
+            for line in self.lines
+            if {*extract_key_value_pairs(line.decode("utf-8"))}.isdisjoint(
+                _DATA_FIELDS
+            )
+        ]
+        lines.append(b"CompressedData = False\n")
+        lines.append(f"ElementDataFile = {element_data_file}\n".encode())
+        return b"".join(lines)
+
+
+class MetaImage(NamedTuple):
+    header: MetaImageHeader
+    path: Path
+    pixel_data: np.memmap
+
+
+def parse_header(*, data):
+    """
+    Parse a MetaImage header from the start of a file
+
+    Returns
+    -------
+        The header, or None if ``data`` ends before the header does
+
+    Raises
+    ------
+    ValidationError
+        If the header is invalid
+    """
+    fields = {}
+    lines = []
+    position = 0
+
+    while "ElementDataFile" not in fields:
+        end = data.find(b"\n", position, position + MAX_HEADER_LINE_LENGTH)
+
+        if end == -1:
+            if len(data) - position >= MAX_HEADER_LINE_LENGTH:
+                raise ValidationError("Line length is too long")
+            return None
+
+        line = data[position : end + 1]
+        position = end + 1
+
+        lines.append(line)
+        if len(lines) > MAX_HEADER_LINES:
+            raise ValidationError("Files contains too many header lines")
+
+        try:
+            fields.update(extract_key_value_pairs(line.decode("utf-8")))
+        except UnicodeDecodeError as e:
+            raise ValidationError("Header contains invalid UTF-8") from e
+
+    return MetaImageHeader(fields=fields, lines=lines[:-1], size=position)
+
+
+def _read_header(*, file):
+    """Read the header of a file, and the data that were read after it"""
+    read_size = HEADER_READ_SIZE
+
+    while True:
+        try:
+            body, total_size = file.storage.read_range(
+                name=file.name, start=0, end=read_size - 1
+            )
+        except EOFError:
+            raise ValidationError("File is empty")
+
+        with body:
+            data = body.read()
+
+        header = parse_header(data=data)
+
+        if header is not None:
+            return header, data[header.size :], total_size
+        elif len(data) >= total_size:
+            raise ValidationError("Could not find the end of the header")
+
+        read_size *= 4
+
+
+def read_header(*, file):
+    """
+    Read the header of an MHA or MHD file from storage
+
+    Only the start of the file is fetched, so this can be used to inspect
+    an image without downloading its pixel data.
+    """
+    header, _, _ = _read_header(file=file)
+    return header
+
+
+def _check_size(*, size, max_size):
+    if max_size is not None and size > max_size:
+        raise OSError(
+            f"File exceeds maximum file size. (Size: {size}, Max: {max_size})"
+        )
+
+
+def _read_uncompressed(*, file, start, prefix, out):
+    """Fill ``out`` with the data in ``file`` from ``start`` onwards"""
+    n_prefix = min(len(prefix), len(out))
+    out[:n_prefix] = np.frombuffer(prefix, dtype=np.uint8, count=n_prefix)
+
+    chunk_size = settings.CASES_IMAGE_READ_CHUNK_SIZE
+    offsets = range(n_prefix, len(out), chunk_size)
+
+    def read_chunk(offset):
+        end = min(offset + chunk_size, len(out))
+
+        try:
+            body, _ = file.storage.read_range(
+                name=file.name, start=start + offset, end=start + end - 1
+            )
+        except EOFError as e:
+            raise ValidationError("Pixel data are truncated") from e
+
+        with body:
+            position = offset
+            for chunk in body.iter_chunks(chunk_size=1024 * 1024):
+                out[position : position + len(chunk)] = np.frombuffer(
+                    chunk, dtype=np.uint8
+                )
+                position += len(chunk)
+
+        if position != end:
+            raise ValidationError("Pixel data are truncated")
+
+    with ThreadPoolExecutor(
+        max_workers=settings.CASES_IMAGE_READ_MAX_WORKERS
+    ) as pool:
+        for future in [pool.submit(read_chunk, o) for o in offsets]:
+            # Raise any errors
+            future.result()
+
+
+def _read_compressed(*, body, prefix, out):
+    """Decompress the zlib or gzip stream in ``prefix`` and ``body``"""
+    # Detect zlib and gzip headers, as ITK does
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 32)
+    position = 0
+
+    def write(data):
+        nonlocal position
+
+        if position + len(data) > len(out):
+            raise ValidationError("Pixel data are larger than expected")
+
+        out[position : position + len(data)] = np.frombuffer(
+            data, dtype=np.uint8
+        )
+        position += len(data)
+
+    try:
+        write(decompressor.decompress(prefix))
+
+        if body is not None:
+            with body:
+                for chunk in body.iter_chunks(
+                    chunk_size=settings.CASES_IMAGE_READ_CHUNK_SIZE
+                ):
+                    if decompressor.eof:
+                        break
+                    write(decompressor.decompress(chunk))
+
+        write(decompressor.flush())
+    except zlib.error as e:
+        raise ValidationError("Could not decompress the pixel data") from e
+
+    if position != len(out):
+        raise ValidationError("Pixel data are truncated")
+
+
+@contextmanager
+def stream_metaimage(*, header_file, data_file=None, max_size=None):
+    """
+    Stream a MetaImage from storage to a temporary directory
+
+    Parameters
+    ----------
+    header_file
+        The ``FieldFile`` of the MHA or MHD file
+    data_file
+        The ``FieldFile`` of the RAW or ZRAW file for MHD files
+    max_size
+        The maximum total size of the stored files in bytes
+
+    Yields
+    ------
+        A ``MetaImage`` with the parsed header, the path to an MHD file
+        that can be read by SimpleITK and the pixel data as a read only
+        memory mapped array
+
+    Raises
+    ------
+    FileNotFoundError
+        If either of the files do not exist
+    OSError
+        If the files exceed ``max_size``
+    ValidationError
+        If the files are not valid MetaImages
+    """
+    header, prefix, size = _read_header(file=header_file)
+
+    if header.is_local != (data_file is None):
+        raise ValidationError("Unsupported element data file")
+
+    if header.is_local:
+        _check_size(size=size, max_size=max_size)
+        pixel_file, start = header_file, header.size
+    else:
+        pixel_file, start, prefix = data_file, 0, b""
+
+    with TemporaryDirectory() as tmp_dir:
+        raw_path = Path(tmp_dir) / "image.raw"
+        out = np.memmap(
+            raw_path, dtype=np.uint8, mode="w+", shape=(header.n_bytes,)
+        )
+
+        if header.is_compressed:
+            try:
+                body, data_size = pixel_file.storage.read_range(
+                    name=pixel_file.name, start=start + len(prefix)
+                )
+            except EOFError:
+                # The prefix already contains all of the data
+                body, data_size = None, size
+
+            if not header.is_local:
+                _check_size(size=size + data_size, max_size=max_size)
+
+            _read_compressed(body=body, prefix=prefix, out=out)
+        else:
+            if not header.is_local:
+                data_size = pixel_file.storage.size(pixel_file.name)
+                _check_size(size=size + data_size, max_size=max_size)
+
+            _read_uncompressed(
+                file=pixel_file, start=start, prefix=prefix, out=out
+            )
+
+        out.flush()
+        del out
+
+        path = Path(tmp_dir) / "image.mhd"
+        path.write_bytes(header.as_raw_header(element_data_file=raw_path.name))
+
+        yield MetaImage(
+            header=header,
+            path=path,
+            pixel_data=np.memmap(
+                raw_path, dtype=header.dtype, mode="r", shape=header.shape
+            ),
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.13 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cases", "0014_imagefile_size_in_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="image",
+            name="segment_voxel_counts",
+            field=models.JSONField(
+                blank=True,
+                default=None,
+                editable=False,
+                help_text="The number of voxels in each segment",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,20 +1,20 @@
 import logging
-from pathlib import Path
-from tempfile import TemporaryDirectory
+from contextlib import contextmanager
 
 from actstream.actions import follow
 from actstream.models import Follow
 from django.conf import settings
+from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist, SuspiciousFileOperation
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
-from django.db.models.signals import post_delete, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.db.transaction import on_commit
 from django.dispatch import receiver
-from django.utils._os import safe_join
 from django.utils.text import get_valid_filename
 from guardian.models import GroupObjectPermissionBase, UserObjectPermissionBase
-from guardian.shortcuts import assign_perm, get_groups_with_perms, remove_perm
+from guardian.shortcuts import assign_perm
 from panimg.image_builders.metaio_utils import load_sitk_image
 from panimg.models import (
     MAXIMUM_SEGMENTS_LENGTH,
@@ -24,6 +24,12 @@ from panimg.models import (
 )
 from storages.utils import clean_name
 
+from grandchallenge.cases.metaio import read_header, stream_metaimage
+from grandchallenge.cases.segments import (
+    is_segmentation_header,
+    segment_voxel_counts,
+)
+from grandchallenge.cases.tiles import upload_packed_tiles, upload_tiles
 from grandchallenge.core.models import FieldChangeMixin, UUIDModel
 from grandchallenge.core.storage import protected_s3_storage
 from grandchallenge.core.validators import JSONValidator
@@ -318,6 +324,13 @@ class Image(UUIDModel):
         default=None,
         validators=[JSONValidator(schema=SEGMENTS_SCHEMA)],
     )
+    segment_voxel_counts = models.JSONField(
+        null=True,
+        blank=True,
+        default=None,
+        editable=False,
+        help_text="The number of voxels in each segment",
+    )
     eye_choice = models.CharField(
         max_length=2,
         choices=EYE_CHOICES,
@@ -389,8 +402,7 @@ class Image(UUIDModel):
         Raises
         ------
         FileNotFoundError
-            Raised when Image has no related mhd/mha ImageFile or actual file
-            cannot be found on storage
+            Raised when Image has no related mhd/mha ImageFile
         """
         image_data_file = None
         try:
@@ -411,11 +423,44 @@ class Image(UUIDModel):
                     f"No mhd or mha file found for image {self.name} (pk: {self.pk})"
                 )
 
-        if not header_file.file.storage.exists(name=header_file.file.name):
-            raise FileNotFoundError(f"No file found for {header_file.file}")
-
         return header_file, image_data_file
 
+    @contextmanager
+    def open_metaimage(self, *, max_size=None):
+        """
+        Stream the MHA or MHD/RAW files of this image to a temporary directory
+
+        The pixel data are available as a memory mapped array until the
+        context exits, so images larger than memory can be processed.
+
+        Parameters
+        ----------
+        max_size
+            The maximum total size of the stored files in bytes
+
+        Yields
+        ------
+            A ``MetaImage``
+
+        Raises
+        ------
+        FileNotFoundError
+            Raised when Image has no related mhd/mha ImageFile or actual file
+            cannot be found on storage
+        OSError
+            Raised when the files exceed ``max_size``
+        """
+        header_file, image_data_file = self._metaimage_files
+
+        with stream_metaimage(
+            header_file=header_file.file,
+            data_file=(
+                None if image_data_file is None else image_data_file.file
+            ),
+            max_size=max_size,
+        ) as metaimage:
+            yield metaimage
+
     @property
     def sitk_image(self):
         """
@@ -429,38 +474,13 @@ class Image(UUIDModel):
         -------
             A SimpleITK image
         """
-        files = [i for i in self._metaimage_files if i is not None]
-
-        file_size = 0
-        for file in files:
-            if not file.file.storage.exists(name=file.file.name):
-                raise FileNotFoundError(f"No file found for {file.file}")
-
-            # Add up file sizes of mhd and raw file to get total file size
-            file_size += file.file.size
-
-        # Check file size to guard for out of memory error
-        if file_size > settings.MAX_SITK_FILE_SIZE:
-            raise OSError(
-                f"File exceeds maximum file size. (Size: {file_size}, Max: {settings.MAX_SITK_FILE_SIZE})"
-            )
-
-        with TemporaryDirectory() as tempdirname:
-            for file in files:
-                with (
-                    file.file.open("rb") as infile,
-                    open(
-                        Path(tempdirname) / Path(file.file.name).name, "wb"
-                    ) as outfile,
-                ):
-                    buffer = True
-                    while buffer:
-                        buffer = infile.read(1024)
-                        outfile.write(buffer)
-
+        # Guard against out of memory errors as SimpleITK loads the
+        # whole image
+        with self.open_metaimage(
+            max_size=settings.MAX_SITK_FILE_SIZE
+        ) as metaimage:
             try:
-                hdr_path = Path(tempdirname) / Path(files[0].file.name).name
-                sitk_image = load_sitk_image(hdr_path)
+                sitk_image = load_sitk_image(metaimage.path)
             except RuntimeError as e:
                 logging.error(
                     f"Failed to load SimpleITK image with error: {e}"
@@ -469,6 +489,37 @@ class Image(UUIDModel):
 
         return sitk_image
 
+    def update_segments(self):
+        """
+        Determine the segments of this image and the voxel counts of each
+
+        The header is checked first so that the pixel data are only fetched
+        for images that could be segmentations. These are streamed from
+        storage and scanned in blocks, so this works for images that are too
+        large for ``sitk_image``.
+        """
+        header_file, _ = self._metaimage_files
+
+        if is_segmentation_header(header=read_header(file=header_file.file)):
+            with self.open_metaimage() as metaimage:
+                counts = segment_voxel_counts(
+                    metaimage=metaimage,
+                    block_size=settings.CASES_SEGMENTS_BLOCK_SIZE,
+                )
+        else:
+            counts = None
+
+        if counts is None:
+            self.segments = None
+            self.segment_voxel_counts = None
+        else:
+            self.segments = sorted(counts)
+            self.segment_voxel_counts = {
+                str(segment): count for segment, count in counts.items()
+            }
+
+        self.save(update_fields=["segments", "segment_voxel_counts"])
+
     def update_viewer_groups_permissions(self, *, exclude_jobs=None):
         """
         Update the permissions for the algorithm jobs viewers groups to
@@ -482,68 +533,9 @@ class Image(UUIDModel):
             image from the results image set, and is used when the pre_clear
             signal is sent.
         """
-        from grandchallenge.algorithms.models import Job
-        from grandchallenge.archives.models import Archive
-        from grandchallenge.reader_studies.models import ReaderStudy
-
-        if exclude_jobs is None:
-            exclude_jobs = set()
-        else:
-            exclude_jobs = {j.pk for j in exclude_jobs}
-
-        expected_groups = set()
-
-        for key in ["inputs__image", "outputs__image"]:
-            for job in (
-                Job.objects.exclude(pk__in=exclude_jobs)
-                .filter(**{key: self})
-                .prefetch_related("viewer_groups")
-            ):
-                expected_groups.update(job.viewer_groups.all())
-
-        for archive in Archive.objects.filter(
-            items__values__image=self
-        ).select_related("editors_group", "uploaders_group", "users_group"):
-            expected_groups.update(
-                [
-                    archive.editors_group,
-                    archive.uploaders_group,
-                    archive.users_group,
-                ]
-            )
-
-        for rs in ReaderStudy.objects.filter(
-            display_sets__values__image=self
-        ).select_related("editors_group", "readers_group"):
-            expected_groups.update(
-                [
-                    rs.editors_group,
-                    rs.readers_group,
-                ]
-            )
-
-        # Reader study editors for reader studies that have answers that
-        # include this image.
-        for answer in self.answer_set.select_related(
-            "question__reader_study__editors_group"
-        ).all():
-            expected_groups.add(answer.question.reader_study.editors_group)
-
-        current_groups = get_groups_with_perms(self, attach_perms=True)
-        current_groups = {
-            group
-            for group, perms in current_groups.items()
-            if "view_image" in perms
-        }
-
-        groups_missing_perms = expected_groups - current_groups
-        groups_with_extra_perms = current_groups - expected_groups
-
-        for g in groups_missing_perms:
-            assign_perm("view_image", g, self)
-
-        for g in groups_with_extra_perms:
-            remove_perm("view_image", g, self)
+        update_viewer_groups_permissions(
+            image_pks=[self.pk], exclude_jobs=exclude_jobs
+        )
 
     def assign_view_perm_to_creator(self):
         for answer in self.answer_set.all():
@@ -565,6 +557,114 @@ class ImageGroupObjectPermission(GroupObjectPermissionBase):
     content_object = models.ForeignKey(Image, on_delete=models.CASCADE)
 
 
+def _expected_viewer_groups(*, image_pks, exclude_jobs):
+    """The (image pk, group pk) pairs that should have view_image"""
+    from grandchallenge.algorithms.models import Job
+    from grandchallenge.archives.models import ArchiveItem
+    from grandchallenge.reader_studies.models import Answer, DisplaySet
+
+    querysets = [
+        through.objects.filter(componentinterfacevalue__image__in=image_pks)
+        .exclude(job__in=exclude_jobs)
+        .values_list("componentinterfacevalue__image", "job__viewer_groups")
+        for through in (Job.inputs.through, Job.outputs.through)
+    ]
+    querysets += [
+        ArchiveItem.values.through.objects.filter(
+            componentinterfacevalue__image__in=image_pks
+        ).values_list(
+            "componentinterfacevalue__image", f"archiveitem__archive__{group}"
+        )
+        for group in ("editors_group", "uploaders_group", "users_group")
+    ]
+    querysets += [
+        DisplaySet.values.through.objects.filter(
+            componentinterfacevalue__image__in=image_pks
+        ).values_list(
+            "componentinterfacevalue__image",
+            f"displayset__reader_study__{group}",
+        )
+        for group in ("editors_group", "readers_group")
+    ]
+    # Reader study editors for reader studies that have answers that
+    # include these images.
+    querysets.append(
+        Answer.objects.filter(answer_image__in=image_pks).values_list(
+            "answer_image", "question__reader_study__editors_group"
+        )
+    )
+
+    return {
+        (image_pk, group_pk)
+        for queryset in querysets
+        for image_pk, group_pk in queryset.distinct()
+        if group_pk is not None
+    }
+
+
+def update_viewer_groups_permissions(*, image_pks, exclude_jobs=None):
+    """
+    Update the permissions for the viewer groups to view a set of images.
+
+    The groups that should be able to view the images are found with one
+    query per relation, these are compared with the existing permissions
+    and only the differences are created or deleted.
+
+    Parameters
+    ----------
+    image_pks
+        The primary keys of the images to update
+    exclude_jobs
+        Exclude these jobs from being considered, see
+        ``Image.update_viewer_groups_permissions``
+    """
+    image_pks = {*image_pks}
+
+    if not image_pks:
+        return
+
+    if exclude_jobs is None:
+        exclude_jobs = set()
+    else:
+        exclude_jobs = {j.pk for j in exclude_jobs}
+
+    permission = Permission.objects.get(
+        codename="view_image",
+        content_type=ContentType.objects.get_for_model(Image),
+    )
+
+    expected_pairs = _expected_viewer_groups(
+        image_pks=image_pks, exclude_jobs=exclude_jobs
+    )
+    current_pairs = {
+        (image_pk, group_pk): pk
+        for pk, image_pk, group_pk in ImageGroupObjectPermission.objects.filter(
+            content_object__in=image_pks, permission=permission
+        ).values_list(
+            "pk", "content_object", "group"
+        )
+    }
+
+    ImageGroupObjectPermission.objects.bulk_create(
+        [
+            ImageGroupObjectPermission(
+                content_object_id=image_pk,
+                group_id=group_pk,
+                permission=permission,
+            )
+            for image_pk, group_pk in expected_pairs - current_pairs.keys()
+        ],
+        ignore_conflicts=True,
+    )
+    ImageGroupObjectPermission.objects.filter(
+        pk__in=[
+            pk
+            for pair, pk in current_pairs.items()
+            if pair not in expected_pairs
+        ]
+    ).delete()
+
+
 class ImageFile(FieldChangeMixin, UUIDModel):
     IMAGE_TYPE_MHD = ImageType.MHD.value
     IMAGE_TYPE_TIFF = ImageType.TIFF.value
@@ -613,35 +713,70 @@ class ImageFile(FieldChangeMixin, UUIDModel):
             raise RuntimeError("The file cannot be changed")
 
         if adding and self._directory is not None:
-            self.save_directory()
-
-        if adding or self.has_changed("file"):
+            # The size is known from the local files
+            self.size_in_storage = self.file.size + self.save_directory()
+        elif adding or self.has_changed("file"):
             self.update_size_in_storage()
 
         super().save(*args, **kwargs)
 
-    def _directory_file_destination(self, *, file):
-        base = self.file.field.upload_to(
+    @property
+    def _directory_destination(self):
+        return self.file.field.upload_to(
             instance=self, filename=f"{self._directory.stem}"
         )
-        return safe_join(f"/{base}", file.relative_to(self._directory))[1:]
+
+    @property
+    def tiles_prefix(self):
+        """The prefix of the tiles of a DZI file in storage"""
+        return clean_name(self.file.name.replace(".dzi", "_files"))
 
     def save_directory(self):
-        # Saves all the files in the directory associated with this file
+        """
+        Saves all the files in the directory associated with this file
+
+        Returns
+        -------
+            The number of bytes that were stored
+        """
         if self._directory is None:
             raise ValueError("Directory is unset")
 
-        for file in self._directory.rglob("**/*"):
-            if not file.is_file():
-                continue
+        if settings.CASES_PACK_DZI_TILES:
+            upload = upload_packed_tiles
+        else:
+            upload = upload_tiles
 
-            if file.is_symlink() or file.absolute() != file.resolve():
-                raise SuspiciousFileOperation
+        return upload(
+            storage=self.file.field.storage,
+            directory=self._directory,
+            destination=self._directory_destination,
+        )
 
-            with open(file, "rb") as f:
-                self.file.field.storage.save(
-                    name=self._directory_file_destination(file=file), content=f
-                )
+    def upload(self):
+        """
+        Uploads the file and any associated directory without saving
+
+        The size in storage is calculated from the local files rather than
+        by querying the storage backend, which allows this to be used
+        before ``ImageFile.objects.bulk_create``.
+        """
+        if self.file._committed:
+            raise RuntimeError("The file has already been uploaded")
+
+        stored_bytes = self.file.size
+
+        if self._directory is not None:
+            stored_bytes += self.save_directory()
+
+        # The name is unique to this image file, so the file from an earlier
+        # attempt is overwritten rather than stored under another name
+        name = self.file.field.generate_filename(self, self.file.name)
+        self.file.name = self.file.storage.put(
+            name=name, content=self.file.file
+        )
+        self.file._committed = True
+        self.size_in_storage = stored_bytes
 
     def update_size_in_storage(self):
         if not self.file:
@@ -651,18 +786,10 @@ class ImageFile(FieldChangeMixin, UUIDModel):
         stored_bytes = self.file.size
 
         if self.image_type == self.IMAGE_TYPE_DZI:
-            paginator = self.file.storage.connection.meta.client.get_paginator(
-                "list_objects"
-            )
-            images_prefix = clean_name(
-                self.file.name.replace(".dzi", "_files")
+            # Includes any packed tiles and their index
+            stored_bytes += self.file.storage.size_of_prefix(
+                prefix=self.tiles_prefix
             )
-            pages = paginator.paginate(
-                Bucket=self.file.storage.bucket_name, Prefix=images_prefix
-            )
-            for page in pages:
-                for entry in page.get("Contents", ()):
-                    stored_bytes += entry["Size"]
 
         self.size_in_storage = stored_bytes
 
@@ -670,10 +797,51 @@ class ImageFile(FieldChangeMixin, UUIDModel):
 @receiver(post_delete, sender=ImageFile)
 def delete_image_files(*_, instance: ImageFile, **__):
     """
-    Deletes the related image files, note that DZI files are not handled!
+    Deletes the related image files and the tiles of DZI files
 
     We use a signal rather than overriding delete() to catch usages of
     bulk_delete.
     """
+    from grandchallenge.cases.tasks import delete_tiles
+
     if instance.file:
         instance.file.storage.delete(name=instance.file.name)
+
+        if instance.image_type == ImageFile.IMAGE_TYPE_DZI:
+            # There can be tens of thousands of tiles
+            on_commit(
+                delete_tiles.signature(
+                    kwargs={"prefix": instance.tiles_prefix}
+                ).apply_async
+            )
+
+
+def image_metadata_cache_key(*, image_pk):
+    return f"cases.image.metadata.{image_pk}"
+
+
+def invalidate_image_metadata(*, image_pks):
+    """
+    Removes the cached metadata of images
+
+    The metadata are removed immediately and again after the transaction is
+    committed, so that a request that reads the old rows in the meantime
+    cannot cache them.
+    """
+    keys = [image_metadata_cache_key(image_pk=pk) for pk in image_pks]
+
+    if keys:
+        cache.delete_many(keys)
+        on_commit(lambda: cache.delete_many(keys))
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_image_metadata_on_image_change(*_, instance: Image, **__):
+    invalidate_image_metadata(image_pks=[instance.pk])
+
+
+@receiver(post_save, sender=ImageFile)
+@receiver(post_delete, sender=ImageFile)
+def invalidate_image_metadata_on_file_change(*_, instance: ImageFile, **__):
+    invalidate_image_metadata(image_pks=[instance.image_id])
@@ -0,0 +1,107 @@
+"""
+Out of core extraction of the segments of label maps
+
+The voxel values are counted block by block with ``np.bincount`` so the
+memory used is bounded by the block size, regardless of the size of the
+image. The rules for what is a segmentation match those of
+``panimg.models.SimpleITKImage.segments``.
+"""
+
+import numpy as np
+from panimg.exceptions import ValidationError
+from panimg.models import MAXIMUM_SEGMENTS_LENGTH
+
+# Segmentations are single channel 8 bit images
+SEGMENTATION_DTYPES = {np.dtype("i1"), np.dtype("u1")}
+
+
+def is_segmentation_header(*, header):
+    """Could the image described by a MetaImage header be a segmentation?"""
+    try:
+        dtype, shape = header.dtype, header.shape
+    except ValidationError:
+        return False
+
+    return dtype.newbyteorder("=") in SEGMENTATION_DTYPES and str(
+        len(shape)
+    ) == header.fields.get("NDims")
+
+
+def count_voxel_values(*, pixel_data, block_size):
+    """
+    Count the occurrences of each value in an 8 bit array
+
+    Parameters
+    ----------
+    pixel_data
+        An 8 bit array, usually memory mapped
+    block_size
+        The number of voxels that are read at a time
+
+    Returns
+    -------
+        A dictionary of the values in the array and their counts
+    """
+    flat = pixel_data.reshape(-1)
+    counts = np.zeros(256, dtype=np.int64)
+
+    for start in range(0, flat.size, block_size):
+        counts += np.bincount(
+            flat[start : start + block_size].view(np.uint8), minlength=256
+        )
+
+    # The value of each bin in the original dtype
+    values = np.arange(256, dtype=np.uint8).view(flat.dtype)
+
+    return {
+        int(values[idx]): int(counts[idx]) for idx in np.flatnonzero(counts)
+    }
+
+
+def segment_voxel_counts(*, metaimage, block_size):
+    """
+    Determine the segments of an image and the number of voxels in each
+
+    For 4D images each volume is a separate segment that must only contain
+    the values 0 and 1, the segments are then numbered from 1 and the
+    number of voxels set to 1 is counted.
+
+    Returns
+    -------
+        A dictionary of the segments and their voxel counts, or None if
+        the image is not a segmentation
+    """
+    pixel_data = metaimage.pixel_data
+    n_dims = int(metaimage.header.fields["NDims"])
+
+    if (
+        pixel_data.dtype.newbyteorder("=") not in SEGMENTATION_DTYPES
+        or pixel_data.ndim != n_dims
+    ):
+        # Only single channel, 8 bit images are segmentations
+        return None
+
+    if n_dims == 4:
+        counts = {}
+
+        for volume in range(pixel_data.shape[0]):
+            volume_counts = count_voxel_values(
+                pixel_data=pixel_data[volume], block_size=block_size
+            )
+
+            if not volume_counts.keys() <= {0, 1}:
+                # 4D Segmentations must only have values 0 and 1
+                # as the 4th dimension encodes the overlay type
+                return None
+
+            # Use 1-indexing for each segmentation
+            counts[volume + 1] = volume_counts.get(1, 0)
+    else:
+        counts = count_voxel_values(
+            pixel_data=pixel_data, block_size=block_size
+        )
+
+    if len(counts) <= MAXIMUM_SEGMENTS_LENGTH:
+        return counts
+    else:
+        return None
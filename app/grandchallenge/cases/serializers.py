@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import CharField
@@ -12,7 +15,12 @@ from grandchallenge.archives.tasks import (
     add_images_to_archive,
     add_images_to_archive_item,
 )
-from grandchallenge.cases.models import Image, ImageFile, RawImageUploadSession
+from grandchallenge.cases.models import (
+    Image,
+    ImageFile,
+    RawImageUploadSession,
+    image_metadata_cache_key,
+)
 from grandchallenge.components.models import ComponentInterface
 from grandchallenge.components.tasks import add_image_to_object
 from grandchallenge.core.guardian import filter_by_permission
@@ -28,11 +36,51 @@ class ImageFileSerializer(serializers.ModelSerializer):
         fields = ("pk", "image", "file", "image_type")
 
 
+class CachedImageListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+
+        return self.child.to_representations(images=[*data])
+
+
 class HyperlinkedImageSerializer(serializers.ModelSerializer):
+    """
+    Serializes images, the representation of each image is cached
+
+    The cached representations are invalidated when an image or its
+    files change.
+    """
+
     files = ImageFileSerializer(many=True, read_only=True)
     modality = ImagingModalitySerializer(allow_null=True, read_only=True)
 
+    def to_representation(self, instance):
+        return self.to_representations(images=[instance])[0]
+
+    def to_representations(self, *, images):
+        """Gets the representations of many images with one cache lookup"""
+        keys = {
+            image.pk: image_metadata_cache_key(image_pk=image.pk)
+            for image in images
+        }
+        representations = cache.get_many([*keys.values()])
+        missing = {}
+
+        for image in images:
+            if keys[image.pk] not in representations:
+                missing[keys[image.pk]] = super().to_representation(image)
+
+        if missing:
+            cache.set_many(
+                missing, timeout=settings.CASES_IMAGE_METADATA_CACHE_TIMEOUT
+            )
+            representations.update(missing)
+
+        return [representations[keys[image.pk]] for image in images]
+
     class Meta:
+        list_serializer_class = CachedImageListSerializer
         model = Image
         fields = (
             "pk",
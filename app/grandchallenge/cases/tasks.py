@@ -1,14 +1,21 @@
 import logging
+import time
 import zipfile
+from collections import defaultdict
 from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from shutil import rmtree
+from shutil import copyfileobj, rmtree
 from tempfile import TemporaryDirectory
+from threading import Event, Thread, local
+from uuid import uuid5
 
 from billiard.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
-from celery import shared_task
+from celery import group, shared_task
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files import File
 from django.db import OperationalError, transaction
@@ -18,9 +25,20 @@ from django.utils._os import safe_join
 from django.utils.module_loading import import_string
 from panimg import convert, post_process
 from panimg.models import PanImgFile, PanImgResult
-
-from grandchallenge.cases.models import Image, ImageFile, RawImageUploadSession
+from pydicom import dcmread
+from redis.exceptions import LockError
+
+from grandchallenge.cases.models import (
+    Image,
+    ImageFile,
+    RawImageUploadSession,
+    invalidate_image_metadata,
+    update_viewer_groups_permissions,
+)
 from grandchallenge.components.backends.utils import safe_extract
+from grandchallenge.components.tasks import _retry
+from grandchallenge.core.cache import _cache_key_from_method
+from grandchallenge.core.storage import protected_s3_storage
 from grandchallenge.notifications.models import Notification, NotificationType
 from grandchallenge.uploads.models import UserUpload
 
@@ -35,11 +53,31 @@ class DuplicateFilesException(ValueError):
     pass
 
 
-def _populate_tmp_dir(tmp_dir, upload_session):
-    session_files = [*upload_session.user_uploads.all()]
+# The signatures of zip files with content and of empty zip files
+ZIP_MAGIC_NUMBERS = (b"PK\x03\x04", b"PK\x05\x06")
+
+# Files with these suffixes always form an image on their own
+STANDALONE_IMAGE_SUFFIXES = (
+    ".mha",
+    ".nii",
+    ".nii.gz",
+    ".nrrd",
+    ".tif",
+    ".tiff",
+    ".svs",
+    ".ndpi",
+)
 
-    populate_provisioning_directory(session_files, tmp_dir)
-    extract_files(source_path=tmp_dir)
+
+@contextmanager
+def _record_duration(*, timings, stage):
+    """Records the duration of a stage in seconds"""
+    start = time.monotonic()
+
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.monotonic() - start, 3)
 
 
 def populate_provisioning_directory(
@@ -48,16 +86,45 @@ def populate_provisioning_directory(
     """
     Provisions provisioning_dir with the files associated using the given
     list of uploaded files.
+
+    The files are downloaded concurrently, large files are also downloaded
+    with concurrent ranged requests by the boto3 transfer manager.
     """
+    destinations = {}
+
     for input_file in input_files:
         dest = Path(safe_join(provisioning_dir, input_file.filename))
 
-        if dest.exists():
+        if dest in destinations or dest.exists():
             raise DuplicateFilesException("Duplicate files uploaded")
 
+        destinations[dest] = input_file
+
+    def download(dest, input_file):
         with open(dest, "wb") as f:
             input_file.download_fileobj(fileobj=f)
 
+    with ThreadPoolExecutor(
+        max_workers=settings.CASES_PROVISIONING_MAX_WORKERS
+    ) as pool:
+        futures = [
+            pool.submit(download, dest, input_file)
+            for dest, input_file in destinations.items()
+        ]
+
+        for future in futures:
+            # Raise any errors
+            future.result()
+
+
+def is_zip_file(*, path: Path):
+    """Checks the magic number of a file to see if it could be a zip file"""
+    if not path.is_file():
+        return False
+
+    with open(path, "rb") as f:
+        return f.read(4) in ZIP_MAGIC_NUMBERS
+
 
 def check_compressed_and_extract(*, src_path: Path, checked_paths: set[Path]):
     """Checks if `src_path` is a zip file and if so, extracts it."""
@@ -66,6 +133,9 @@ def check_compressed_and_extract(*, src_path: Path, checked_paths: set[Path]):
 
     checked_paths.add(src_path)
 
+    if not is_zip_file(path=src_path):
+        return
+
     extracted_dir = src_path.parent / f"{src_path.name}_extracted"
     extracted_dir.mkdir()
 
@@ -89,8 +159,32 @@ def extract_files(*, source_path: Path, checked_paths=None):
         )
 
 
+def _extract_archive(src_path):
+    check_compressed_and_extract(src_path=src_path, checked_paths=set())
+
+
+def extract_files_concurrently(*, source_path: Path):
+    """
+    Extracts the archives in the top level of `source_path`
+
+    Each archive, and any archives that it contains, is extracted in
+    a separate process.
+    """
+    archives = [p for p in source_path.iterdir() if is_zip_file(path=p)]
+
+    if len(archives) <= 1:
+        extract_files(source_path=source_path)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(len(archives), settings.CASES_EXTRACTION_MAX_WORKERS)
+    ) as pool:
+        for _ in pool.map(_extract_archive, archives):
+            pass
+
+
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-2xlarge"])
-def build_images(*, upload_session_pk):
+def build_images(*, upload_session_pk):  # noqa: C901
     """
     Task which analyzes an upload session and attempts to extract and store
     detected images assembled from files uploaded in the image session.
@@ -99,10 +193,17 @@ def build_images(*, upload_session_pk):
     :class:`RawImageUploadSession` to indicate if it is running or has finished
     computing.
 
+    The session is claimed by setting its status to started, so that it is
+    only imported once, even if the task is delivered more than once. The
+    files are provisioned, extracted and converted without holding the lock
+    on the upload session. The lock is only acquired in the transaction that
+    stores the images and writes the status of the session.
+
     Results are stored in:
     - `RawImageUploadSession.error_message` if a general error occurred during
         processing.
-    - The `RawImageUploadSession.import_result` for file-by-file states.
+    - The `RawImageUploadSession.import_result` for file-by-file states,
+        and the duration of each stage in seconds.
 
     Parameters
     ----------
@@ -110,30 +211,79 @@ def build_images(*, upload_session_pk):
         The uuid of the upload sessions that should be analyzed.
     """
 
-    session_queryset = RawImageUploadSession.objects.filter(
-        pk=upload_session_pk
-    ).select_for_update(nowait=True)
+    claimed = RawImageUploadSession.objects.filter(
+        pk=upload_session_pk,
+        status__in=[
+            RawImageUploadSession.PENDING,
+            RawImageUploadSession.REQUEUED,
+        ],
+    ).update(status=RawImageUploadSession.STARTED)
 
-    with transaction.atomic():
-        upload_session = session_queryset.get()
-        upload_session.status = upload_session.STARTED
-        upload_session.save()
+    if not claimed:
+        logger.info(
+            f"Upload session {upload_session_pk} was already handled by "
+            "another task"
+        )
+        return
+
+    upload_session = RawImageUploadSession.objects.get(pk=upload_session_pk)
+    timings = {}
 
     try:
-        with transaction.atomic():
-            # Acquire locks
-            upload_session = session_queryset.get()
-
-            with TemporaryDirectory() as tmp_dir:
-                tmp_dir = Path(tmp_dir).resolve()
-                _populate_tmp_dir(tmp_dir, upload_session)
-                _handle_raw_image_files(tmp_dir, upload_session)
-
-            upload_session.status = upload_session.SUCCESS
-            upload_session.save()
-    except OperationalError:
-        # Could not acquire locks
-        raise
+        with (
+            TemporaryDirectory() as tmp_dir,
+            TemporaryDirectory() as output_directory,
+        ):
+            tmp_dir = Path(tmp_dir).resolve()
+
+            with _record_duration(timings=timings, stage="provisioning"):
+                # The creators are needed for the object keys, so are
+                # selected here rather than queried in each download thread
+                populate_provisioning_directory(
+                    [*upload_session.user_uploads.select_related("creator")],
+                    tmp_dir,
+                )
+
+            with _record_duration(timings=timings, stage="extraction"):
+                extract_files_concurrently(source_path=tmp_dir)
+
+            with _record_duration(timings=timings, stage="conversion"):
+                panimg_result = _convert_images(
+                    input_directory=tmp_dir,
+                    output_directory=output_directory,
+                    max_workers=settings.CASES_CONVERSION_MAX_WORKERS,
+                )
+
+            with transaction.atomic():
+                upload_session = (
+                    RawImageUploadSession.objects.select_for_update().get(
+                        pk=upload_session_pk
+                    )
+                )
+
+                if upload_session.status != upload_session.STARTED:
+                    logger.info(
+                        f"{upload_session} is no longer being imported"
+                    )
+                    return
+
+                # The images are only kept if the status is written
+                with _record_duration(timings=timings, stage="storage"):
+                    _save_panimg_result(
+                        panimg_result=panimg_result, origin=upload_session
+                    )
+
+                _handle_raw_files(
+                    consumed_files=panimg_result.consumed_files,
+                    file_errors=panimg_result.file_errors,
+                    base_directory=tmp_dir,
+                    upload_session=upload_session,
+                )
+                upload_session.import_result["timings"] = timings
+                upload_session.status = upload_session.SUCCESS
+                upload_session.save()
+
+            _delete_session_files(upload_session=upload_session)
     except DuplicateFilesException as e:
         _delete_session_files(upload_session=upload_session)
         upload_session.error_message = str(e)
@@ -151,21 +301,6 @@ def build_images(*, upload_session_pk):
         raise
 
 
-def _handle_raw_image_files(tmp_dir, upload_session):
-    importer_result = import_images(
-        input_directory=tmp_dir, origin=upload_session
-    )
-
-    _handle_raw_files(
-        consumed_files=importer_result.consumed_files,
-        file_errors=importer_result.file_errors,
-        base_directory=tmp_dir,
-        upload_session=upload_session,
-    )
-
-    _delete_session_files(upload_session=upload_session)
-
-
 @dataclass
 class ImporterResult:
     new_images: set[Image]
@@ -199,6 +334,53 @@ def import_images(
 
     """
     with TemporaryDirectory() as output_directory:
+        panimg_result = _convert_images(
+            input_directory=input_directory,
+            output_directory=output_directory,
+            builders=builders,
+            recurse_subdirectories=recurse_subdirectories,
+        )
+        new_images = _save_panimg_result(
+            panimg_result=panimg_result, origin=origin
+        )
+
+    return ImporterResult(
+        new_images=new_images,
+        consumed_files=panimg_result.consumed_files,
+        file_errors=panimg_result.file_errors,
+    )
+
+
+def _convert_images(
+    *,
+    input_directory: Path,
+    output_directory: Path,
+    builders: Sequence[Callable] | None = None,
+    recurse_subdirectories: bool = True,
+    max_workers: int = 1,
+) -> PanImgResult:
+    """
+    Converts the files in input_directory, without using the database
+
+    If more than one worker is used the files are partitioned into
+    independent groups that are converted in separate processes.
+    """
+    if max_workers > 1:
+        groups = partition_input_directory(
+            input_directory=input_directory,
+            recurse_subdirectories=recurse_subdirectories,
+        )
+    else:
+        groups = []
+
+    if len(groups) > 1:
+        panimg_result = _convert_groups_concurrently(
+            groups=groups,
+            output_directory=Path(output_directory),
+            builders=builders,
+            max_workers=max_workers,
+        )
+    else:
         panimg_result = convert(
             input_directory=input_directory,
             output_directory=output_directory,
@@ -207,32 +389,193 @@ def import_images(
             recurse_subdirectories=recurse_subdirectories,
         )
 
-        _check_all_ids(panimg_result=panimg_result)
+    _check_all_ids(panimg_result=panimg_result)
+
+    return panimg_result
+
+
+def _get_study_instance_uid(*, path: Path) -> str | None:
+    try:
+        with path.open("rb") as f:
+            ds = dcmread(
+                f, stop_before_pixels=True, specific_tags=["StudyInstanceUID"]
+            )
+        return str(ds.StudyInstanceUID)
+    except Exception:
+        # Not a DICOM file, or one that the builders will report on
+        return None
 
-        django_result = _convert_panimg_to_internal(
-            new_images=panimg_result.new_images,
-            new_image_files=panimg_result.new_image_files,
-        )
 
-        _store_images(
-            origin=origin,
-            images=django_result.new_images,
-            image_files=django_result.new_image_files,
+def partition_input_directory(
+    *, input_directory: Path, recurse_subdirectories: bool = True
+) -> list[set[Path]]:
+    """
+    Partitions the files in a directory into groups that can be converted
+    independently
+
+    As in panimg, files in different directories never form the same image.
+    Within a directory each standalone image file is a group, DICOM files
+    are grouped by study as the image names are numbered per study, and
+    all other files, such as MHD headers and their data, form one group.
+
+    Returns
+    -------
+        The groups of resolved file paths, in a deterministic order
+    """
+    input_directory = Path(input_directory).resolve()
+
+    groups = []
+    files = []
+
+    for path in sorted(input_directory.iterdir()):
+        if path.is_dir() and recurse_subdirectories:
+            groups.extend(
+                partition_input_directory(
+                    input_directory=path,
+                    recurse_subdirectories=recurse_subdirectories,
+                )
+            )
+        elif path.is_file():
+            files.append(path)
+
+    studies = defaultdict(set)
+    others = set()
+
+    for path in files:
+        if path.name.lower().endswith(STANDALONE_IMAGE_SUFFIXES):
+            groups.append({path})
+        elif study_instance_uid := _get_study_instance_uid(path=path):
+            studies[study_instance_uid].add(path)
+        else:
+            others.add(path)
+
+    groups.extend(studies[uid] for uid in sorted(studies))
+
+    if others:
+        groups.append(others)
+
+    return groups
+
+
+def _convert_group(
+    *,
+    files: set[Path],
+    output_directory: Path,
+    builders: Sequence[Callable] | None,
+) -> PanImgResult:
+    """
+    Converts a group of files from one directory, as panimg does
+
+    The files of the group are hard linked into a separate directory so
+    that the group can be converted with the public panimg API. The links
+    keep the names of the files, so headers that refer to their data files
+    by name still resolve, and are made in the directory of the files so
+    that they are on the same file system.
+    """
+    output_directory.mkdir(parents=True)
+    (directory,) = {path.parent for path in files}
+
+    with TemporaryDirectory(dir=directory) as input_directory:
+        # panimg reports the paths in the resolved input directory
+        input_directory = Path(input_directory).resolve()
+        links = {}
+
+        for path in files:
+            link = input_directory / path.name
+            link.hardlink_to(path)
+            links[link] = path
+
+        result = convert(
+            input_directory=input_directory,
+            output_directory=output_directory,
+            builders=builders,
+            post_processors=[],  # Do the post-processing later
+            recurse_subdirectories=False,
         )
 
-        for image in django_result.new_images:
-            on_commit(
-                post_process_image.signature(
-                    kwargs={"image_pk": image.pk}
-                ).apply_async
+    return PanImgResult(
+        new_images=result.new_images,
+        new_image_files=result.new_image_files,
+        consumed_files={links[path] for path in result.consumed_files},
+        file_errors={
+            links[path]: errors for path, errors in result.file_errors.items()
+        },
+    )
+
+
+def _convert_groups_concurrently(
+    *,
+    groups: list[set[Path]],
+    output_directory: Path,
+    builders: Sequence[Callable] | None,
+    max_workers: int,
+) -> PanImgResult:
+    """Converts each group in a separate process and merges the results"""
+    merged = PanImgResult(
+        new_images=set(),
+        new_image_files=set(),
+        consumed_files=set(),
+        file_errors={},
+    )
+
+    with ProcessPoolExecutor(
+        max_workers=min(len(groups), max_workers)
+    ) as pool:
+        futures = [
+            pool.submit(
+                _convert_group,
+                files=files,
+                # Separate directories as the outputs are named by image
+                output_directory=output_directory / str(idx),
+                builders=builders,
             )
+            for idx, files in enumerate(groups)
+        ]
 
-    return ImporterResult(
-        new_images=django_result.new_images,
-        consumed_files=panimg_result.consumed_files,
-        file_errors=panimg_result.file_errors,
+        # Merge in the order of the groups
+        for future in futures:
+            result = future.result()
+
+            merged.new_images |= result.new_images
+            merged.new_image_files |= result.new_image_files
+            merged.consumed_files |= result.consumed_files
+            merged.file_errors.update(result.file_errors)
+
+    merged.file_errors = dict(sorted(merged.file_errors.items()))
+
+    return merged
+
+
+def _save_panimg_result(
+    *, panimg_result: PanImgResult, origin: RawImageUploadSession | None
+) -> set[Image]:
+    """Stores the converted images and schedules their post processing"""
+    django_result = _convert_panimg_to_internal(
+        new_images=panimg_result.new_images,
+        new_image_files=panimg_result.new_image_files,
     )
 
+    _store_images(
+        origin=origin,
+        images=django_result.new_images,
+        image_files=django_result.new_image_files,
+    )
+
+    image_pks = sorted(str(image.pk) for image in django_result.new_images)
+    chunk_size = settings.CASES_POST_PROCESSING_CHUNK_SIZE
+
+    if image_pks:
+        on_commit(
+            group(
+                post_process_images.signature(
+                    kwargs={"image_pks": image_pks[idx : idx + chunk_size]}
+                )
+                for idx in range(0, len(image_pks), chunk_size)
+            ).apply_async
+        )
+
+    return django_result.new_images
+
 
 def _check_all_ids(*, panimg_result: PanImgResult):
     """
@@ -291,14 +634,34 @@ def _store_images(
     images: set[Image],
     image_files: set[ImageFile],
 ):
+    """
+    Stores the images and their files in bulk
+
+    The files are uploaded concurrently and their sizes are taken from the
+    local files. The origin and image foreign keys are not validated as
+    they are set here, and the uniqueness of the primary keys is enforced
+    by the database on insert.
+    """
+    images_by_pk = {image.pk: image for image in images}
+
     for image in images:
         image.origin = origin
-        image.full_clean()
-        image.save()
+        image.full_clean(exclude=["origin"], validate_unique=False)
 
     for obj in image_files:
-        obj.full_clean()
-        obj.save()
+        # Avoids a query when generating the file name
+        obj.image = images_by_pk[obj.image_id]
+        obj.full_clean(exclude=["image"], validate_unique=False)
+
+    with ThreadPoolExecutor(
+        max_workers=settings.CASES_STORAGE_MAX_WORKERS
+    ) as pool:
+        for future in [pool.submit(obj.upload) for obj in image_files]:
+            # Raise any errors
+            future.result()
+
+    Image.objects.bulk_create(images)
+    ImageFile.objects.bulk_create(image_files)
 
 
 def _handle_raw_files(
@@ -338,17 +701,88 @@ def _delete_session_files(*, upload_session):
     upload_session.user_uploads.all().delete()
 
 
+@contextmanager
+def _renewed_lock(*, name, timeout):
+    """
+    Holds a cache lock that is extended until the context exits
+
+    The lock has a short timeout, so if the worker is lost the lock expires
+    soon after and the work can be picked up again.
+    """
+    stop = Event()
+
+    def renew(lock):
+        while not stop.wait(timeout / 3):
+            try:
+                lock.extend(timeout, replace_ttl=True)
+            except LockError as error:
+                logger.warning(f"Could not extend lock {name}: {error}")
+                return
+
+    # The token is shared with the thread that extends the lock
+    with cache.lock(
+        name, timeout=timeout, blocking_timeout=1, thread_local=False
+    ) as lock:
+        renewer = Thread(target=renew, args=(lock,), daemon=True)
+        renewer.start()
+
+        try:
+            yield
+        finally:
+            stop.set()
+            renewer.join()
+
+
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-2xlarge"])
-def post_process_image(*, image_pk):
-    with transaction.atomic():
-        with TemporaryDirectory() as output_directory:
-            image_files = ImageFile.objects.filter(
-                image__pk=image_pk, post_processed=False
-            ).select_for_update(nowait=True)
+def post_process_image(*, image_pk, retries=0):
+    """
+    Post processes the files of an image in stages
+
+    The image is claimed with a cache lock rather than by locking its
+    files, so no database locks are held while the files are downloaded,
+    processed and uploaded. The new files are then stored, and the
+    existing files marked as post processed, in a short transaction.
+    If the image is claimed by another task this task is retried later.
+
+    The uploaded files are recorded in a checkpoint, so if the task is
+    retried after the upload then the other stages are skipped.
+    """
+    try:
+        with _renewed_lock(
+            name=f"{_cache_key_from_method(post_process_image)}.{image_pk}",
+            timeout=settings.CASES_POST_PROCESSING_LOCK_TIMEOUT,
+        ):
+            _post_process_image(image_pk=image_pk)
+    except LockError as error:
+        logger.info(f"Could not acquire lock, retrying later: {error}")
+        _retry(
+            task=post_process_image,
+            signature_kwargs={"kwargs": {"image_pk": str(image_pk)}},
+            retries=retries,
+        )
+
+
+def _post_process_image(*, image_pk):
+    image_files = list(
+        ImageFile.objects.filter(
+            image__pk=image_pk, post_processed=False
+        ).select_related("image")
+    )
 
-            # Acquire the locks
-            image_files = list(image_files)
+    if not image_files:
+        return
+
+    checkpoint_key = f"cases.post_process_image.checkpoint.{image_pk}"
+    source_pks = sorted(str(f.pk) for f in image_files)
+    checkpoint = cache.get(checkpoint_key)
 
+    if checkpoint is not None and checkpoint["sources"] == source_pks:
+        new_image_files = [
+            ImageFile(image=image_files[0].image, **fields)
+            for fields in checkpoint["files"]
+        ]
+    else:
+        with TemporaryDirectory() as output_directory:
             panimg_files = _download_image_files(
                 image_files=image_files, dir=output_directory
             )
@@ -361,41 +795,150 @@ def post_process_image(*, image_pk):
                 post_processor_result=post_processor_result, image_pk=image_pk
             )
 
-            django_result = _convert_panimg_to_internal(
-                new_images=[],
+            new_image_files = _upload_post_processed_images(
+                image=image_files[0].image,
                 new_image_files=post_processor_result.new_image_files,
             )
 
-            _store_post_processed_images(
-                image_files=image_files,
-                new_image_files=django_result.new_image_files,
+        cache.set(
+            checkpoint_key,
+            {
+                "sources": source_pks,
+                "files": [
+                    {
+                        "pk": str(f.pk),
+                        "image_type": f.image_type,
+                        "file": f.file.name,
+                        "size_in_storage": f.size_in_storage,
+                    }
+                    for f in new_image_files
+                ],
+            },
+            timeout=settings.CASES_POST_PROCESSING_CHECKPOINT_TIMEOUT,
+        )
+
+    _store_post_processed_images(
+        image_files=image_files, new_image_files=new_image_files
+    )
+
+    cache.delete(checkpoint_key)
+
+    _update_segment_voxel_counts(image=image_files[0].image)
+
+
+def _update_segment_voxel_counts(*, image):
+    """Counts the voxels in each segment of a newly imported segmentation"""
+    if image.segments is None or image.segment_voxel_counts is not None:
+        return
+
+    try:
+        image.update_segments()
+    except FileNotFoundError:
+        # Only the segments of MetaImages can be counted
+        return
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-2xlarge"])
+def post_process_images(*, image_pks):
+    """Post processes a chunk of images, one at a time"""
+    for image_pk in image_pks:
+        try:
+            post_process_image(image_pk=image_pk)
+        except OperationalError:
+            # The image is locked by another task
+            logger.warning(f"Could not lock the files of image {image_pk}")
+        except Exception:
+            # Do not hold up the rest of the chunk
+            logger.error(
+                f"Could not post process image {image_pk}", exc_info=True
+            )
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
+def delete_tiles(*, prefix):
+    """Deletes the tiles of a DZI file"""
+    n_deleted = protected_s3_storage.delete_prefix(prefix=prefix)
+    logger.info(f"Deleted {n_deleted} tiles from {prefix}")
+
+
+_pending_permissions_updates = local()
+
+
+def _dispatch_viewer_groups_permissions_update():
+    image_pks = getattr(_pending_permissions_updates, "image_pks", set())
+    _pending_permissions_updates.image_pks = set()
+
+    if image_pks:
+        update_image_permissions.apply_async(
+            kwargs={"image_pks": [str(pk) for pk in image_pks]}
+        )
+
+
+def schedule_viewer_groups_permissions_update(*, image_pks):
+    """
+    Schedules the update of the view permissions of a set of images
+
+    The images from every call during a transaction are collected, and
+    are updated by a single task once the transaction is committed.
+    """
+    if not hasattr(_pending_permissions_updates, "image_pks"):
+        _pending_permissions_updates.image_pks = set()
+
+    _pending_permissions_updates.image_pks.update(image_pks)
+
+    # Every call registers a callback, the first one that runs after the
+    # commit dispatches the task and the others find nothing to do.
+    on_commit(_dispatch_viewer_groups_permissions_update)
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
+def update_image_permissions(*, image_pks):
+    """Updates the view permissions of the viewer groups for images"""
+    image_pks = sorted(image_pks)
+    chunk_size = settings.CASES_PERMISSIONS_UPDATE_CHUNK_SIZE
+
+    for idx in range(0, len(image_pks), chunk_size):
+        with transaction.atomic():
+            update_viewer_groups_permissions(
+                image_pks=image_pks[idx : idx + chunk_size]
             )
 
 
 def _download_image_files(*, image_files, dir):
     """
-    Downloads a set of image files to a directory
+    Downloads a set of image files to a directory concurrently
 
     Returns a set of PanImgFiles that point to the local files
     """
     panimg_files = set()
 
-    for im_file in image_files:
-        dest = safe_join(dir, im_file.file.name)
-        panimg_files.add(
-            PanImgFile(
-                image_id=im_file.image.pk,
-                image_type=im_file.image_type,
-                file=dest,
+    def download(im_file, dest):
+        with im_file.file.open("rb") as fs, open(dest, "wb") as fd:
+            copyfileobj(fs, fd, length=settings.CASES_IMAGE_READ_CHUNK_SIZE)
+
+    with ThreadPoolExecutor(
+        max_workers=settings.CASES_STORAGE_MAX_WORKERS
+    ) as pool:
+        futures = []
+
+        for im_file in image_files:
+            dest = safe_join(dir, im_file.file.name)
+            panimg_files.add(
+                PanImgFile(
+                    image_id=im_file.image.pk,
+                    image_type=im_file.image_type,
+                    file=dest,
+                )
             )
-        )
 
-        # Safe to create directories as safe_join has been used
-        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+            # Safe to create directories as safe_join has been used
+            Path(dest).parent.mkdir(parents=True, exist_ok=True)
 
-        with im_file.file.open("rb") as fs, open(dest, "wb") as fd:
-            for chunk in fs.chunks():
-                fd.write(chunk)
+            futures.append(pool.submit(download, im_file, dest))
+
+        for future in futures:
+            # Raise any errors
+            future.result()
 
     return panimg_files
 
@@ -410,12 +953,60 @@ def _check_post_processor_result(*, post_processor_result, image_pk):
         raise RuntimeError("Created image IDs do not match")
 
 
+def _upload_post_processed_images(*, image, new_image_files):
+    """
+    Uploads the post processed files
+
+    The primary keys, and so the names in storage, of the new files are
+    derived from the names of the local files. The files are uploaded
+    without checking if these names are available, so the files from a
+    retried task overwrite those of the earlier attempt.
+    """
+    django_result = _convert_panimg_to_internal(
+        new_images=[], new_image_files=new_image_files
+    )
+
+    for obj in django_result.new_image_files:
+        obj.pk = uuid5(image.pk, Path(obj.file.name).name)
+        obj.image = image
+        obj.full_clean(exclude=["image"], validate_unique=False)
+        obj.upload()
+
+    return django_result.new_image_files
+
+
 def _store_post_processed_images(*, image_files, new_image_files):
     """Save the post processed files"""
-    for im_file in image_files:
-        im_file.post_processed = True
-        im_file.save(update_fields=["post_processed"])
+    from grandchallenge.challenges.tasks import schedule_cost_ledger_update
 
-    for obj in new_image_files:
-        obj.full_clean()
-        obj.save()
+    with transaction.atomic():
+        # Acquire the locks
+        unprocessed = [
+            *ImageFile.objects.filter(
+                pk__in=[f.pk for f in image_files], post_processed=False
+            )
+            .select_for_update(nowait=True)
+            .values_list("pk", flat=True)
+        ]
+
+        if len(unprocessed) != len(image_files):
+            logger.info("Image files were post processed by another task")
+            return
+
+        existing = {
+            *ImageFile.objects.filter(
+                pk__in=[f.pk for f in new_image_files]
+            ).values_list("pk", flat=True)
+        }
+
+        ImageFile.objects.bulk_create(
+            [f for f in new_image_files if f.pk not in existing]
+        )
+        ImageFile.objects.filter(pk__in=unprocessed).update(
+            post_processed=True
+        )
+        # Neither of these send signals
+        invalidate_image_metadata(
+            image_pks={f.image_id for f in new_image_files}
+        )
+        schedule_cost_ledger_update(instances=new_image_files)
@@ -0,0 +1,175 @@
+"""
+Storage of the tiles of DZI pyramids
+
+The post processing of whole slide images creates directories with tens
+of thousands of tiles. These are either uploaded concurrently as
+separate objects, or packed into a single archive object that is stored
+alongside an index of the position of each tile, so that a tile can be
+read with a ranged GET request.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryFile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.utils._os import safe_join
+
+ARCHIVE_SUFFIX = ".tiles"
+INDEX_SUFFIX = ".tiles.json"
+INDEX_CACHE_TIMEOUT = 60 * 60
+
+
+def _directory_files(*, directory):
+    """The files in a directory and their paths relative to it"""
+    for file in sorted(directory.rglob("**/*")):
+        if not file.is_file():
+            continue
+
+        if file.is_symlink() or file.absolute() != file.resolve():
+            raise SuspiciousFileOperation
+
+        yield file, file.relative_to(directory).as_posix()
+
+
+def _destination(*, destination, relative_path):
+    return safe_join(f"/{destination}", relative_path)[1:]
+
+
+def upload_tiles(*, storage, directory, destination):
+    """
+    Uploads each file in a directory concurrently
+
+    Parameters
+    ----------
+    storage
+        The storage to upload the files to
+    directory
+        The local directory containing the tiles
+    destination
+        The name of the directory in storage, which must be unique
+
+    Returns
+    -------
+        The total number of bytes uploaded
+    """
+
+    def upload(file, relative_path):
+        with open(file, "rb") as f:
+            storage.put(
+                name=_destination(
+                    destination=destination, relative_path=relative_path
+                ),
+                content=f,
+            )
+        return file.stat().st_size
+
+    with ThreadPoolExecutor(
+        max_workers=settings.CASES_TILE_UPLOAD_MAX_WORKERS
+    ) as pool:
+        futures = [
+            pool.submit(upload, file, relative_path)
+            for file, relative_path in _directory_files(directory=directory)
+        ]
+        return sum(future.result() for future in futures)
+
+
+def pack_tiles(*, directory, archive):
+    """
+    Writes the files in a directory to a single archive
+
+    Returns
+    -------
+        The index of the archive, a dictionary of the relative paths of the
+        files to their offset and length in the archive
+    """
+    index = {}
+    offset = 0
+
+    for file, relative_path in _directory_files(directory=directory):
+        with open(file, "rb") as f:
+            length = 0
+            while chunk := f.read(1024 * 1024):
+                archive.write(chunk)
+                length += len(chunk)
+
+        index[relative_path] = [offset, length]
+        offset += length
+
+    return index
+
+
+def upload_packed_tiles(*, storage, directory, destination):
+    """
+    Uploads the files in a directory as an archive and its index
+
+    Large archives are uploaded with a multipart upload by the storage.
+
+    Returns
+    -------
+        The total number of bytes uploaded
+    """
+    with TemporaryFile() as archive:
+        index = pack_tiles(directory=directory, archive=archive)
+        archive_size = archive.tell()
+        archive.seek(0)
+
+        storage.put(
+            name=f"{destination}{ARCHIVE_SUFFIX}", content=File(archive)
+        )
+
+    index = json.dumps(index).encode("utf-8")
+    storage.put(
+        name=f"{destination}{INDEX_SUFFIX}", content=ContentFile(index)
+    )
+
+    return archive_size + len(index)
+
+
+def _get_index(*, storage, destination):
+    key = f"tiles-index:{storage.bucket_name}:{destination}"
+    index = cache.get(key)
+
+    if index is None:
+        try:
+            with storage.open(f"{destination}{INDEX_SUFFIX}") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            # The tiles were not packed, which is also cached
+            index = {}
+
+        cache.set(key, index, timeout=INDEX_CACHE_TIMEOUT)
+
+    return index
+
+
+def read_packed_tile(*, storage, destination, relative_path):
+    """
+    Reads a tile from a packed archive with a ranged GET request
+
+    Returns
+    -------
+        The content of the tile, or None if it is not in a packed archive
+    """
+    index = _get_index(storage=storage, destination=destination)
+
+    try:
+        offset, length = index[relative_path]
+    except KeyError:
+        return None
+
+    if length == 0:
+        return b""
+
+    body, _ = storage.read_range(
+        name=f"{destination}{ARCHIVE_SUFFIX}",
+        start=offset,
+        end=offset + length - 1,
+    )
+
+    with body:
+        return body.read()
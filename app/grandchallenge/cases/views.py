@@ -1,11 +1,16 @@
+import json
 from functools import reduce
+from hashlib import sha256
 from operator import or_
 
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Q
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 from django.template.response import TemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views import View
 from django.views.generic import DetailView, ListView
 from django_filters.rest_framework import DjangoFilterBackend
@@ -93,6 +98,32 @@ class ImageViewSet(ReadOnlyModelViewSet):
         PaginatedCSVRenderer,
     )
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        return self._get_conditional_response(response=response)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        return self._get_conditional_response(response=response)
+
+    def _get_conditional_response(self, *, response):
+        """
+        Sets a strong ETag on the response from the serialized data
+
+        A Not Modified response is returned if the client already has it.
+        """
+        content = json.dumps(
+            [self.request.accepted_media_type, response.data],
+            cls=DjangoJSONEncoder,
+            sort_keys=True,
+        )
+        response["ETag"] = quote_etag(
+            sha256(content.encode("utf-8")).hexdigest()
+        )
+        return get_conditional_response(
+            self.request, etag=response["ETag"], response=response
+        )
+
 
 class RawImageUploadSessionViewSet(
     CreateModelMixin, RetrieveModelMixin, ListModelMixin, GenericViewSet
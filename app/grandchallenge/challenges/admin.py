@@ -5,6 +5,7 @@ from django.contrib.admin import ModelAdmin
 from django.core.exceptions import ValidationError
 from django.utils.html import format_html
 
+from grandchallenge.challenges.costs import recompute_ledger_totals
 from grandchallenge.challenges.emails import send_challenge_status_update_email
 from grandchallenge.challenges.models import (
     Challenge,
@@ -51,10 +52,36 @@ class ChallengeAdmin(ModelAdmin):
         "hidden",
     )
     search_fields = ("short_name",)
+    actions = ["compare_cost_ledger_with_full_recompute"]
 
     def get_queryset(self, *args, **kwargs):
         return super().get_queryset(*args, **kwargs).with_available_compute()
 
+    @admin.action(description="Compare cost ledger with a full recompute")
+    def compare_cost_ledger_with_full_recompute(self, request, queryset):
+        for challenge in queryset:
+            recomputed = recompute_ledger_totals(challenge=challenge)
+
+            differences = [
+                f"{field}: ledger {getattr(challenge, field)}, "
+                f"recomputed {total}"
+                for field, total in recomputed.items()
+                if getattr(challenge, field) != total
+            ]
+
+            if differences:
+                self.message_user(
+                    request,
+                    f"{challenge.short_name} differs, {'; '.join(differences)}",
+                    messages.WARNING,
+                )
+            else:
+                self.message_user(
+                    request,
+                    f"{challenge.short_name} matches the full recompute",
+                    messages.SUCCESS,
+                )
+
     def available_compute_euros(self, obj):
         return millicents_to_euro(obj.available_compute_euro_millicents)
 
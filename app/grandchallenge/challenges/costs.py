@@ -1,6 +1,10 @@
 from datetime import timedelta
+from typing import NamedTuple
 
-from django.db.models import Count, Sum
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Avg, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
 
 from grandchallenge.algorithms.models import (
     AlgorithmImage,
@@ -8,152 +12,408 @@ from grandchallenge.algorithms.models import (
     Job,
 )
 from grandchallenge.cases.models import ImageFile
+from grandchallenge.challenges.models import Challenge, ChallengeCostEntry
 from grandchallenge.components.models import ComponentInterfaceValue
-from grandchallenge.evaluation.models import Evaluation, Method
+from grandchallenge.evaluation.models import Evaluation, Method, Phase
 
 
-def annotate_job_duration_and_compute_costs(*, phase):
-    algorithm_jobs = (
-        Job.objects.with_duration()
-        .filter(
-            inputs__archive_items__archive__phase=phase,
-            algorithm_image__submission__phase=phase,
+class _LedgerRule(NamedTuple):
+    model: type
+    # The lookup from the model to the challenge or phase it is accounted to
+    target: str
+    # Phase entries are kept for the compute costs and job durations
+    phase_entry: bool
+    amounts: tuple[str, ...]
+    # The lookup from the model to a challenge or phase that must be the
+    # same as the target, e.g. the algorithm of a job must be submitted
+    # to the phase that owns the archive of its inputs
+    same_as: str | None = None
+
+
+_STORAGE = ("size_in_storage",)
+_STORAGE_AND_REGISTRY = ("size_in_storage", "size_in_registry")
+_COMPUTE_COST = ("compute_cost_euro_millicents",)
+
+_LEDGER_RULES = (
+    _LedgerRule(
+        model=ImageFile,
+        target="image__componentinterfacevalue__archive_items__archive__phase__challenge",
+        phase_entry=False,
+        amounts=_STORAGE,
+    ),
+    _LedgerRule(
+        model=ImageFile,
+        target="image__componentinterfacevalue__evaluation_evaluations_as_input__submission__phase__challenge",
+        phase_entry=False,
+        amounts=_STORAGE,
+    ),
+    _LedgerRule(
+        model=ComponentInterfaceValue,
+        target="archive_items__archive__phase__challenge",
+        phase_entry=False,
+        amounts=_STORAGE,
+    ),
+    _LedgerRule(
+        model=ComponentInterfaceValue,
+        target="evaluation_evaluations_as_input__submission__phase__challenge",
+        phase_entry=False,
+        amounts=_STORAGE,
+    ),
+    _LedgerRule(
+        model=AlgorithmImage,
+        target="job__inputs__archive_items__archive__phase__challenge",
+        same_as="submission__phase__challenge",
+        phase_entry=False,
+        amounts=_STORAGE_AND_REGISTRY,
+    ),
+    _LedgerRule(
+        model=AlgorithmModel,
+        target="job__inputs__archive_items__archive__phase__challenge",
+        same_as="job__algorithm_image__submission__phase__challenge",
+        phase_entry=False,
+        amounts=_STORAGE,
+    ),
+    _LedgerRule(
+        model=Method,
+        target="phase__challenge",
+        phase_entry=False,
+        amounts=_STORAGE_AND_REGISTRY,
+    ),
+    _LedgerRule(
+        model=Job,
+        target="inputs__archive_items__archive__phase__challenge",
+        same_as="algorithm_image__submission__phase__challenge",
+        phase_entry=False,
+        amounts=_COMPUTE_COST,
+    ),
+    _LedgerRule(
+        model=Evaluation,
+        target="submission__phase__challenge",
+        phase_entry=False,
+        amounts=_COMPUTE_COST,
+    ),
+    _LedgerRule(
+        model=Job,
+        target="inputs__archive_items__archive__phase",
+        same_as="algorithm_image__submission__phase",
+        phase_entry=True,
+        amounts=_COMPUTE_COST,
+    ),
+    _LedgerRule(
+        model=Evaluation,
+        target="submission__phase",
+        phase_entry=True,
+        amounts=_COMPUTE_COST,
+    ),
+)
+
+LEDGER_MODELS = frozenset(rule.model for rule in _LEDGER_RULES)
+
+
+def _expected_ledger_entries(*, rule, pks=None, challenge=None):
+    """Returns the ledger entries that a rule gives for a set of objects"""
+    if rule.phase_entry:
+        challenge_lookup = f"{rule.target}__challenge"
+    else:
+        challenge_lookup = rule.target
+
+    if rule.same_as is None:
+        conditions = [Q(**{f"{rule.target}__isnull": False})]
+    else:
+        conditions = [Q(**{rule.target: F(rule.same_as)})]
+
+    if pks is not None:
+        conditions.append(Q(pk__in=pks))
+
+    if challenge is not None:
+        conditions.append(Q(**{challenge_lookup: challenge}))
+
+    if rule.model is Job:
+        queryset = Job.objects.with_duration()
+        extra = ("status", "duration")
+    else:
+        queryset = rule.model.objects.all()
+        extra = ()
+
+    # All conditions are applied in a single filter so that they use the
+    # same joins, and the values reuse these joins too
+    rows = (
+        queryset.filter(*conditions)
+        .values_list(
+            "pk",
+            challenge_lookup,
+            rule.target if rule.phase_entry else challenge_lookup,
+            *rule.amounts,
+            *extra,
         )
         .distinct()
+        .order_by()
     )
-    evaluation_jobs = Evaluation.objects.filter(
-        submission__phase=phase
-    ).distinct()
 
-    update_average_algorithm_job_duration(
-        phase=phase, algorithm_jobs=algorithm_jobs
-    )
-    update_compute_cost_euro_millicents(
-        obj=phase,
-        algorithm_jobs=algorithm_jobs,
-        evaluation_jobs=evaluation_jobs,
-    )
+    content_type = ContentType.objects.get_for_model(rule.model)
 
+    for pk, challenge_pk, phase_pk, *values in rows:
+        if not rule.phase_entry:
+            phase_pk = None
 
-def annotate_compute_costs_and_storage_size(*, challenge):
-    algorithm_jobs = Job.objects.filter(
-        inputs__archive_items__archive__phase__challenge=challenge,
-        algorithm_image__submission__phase__challenge=challenge,
-    ).distinct()
-    evaluation_jobs = Evaluation.objects.filter(
-        submission__phase__challenge=challenge
-    ).distinct()
+        amounts = {
+            field: value or 0
+            for field, value in zip(
+                rule.amounts, values[: len(rule.amounts)], strict=True
+            )
+        }
 
-    update_size_in_storage_and_registry(
-        challenge=challenge,
-        algorithm_jobs=algorithm_jobs,
-        evaluation_jobs=evaluation_jobs,
+        if rule.phase_entry and extra:
+            status, duration = values[len(rule.amounts) :]
+            if (
+                status == Job.SUCCESS
+                and duration is not None
+                and duration > timedelta(seconds=0)
+            ):
+                amounts["job_duration"] = duration
+
+        yield (challenge_pk, phase_pk, content_type.pk, str(pk)), amounts
+
+
+def _apply_ledger_entries(*, existing, expected):
+    """
+    Updates the ledger so that the existing entries match the expected ones
+
+    Returns the challenges and phases whose totals have changed.
+    """
+    stale = {
+        key: entry
+        for key, entry in existing.items()
+        if expected.get(key) != _entry_amounts(entry=entry)
+    }
+    new = {
+        key: amounts
+        for key, amounts in expected.items()
+        if key not in existing or key in stale
+    }
+
+    ChallengeCostEntry.objects.filter(
+        pk__in=[entry.pk for entry in stale.values()]
+    ).delete()
+    ChallengeCostEntry.objects.bulk_create(
+        [
+            ChallengeCostEntry(
+                challenge_id=challenge_pk,
+                phase_id=phase_pk,
+                content_type_id=content_type_pk,
+                object_id=object_id,
+                **amounts,
+            )
+            for (
+                challenge_pk,
+                phase_pk,
+                content_type_pk,
+                object_id,
+            ), amounts in new.items()
+        ],
+        # Another update of the same objects may have created the entry
+        ignore_conflicts=True,
     )
-    update_compute_cost_euro_millicents(
-        obj=challenge,
-        algorithm_jobs=algorithm_jobs,
-        evaluation_jobs=evaluation_jobs,
+
+    changed = {*stale, *new}
+
+    return (
+        {challenge_pk for challenge_pk, phase_pk, *_ in changed},
+        {phase_pk for _, phase_pk, *_ in changed if phase_pk is not None},
     )
 
 
-def update_size_in_storage_and_registry(
-    *, challenge, algorithm_jobs, evaluation_jobs
-):
-    archive_image_storage = (
-        ImageFile.objects.filter(
-            image__componentinterfacevalue__archive_items__archive__phase__challenge=challenge
+def _entry_amounts(*, entry):
+    amounts = {
+        field: getattr(entry, field)
+        for field in (*_STORAGE_AND_REGISTRY, *_COMPUTE_COST)
+        if getattr(entry, field)
+    }
+
+    if entry.job_duration is not None:
+        amounts["job_duration"] = entry.job_duration
+
+    return amounts
+
+
+def _existing_ledger_entries(*, entries):
+    return {
+        (
+            entry.challenge_id,
+            entry.phase_id,
+            entry.content_type_id,
+            entry.object_id,
+        ): entry
+        for entry in entries
+    }
+
+
+def _expected_amounts(*, expected):
+    """Drops the zero amounts so that they compare equal to the entries"""
+    return {
+        key: {field: value for field, value in amounts.items() if value}
+        for key, amounts in expected.items()
+    }
+
+
+def update_totals_from_ledger(*, challenge_pks, phase_pks):
+    """
+    Sets the costs and sizes of challenges and phases to their totals
+
+    The ledger of a challenge is only complete once it has been reconciled,
+    until then its totals and those of its phases are left as they are.
+    """
+
+    def total(*, field, group):
+        entries = ChallengeCostEntry.objects.filter(**{group: OuterRef("pk")})
+
+        if group == "challenge":
+            entries = entries.filter(phase__isnull=True)
+
+        return Coalesce(
+            Subquery(
+                entries.order_by()
+                .values(group)
+                .annotate(total=Sum(field))
+                .values("total")
+            ),
+            0,
         )
-        .distinct()
-        .aggregate(Sum("size_in_storage"))
+
+    Challenge.objects.filter(
+        pk__in=challenge_pks, cost_ledger_reconciled_at__isnull=False
+    ).update(
+        compute_cost_euro_millicents=total(
+            field="compute_cost_euro_millicents", group="challenge"
+        ),
+        size_in_storage=total(field="size_in_storage", group="challenge"),
+        size_in_registry=total(field="size_in_registry", group="challenge"),
     )
-    archive_file_storage = (
-        ComponentInterfaceValue.objects.filter(
-            archive_items__archive__phase__challenge=challenge
-        )
-        .distinct()
-        .aggregate(Sum("size_in_storage"))
+    Phase.objects.filter(
+        pk__in=phase_pks, challenge__cost_ledger_reconciled_at__isnull=False
+    ).update(
+        compute_cost_euro_millicents=total(
+            field="compute_cost_euro_millicents", group="phase"
+        ),
+        average_algorithm_job_duration=Subquery(
+            ChallengeCostEntry.objects.filter(phase=OuterRef("pk"))
+            .order_by()
+            .values("phase")
+            .annotate(average=Avg("job_duration"))
+            .values("average")
+        ),
     )
 
-    output_image_storage = (
-        ImageFile.objects.filter(
-            image__componentinterfacevalue__evaluation_evaluations_as_input__in=evaluation_jobs
-        )
-        .distinct()
-        .aggregate(Sum("size_in_storage"))
-    )
-    output_file_storage = (
-        ComponentInterfaceValue.objects.filter(
-            evaluation_evaluations_as_input__in=evaluation_jobs
+
+def update_ledger_for_objects(*, sources):
+    """
+    Updates the ledger entries of a set of objects, and the totals of the
+    challenges and phases that they are accounted to
+
+    ``sources`` maps the ledger models to the primary keys of the objects
+    that have changed, including those that have been deleted.
+    """
+    sources = {
+        model: {str(pk) for pk in pks} for model, pks in sources.items()
+    }
+
+    if ComponentInterfaceValue in sources:
+        # Images and jobs are accounted through the archives of the values
+        for model, lookup in (
+            (ImageFile, "image__componentinterfacevalue__pk__in"),
+            (Job, "inputs__pk__in"),
+        ):
+            sources.setdefault(model, set()).update(
+                str(pk)
+                for pk in model.objects.filter(
+                    **{lookup: sources[ComponentInterfaceValue]}
+                ).values_list("pk", flat=True)
+            )
+
+    if Job in sources:
+        # The storage of containers is accounted through their jobs
+        for model in (AlgorithmImage, AlgorithmModel):
+            sources.setdefault(model, set()).update(
+                str(pk)
+                for pk in model.objects.filter(
+                    job__pk__in=sources[Job]
+                ).values_list("pk", flat=True)
+            )
+
+    expected = {}
+    for rule in _LEDGER_RULES:
+        if rule.model in sources:
+            expected.update(
+                _expected_ledger_entries(rule=rule, pks=sources[rule.model])
+            )
+
+    q = Q(pk__in=[])
+    for model, pks in sources.items():
+        q |= Q(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id__in=pks,
         )
-        .distinct()
-        .aggregate(Sum("size_in_storage"))
-    )
 
-    algorithm_storage = (
-        AlgorithmImage.objects.filter(job__in=algorithm_jobs)
-        .distinct()
-        .aggregate(Sum("size_in_storage"), Sum("size_in_registry"))
+    existing = _existing_ledger_entries(
+        entries=ChallengeCostEntry.objects.filter(q)
     )
 
-    algorithm_model_storage = (
-        AlgorithmModel.objects.filter(job__in=algorithm_jobs)
-        .distinct()
-        .aggregate(Sum("size_in_storage"))
+    challenge_pks, phase_pks = _apply_ledger_entries(
+        existing=existing, expected=_expected_amounts(expected=expected)
     )
+    update_totals_from_ledger(challenge_pks=challenge_pks, phase_pks=phase_pks)
 
-    method_storage = (
-        Method.objects.filter(phase__challenge=challenge)
-        .distinct()
-        .aggregate(Sum("size_in_storage"), Sum("size_in_registry"))
-    )
 
-    items = [
-        archive_image_storage,
-        archive_file_storage,
-        output_image_storage,
-        output_file_storage,
-        algorithm_storage,
-        algorithm_model_storage,
-        method_storage,
-    ]
-
-    challenge.size_in_storage = sum(
-        item["size_in_storage__sum"] or 0 for item in items
-    )
-    challenge.size_in_registry = sum(
-        item.get("size_in_registry__sum") or 0 for item in items
-    )
+def _expected_challenge_ledger_entries(*, challenge):
+    expected = {}
+    for rule in _LEDGER_RULES:
+        expected.update(
+            _expected_ledger_entries(rule=rule, challenge=challenge.pk)
+        )
 
+    return _expected_amounts(expected=expected)
 
-def update_compute_cost_euro_millicents(
-    *, obj, algorithm_jobs, evaluation_jobs
-):
-    algorithm_job_costs = algorithm_jobs.aggregate(
-        Sum("compute_cost_euro_millicents")
-    )
 
-    evaluation_costs = evaluation_jobs.aggregate(
-        Sum("compute_cost_euro_millicents")
-    )
+def recompute_ledger_totals(*, challenge):
+    """
+    Returns the costs and sizes of a challenge as they would be after its
+    ledger is reconciled, without changing the ledger
+    """
+    totals = dict.fromkeys((*_COMPUTE_COST, *_STORAGE_AND_REGISTRY), 0)
 
-    items = [algorithm_job_costs, evaluation_costs]
+    for (_, phase_pk, *_), amounts in _expected_challenge_ledger_entries(
+        challenge=challenge
+    ).items():
+        if phase_pk is None:
+            for field in totals:
+                totals[field] += amounts.get(field, 0)
+
+    return totals
 
-    obj.compute_cost_euro_millicents = sum(
-        item["compute_cost_euro_millicents__sum"] or 0 for item in items
-    )
 
+def reconcile_ledger(*, challenge):
+    """
+    Recomputes all the ledger entries of a challenge
 
-def update_average_algorithm_job_duration(*, phase, algorithm_jobs):
-    aggregates = algorithm_jobs.filter(
-        status=Job.SUCCESS, duration__gt=timedelta(seconds=0)
-    ).aggregate(
-        total_job_duration=Sum("duration"),
-        job_count=Count("pk", distinct=True),
+    Returns the number of entries that were missing, stale or wrong.
+    """
+    existing = _existing_ledger_entries(entries=challenge.cost_entries.all())
+    expected = _expected_challenge_ledger_entries(challenge=challenge)
+
+    drift = sum(
+        1
+        for key in {*existing, *expected}
+        if key not in existing
+        or expected.get(key) != _entry_amounts(entry=existing[key])
     )
 
-    if all(aggregates.values()):
-        phase.average_algorithm_job_duration = (
-            aggregates["total_job_duration"] / aggregates["job_count"]
-        )
-    else:
-        phase.average_algorithm_job_duration = None
+    _apply_ledger_entries(existing=existing, expected=expected)
+    Challenge.objects.filter(pk=challenge.pk).update(
+        cost_ledger_reconciled_at=now()
+    )
+    update_totals_from_ledger(
+        challenge_pks={challenge.pk},
+        phase_pks=challenge.phase_set.values_list("pk", flat=True),
+    )
+
+    return drift
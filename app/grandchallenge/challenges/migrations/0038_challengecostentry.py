@@ -0,0 +1,95 @@
+# Generated by Django 4.2.13 on 2026-10-19 12:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("evaluation", "0057_evaluationlogchunk"),
+        ("challenges", "0037_external_evaluators_group"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChallengeCostEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.CharField(max_length=36)),
+                (
+                    "compute_cost_euro_millicents",
+                    models.PositiveBigIntegerField(default=0),
+                ),
+                ("size_in_storage", models.PositiveBigIntegerField(default=0)),
+                (
+                    "size_in_registry",
+                    models.PositiveBigIntegerField(default=0),
+                ),
+                (
+                    "job_duration",
+                    models.DurationField(
+                        help_text="The duration of a successful algorithm job of a phase",
+                        null=True,
+                    ),
+                ),
+                (
+                    "challenge",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cost_entries",
+                        to="challenges.challenge",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "phase",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cost_entries",
+                        to="evaluation.phase",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["content_type", "object_id"],
+                        name="challenges__content_9c72c0_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="challengecostentry",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("phase__isnull", True)),
+                fields=("challenge", "content_type", "object_id"),
+                name="unique_challenge_cost_entry",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="challengecostentry",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("phase__isnull", False)),
+                fields=("phase", "content_type", "object_id"),
+                name="unique_phase_cost_entry",
+            ),
+        ),
+    ]
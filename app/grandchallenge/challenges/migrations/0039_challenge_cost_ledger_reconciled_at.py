@@ -0,0 +1,22 @@
+# Generated by Django 4.2.13 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenges", "0038_challengecostentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="challenge",
+            name="cost_ledger_reconciled_at",
+            field=models.DateTimeField(
+                editable=False,
+                help_text="When the cost ledger of this challenge was last reconciled. The costs and sizes are only taken from the ledger once it has been reconciled.",
+                null=True,
+            ),
+        ),
+    ]
@@ -24,6 +24,7 @@ from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.utils.module_loading import import_string
 from django.utils.text import get_valid_filename
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from django_deprecate_fields import deprecate_field
 from guardian.models import GroupObjectPermissionBase, UserObjectPermissionBase
@@ -392,6 +393,15 @@ class Challenge(ChallengeBase):
         default=0,
         help_text="The number of bytes stored in the registry",
     )
+    cost_ledger_reconciled_at = models.DateTimeField(
+        editable=False,
+        null=True,
+        help_text=(
+            "When the cost ledger of this challenge was last reconciled. "
+            "The costs and sizes are only taken from the ledger once it has "
+            "been reconciled."
+        ),
+    )
 
     objects = ChallengeSet.as_manager()
 
@@ -438,6 +448,8 @@ class Challenge(ChallengeBase):
         if adding:
             self.create_groups()
             self.create_forum()
+            # The ledger of a new challenge is complete from the start
+            self.cost_ledger_reconciled_at = now()
 
         super().save(*args, **kwargs)
 
@@ -756,6 +768,49 @@ class ChallengeGroupObjectPermission(GroupObjectPermissionBase):
     content_object = models.ForeignKey(Challenge, on_delete=models.CASCADE)
 
 
+class ChallengeCostEntry(models.Model):
+    """
+    The compute cost and storage of an object that is accounted to a
+    challenge, or to one of its phases
+
+    The totals of the challenges and phases are the sums of their entries.
+    """
+
+    challenge = models.ForeignKey(
+        Challenge, on_delete=models.CASCADE, related_name="cost_entries"
+    )
+    phase = models.ForeignKey(
+        "evaluation.Phase",
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="cost_entries",
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=36)
+    compute_cost_euro_millicents = models.PositiveBigIntegerField(default=0)
+    size_in_storage = models.PositiveBigIntegerField(default=0)
+    size_in_registry = models.PositiveBigIntegerField(default=0)
+    job_duration = models.DurationField(
+        null=True,
+        help_text="The duration of a successful algorithm job of a phase",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["challenge", "content_type", "object_id"],
+                condition=Q(phase__isnull=True),
+                name="unique_challenge_cost_entry",
+            ),
+            models.UniqueConstraint(
+                fields=["phase", "content_type", "object_id"],
+                condition=Q(phase__isnull=False),
+                name="unique_phase_cost_entry",
+            ),
+        ]
+        indexes = [models.Index(fields=["content_type", "object_id"])]
+
+
 @receiver(post_delete, sender=Challenge)
 def delete_challenge_groups_hook(*_, instance: Challenge, using, **__):
     """
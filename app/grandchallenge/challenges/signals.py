@@ -0,0 +1,110 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from grandchallenge.algorithms.models import (
+    AlgorithmImage,
+    AlgorithmModel,
+    Job,
+)
+from grandchallenge.archives.models import ArchiveItem
+from grandchallenge.cases.models import ImageFile
+from grandchallenge.challenges.tasks import schedule_cost_ledger_update
+from grandchallenge.components.models import (
+    ComponentInterfaceValue,
+    ImportStatusChoices,
+)
+from grandchallenge.evaluation.models import Evaluation, Method
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Evaluation)
+def update_cost_ledger_on_job_saved(*_, instance, **__):
+    if (
+        instance.status == instance.SUCCESS
+        or instance.compute_cost_euro_millicents is not None
+    ):
+        schedule_cost_ledger_update(instances=[instance])
+
+
+@receiver(post_save, sender=AlgorithmImage)
+@receiver(post_save, sender=AlgorithmModel)
+@receiver(post_save, sender=Method)
+def update_cost_ledger_on_import_completed(*_, instance, **__):
+    # The sizes of the containers are known once they have been imported
+    if instance.import_status == ImportStatusChoices.COMPLETED:
+        schedule_cost_ledger_update(instances=[instance])
+
+
+@receiver(post_save, sender=ImageFile)
+@receiver(post_save, sender=ComponentInterfaceValue)
+@receiver(post_delete, sender=AlgorithmImage)
+@receiver(post_delete, sender=AlgorithmModel)
+@receiver(post_delete, sender=Method)
+@receiver(post_delete, sender=ImageFile)
+@receiver(post_delete, sender=ComponentInterfaceValue)
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Evaluation)
+def update_cost_ledger_on_object_changed(*_, instance, **__):
+    schedule_cost_ledger_update(instances=[instance])
+
+
+@receiver(m2m_changed, sender=ArchiveItem.values.through)
+@receiver(m2m_changed, sender=Evaluation.inputs.through)
+def update_cost_ledger_on_values_changed(
+    instance, action, reverse, model, pk_set, **_
+):
+    if action not in ["post_add", "post_remove", "pre_clear"]:
+        # nothing to do for the other actions
+        return
+
+    if reverse:
+        values = [instance]
+    elif pk_set is None:
+        # When using a _clear action, pk_set is None
+        # https://docs.djangoproject.com/en/2.2/ref/signals/#m2m-changed
+        field = "values" if isinstance(instance, ArchiveItem) else "inputs"
+        values = getattr(instance, field).all()
+    else:
+        values = [model(pk=pk) for pk in pk_set]
+
+    schedule_cost_ledger_update(instances=values)
+
+
+@receiver(pre_delete, sender=ArchiveItem)
+@receiver(pre_delete, sender=Evaluation)
+def update_cost_ledger_on_values_deleted(*_, instance, **__):
+    # The values are removed by the cascade without an m2m_changed signal
+    field = "values" if isinstance(instance, ArchiveItem) else "inputs"
+    schedule_cost_ledger_update(instances=getattr(instance, field).all())
+
+
+@receiver(pre_delete, sender=ComponentInterfaceValue)
+def update_cost_ledger_on_value_deleted(*_, instance, **__):
+    # The images and jobs that are accounted through the value cannot be
+    # found from it once it has been deleted
+    schedule_cost_ledger_update(
+        instances=[
+            *ImageFile.objects.filter(image__componentinterfacevalue=instance),
+            *Job.objects.filter(inputs=instance),
+        ]
+    )
+
+
+@receiver(pre_delete, sender=Job)
+def update_cost_ledger_on_job_deleted(*_, instance, **__):
+    # The containers are accounted through their jobs
+    schedule_cost_ledger_update(
+        instances=[
+            container
+            for container in (
+                instance.algorithm_image,
+                instance.algorithm_model,
+            )
+            if container is not None
+        ]
+    )
@@ -1,14 +1,22 @@
+import logging
+from threading import local
+
 from celery import shared_task
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Count, Max
+from django.db.transaction import on_commit
 
 from grandchallenge.challenges.costs import (
-    annotate_compute_costs_and_storage_size,
-    annotate_job_duration_and_compute_costs,
+    reconcile_ledger,
+    update_ledger_for_objects,
 )
 from grandchallenge.challenges.models import Challenge
-from grandchallenge.evaluation.models import Evaluation, Phase
+from grandchallenge.evaluation.models import Evaluation
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -56,31 +64,68 @@ def update_challenge_results_cache():
     )
 
 
-@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-2xlarge"])
-def update_compute_costs_and_storage_size():
-    challenges = Challenge.objects.all()
+_pending_ledger_updates = local()
 
-    for challenge in challenges:
-        annotate_compute_costs_and_storage_size(challenge=challenge)
 
-    Challenge.objects.bulk_update(
-        challenges,
-        [
-            "size_in_storage",
-            "size_in_registry",
-            "compute_cost_euro_millicents",
-        ],
-    )
+def _dispatch_cost_ledger_update():
+    sources = getattr(_pending_ledger_updates, "sources", {})
+    _pending_ledger_updates.sources = {}
 
-    phases = Phase.objects.all()
+    if sources:
+        update_cost_ledger.apply_async(
+            kwargs={
+                "sources": {
+                    label: sorted(str(pk) for pk in pks)
+                    for label, pks in sources.items()
+                }
+            }
+        )
 
-    for phase in phases:
-        annotate_job_duration_and_compute_costs(phase=phase)
 
-    Phase.objects.bulk_update(
-        phases,
-        [
-            "average_algorithm_job_duration",
-            "compute_cost_euro_millicents",
-        ],
-    )
+def schedule_cost_ledger_update(*, instances):
+    """
+    Schedules the update of the cost ledger entries of a set of objects
+
+    The objects from every call during a transaction are collected, and
+    are updated by a single task once the transaction is committed.
+    """
+    if not hasattr(_pending_ledger_updates, "sources"):
+        _pending_ledger_updates.sources = {}
+
+    for instance in instances:
+        _pending_ledger_updates.sources.setdefault(
+            instance._meta.label_lower, set()
+        ).add(instance.pk)
+
+    on_commit(_dispatch_cost_ledger_update)
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
+def update_cost_ledger(*, sources):
+    """Updates the cost ledger entries of the changed objects"""
+    with transaction.atomic():
+        update_ledger_for_objects(
+            sources={
+                apps.get_model(label): pks for label, pks in sources.items()
+            }
+        )
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-2xlarge"])
+def update_compute_costs_and_storage_size():
+    """
+    Reconciles the cost ledger of each challenge
+
+    The ledger is kept up to date as objects change, so this only corrects
+    the drift from changes that are not signalled, such as bulk updates.
+    The totals of a challenge that existed before the ledger are only taken
+    from it after its first reconciliation.
+    """
+    for challenge in Challenge.objects.all():
+        with transaction.atomic():
+            drift = reconcile_ledger(challenge=challenge)
+
+        if drift:
+            logger.warning(
+                f"Corrected {drift} cost ledger entries for {challenge}"
+            )
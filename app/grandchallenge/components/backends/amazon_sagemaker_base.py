@@ -29,6 +29,10 @@ from grandchallenge.components.backends.utils import (
     user_error,
 )
 from grandchallenge.components.models import GPUTypeChoices
+from grandchallenge.components.runtime_metrics import (
+    encode_series,
+    summarise_series,
+)
 from grandchallenge.evaluation.utils import get
 
 logger = logging.getLogger(__name__)
@@ -42,6 +46,12 @@ class LogStreamNotFound(Exception):
     """Raised when a log stream could not be found"""
 
 
+class LogPage(NamedTuple):
+    log_stream_name: str
+    next_token: str
+    lines: list[dict]
+
+
 class InstanceType(NamedTuple):
     name: str
     cpu: int
@@ -392,6 +402,7 @@ class ModelChoices(TextChoices):
 
 class AmazonSageMakerBaseExecutor(Executor, ABC):
     IS_EVENT_DRIVEN = True
+    CAN_TAIL_LOGS = True
 
     @property
     @abstractmethod
@@ -432,6 +443,7 @@ class AmazonSageMakerBaseExecutor(Executor, ABC):
 
         self.__duration = None
         self.__runtime_metrics = {}
+        self.__task_log_lines = None
 
         self.__sagemaker_client = None
         self.__logs_client = None
@@ -636,12 +648,80 @@ class AmazonSageMakerBaseExecutor(Executor, ABC):
         else:
             raise LogStreamNotFound("Log stream not found")
 
-    def _set_task_logs(self):
+    @staticmethod
+    def _parse_log_event(*, event):
+        try:
+            parsed_log = parse_structured_log(
+                log=event["message"].replace("\x00", "")
+            )
+            timestamp = ms_timestamp_to_datetime(event["timestamp"])
+        except (JSONDecodeError, KeyError, ValueError):
+            logger.warning("Could not parse log")
+            return None
+
+        if parsed_log is not None:
+            return {
+                "timestamp": timestamp.isoformat(),
+                "source": parsed_log.source.value,
+                "message": parsed_log.message,
+            }
+
+    def tail_logs(self, *, log_stream_name=None, next_token=None):
+        """
+        Page forwards through the log events of this job
+
+        Starts from the head of the log stream, or from ``next_token`` if
+        this is given, and yields a ``LogPage`` for each response until the
+        end of the stream is reached. The ``next_token`` of the last page
+        can be used to resume tailing later on.
+        """
+        if log_stream_name is None:
+            try:
+                log_stream_name = self._get_log_stream_name(data_log=False)
+            except LogStreamNotFound as error:
+                logger.warning(str(error))
+                return
+
+        while True:
+            kwargs = {
+                "logGroupName": self._log_group_name,
+                "logStreamName": log_stream_name,
+                "startFromHead": True,
+            }
+
+            if next_token is not None:
+                kwargs["nextToken"] = next_token
+
+            response = self._logs_client.get_log_events(**kwargs)
+
+            lines = [
+                line
+                for event in response["events"]
+                if (line := self._parse_log_event(event=event)) is not None
+            ]
+
+            yield LogPage(
+                log_stream_name=log_stream_name,
+                next_token=response["nextForwardToken"],
+                lines=lines,
+            )
+
+            if response["nextForwardToken"] == next_token:
+                # The same token is returned at the end of the stream
+                return
+            else:
+                next_token = response["nextForwardToken"]
+
+    def preload_task_logs(self, *, lines):
+        """Use log lines that have already been tailed for the task logs"""
+        self.__task_log_lines = lines
+
+    def _get_latest_log_lines(self):
         try:
             log_stream_name = self._get_log_stream_name(data_log=False)
         except LogStreamNotFound as error:
             logger.warning(str(error))
-            return
+            return []
 
         response = self._logs_client.get_log_events(
             logGroupName=self._log_group_name,
@@ -649,27 +729,28 @@ class AmazonSageMakerBaseExecutor(Executor, ABC):
             limit=LOGLINES,
             startFromHead=False,
         )
+
+        return [
+            line
+            for event in response["events"]
+            if (line := self._parse_log_event(event=event)) is not None
+        ]
+
+    def _set_task_logs(self):
+        if self.__task_log_lines is None:
+            self.__task_log_lines = self._get_latest_log_lines()
+
         stdout = []
         stderr = []
 
-        for event in response["events"]:
-            try:
-                parsed_log = parse_structured_log(
-                    log=event["message"].replace("\x00", "")
-                )
-                timestamp = ms_timestamp_to_datetime(event["timestamp"])
-            except (JSONDecodeError, KeyError, ValueError):
-                logger.warning("Could not parse log")
-                continue
-
-            if parsed_log is not None:
-                output = f"{timestamp.isoformat()} {parsed_log.message}"
-                if parsed_log.source == SourceChoices.STDOUT:
-                    stdout.append(output)
-                elif parsed_log.source == SourceChoices.STDERR:
-                    stderr.append(output)
-                else:
-                    logger.error("Invalid source")
+        for line in self.__task_log_lines:
+            output = f"{line['timestamp']} {line['message']}"
+            if line["source"] == SourceChoices.STDOUT:
+                stdout.append(output)
+            elif line["source"] == SourceChoices.STDERR:
+                stderr.append(output)
+            else:
+                logger.error("Invalid source")
 
         self._stdout = stdout
         self._stderr = stderr
@@ -705,16 +786,25 @@ class AmazonSageMakerBaseExecutor(Executor, ABC):
         if "NextToken" in response:
             logger.error("Too many metrics found")
 
+        results = [
+            metric
+            for metric in response["MetricDataResults"]
+            if metric["Id"] == query_id
+        ]
         runtime_metrics = [
             {
                 "label": metric["Label"],
                 "status": metric["StatusCode"],
-                "timestamps": [t.isoformat() for t in metric["Timestamps"]],
-                "values": metric["Values"],
+                **encode_series(
+                    timestamps=metric["Timestamps"], values=metric["Values"]
+                ),
             }
-            for metric in response["MetricDataResults"]
-            if metric["Id"] == query_id
+            for metric in results
         ]
+        summary = {
+            metric["Label"]: summarise_series(values=metric["Values"])
+            for metric in results
+        }
 
         self.__runtime_metrics = {
             "instance": {
@@ -729,6 +819,7 @@ class AmazonSageMakerBaseExecutor(Executor, ABC):
                 ),
             },
             "metrics": runtime_metrics,
+            "summary": summary,
         }
 
     def _get_task_return_code(self):
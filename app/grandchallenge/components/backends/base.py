@@ -39,6 +39,7 @@ class JobParams(NamedTuple):
 
 class Executor(ABC):
     IS_EVENT_DRIVEN = False
+    CAN_TAIL_LOGS = False
 
     def __init__(
         self,
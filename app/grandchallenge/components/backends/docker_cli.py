@@ -0,0 +1,294 @@
+import json
+import shlex
+import shutil
+from subprocess import PIPE, CalledProcessError, Popen, run
+from tempfile import TemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+
+from grandchallenge.components.backends.docker_client import _get_cpuset_cpus
+from grandchallenge.components.backends.utils import SourceChoices
+from grandchallenge.components.registry import _get_registry_auth_config
+from grandchallenge.evaluation.utils import get
+
+
+def _get_docker_command(*args, authenticate=False):
+    clean_command = shlex.join(["docker", *args])
+
+    if authenticate:
+        auth_config = _get_registry_auth_config()
+        login_command = shlex.join(
+            [
+                "docker",
+                "login",
+                "--username",
+                auth_config["username"],
+                "--password",
+                auth_config["password"],
+                settings.COMPONENTS_REGISTRY_URL,
+            ]
+        )
+        clean_command = f"{login_command} && {clean_command}"
+
+    return ["/bin/sh", "-c", clean_command]
+
+
+def _run_docker_command(*args, authenticate=False):
+    return run(
+        _get_docker_command(*args, authenticate=authenticate),
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+
+class DockerCLIClient:
+    """Interacts with the docker daemon by running docker CLI subprocesses"""
+
+    @classmethod
+    def is_available(cls):
+        return shutil.which("docker") is not None
+
+    def pull_image(self, *, repo_tag, authenticate=False):
+        return _run_docker_command(
+            "image", "pull", repo_tag, authenticate=authenticate
+        )
+
+    def build_image(self, *, repo_tag, path):
+        return _run_docker_command(
+            "build",
+            "--platform",
+            settings.COMPONENTS_CONTAINER_PLATFORM,
+            "--tag",
+            repo_tag,
+            path,
+        )
+
+    def save_image(self, *, repo_tag, output):
+        return _run_docker_command("save", "--output", str(output), repo_tag)
+
+    def load_image(self, *, input):
+        return _run_docker_command("load", "--input", str(input))
+
+    def inspect_image(self, *, repo_tag):
+        try:
+            result = _run_docker_command(
+                "image", "inspect", "--format", "{{json .}}", repo_tag
+            )
+            return json.loads(result.stdout)
+        except CalledProcessError as error:
+            if ": No such image" in error.stderr:
+                raise ObjectDoesNotExist from error
+            else:
+                raise
+
+    def inspect_network(self, *, name):
+        result = _run_docker_command(
+            "network", "inspect", "--format", "{{json .}}", name
+        )
+        return json.loads(result.stdout)
+
+    def stop_container(self, *, name):
+        try:
+            container_id = self.get_container_id(name=name)
+            return _run_docker_command("stop", container_id)
+        except ObjectDoesNotExist:
+            return
+
+    def remove_container(self, *, name):
+        try:
+            container_id = self.get_container_id(name=name)
+            try:
+                _run_docker_command("rm", container_id)
+            except CalledProcessError as error:
+                if (
+                    "Error response from daemon: No such container"
+                    in error.stderr
+                ):
+                    raise ObjectDoesNotExist from error
+                elif "Error: No such container" in error.stderr:
+                    # Old versions of docker return this error string
+                    raise ObjectDoesNotExist from error
+                elif (
+                    f"Error response from daemon: removal of container {container_id} is already in progress"
+                    in error.stderr
+                ):
+                    return
+                else:
+                    raise
+        except ObjectDoesNotExist:
+            return
+
+    def get_container_id(self, *, name):
+        result = _run_docker_command(
+            "ps", "--all", "--quiet", "--filter", f"name={name}"
+        )
+        return get([line for line in result.stdout.splitlines()])
+
+    def inspect_container(self, *, name):
+        container_id = self.get_container_id(name=name)
+        result = _run_docker_command(
+            "inspect", "--format", "{{json .}}", container_id
+        )
+        return json.loads(result.stdout)
+
+    def get_logs(self, *, name, tail=None):
+        container_id = self.get_container_id(name=name)
+        args = ["logs", "--timestamps"]
+
+        if tail is not None:
+            args.extend(["--tail", str(tail)])
+
+        result = _run_docker_command(*args, container_id)
+
+        return result.stdout.splitlines() + result.stderr.splitlines()
+
+    def stream_logs(self, *, name, since=None, follow=True):
+        container_id = self.get_container_id(name=name)
+        args = ["logs", "--timestamps"]
+
+        if follow:
+            args.append("--follow")
+
+        if since is not None:
+            args.extend(["--since", str(since)])
+
+        # The CLI cannot interleave both streams on a single pipe whilst
+        # keeping their sources apart, so only stdout is followed here and
+        # stderr is buffered to disk and emitted once the process exits
+        with (
+            TemporaryFile(mode="w+") as stderr,
+            Popen(
+                _get_docker_command(*args, container_id),
+                stdout=PIPE,
+                stderr=stderr,
+                text=True,
+            ) as process,
+        ):
+            for line in process.stdout:
+                yield SourceChoices.STDOUT, line.rstrip("\n")
+
+            process.wait()
+            stderr.seek(0)
+
+            if process.returncode != 0:
+                raise CalledProcessError(
+                    returncode=process.returncode,
+                    cmd=args,
+                    stderr=stderr.read(),
+                )
+
+            for line in stderr:
+                yield SourceChoices.STDERR, line.rstrip("\n")
+
+    def stream_events(self, *, filters=None, since=None, until=None):
+        args = ["events", "--format", "{{json .}}"]
+
+        for key, values in (filters or {}).items():
+            for value in values:
+                args.extend(["--filter", f"{key}={value}"])
+
+        if since is not None:
+            args.extend(["--since", str(since)])
+
+        if until is not None:
+            args.extend(["--until", str(until)])
+
+        with Popen(
+            _get_docker_command(*args), stdout=PIPE, text=True
+        ) as process:
+            try:
+                for line in process.stdout:
+                    if line.strip():
+                        yield json.loads(line)
+            finally:
+                process.terminate()
+
+    def run_container(  # noqa: C901
+        self,
+        *,
+        repo_tag,
+        name,
+        labels,
+        environment,
+        network,
+        mem_limit,
+        ports=None,
+        extra_hosts=None,
+        command=None,
+        remove=False,
+        detach=True,
+    ):
+        docker_args = [
+            "run",
+            "--name",
+            name,
+            "--network",
+            network,
+            "--memory",
+            f"{mem_limit}g",
+            "--memory-swap",
+            f"{mem_limit}g",
+            "--cpu-period",
+            str(settings.COMPONENTS_CPU_PERIOD),
+            "--cpu-quota",
+            str(settings.COMPONENTS_CPU_QUOTA),
+            "--cpu-shares",
+            str(settings.COMPONENTS_CPU_SHARES),
+            "--cpuset-cpus",
+            _get_cpuset_cpus(),
+            "--security-opt",
+            "no-new-privileges",
+            "--pids-limit",
+            str(settings.COMPONENTS_PIDS_LIMIT),
+            "--log-driver",
+            "json-file",
+            "--log-opt",
+            "max-size=1g",
+            "--platform",
+            settings.COMPONENTS_CONTAINER_PLATFORM,
+            "--init",
+        ]
+
+        if detach:
+            docker_args.append("--detach")
+
+        if remove:
+            docker_args.append("--rm")
+
+        if not settings.COMPONENTS_DOCKER_KEEP_CAPS_UNSAFE:
+            docker_args.extend(["--cap-drop", "all"])
+
+        if settings.COMPONENTS_DOCKER_RUNTIME is not None:
+            docker_args.extend(
+                ["--runtime", settings.COMPONENTS_DOCKER_RUNTIME]
+            )
+
+        for k, v in labels.items():
+            docker_args.extend(["--label", f"{k}={v}"])
+
+        for k, v in environment.items():
+            docker_args.extend(["--env", f"{k}={v}"])
+
+        if extra_hosts is not None:
+            for k, v in extra_hosts.items():
+                docker_args.extend(["--add-host", f"{k}:{v}"])
+
+        if ports is not None:
+            for container_port, v in ports.items():
+                bind_address, host_port = v
+                host_port = "" if host_port is None else host_port
+                docker_args.extend(
+                    [
+                        "--publish",
+                        f"{bind_address}:{host_port}:{container_port}",
+                    ]
+                )
+
+        # Last two args must be the repo tag and optional command
+        docker_args.append(repo_tag)
+        if command is not None:
+            docker_args.extend(command)
+
+        return _run_docker_command(*docker_args)
@@ -1,144 +1,113 @@
-import json
+"""
+Interface to the docker daemon used by the docker backend and workstations
+
+The functions in this module delegate to the client configured in
+``settings.COMPONENTS_DOCKER_CLIENT``. By default this talks to the Docker
+Engine API over the unix socket, falling back to the ``docker`` CLI when the
+socket is not available.
+"""
+
+import logging
 import os
-import shlex
-from subprocess import CalledProcessError, run
+from functools import cache
 
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
-
-from grandchallenge.components.registry import _get_registry_auth_config
-from grandchallenge.evaluation.utils import get
-
-
-def _run_docker_command(*args, authenticate=False):
-    clean_command = shlex.join(["docker", *args])
-
-    if authenticate:
-        auth_config = _get_registry_auth_config()
-        login_command = shlex.join(
-            [
-                "docker",
-                "login",
-                "--username",
-                auth_config["username"],
-                "--password",
-                auth_config["password"],
-                settings.COMPONENTS_REGISTRY_URL,
-            ]
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_DOCKER_CLIENT = (
+    "grandchallenge.components.backends.docker_cli.DockerCLIClient"
+)
+
+
+@cache
+def _get_client(*, backend):
+    Client = import_string(backend)  # noqa: N806
+
+    if not Client.is_available():
+        logger.warning(
+            f"{Client.__name__} is not available, "
+            "falling back to the docker CLI"
         )
-        clean_command = f"{login_command} && {clean_command}"
+        Client = import_string(FALLBACK_DOCKER_CLIENT)  # noqa: N806
 
-    return run(
-        ["/bin/sh", "-c", clean_command],
-        check=True,
-        capture_output=True,
-        text=True,
-    )
+    return Client()
+
+
+def get_client():
+    return _get_client(backend=settings.COMPONENTS_DOCKER_CLIENT)
 
 
 def pull_image(*, repo_tag, authenticate=False):
-    return _run_docker_command(
-        "image", "pull", repo_tag, authenticate=authenticate
+    return get_client().pull_image(
+        repo_tag=repo_tag, authenticate=authenticate
     )
 
 
 def build_image(*, repo_tag, path):
-    return _run_docker_command(
-        "build",
-        "--platform",
-        settings.COMPONENTS_CONTAINER_PLATFORM,
-        "--tag",
-        repo_tag,
-        path,
-    )
+    return get_client().build_image(repo_tag=repo_tag, path=path)
 
 
 def save_image(*, repo_tag, output):
-    return _run_docker_command("save", "--output", str(output), repo_tag)
+    return get_client().save_image(repo_tag=repo_tag, output=output)
 
 
 def load_image(*, input):
-    return _run_docker_command("load", "--input", str(input))
+    return get_client().load_image(input=input)
 
 
 def inspect_image(*, repo_tag):
-    try:
-        result = _run_docker_command(
-            "image", "inspect", "--format", "{{json .}}", repo_tag
-        )
-        return json.loads(result.stdout)
-    except CalledProcessError as error:
-        if ": No such image" in error.stderr:
-            raise ObjectDoesNotExist from error
-        else:
-            raise
+    return get_client().inspect_image(repo_tag=repo_tag)
 
 
 def inspect_network(*, name):
-    result = _run_docker_command(
-        "network", "inspect", "--format", "{{json .}}", name
-    )
-    return json.loads(result.stdout)
+    return get_client().inspect_network(name=name)
 
 
 def stop_container(*, name):
-    try:
-        container_id = get_container_id(name=name)
-        return _run_docker_command("stop", container_id)
-    except ObjectDoesNotExist:
-        return
+    return get_client().stop_container(name=name)
 
 
 def remove_container(*, name):
-    try:
-        container_id = get_container_id(name=name)
-        try:
-            _run_docker_command("rm", container_id)
-        except CalledProcessError as error:
-            if "Error response from daemon: No such container" in error.stderr:
-                raise ObjectDoesNotExist from error
-            elif "Error: No such container" in error.stderr:
-                # Old versions of docker return this error string
-                raise ObjectDoesNotExist from error
-            elif (
-                f"Error response from daemon: removal of container {container_id} is already in progress"
-                in error.stderr
-            ):
-                return
-            else:
-                raise
-    except ObjectDoesNotExist:
-        return
+    return get_client().remove_container(name=name)
 
 
 def get_container_id(*, name):
-    result = _run_docker_command(
-        "ps", "--all", "--quiet", "--filter", f"name={name}"
-    )
-    return get([line for line in result.stdout.splitlines()])
+    return get_client().get_container_id(name=name)
 
 
 def inspect_container(*, name):
-    container_id = get_container_id(name=name)
-    result = _run_docker_command(
-        "inspect", "--format", "{{json .}}", container_id
-    )
-    return json.loads(result.stdout)
+    return get_client().inspect_container(name=name)
 
 
 def get_logs(*, name, tail=None):
-    container_id = get_container_id(name=name)
-    args = ["logs", "--timestamps"]
+    return get_client().get_logs(name=name, tail=tail)
+
+
+def stream_logs(*, name, since=None, follow=True):
+    """
+    Stream the logs of a container
+
+    Yields ``(source, line)`` tuples where source is one of
+    ``SourceChoices`` and line includes the docker timestamp.
+    """
+    yield from get_client().stream_logs(name=name, since=since, follow=follow)
 
-    if tail is not None:
-        args.extend(["--tail", str(tail)])
 
-    result = _run_docker_command(*args, container_id)
+def stream_events(*, filters=None, since=None, until=None):
+    """
+    Subscribe to daemon events
 
-    return result.stdout.splitlines() + result.stderr.splitlines()
+    Yields the decoded event dictionaries as they are emitted by the daemon.
+    Without ``until`` this blocks until the consumer stops iterating.
+    """
+    yield from get_client().stream_events(
+        filters=filters, since=since, until=until
+    )
 
 
-def run_container(  # noqa: C901
+def run_container(
     *,
     repo_tag,
     name,
@@ -152,76 +121,19 @@ def run_container(  # noqa: C901
     remove=False,
     detach=True,
 ):
-    docker_args = [
-        "run",
-        "--name",
-        name,
-        "--network",
-        network,
-        "--memory",
-        f"{mem_limit}g",
-        "--memory-swap",
-        f"{mem_limit}g",
-        "--cpu-period",
-        str(settings.COMPONENTS_CPU_PERIOD),
-        "--cpu-quota",
-        str(settings.COMPONENTS_CPU_QUOTA),
-        "--cpu-shares",
-        str(settings.COMPONENTS_CPU_SHARES),
-        "--cpuset-cpus",
-        _get_cpuset_cpus(),
-        "--security-opt",
-        "no-new-privileges",
-        "--pids-limit",
-        str(settings.COMPONENTS_PIDS_LIMIT),
-        "--log-driver",
-        "json-file",
-        "--log-opt",
-        "max-size=1g",
-        "--platform",
-        settings.COMPONENTS_CONTAINER_PLATFORM,
-        "--init",
-    ]
-
-    if detach:
-        docker_args.append("--detach")
-
-    if remove:
-        docker_args.append("--rm")
-
-    if not settings.COMPONENTS_DOCKER_KEEP_CAPS_UNSAFE:
-        docker_args.extend(["--cap-drop", "all"])
-
-    if settings.COMPONENTS_DOCKER_RUNTIME is not None:
-        docker_args.extend(["--runtime", settings.COMPONENTS_DOCKER_RUNTIME])
-
-    for k, v in labels.items():
-        docker_args.extend(["--label", f"{k}={v}"])
-
-    for k, v in environment.items():
-        docker_args.extend(["--env", f"{k}={v}"])
-
-    if extra_hosts is not None:
-        for k, v in extra_hosts.items():
-            docker_args.extend(["--add-host", f"{k}:{v}"])
-
-    if ports is not None:
-        for container_port, v in ports.items():
-            bind_address, host_port = v
-            host_port = "" if host_port is None else host_port
-            docker_args.extend(
-                [
-                    "--publish",
-                    f"{bind_address}:{host_port}:{container_port}",
-                ]
-            )
-
-    # Last two args must be the repo tag and optional command
-    docker_args.append(repo_tag)
-    if command is not None:
-        docker_args.extend(command)
-
-    return _run_docker_command(*docker_args)
+    return get_client().run_container(
+        repo_tag=repo_tag,
+        name=name,
+        labels=labels,
+        environment=environment,
+        network=network,
+        mem_limit=mem_limit,
+        ports=ports,
+        extra_hosts=extra_hosts,
+        command=command,
+        remove=remove,
+        detach=detach,
+    )
 
 
 def _get_cpuset_cpus():
@@ -0,0 +1,576 @@
+import base64
+import json
+import os
+import socket
+import struct
+import tarfile
+from contextlib import contextmanager
+from http.client import HTTPConnection, HTTPException
+from queue import Empty, Full, LifoQueue
+from subprocess import CalledProcessError
+from tempfile import SpooledTemporaryFile
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+
+from grandchallenge.components.backends.docker_client import _get_cpuset_cpus
+from grandchallenge.components.backends.utils import SourceChoices
+from grandchallenge.components.registry import _get_registry_auth_config
+from grandchallenge.evaluation.utils import get
+
+# Stream identifiers used in the multiplexed log stream, see
+# https://docs.docker.com/engine/api/v1.41/#tag/Container/operation/ContainerAttach
+LOG_STREAM_SOURCES = {1: SourceChoices.STDOUT, 2: SourceChoices.STDERR}
+LOG_FRAME_HEADER = struct.Struct(">BxxxL")
+COPY_CHUNK_SIZE = 1024 * 1024
+DEFAULT_TIMEOUT = object()
+
+
+class DockerEngineAPIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+    def __str__(self):
+        return f"{self.status}: {self.message}"
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """An HTTP connection to a unix domain socket"""
+
+    def __init__(self, *, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._socket_path)
+        self.sock = sock
+
+
+class DockerEngineAPIClient:
+    """
+    Interacts with the docker daemon using the Docker Engine API
+
+    Idle keep-alive connections to the daemon socket are pooled so that
+    consecutive calls do not need to reconnect.
+    """
+
+    def __init__(self):
+        self._socket_path = settings.COMPONENTS_DOCKER_SOCKET
+        self._api_prefix = f"/v{settings.COMPONENTS_DOCKER_API_VERSION}"
+        self._pool = LifoQueue(
+            maxsize=settings.COMPONENTS_DOCKER_CONNECTION_POOL_SIZE
+        )
+
+    @classmethod
+    def is_available(cls):
+        return os.path.exists(settings.COMPONENTS_DOCKER_SOCKET)
+
+    @contextmanager
+    def _connection(self, *, timeout=DEFAULT_TIMEOUT):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = settings.COMPONENTS_DOCKER_TIMEOUT
+
+        try:
+            connection = self._pool.get_nowait()
+        except Empty:
+            connection = UnixHTTPConnection(
+                socket_path=self._socket_path, timeout=timeout
+            )
+
+        connection.timeout = timeout
+
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+
+        try:
+            yield connection
+        except BaseException:
+            # Includes GeneratorExit from abandoned streams, where the
+            # remainder of the response is never going to be read
+            connection.close()
+            raise
+
+        try:
+            self._pool.put_nowait(connection)
+        except Full:
+            connection.close()
+
+    def _url(self, path, params=None):
+        url = f"{self._api_prefix}{path}"
+
+        if params:
+            url += f"?{urlencode(params)}"
+
+        return url
+
+    @contextmanager
+    def _request(
+        self,
+        method,
+        path,
+        *,
+        params=None,
+        body=None,
+        headers=None,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        headers = {**(headers or {})}
+
+        if isinstance(body, dict):
+            body = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        with self._connection(timeout=timeout) as connection:
+            url = self._url(path, params)
+            reused = connection.sock is not None
+
+            try:
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+            except (ConnectionError, HTTPException):
+                if not reused or hasattr(body, "read"):
+                    # Either a genuine failure, or the body has been
+                    # consumed and cannot be resent
+                    raise
+
+                # The daemon closed the idle pooled connection, reconnect
+                connection.close()
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+
+            if response.status >= 400:
+                raise DockerEngineAPIError(
+                    response.status, self._get_error_message(response)
+                )
+
+            yield response
+
+            # Drain the response so that the connection can be reused
+            while response.read(COPY_CHUNK_SIZE):
+                pass
+
+            if response.will_close:
+                connection.close()
+
+    @staticmethod
+    def _get_error_message(response):
+        content = response.read()
+
+        try:
+            return json.loads(content)["message"]
+        except (ValueError, KeyError, TypeError):
+            return content.decode("utf-8", errors="replace")
+
+    def _get_json(self, path, *, params=None):
+        with self._request("GET", path, params=params) as response:
+            return json.loads(response.read())
+
+    @staticmethod
+    def _iter_json_stream(response):
+        """Decode a stream of newline delimited JSON objects"""
+        while line := response.readline():
+            if line.strip():
+                yield json.loads(line)
+
+    def _consume_progress(self, response):
+        """Consume a pull/build/load progress stream, raising any errors"""
+        for message in self._iter_json_stream(response):
+            if "error" in message:
+                raise DockerEngineAPIError(response.status, message["error"])
+
+    @staticmethod
+    def _get_registry_auth_header():
+        auth_config = _get_registry_auth_config()
+
+        if auth_config is None:
+            return {}
+
+        auth_config = {
+            **auth_config,
+            "serveraddress": settings.COMPONENTS_REGISTRY_URL,
+        }
+
+        return {
+            "X-Registry-Auth": base64.urlsafe_b64encode(
+                json.dumps(auth_config).encode("utf-8")
+            ).decode("ascii")
+        }
+
+    @staticmethod
+    def _container_path(name, *, action=""):
+        path = f"/containers/{quote(name, safe='')}"
+
+        if action:
+            path += f"/{action}"
+
+        return path
+
+    def pull_image(self, *, repo_tag, authenticate=False):
+        headers = self._get_registry_auth_header() if authenticate else {}
+
+        with self._request(
+            "POST",
+            "/images/create",
+            params={
+                "fromImage": repo_tag,
+                "platform": settings.COMPONENTS_CONTAINER_PLATFORM,
+            },
+            headers=headers,
+            timeout=settings.COMPONENTS_DOCKER_IMAGE_TIMEOUT,
+        ) as response:
+            self._consume_progress(response)
+
+    def build_image(self, *, repo_tag, path):
+        with SpooledTemporaryFile(max_size=COPY_CHUNK_SIZE) as context:
+            with tarfile.open(fileobj=context, mode="w") as tar:
+                tar.add(path, arcname=".")
+
+            context.seek(0, os.SEEK_END)
+            content_length = context.tell()
+            context.seek(0)
+
+            with self._request(
+                "POST",
+                "/build",
+                params={
+                    "t": repo_tag,
+                    "platform": settings.COMPONENTS_CONTAINER_PLATFORM,
+                },
+                body=context,
+                headers={
+                    "Content-Type": "application/x-tar",
+                    "Content-Length": str(content_length),
+                },
+                timeout=settings.COMPONENTS_DOCKER_IMAGE_TIMEOUT,
+            ) as response:
+                self._consume_progress(response)
+
+    def save_image(self, *, repo_tag, output):
+        with (
+            self._request(
+                "GET",
+                f"/images/{quote(repo_tag, safe='')}/get",
+                timeout=settings.COMPONENTS_DOCKER_IMAGE_TIMEOUT,
+            ) as response,
+            open(output, "wb") as f,
+        ):
+            while chunk := response.read(COPY_CHUNK_SIZE):
+                f.write(chunk)
+
+    def load_image(self, *, input):
+        with open(input, "rb") as f:
+            with self._request(
+                "POST",
+                "/images/load",
+                params={"quiet": "1"},
+                body=f,
+                headers={
+                    "Content-Type": "application/x-tar",
+                    "Content-Length": str(os.fstat(f.fileno()).st_size),
+                },
+                timeout=settings.COMPONENTS_DOCKER_IMAGE_TIMEOUT,
+            ) as response:
+                self._consume_progress(response)
+
+    def inspect_image(self, *, repo_tag):
+        try:
+            return self._get_json(f"/images/{quote(repo_tag, safe='')}/json")
+        except DockerEngineAPIError as error:
+            if error.status == 404:
+                raise ObjectDoesNotExist from error
+            else:
+                raise
+
+    def inspect_network(self, *, name):
+        return self._get_json(f"/networks/{quote(name, safe='')}")
+
+    def stop_container(self, *, name):
+        try:
+            with self._request(
+                "POST",
+                self._container_path(name, action="stop"),
+                timeout=settings.COMPONENTS_DOCKER_IMAGE_TIMEOUT,
+            ):
+                pass
+        except DockerEngineAPIError as error:
+            if error.status == 404:
+                return
+            else:
+                raise
+
+    def remove_container(self, *, name):
+        try:
+            with self._request("DELETE", self._container_path(name)):
+                pass
+        except DockerEngineAPIError as error:
+            if error.status == 404:
+                return
+            elif error.status == 409 and "already in progress" in str(
+                error.message
+            ):
+                return
+            else:
+                raise
+
+    def get_container_id(self, *, name):
+        containers = self._get_json(
+            "/containers/json",
+            params={"all": "1", "filters": json.dumps({"name": [name]})},
+        )
+        return get([container["Id"] for container in containers])
+
+    def inspect_container(self, *, name):
+        try:
+            return self._get_json(self._container_path(name, action="json"))
+        except DockerEngineAPIError as error:
+            if error.status == 404:
+                raise ObjectDoesNotExist from error
+            else:
+                raise
+
+    @staticmethod
+    def _demultiplex_logs(response):
+        """Split the multiplexed log stream into lines per source"""
+        buffers = {source: b"" for source in LOG_STREAM_SOURCES.values()}
+
+        while header := response.read(LOG_FRAME_HEADER.size):
+            stream_type, size = LOG_FRAME_HEADER.unpack(header)
+            source = LOG_STREAM_SOURCES.get(stream_type)
+            payload = response.read(size)
+
+            if source is None:
+                # stdin is never attached, ignore it
+                continue
+
+            *lines, buffers[source] = (buffers[source] + payload).split(b"\n")
+
+            for line in lines:
+                yield source, line.decode("utf-8", errors="replace")
+
+        for source, remainder in buffers.items():
+            if remainder:
+                yield source, remainder.decode("utf-8", errors="replace")
+
+    def _logs_request(self, *, name, params, timeout=DEFAULT_TIMEOUT):
+        return self._request(
+            "GET",
+            self._container_path(name, action="logs"),
+            params={
+                "stdout": "1",
+                "stderr": "1",
+                "timestamps": "1",
+                **params,
+            },
+            timeout=timeout,
+        )
+
+    def get_logs(self, *, name, tail=None):
+        params = {} if tail is None else {"tail": str(tail)}
+
+        try:
+            with self._logs_request(name=name, params=params) as response:
+                loglines = [*self._demultiplex_logs(response)]
+        except DockerEngineAPIError as error:
+            if error.status == 404:
+                raise ObjectDoesNotExist from error
+            else:
+                raise
+
+        # Match the ordering of the CLI, stdout followed by stderr
+        return [
+            line for source, line in loglines if source == SourceChoices.STDOUT
+        ] + [
+            line for source, line in loglines if source == SourceChoices.STDERR
+        ]
+
+    def stream_logs(self, *, name, since=None, follow=True):
+        params = {"follow": "1" if follow else "0"}
+
+        if since is not None:
+            params["since"] = str(since)
+
+        try:
+            with self._logs_request(
+                name=name,
+                params=params,
+                # Following can wait indefinitely between frames
+                timeout=None if follow else DEFAULT_TIMEOUT,
+            ) as response:
+                yield from self._demultiplex_logs(response)
+        except DockerEngineAPIError as error:
+            if error.status == 404:
+                raise ObjectDoesNotExist from error
+            else:
+                raise
+
+    def stream_events(self, *, filters=None, since=None, until=None):
+        params = {}
+
+        if filters:
+            params["filters"] = json.dumps(filters)
+
+        if since is not None:
+            params["since"] = str(since)
+
+        if until is not None:
+            params["until"] = str(until)
+
+        with self._request(
+            "GET",
+            "/events",
+            params=params,
+            # The subscription can be idle for a long time
+            timeout=None,
+        ) as response:
+            yield from self._iter_json_stream(response)
+
+    def _get_container_config(  # noqa: C901
+        self,
+        *,
+        repo_tag,
+        labels,
+        environment,
+        network,
+        mem_limit,
+        ports,
+        extra_hosts,
+        command,
+        remove,
+    ):
+        host_config = {
+            "NetworkMode": network,
+            "Memory": mem_limit * 1024**3,
+            "MemorySwap": mem_limit * 1024**3,
+            "CpuPeriod": settings.COMPONENTS_CPU_PERIOD,
+            "CpuQuota": settings.COMPONENTS_CPU_QUOTA,
+            "CpuShares": settings.COMPONENTS_CPU_SHARES,
+            "CpusetCpus": _get_cpuset_cpus(),
+            "SecurityOpt": ["no-new-privileges"],
+            "PidsLimit": settings.COMPONENTS_PIDS_LIMIT,
+            "LogConfig": {"Type": "json-file", "Config": {"max-size": "1g"}},
+            "Init": True,
+            "AutoRemove": remove,
+        }
+
+        if not settings.COMPONENTS_DOCKER_KEEP_CAPS_UNSAFE:
+            host_config["CapDrop"] = ["all"]
+
+        if settings.COMPONENTS_DOCKER_RUNTIME is not None:
+            host_config["Runtime"] = settings.COMPONENTS_DOCKER_RUNTIME
+
+        if extra_hosts is not None:
+            host_config["ExtraHosts"] = [
+                f"{k}:{v}" for k, v in extra_hosts.items()
+            ]
+
+        exposed_ports = {}
+
+        if ports is not None:
+            port_bindings = {}
+
+            for container_port, v in ports.items():
+                bind_address, host_port = v
+                host_port = "" if host_port is None else str(host_port)
+                exposed_ports[f"{container_port}/tcp"] = {}
+                port_bindings[f"{container_port}/tcp"] = [
+                    {"HostIp": bind_address, "HostPort": host_port}
+                ]
+
+            host_config["PortBindings"] = port_bindings
+
+        config = {
+            "Image": repo_tag,
+            "Labels": {k: str(v) for k, v in labels.items()},
+            "Env": [f"{k}={v}" for k, v in environment.items()],
+            "ExposedPorts": exposed_ports,
+            "HostConfig": host_config,
+        }
+
+        if command is not None:
+            config["Cmd"] = command
+
+        return config
+
+    def run_container(
+        self,
+        *,
+        repo_tag,
+        name,
+        labels,
+        environment,
+        network,
+        mem_limit,
+        ports=None,
+        extra_hosts=None,
+        command=None,
+        remove=False,
+        detach=True,
+    ):
+        with self._request(
+            "POST",
+            "/containers/create",
+            params={
+                "name": name,
+                "platform": settings.COMPONENTS_CONTAINER_PLATFORM,
+            },
+            body=self._get_container_config(
+                repo_tag=repo_tag,
+                labels=labels,
+                environment=environment,
+                network=network,
+                mem_limit=mem_limit,
+                ports=ports,
+                extra_hosts=extra_hosts,
+                command=command,
+                remove=remove,
+            ),
+        ) as response:
+            container_id = json.loads(response.read())["Id"]
+
+        if detach:
+            with self._request(
+                "POST", self._container_path(container_id, action="start")
+            ):
+                pass
+        else:
+            self._start_and_wait(container_id=container_id, command=command)
+
+        return container_id
+
+    def _start_and_wait(self, *, container_id, command):
+        # Register the wait before starting so that the exit cannot be
+        # missed, even if the container is automatically removed
+        with self._connection(timeout=None) as wait_connection:
+            wait_connection.request(
+                "POST",
+                self._url(
+                    self._container_path(container_id, action="wait"),
+                    {"condition": "next-exit"},
+                ),
+            )
+
+            with self._request(
+                "POST", self._container_path(container_id, action="start")
+            ):
+                pass
+
+            wait_response = wait_connection.getresponse()
+            result = json.loads(wait_response.read())
+
+        if wait_response.status >= 400:
+            raise DockerEngineAPIError(
+                wait_response.status, result.get("message")
+            )
+
+        if result["StatusCode"] != 0:
+            # Match the behaviour of `docker run` without `--detach`
+            raise CalledProcessError(
+                returncode=result["StatusCode"],
+                cmd=command,
+                stderr=(result.get("Error") or {}).get("Message", ""),
+            )
@@ -0,0 +1,140 @@
+import time
+
+from django.core.management import BaseCommand
+from jsonschema import validate
+
+from grandchallenge.components.models import (
+    ComponentInterface,
+    InterfaceKindChoices,
+)
+from grandchallenge.components.schemas import INTERFACE_VALUE_SCHEMA
+from grandchallenge.core.validators import get_json_schema_registry
+
+VERSION = {"major": 1, "minor": 0}
+
+
+def _example_values(*, n_elements):
+    """Example values of the json interface kinds with n_elements items"""
+    point = [1.0, 2.0, 3.0]
+    path_points = [point] * n_elements
+    corners = [[0, 0, 0], [10, 0, 0], [10, 10, 0], [0, 0, 0]]
+
+    return {
+        InterfaceKindChoices.STRING: "hello",
+        InterfaceKindChoices.INTEGER: 42,
+        InterfaceKindChoices.FLOAT: 4.2,
+        InterfaceKindChoices.BOOL: True,
+        InterfaceKindChoices.POINT: {
+            "version": VERSION,
+            "type": "Point",
+            "name": "test",
+            "point": point,
+        },
+        InterfaceKindChoices.MULTIPLE_POINTS: {
+            "version": VERSION,
+            "type": "Multiple points",
+            "name": "test",
+            "points": [{"point": point}] * n_elements,
+        },
+        InterfaceKindChoices.MULTIPLE_TWO_D_BOUNDING_BOXES: {
+            "version": VERSION,
+            "type": "Multiple 2D bounding boxes",
+            "name": "test",
+            "boxes": [{"corners": corners}] * n_elements,
+        },
+        InterfaceKindChoices.MULTIPLE_DISTANCE_MEASUREMENTS: {
+            "version": VERSION,
+            "type": "Multiple distance measurements",
+            "name": "test",
+            "lines": [{"start": point, "end": point}] * n_elements,
+        },
+        InterfaceKindChoices.POLYGON: {
+            "version": VERSION,
+            "type": "Polygon",
+            "name": "test",
+            "seed_point": point,
+            "path_points": path_points,
+            "sub_type": "poly",
+            "groups": [],
+        },
+        InterfaceKindChoices.MULTIPLE_POLYGONS: {
+            "version": VERSION,
+            "type": "Multiple polygons",
+            "name": "test",
+            "polygons": [
+                {
+                    "name": "test",
+                    "seed_point": point,
+                    "path_points": [point] * 10,
+                    "sub_type": "poly",
+                    "groups": [],
+                }
+            ]
+            * (n_elements // 10),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time taken to validate values of each json interface "
+        "kind with a new validator per value and with the cached validators"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--elements",
+            type=int,
+            default=100_000,
+            help="The number of items in the values of the multiple kinds",
+        )
+        parser.add_argument(
+            "--repeats",
+            type=int,
+            default=5,
+            help="The number of times each value is validated",
+        )
+
+    def handle(self, *args, **options):
+        registry = get_json_schema_registry()
+
+        for kind, value in _example_values(
+            n_elements=options["elements"]
+        ).items():
+            interface = ComponentInterface(kind=kind)
+
+            def uncached():
+                validate(
+                    value,
+                    {
+                        **INTERFACE_VALUE_SCHEMA,
+                        "anyOf": [{"$ref": f"#/definitions/{kind}"}],
+                    },
+                    registry=registry,
+                )
+
+            def cached():
+                interface.validate_against_schema(value=value)
+
+            durations = {
+                name: self._time(func=func, repeats=options["repeats"])
+                for name, func in (("uncached", uncached), ("cached", cached))
+            }
+
+            self.stdout.write(
+                f"{kind.label}: "
+                f"uncached {durations['uncached'] * 1000:.2f} ms, "
+                f"cached {durations['cached'] * 1000:.2f} ms, "
+                f"speedup {durations['uncached'] / durations['cached']:.1f}x"
+            )
+
+    @staticmethod
+    def _time(*, func, repeats):
+        # The first call warms up the cache
+        func()
+
+        start = time.monotonic()
+        for _ in range(repeats):
+            func()
+
+        return (time.monotonic() - start) / repeats
@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand
+
+from grandchallenge.algorithms.models import Job
+from grandchallenge.components.runtime_metrics import compact_runtime_metrics
+from grandchallenge.evaluation.models import Evaluation
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in (Job, Evaluation):
+            # Compacted jobs have a summary so drop out of this queryset
+            queryset = (
+                model.objects.filter(runtime_metrics__has_key="metrics")
+                .exclude(runtime_metrics__has_key="summary")
+                .order_by("pk")
+            )
+            n_compacted = 0
+
+            while jobs := [*queryset[: options["batch_size"]]]:
+                for job in jobs:
+                    job.runtime_metrics = compact_runtime_metrics(
+                        runtime_metrics=job.runtime_metrics
+                    )
+
+                model.objects.bulk_update(jobs, fields=["runtime_metrics"])
+                n_compacted += len(jobs)
+
+            self.stdout.write(
+                f"Compacted the runtime metrics of {n_compacted} "
+                f"{model._meta.verbose_name_plural}"
+            )
@@ -0,0 +1,64 @@
+import json
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from grandchallenge.components.tasks import _handle_event_batch, buffer_event
+
+
+class Command(BaseCommand):
+    help = (
+        "Buffers recorded backend events from a JSON lines file, "
+        "optionally handling them in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "events",
+            type=str,
+            help=(
+                "Path to a JSON lines file, each line is either an event "
+                'or an object with "backend" and "event" keys'
+            ),
+        )
+        parser.add_argument(
+            "--backend",
+            type=str,
+            default=settings.COMPONENTS_DEFAULT_BACKEND,
+            help="The backend for events that do not specify one",
+        )
+        parser.add_argument("--handle", action="store_true")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.COMPONENTS_EVENT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        n_events = 0
+
+        with open(options["events"]) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+
+                if {"backend", "event"} <= record.keys():
+                    backend, event = record["backend"], record["event"]
+                else:
+                    backend, event = options["backend"], record
+
+                buffer_event(event=event, backend=backend)
+
+                n_events += 1
+
+        self.stdout.write(f"Buffered {n_events} events")
+
+        if options["handle"]:
+            while True:
+                stats = _handle_event_batch(batch_size=options["batch_size"])
+                self.stdout.write(str(stats))
+
+                if stats.handled + stats.superseded + stats.stale == 0:
+                    break
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.13 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("components", "0019_alter_componentinterface_kind"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ComponentJobEvent",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("backend", models.CharField(editable=False, max_length=255)),
+                (
+                    "job_app_label",
+                    models.CharField(editable=False, max_length=64),
+                ),
+                (
+                    "job_model_name",
+                    models.CharField(editable=False, max_length=64),
+                ),
+                ("job_pk", models.UUIDField(editable=False)),
+                ("attempt", models.PositiveSmallIntegerField(editable=False)),
+                ("event", models.JSONField(editable=False)),
+                (
+                    "retries",
+                    models.PositiveIntegerField(default=0, editable=False),
+                ),
+                ("retry_at", models.DateTimeField(editable=False, null=True)),
+            ],
+            options={
+                "ordering": ("created", "pk"),
+            },
+        ),
+    ]
@@ -1,7 +1,9 @@
 import json
 import logging
 import re
+import zlib
 from datetime import timedelta
+from functools import cache
 from json import JSONDecodeError
 from pathlib import Path
 from typing import NamedTuple
@@ -23,7 +25,19 @@ from django.core.validators import (
     RegexValidator,
 )
 from django.db import models, transaction
-from django.db.models import Avg, F, IntegerChoices, QuerySet, Sum, TextChoices
+from django.db.models import (
+    Avg,
+    Count,
+    F,
+    FloatField,
+    IntegerChoices,
+    Max,
+    QuerySet,
+    Sum,
+    TextChoices,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
 from django.db.transaction import on_commit
 from django.forms import ModelChoiceField
 from django.forms.models import model_to_dict
@@ -40,6 +54,11 @@ from panimg.models import MAXIMUM_SEGMENTS_LENGTH
 from grandchallenge.cases.models import Image, ImageFile, RawImageUploadSession
 from grandchallenge.cases.widgets import FlexibleImageField
 from grandchallenge.charts.specs import components_line
+from grandchallenge.components.runtime_metrics import (
+    RUNTIME_METRIC_LABELS,
+    decode_series,
+    downsample_series,
+)
 from grandchallenge.components.schemas import INTERFACE_VALUE_SCHEMA
 from grandchallenge.components.tasks import (
     _repo_login_and_run,
@@ -52,16 +71,19 @@ from grandchallenge.components.validators import (
     validate_no_slash_at_ends,
     validate_safe_path,
 )
+from grandchallenge.core.guardian import get_dfk_permission_filters
 from grandchallenge.core.models import FieldChangeMixin, UUIDModel
 from grandchallenge.core.storage import (
     private_s3_storage,
     protected_s3_storage,
 )
+from grandchallenge.core.utils.json_stream import load_json_streaming
 from grandchallenge.core.validators import (
     ExtensionValidator,
     JSONSchemaValidator,
     JSONValidator,
     MimeTypeValidator,
+    inline_schema_definitions,
 )
 from grandchallenge.uploads.models import UserUpload
 from grandchallenge.uploads.validators import validate_gzip_mimetype
@@ -1127,16 +1149,40 @@ class ComponentInterface(OverlaySegmentsMixin):
 
     def validate_against_schema(self, *, value):
         """Validates values against both default and custom schemas"""
-        JSONValidator(
-            schema={
-                **INTERFACE_VALUE_SCHEMA,
-                "anyOf": [{"$ref": f"#/definitions/{self.kind}"}],
-            }
-        )(value=value)
+        get_interface_kind_validator(kind=self.kind)(value=value)
 
         if self.schema:
             JSONValidator(schema=self.schema)(value=value)
 
+    def validate_file_against_schema(self, *, file):
+        """
+        Validates a json file against both default and custom schemas
+
+        The items of the large arrays of the default schema are validated
+        one at a time as the file is read, rather than loading the whole
+        value in memory.
+        """
+        item_validators = get_interface_kind_item_validators(kind=self.kind)
+
+        try:
+            if self.schema or not item_validators:
+                value = json.loads(file.read())
+            else:
+                value = load_json_streaming(
+                    file=file,
+                    array_item_callbacks={
+                        key: lambda item, validator=validator: validator(
+                            value=item
+                        )
+                        for key, validator in item_validators.items()
+                    },
+                )
+        except (JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValidationError(e)
+
+        # Any streamed arrays are empty here, their items are already valid
+        self.validate_against_schema(value=value)
+
     @cached_property
     def value_required(self):
         value_required = True
@@ -1154,6 +1200,49 @@ class ComponentInterface(OverlaySegmentsMixin):
         ordering = ("pk",)
 
 
+@cache
+def get_interface_kind_validator(*, kind):
+    """The validator of the default schema for values of an interface kind"""
+    return JSONValidator(
+        schema=inline_schema_definitions(
+            schema={
+                **INTERFACE_VALUE_SCHEMA,
+                "anyOf": [{"$ref": f"#/definitions/{kind}"}],
+            }
+        )
+    )
+
+
+@cache
+def get_interface_kind_item_validators(*, kind):
+    """
+    The validators of the items of the arrays in values of an interface kind
+
+    Only arrays with no other constraints than the type of their items are
+    included, so the items can be validated independently.
+    """
+    schema = get_interface_kind_validator(kind=kind).schema
+
+    if "definitions" in schema:
+        # The definitions could not be inlined
+        return {}
+
+    (kind_schema,) = schema["anyOf"]
+
+    if kind_schema.get("type") != "object":
+        return {}
+
+    return {
+        key: JSONValidator(
+            schema={"$schema": schema["$schema"], **property_schema["items"]}
+        )
+        for key, property_schema in kind_schema.get("properties", {}).items()
+        if property_schema.keys() == {"type", "items"}
+        and property_schema["type"] == "array"
+        and isinstance(property_schema["items"], dict)
+    }
+
+
 def component_interface_value_path(instance, filename):
     # Convert the pk to a hex, padded to 4 chars with zeros
     pk_as_padded_hex = f"{instance.pk:04x}"
@@ -1378,26 +1467,19 @@ class ComponentInterfaceValue(models.Model):
             return
         if self.interface.saved_in_object_store:
             self._validate_file_only()
-            with self.file.open("r") as f:
-                try:
-                    value = json.loads(f.read().decode("utf-8"))
-                except JSONDecodeError as e:
-                    raise ValidationError(e)
+            with self.file.open("rb") as f:
+                self.interface.validate_file_against_schema(file=f)
         else:
             self._validate_value_only()
-            value = self.value
-
-        self.interface.validate_against_schema(value=value)
+            self.interface.validate_against_schema(value=self.value)
 
     def validate_user_upload(self, user_upload):
         if not user_upload.is_completed:
             raise ValidationError("User upload is not completed.")
         if self.interface.is_json_kind:
-            try:
-                value = json.loads(user_upload.read_object())
-            except JSONDecodeError as e:
-                raise ValidationError(e)
-            self.interface.validate_against_schema(value=value)
+            self.interface.validate_file_against_schema(
+                file=user_upload.open_object()
+            )
         self._user_upload_validated = True
 
     def update_size_in_storage(self):
@@ -1410,6 +1492,54 @@ class ComponentInterfaceValue(models.Model):
         ordering = ("pk",)
 
 
+def get_viewable_component_interface_values(*, user, pks):
+    """
+    Get the component interface values that a user can view
+
+    A user can view a value if they can view a job that uses it as an input
+    or output, or an archive item or display set that contains it. Rather
+    than resolving the permissions for each of these models separately,
+    the pks are found in a single query from the through tables joined
+    with the direct foreign key permission tables of the related models.
+    """
+    from grandchallenge.algorithms.models import Job
+    from grandchallenge.archives.models import ArchiveItem
+    from grandchallenge.reader_studies.models import DisplaySet
+
+    querysets = []
+
+    for field, codename in (
+        (Job.inputs, "view_job"),
+        (Job.outputs, "view_job"),
+        (ArchiveItem.values, "view_archiveitem"),
+        (DisplaySet.values, "view_displayset"),
+    ):
+        through = field.through
+        model = field.field.model
+        lookup = through._meta.get_field(model._meta.model_name).name
+        related_queryset = through.objects.filter(
+            componentinterfacevalue__in=pks
+        )
+
+        if user.is_superuser:
+            related_filter_kwargs = [{}]
+        else:
+            related_filter_kwargs = get_dfk_permission_filters(
+                model=model, user=user, permission=codename, lookup=lookup
+            )
+
+        querysets += [
+            related_queryset.filter(**kwargs).values_list(
+                "componentinterfacevalue", flat=True
+            )
+            for kwargs in related_filter_kwargs
+        ]
+
+    return ComponentInterfaceValue.objects.filter(
+        pk__in=querysets[0].union(*querysets[1:])
+    )
+
+
 class ComponentJobManager(models.QuerySet):
     def with_duration(self):
         """Annotate the queryset with the duration of completed jobs"""
@@ -1439,6 +1569,32 @@ class ComponentJobManager(models.QuerySet):
             ]
         )
 
+    def runtime_metrics_summary(self):
+        """
+        Summarise the runtime metrics of the jobs per instance type
+
+        For each metric the peak and the average of the per job means
+        are calculated, e.g. ``MemoryUtilization_max`` and
+        ``MemoryUtilization_mean``. Used to right-size the instance types.
+        """
+        aggregates = {}
+
+        for label in RUNTIME_METRIC_LABELS:
+            for statistic, aggregate in (("max", Max), ("mean", Avg)):
+                aggregates[f"{label}_{statistic}"] = aggregate(
+                    Cast(
+                        KT(f"runtime_metrics__summary__{label}__{statistic}"),
+                        output_field=FloatField(),
+                    )
+                )
+
+        return (
+            self.exclude(runtime_metrics__summary__isnull=True)
+            .values(instance_name=KT("runtime_metrics__instance__name"))
+            .annotate(num_jobs=Count("pk"), **aggregates)
+            .order_by("instance_name")
+        )
+
 
 class ComponentJob(models.Model):
     # The job statuses come directly from celery.result.AsyncResult.status:
@@ -1680,6 +1836,46 @@ class ComponentJob(models.Model):
         else:
             return "secondary"
 
+    def update_log_chunks(self, *, executor):
+        """Persist the log lines that have been added since the last tail"""
+        latest_chunk = self.log_chunks.order_by("-sequence").first()
+
+        if latest_chunk is None:
+            sequence = 0
+            tail_kwargs = {}
+        else:
+            sequence = latest_chunk.sequence + 1
+            tail_kwargs = {
+                "log_stream_name": latest_chunk.log_stream_name,
+                "next_token": latest_chunk.next_forward_token,
+            }
+
+        for page in executor.tail_logs(**tail_kwargs):
+            if page.lines:
+                self.log_chunks.create(
+                    sequence=sequence,
+                    log_stream_name=page.log_stream_name,
+                    next_forward_token=page.next_token,
+                    lines=page.lines,
+                )
+                sequence += 1
+
+    def iter_log_lines(self):
+        for chunk in self.log_chunks.order_by("sequence").iterator():
+            yield from chunk.lines
+
+    def get_log_lines(self, *, tail):
+        """Get the last lines of the persisted logs"""
+        lines = []
+
+        for chunk in self.log_chunks.order_by("-sequence").iterator():
+            lines = chunk.lines + lines
+
+            if len(lines) >= tail:
+                break
+
+        return lines[-tail:]
+
     @property
     def runtime_metrics_chart(self):
         instance_metrics = self.runtime_metrics["instance"]
@@ -1693,18 +1889,27 @@ class ComponentJob(models.Model):
             gpu_str = "No"
         title = f"{instance_metrics['name']} / {instance_metrics['cpu']} CPU / {instance_metrics['memory']} GB Memory / {gpu_str} GPU"
 
-        return components_line(
-            values=[
+        values = []
+
+        for metric in self.runtime_metrics["metrics"]:
+            timestamps, series = decode_series(metric=metric)
+            timestamps, series = downsample_series(
+                timestamps=timestamps,
+                values=series,
+                threshold=settings.COMPONENTS_RUNTIME_METRICS_CHART_POINTS,
+            )
+            values.extend(
                 {
                     "Metric": metric["label"],
-                    "Timestamp": timestamp,
-                    "Percent": value / 100.0,
+                    "Timestamp": timestamp.isoformat(),
+                    # The values are stored as float32
+                    "Percent": float(f"{value / 100.0:.6g}"),
                 }
-                for metric in self.runtime_metrics["metrics"]
-                for timestamp, value in zip(
-                    metric["timestamps"], metric["values"], strict=True
-                )
-            ],
+                for timestamp, value in zip(timestamps, series, strict=True)
+            )
+
+        return components_line(
+            values=values,
             title=title,
             cpu_limit=cpu_limit,
             tooltip=[
@@ -1721,6 +1926,86 @@ class ComponentJob(models.Model):
         abstract = True
 
 
+class ComponentJobLogChunk(models.Model):
+    """
+    A compressed chunk of the log lines of a component job
+
+    Concrete models must define a foreign key to the job with the
+    related name ``log_chunks``.
+    """
+
+    created = models.DateTimeField(auto_now_add=True)
+    sequence = models.PositiveIntegerField(editable=False)
+    log_stream_name = models.CharField(max_length=512, editable=False)
+    next_forward_token = models.CharField(
+        max_length=512,
+        editable=False,
+        help_text="The token to continue tailing the log stream from",
+    )
+    num_lines = models.PositiveIntegerField(editable=False)
+    content = models.BinaryField(
+        editable=False,
+        help_text="The zlib compressed, newline delimited JSON log lines",
+    )
+
+    @property
+    def lines(self):
+        if not self.num_lines:
+            return []
+
+        return [
+            json.loads(line)
+            for line in zlib.decompress(self.content)
+            .decode("utf-8")
+            .split("\n")
+        ]
+
+    @lines.setter
+    def lines(self, value):
+        self.num_lines = len(value)
+        self.content = zlib.compress(
+            "\n".join(json.dumps(line) for line in value).encode("utf-8")
+        )
+
+    class Meta:
+        abstract = True
+        ordering = ("sequence",)
+
+
+class ComponentJobEvent(models.Model):
+    """
+    An event from an event driven backend that is waiting to be handled
+
+    Events are buffered here by `handle_event` and then handled in batches
+    by `handle_buffered_events`, which avoids a task and lock per event.
+    """
+
+    created = models.DateTimeField(auto_now_add=True)
+    backend = models.CharField(max_length=255, editable=False)
+    job_app_label = models.CharField(max_length=64, editable=False)
+    job_model_name = models.CharField(max_length=64, editable=False)
+    job_pk = models.UUIDField(editable=False)
+    attempt = models.PositiveSmallIntegerField(editable=False)
+    event = models.JSONField(editable=False)
+    retries = models.PositiveIntegerField(default=0, editable=False)
+    retry_at = models.DateTimeField(null=True, editable=False)
+
+    class Meta:
+        ordering = ("created", "pk")
+
+    def __str__(self):
+        return f"{self.job_model_name} {self.job_pk} attempt {self.attempt}"
+
+    @property
+    def job_key(self):
+        return (
+            self.backend,
+            self.job_app_label,
+            self.job_model_name,
+            self.job_pk,
+        )
+
+
 def docker_image_path(instance, filename):
     return (
         f"docker/"
@@ -0,0 +1,182 @@
+"""
+Compact storage of the runtime metrics of component jobs
+
+The runtime metrics are stored in the ``runtime_metrics`` field of the job.
+Each series stores its start time in seconds since the epoch, the
+differences between consecutive timestamps as int32 and the values as
+float32. Both arrays are little endian and base64 encoded so that they can
+be kept in a JSON field. Jobs executed before this format was introduced
+have lists of ISO timestamps and values, these are read as is.
+"""
+
+import sys
+from array import array
+from base64 import b64decode, b64encode
+from datetime import datetime, timezone
+
+# The metrics reported by SageMaker for training job hosts
+RUNTIME_METRIC_LABELS = (
+    "CPUUtilization",
+    "MemoryUtilization",
+    "DiskUtilization",
+    "GPUUtilization",
+    "GPUMemoryUtilization",
+)
+
+
+def _to_b64(*, typecode, values):
+    arr = array(typecode, values)
+
+    if sys.byteorder == "big":
+        arr.byteswap()
+
+    return b64encode(arr.tobytes()).decode("ascii")
+
+
+def _from_b64(*, typecode, data):
+    arr = array(typecode)
+    arr.frombytes(b64decode(data))
+
+    if sys.byteorder == "big":
+        arr.byteswap()
+
+    return arr
+
+
+def encode_series(*, timestamps, values):
+    """
+    Encode a series of timezone aware timestamps and values
+
+    The timestamps are stored with a resolution of one second.
+    """
+    seconds = [int(t.timestamp()) for t in timestamps]
+
+    return {
+        "start": seconds[0] if seconds else None,
+        "time_deltas": _to_b64(
+            typecode="i",
+            values=[b - a for a, b in zip(seconds, seconds[1:], strict=False)],
+        ),
+        "values": _to_b64(typecode="f", values=values),
+    }
+
+
+def decode_series(*, metric):
+    """
+    Decode a series of runtime metrics
+
+    Returns
+    -------
+        A tuple of the timestamps, as timezone aware datetimes, and the values
+    """
+    if "timestamps" in metric:
+        return (
+            [datetime.fromisoformat(t) for t in metric["timestamps"]],
+            [float(v) for v in metric["values"]],
+        )
+
+    values = [*_from_b64(typecode="f", data=metric["values"])]
+
+    if metric["start"] is None:
+        return [], values
+
+    seconds = [metric["start"]]
+    for delta in _from_b64(typecode="i", data=metric["time_deltas"]):
+        seconds.append(seconds[-1] + delta)
+
+    return (
+        [datetime.fromtimestamp(s, tz=timezone.utc) for s in seconds],
+        values,
+    )
+
+
+def summarise_series(*, values):
+    """The peak and mean of a series, used to compare jobs"""
+    if not values:
+        return {"max": None, "mean": None}
+
+    return {"max": max(values), "mean": sum(values) / len(values)}
+
+
+def largest_triangle_three_buckets(*, x, y, threshold):
+    """
+    Downsample a series whilst preserving its visual shape
+
+    Implements the Largest-Triangle-Three-Buckets algorithm of
+    Sveinn Steinarsson (2013). The first and last points are always kept,
+    for each bucket in between the point that forms the largest triangle
+    with the previously selected point and the mean of the next bucket
+    is selected.
+
+    Returns
+    -------
+        The sorted indices of the selected points
+    """
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return [*range(n)]
+
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        next_count = next_end - next_start
+        mean_x = sum(x[next_start:next_end]) / next_count
+        mean_y = sum(y[next_start:next_end]) / next_count
+
+        a = max(
+            range(start, end),
+            key=lambda i, a=a: abs(
+                (x[a] - mean_x) * (y[i] - y[a])
+                - (x[a] - x[i]) * (mean_y - y[a])
+            ),
+        )
+        selected.append(a)
+
+    selected.append(n - 1)
+
+    return selected
+
+
+def downsample_series(*, timestamps, values, threshold):
+    """Downsample a series of timestamps and values ordered by time"""
+    order = sorted(range(len(timestamps)), key=lambda i: timestamps[i])
+
+    if len(order) <= threshold:
+        return timestamps, values
+
+    x = [timestamps[i].timestamp() for i in order]
+    y = [values[i] for i in order]
+
+    indices = largest_triangle_three_buckets(x=x, y=y, threshold=threshold)
+
+    return (
+        [timestamps[order[i]] for i in indices],
+        [values[order[i]] for i in indices],
+    )
+
+
+def compact_runtime_metrics(*, runtime_metrics):
+    """Convert runtime metrics stored as lists to the compact format"""
+    metrics = []
+    summary = {}
+
+    for metric in runtime_metrics["metrics"]:
+        timestamps, values = decode_series(metric=metric)
+        metrics.append(
+            {
+                "label": metric["label"],
+                "status": metric["status"],
+                **encode_series(timestamps=timestamps, values=values),
+            }
+        )
+        summary[metric["label"]] = summarise_series(values=values)
+
+    return {**runtime_metrics, "metrics": metrics, "summary": summary}
@@ -1,30 +1,38 @@
+import hashlib
 import itertools
 import json
 import logging
+import re
 import shlex
 import subprocess
 import tarfile
+import time
 import uuid
 import zlib
-from base64 import b64decode, b64encode
-from binascii import hexlify
+from base64 import b64encode
+from contextlib import ExitStack
+from datetime import timedelta
+from io import BytesIO
 from lzma import LZMAError
 from pathlib import Path
 from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import NamedTuple
 
 from billiard.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+from botocore.exceptions import BotoCoreError, ClientError
 from celery import shared_task
 from celery.exceptions import MaxRetriesExceededError
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.db import OperationalError, transaction
-from django.db.models import DateTimeField, ExpressionWrapper, F
+from django.db.models import DateTimeField, ExpressionWrapper, F, Q
 from django.db.transaction import on_commit
 from django.utils.module_loading import import_string
 from django.utils.timezone import now
-from panimg.models import SimpleITKImage
+from redis.exceptions import LockError
 
 from grandchallenge.cases.models import Image, ImageFile, RawImageUploadSession
 from grandchallenge.components.backends.exceptions import (
@@ -33,9 +41,11 @@ from grandchallenge.components.backends.exceptions import (
     RetryTask,
     TaskCancelled,
 )
+from grandchallenge.components.backends.utils import LOGLINES
 from grandchallenge.components.emails import send_invalid_dockerfile_email
 from grandchallenge.components.exceptions import PriorStepFailed
 from grandchallenge.components.registry import _get_registry_auth_config
+from grandchallenge.core.cache import _cache_key_from_method
 from grandchallenge.core.templatetags.remove_whitespace import oxford_comma
 from grandchallenge.core.utils.error_messages import (
     format_validation_error_message,
@@ -46,6 +56,10 @@ from grandchallenge.uploads.models import UserUpload
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 60 * 24  # 1 day assuming 60 seconds delay
+EVENT_RETRY_DELAY = timedelta(seconds=60)
+CONTAINER_IMAGE_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CONTAINER_IMAGE_CONFIG_SIZE = 4 * 1024 * 1024
+MAX_CONTAINER_IMAGE_CANDIDATES_SIZE = 16 * 1024 * 1024
 
 
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-2xlarge"])
@@ -242,7 +256,7 @@ def push_container_image(*, instance):
         with NamedTemporaryFile(suffix=".tar") as o:
             with instance.image.open(mode="rb") as im:
                 # Rewrite to tar as crane cannot handle gz
-                _decompress_tarball(in_fileobj=im, out_fileobj=o)
+                _stream_container_image(in_fileobj=im, out_fileobj=o)
 
             _repo_login_and_run(
                 command=["crane", "push", o.name, instance.original_repo_tag]
@@ -431,15 +445,205 @@ def _mutate_container_image(
         )
 
 
-def _decompress_tarball(*, in_fileobj, out_fileobj):
-    """Create an uncompress tarball from a (compressed) tarball"""
-    with (
-        tarfile.open(fileobj=in_fileobj, mode="r") as it,
-        tarfile.open(fileobj=out_fileobj, mode="w|") as ot,
-    ):
-        for member in it.getmembers():
-            extracted = it.extractfile(member)
-            ot.addfile(member, extracted)
+class _CountingReader:
+    """Wraps a file object, counting the bytes that are read"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = self._fileobj.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def consume(self):
+        while self.read(CONTAINER_IMAGE_CHUNK_SIZE):
+            pass
+
+    def seek(self, offset):
+        return self._fileobj.seek(offset)
+
+
+class _DigestingReader(_CountingReader):
+    """Wraps a file object, counting and hashing the bytes that are read"""
+
+    def __init__(self, fileobj):
+        super().__init__(fileobj)
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.sha256.update(chunk)
+        return chunk
+
+
+def _is_config_candidate(*, tarinfo, config_filename, candidates_size=0):
+    """
+    Could this member be the manifest or the image config?
+
+    Before the manifest is found other candidates are only kept while
+    their total size is below the limit.
+    """
+    if tarinfo.size > MAX_CONTAINER_IMAGE_CONFIG_SIZE:
+        return False
+    elif config_filename is not None:
+        return tarinfo.name == config_filename
+    elif tarinfo.name == "manifest.json":
+        return True
+
+    return (
+        tarinfo.name.endswith(".json") or tarinfo.name.startswith("blobs/")
+    ) and (
+        candidates_size + tarinfo.size <= MAX_CONTAINER_IMAGE_CANDIDATES_SIZE
+    )
+
+
+def _get_content_address(*, name):
+    """The sha256 that a member should have, if it is content addressed"""
+    match = re.match(
+        r"^(?:blobs/sha256/(?P<blob>[0-9a-f]{64})|(?P<config>[0-9a-f]{64})\.json)$",
+        name,
+    )
+
+    if match:
+        return match.group("blob") or match.group("config")
+
+
+def _validate_content_addresses(*, digests):
+    for name, digest in digests.items():
+        expected_digest = _get_content_address(name=name)
+
+        if expected_digest is not None and digest != expected_digest:
+            raise ValidationError(
+                f"The sha256 hash of {name} in the container image file "
+                "is incorrect. Was this created with docker save?"
+            )
+
+
+def _stream_container_image(*, in_fileobj, out_fileobj=None):
+    """
+    Read a (compressed) container image tarball in a single pass
+
+    The members are read sequentially so that compressed tarballs are only
+    decompressed once. The sha256 digest of each member is computed as it
+    is read, and content addressed members are checked against their name.
+
+    If ``out_fileobj`` is given the uncompressed tarball is written to it
+    in the same pass, otherwise reading stops as soon as the manifest and
+    config have been found. The members that could be the config are kept
+    until the manifest is found, up to a total size. If the config was not
+    kept it is read in a second pass.
+    """
+    start = time.monotonic()
+    in_reader = _CountingReader(in_fileobj)
+    candidates = {}
+    candidates_size = 0
+    digests = {}
+    config_filename = None
+
+    with ExitStack() as stack:
+        it = stack.enter_context(tarfile.open(fileobj=in_reader, mode="r|*"))
+
+        if out_fileobj is None:
+            ot = None
+        else:
+            ot = stack.enter_context(
+                tarfile.open(fileobj=out_fileobj, mode="w|")
+            )
+
+        for member in it:
+            if not member.isfile():
+                if ot is not None:
+                    ot.addfile(member)
+                continue
+
+            member_reader = _DigestingReader(it.extractfile(member))
+
+            if _is_config_candidate(
+                tarinfo=member,
+                config_filename=config_filename,
+                candidates_size=candidates_size,
+            ):
+                content = member_reader.read()
+                candidates[member.name] = content
+                candidates_size += len(content)
+
+                if ot is not None:
+                    ot.addfile(member, BytesIO(content))
+            elif ot is not None:
+                ot.addfile(member, member_reader)
+            else:
+                member_reader.consume()
+
+            digests[member.name] = member_reader.sha256.hexdigest()
+
+            if member.name == "manifest.json":
+                config_filename, candidates = _get_manifest_and_config(
+                    candidates=candidates
+                )
+
+            if (
+                ot is None
+                and config_filename is not None
+                and config_filename in candidates
+            ):
+                break
+
+    _read_dropped_config(
+        in_reader=in_reader,
+        config_filename=config_filename,
+        candidates=candidates,
+        digests=digests,
+    )
+
+    _validate_content_addresses(digests=digests)
+
+    duration = max(time.monotonic() - start, 1e-6)
+    logger.info(
+        f"Read {in_reader.bytes_read} bytes of container image in "
+        f"{duration:.1f}s ({in_reader.bytes_read / duration:.0f} bytes/s)"
+    )
+
+    return {
+        "container_image_files": candidates,
+        "digests": digests,
+        "bytes_read": in_reader.bytes_read,
+        "duration": duration,
+    }
+
+
+def _get_manifest_and_config(*, candidates):
+    """Find the config filename and drop the other config candidates"""
+    config_filename = _get_image_manifest(
+        container_image_files=candidates
+    ).get("Config")
+
+    # Only the config needs to be kept from now on
+    return config_filename, {
+        k: v
+        for k, v in candidates.items()
+        if k in {"manifest.json", config_filename}
+    }
+
+
+def _read_dropped_config(*, in_reader, config_filename, candidates, digests):
+    """
+    Read the config in a second pass if it was dropped
+
+    This happens if the config was read before the manifest, when the
+    candidates that were kept had already reached their total size.
+    """
+    if config_filename not in digests or config_filename in candidates:
+        return
+
+    in_reader.seek(0)
+
+    with tarfile.open(fileobj=in_reader, mode="r|*") as it:
+        for member in it:
+            if member.name == config_filename and member.isfile():
+                candidates[config_filename] = it.extractfile(member).read()
+                return
 
 
 def _validate_docker_image_manifest(*, instance) -> str:
@@ -475,38 +679,26 @@ def _validate_docker_image_manifest(*, instance) -> str:
 
 def _get_image_config_and_sha256(*, instance):
     try:
-        with (
-            instance.image.open(mode="rb") as im,
-            tarfile.open(fileobj=im, mode="r") as open_tarfile,
-        ):
-            container_image_files = {
-                tarinfo.name: tarinfo
-                for tarinfo in open_tarfile.getmembers()
-                if tarinfo.isfile()
-            }
-
-            image_manifest = _get_image_manifest(
-                container_image_files=container_image_files,
-                open_tarfile=open_tarfile,
-            )
-
-            return _get_image_config_file(
-                image_manifest=image_manifest,
-                container_image_files=container_image_files,
-                open_tarfile=open_tarfile,
-            )
-
+        with instance.image.open(mode="rb") as im:
+            container_image_files = _stream_container_image(in_fileobj=im)[
+                "container_image_files"
+            ]
     except (EOFError, zlib.error, LZMAError, tarfile.ReadError, MemoryError):
         raise ValidationError("Could not decompress the container image file.")
 
+    image_manifest = _get_image_manifest(
+        container_image_files=container_image_files
+    )
+
+    return _get_image_config_file(
+        image_manifest=image_manifest,
+        container_image_files=container_image_files,
+    )
+
 
-def _get_image_manifest(*, container_image_files, open_tarfile):
+def _get_image_manifest(*, container_image_files):
     try:
-        manifest = json.loads(
-            open_tarfile.extractfile(
-                container_image_files["manifest.json"]
-            ).read()
-        )
+        manifest = json.loads(container_image_files["manifest.json"])
     except KeyError:
         raise ValidationError(
             "Could not find manifest.json in the container image file. "
@@ -522,17 +714,11 @@ def _get_image_manifest(*, container_image_files, open_tarfile):
     return manifest[0]
 
 
-def _get_image_config_file(
-    *, image_manifest, container_image_files, open_tarfile
-):
+def _get_image_config_file(*, image_manifest, container_image_files):
     config_filename = image_manifest["Config"]
 
     try:
-        config = json.loads(
-            open_tarfile.extractfile(
-                container_image_files[config_filename]
-            ).read()
-        )
+        config = json.loads(container_image_files[config_filename])
     except KeyError:
         raise ValidationError(
             "Could not find the config file in the container image file. "
@@ -759,7 +945,12 @@ def execute_job(  # noqa: C901
         )
         raise
     else:
-        if not executor.IS_EVENT_DRIVEN:
+        if executor.IS_EVENT_DRIVEN and executor.CAN_TAIL_LOGS:
+            step = _delay(
+                task=tail_job_logs, signature_kwargs=job.signature_kwargs
+            )
+            on_commit(step.apply_async)
+        elif not executor.IS_EVENT_DRIVEN:
             job.update_status(
                 status=job.EXECUTED,
                 stdout=executor.stdout,
@@ -795,10 +986,17 @@ def handle_event(*, event, backend, retries=0):  # noqa: C901
     `handle_event` is expected to raise `ComponentException` in which case
     the job will be marked as failed and the error returned to the user.
 
+    If `COMPONENTS_BATCH_EVENTS` is set the event is buffered and later
+    handled by `handle_buffered_events` instead.
+
     Job must be in the EXECUTING state.
 
     Once the job has executed it will be in the EXECUTED or FAILURE states.
     """
+    if settings.COMPONENTS_BATCH_EVENTS:
+        buffer_event(event=event, backend=backend)
+        return
+
     Backend = import_string(backend)  # noqa: N806
 
     job_name = Backend.get_job_name(event=event)
@@ -844,16 +1042,49 @@ def handle_event(*, event, backend, retries=0):  # noqa: C901
         # Nothing to do
         return
 
+    try:
+        _handle_job_event(job=job, executor=executor, event=event)
+    except RetryStep:
+        retry_handle_event(_executor=executor)
+
+
+def _update_log_chunks(*, job, executor):
+    """
+    Persist the new logs of a job, returns whether this succeeded
+
+    The logs are informational, so failing to fetch them must not fail
+    the job.
+    """
+    try:
+        job.update_log_chunks(executor=executor)
+    except (BotoCoreError, ClientError) as error:
+        logger.warning(f"Could not update the logs of {job}: {error}")
+        return False
+    else:
+        return True
+
+
+def _handle_job_event(*, job, executor, event):
+    """
+    Update a locked, executing job with an event from its executor
+
+    Raises `RetryStep` if the event should be handled again later.
+    """
+    if executor.CAN_TAIL_LOGS and _update_log_chunks(
+        job=job, executor=executor
+    ):
+        # Caught up with the logs that were written since the last tail,
+        # the executor then does not need to fetch them again
+        executor.preload_task_logs(lines=job.get_log_lines(tail=LOGLINES))
+
     try:
         executor.handle_event(event=event)
     except TaskCancelled:
         job.update_status(
             status=job.CANCELLED, **get_update_status_kwargs(executor=executor)
         )
-        return
     except RetryStep:
-        retry_handle_event(_executor=executor)
-        return
+        raise
     except RetryTask:
         job.update_status(status=job.PROVISIONED)
         step = _delay(task=retry_task, signature_kwargs=job.signature_kwargs)
@@ -882,6 +1113,279 @@ def handle_event(*, event, backend, retries=0):  # noqa: C901
         )
 
 
+def buffer_event(*, event, backend):
+    """Store an event from an event driven backend to be handled later"""
+    Backend = import_string(backend)  # noqa: N806
+    job_params = Backend.get_job_params(
+        job_name=Backend.get_job_name(event=event)
+    )
+
+    ComponentJobEvent = apps.get_model(  # noqa: N806
+        app_label="components", model_name="ComponentJobEvent"
+    )
+
+    return ComponentJobEvent.objects.create(
+        backend=backend,
+        job_app_label=job_params.app_label,
+        job_model_name=job_params.model_name,
+        job_pk=job_params.pk,
+        attempt=job_params.attempt,
+        event=event,
+    )
+
+
+class EventBatchStats(NamedTuple):
+    received: int
+    handled: int
+    superseded: int
+    stale: int
+    deferred: int
+    retried: int
+    remaining: int
+    oldest_remaining: timedelta | None
+
+
+@shared_task(
+    **settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"],
+    ignore_result=True,
+)
+def handle_buffered_events():
+    """
+    Handles the buffered events in batches until the buffer is drained
+
+    Only one consumer runs at a time, the cache lock is used rather than
+    row locks so that concurrent consumers do not contend for the jobs.
+    """
+    try:
+        with cache.lock(
+            _cache_key_from_method(handle_buffered_events),
+            timeout=settings.CELERY_TASK_TIME_LIMIT,
+            blocking_timeout=1,
+        ):
+            while True:
+                stats = _handle_event_batch(
+                    batch_size=settings.COMPONENTS_EVENT_BATCH_SIZE
+                )
+
+                if stats.received < settings.COMPONENTS_EVENT_BATCH_SIZE or (
+                    stats.handled + stats.superseded + stats.stale == 0
+                ):
+                    # The buffer is drained, or all remaining events are
+                    # waiting for locked jobs or retries
+                    break
+    except LockError as error:
+        logger.info(f"Could not acquire lock: {error}")
+        return
+
+
+def _latest_events(*, events):
+    """
+    Find the latest event for each job
+
+    Events for earlier attempts and events that were received earlier
+    are superseded by later ones for the same job.
+    """
+    latest = {}
+    superseded = []
+
+    for event in events:
+        current = latest.get(event.job_key)
+
+        if current is None:
+            latest[event.job_key] = event
+        elif event.attempt >= current.attempt:
+            superseded.append(current)
+            latest[event.job_key] = event
+        else:
+            superseded.append(event)
+
+    return [latest[key] for key in sorted(latest)], superseded
+
+
+def _handle_buffered_event(*, model, event):
+    """
+    Handle a buffered event in its own transaction
+
+    The event and its job are locked only while the event is handled, so
+    other tasks can lock the other jobs of the batch in the meantime.
+
+    Returns
+    -------
+        Whether the event was "handled", "stale", "deferred" or "retried"
+    """
+    with transaction.atomic():
+        event = (
+            type(event)
+            .objects.filter(pk=event.pk)
+            .select_for_update(skip_locked=True)
+            .first()
+        )
+        job = (
+            model.objects.filter(pk=event.job_pk)
+            .select_for_update(skip_locked=True)
+            .first()
+            if event is not None
+            else None
+        )
+
+        if job is None:
+            # The event or job is locked elsewhere
+            return "deferred"
+
+        if job.attempt != event.attempt or job.status != job.EXECUTING:
+            event.delete()
+            return "stale"
+
+        executor = job.get_executor(backend=event.backend)
+
+        try:
+            with transaction.atomic():
+                _handle_job_event(
+                    job=job, executor=executor, event=event.event
+                )
+        except RetryStep:
+            if event.retries < MAX_RETRIES:
+                event.retries += 1
+                event.retry_at = now() + EVENT_RETRY_DELAY
+                event.save(update_fields=["retries", "retry_at"])
+                return "retried"
+            else:
+                job.update_status(
+                    status=job.FAILURE,
+                    error_message="An unexpected error occurred",
+                    **get_update_status_kwargs(executor=executor),
+                )
+        except Exception:
+            logger.error(f"Could not handle event for {job}", exc_info=True)
+            job.update_status(
+                status=job.FAILURE,
+                error_message="An unexpected error occurred",
+                **get_update_status_kwargs(executor=executor),
+            )
+
+        event.delete()
+        return "handled"
+
+
+def _handle_event_batch(*, batch_size):
+    """
+    Handle a batch of buffered events
+
+    Events are read in the order in which they were received, only the
+    latest event for each job is handled. The jobs of each model are read
+    with a single query, and then each event is handled in its own
+    transaction that locks its job. The side effects of an event are
+    committed along with its removal from the buffer. Events for jobs that
+    are locked elsewhere, or that could not be handled, are deferred to the
+    next batch.
+    """
+    ComponentJobEvent = apps.get_model(  # noqa: N806
+        app_label="components", model_name="ComponentJobEvent"
+    )
+    start = time.monotonic()
+
+    events = [
+        *ComponentJobEvent.objects.filter(
+            Q(retry_at__isnull=True) | Q(retry_at__lte=now())
+        )[:batch_size]
+    ]
+    latest, superseded = _latest_events(events=events)
+    outcomes = {
+        "handled": [],
+        "stale": [],
+        "deferred": [],
+        "retried": [],
+    }
+
+    ComponentJobEvent.objects.filter(
+        pk__in=[e.pk for e in superseded]
+    ).delete()
+
+    for (_, app_label, model_name), group in itertools.groupby(
+        latest, key=lambda e: e.job_key[:3]
+    ):
+        model_events = [*group]
+        model = apps.get_model(app_label=app_label, model_name=model_name)
+        existing_pks = {
+            *model.objects.filter(
+                pk__in=[e.job_pk for e in model_events]
+            ).values_list("pk", flat=True)
+        }
+
+        for event in model_events:
+            if event.job_pk not in existing_pks:
+                event.delete()
+                outcome = "stale"
+            else:
+                try:
+                    outcome = _handle_buffered_event(model=model, event=event)
+                except Exception:
+                    logger.error(
+                        f"Could not handle event {event.pk}", exc_info=True
+                    )
+                    outcome = "deferred"
+
+            outcomes[outcome].append(event)
+
+    oldest = ComponentJobEvent.objects.order_by("created").first()
+
+    stats = EventBatchStats(
+        received=len(events),
+        handled=len(outcomes["handled"]),
+        superseded=len(superseded),
+        stale=len(outcomes["stale"]),
+        deferred=len(outcomes["deferred"]),
+        retried=len(outcomes["retried"]),
+        remaining=ComponentJobEvent.objects.count(),
+        oldest_remaining=None if oldest is None else now() - oldest.created,
+    )
+
+    logger.info(
+        f"Handled event batch in {time.monotonic() - start:.3f}s: {stats}"
+    )
+
+    return stats
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
+def tail_job_logs(
+    *, job_pk: uuid.UUID, job_app_label: str, job_model_name: str, backend: str
+):
+    """
+    Persists the new logs of an executing job and schedules the next tail
+
+    The job is locked so that tailing does not race with `handle_event`.
+    Each tail continues from the last persisted log chunk.
+    """
+    model = apps.get_model(app_label=job_app_label, model_name=job_model_name)
+    queryset = model.objects.filter(pk=job_pk).select_for_update(nowait=True)
+
+    with transaction.atomic():
+        try:
+            # Use a savepoint so that the transaction can be used after
+            # failing to get the lock
+            with transaction.atomic():
+                job = queryset.get()
+        except OperationalError:
+            # The job is being handled, try again on the next tail
+            job = get_model_instance(
+                pk=job_pk, app_label=job_app_label, model_name=job_model_name
+            )
+        else:
+            executor = job.get_executor(backend=backend)
+
+            if job.status != job.EXECUTING or not executor.CAN_TAIL_LOGS:
+                return
+
+            _update_log_chunks(job=job, executor=executor)
+
+        if job.status == job.EXECUTING:
+            step = _delay(
+                task=tail_job_logs, signature_kwargs=job.signature_kwargs
+            )
+            on_commit(step.apply_async)
+
+
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-2xlarge"])
 def parse_job_outputs(
     *, job_pk: uuid.UUID, job_app_label: str, job_model_name: str, backend: str
@@ -1127,16 +1631,7 @@ def validate_voxel_values(*, civ_pk):
         civ.image.segments is None
         and first_file.image_type == ImageFile.IMAGE_TYPE_MHD
     ):
-        sitk_image = SimpleITKImage(
-            image=civ.image.sitk_image,
-            name=civ.image.name,
-            consumed_files=set(),
-            spacing_valid=True,
-        )
-        segments = sitk_image.segments
-        if segments is not None:
-            civ.image.segments = [int(segment) for segment in segments]
-            civ.image.save()
+        civ.image.update_segments()
 
     civ.interface._validate_voxel_values(civ.image)
 
@@ -1282,11 +1777,9 @@ def assign_tarball_from_upload(
         )
         return
 
-    current_tarball.user_upload.copy_object(
+    sha256 = current_tarball.user_upload.copy_object(
         to_field=getattr(current_tarball, field_to_copy)
-    )
-
-    sha256 = get_object_sha256(getattr(current_tarball, field_to_copy))
+    ).sha256
     if (
         TarballModel.objects.filter(sha256=sha256)
         .exclude(pk=current_tarball.pk)
@@ -1313,17 +1806,3 @@ def assign_tarball_from_upload(
     # mark as desired version and pass locked peer tarballs directly since else
     # mark_desired_version will fail trying to access the locked tarballs
     current_tarball.mark_desired_version(peer_tarballs=peer_tarballs)
-
-
-def get_object_sha256(file_field):
-    response = file_field.storage.connection.meta.client.head_object(
-        Bucket=file_field.storage.bucket.name,
-        Key=file_field.name,
-        ChecksumMode="ENABLED",
-    )
-
-    # The checksums are not calculated on minio
-    if sha256 := response.get("ChecksumSHA256"):
-        return f"sha256:{hexlify(b64decode(sha256)).decode('utf-8')}"
-    else:
-        return ""
@@ -4,7 +4,7 @@ from dal import autocomplete
 from django.contrib.messages.views import SuccessMessageMixin
 from django.db.models import Q, TextChoices
 from django.forms import Media
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.views.generic import (
@@ -13,7 +13,9 @@ from django.views.generic import (
     FormView,
     ListView,
     TemplateView,
+    View,
 )
+from django.views.generic.detail import SingleObjectMixin
 from django_filters.rest_framework import DjangoFilterBackend
 from guardian.mixins import LoginRequiredMixin
 from rest_framework.viewsets import ReadOnlyModelViewSet
@@ -453,3 +455,20 @@ class CIVSetBulkDelete(LoginRequiredMixin, FormView):
         for civ_set in form.cleaned_data["civ_sets_to_delete"]:
             civ_set.delete()
         return super().form_valid(form)
+
+
+class JobLogsBaseView(ObjectPermissionRequiredMixin, SingleObjectMixin, View):
+    """Streams the persisted log lines of a component job as plain text"""
+
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+
+        return StreamingHttpResponse(
+            (
+                f"{line['timestamp']} {line['source']} {line['message']}\n"
+                for line in self.object.iter_log_lines()
+            ),
+            content_type="text/plain; charset=utf-8",
+        )
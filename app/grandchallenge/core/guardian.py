@@ -49,6 +49,69 @@ class ObjectPermissionRequiredMixin(PermissionRequiredMixin):
     accept_global_perms = False
 
 
+def get_dfk_permission_filters(
+    *, model, user, permission, lookup=None, accept_user_perms=True
+):
+    """
+    Get the filters on the direct foreign key permissions of a model
+
+    The permission can be a ``Permission`` or its codename. If a lookup
+    is given the filters are for the objects that are related to the
+    model through that lookup, rather than for the model itself.
+
+    Returns
+    -------
+        The filter kwargs for the user permissions, if these are accepted,
+        followed by those for the group permissions
+    """
+    if user.is_anonymous:
+        # AnonymousUser does not work with filters
+        user = get_anonymous_user()
+
+    prefix = f"{lookup}__" if lookup else ""
+    permission_lookup = (
+        "permission"
+        if isinstance(permission, Permission)
+        else "permission__codename"
+    )
+
+    dfk_group_model = get_group_obj_perms_model(model)
+
+    if dfk_group_model == GroupObjectPermission:
+        raise RuntimeError("DFK group permissions not active for model")
+
+    group_related_query_name = (
+        dfk_group_model.content_object.field.related_query_name()
+    )
+
+    filters = [
+        {
+            f"{prefix}{group_related_query_name}__group__user": user,
+            f"{prefix}{group_related_query_name}__{permission_lookup}": permission,
+        }
+    ]
+
+    if accept_user_perms:
+        dfk_user_model = get_user_obj_perms_model(model)
+
+        if dfk_user_model == UserObjectPermission:
+            raise RuntimeError("DFK user permissions not active for model")
+
+        user_related_query_name = (
+            dfk_user_model.content_object.field.related_query_name()
+        )
+
+        filters.insert(
+            0,
+            {
+                f"{prefix}{user_related_query_name}__user": user,
+                f"{prefix}{user_related_query_name}__{permission_lookup}": permission,
+            },
+        )
+
+    return filters
+
+
 def filter_by_permission(*, queryset, user, codename, accept_user_perms=True):
     """
     Optimised version of get_objects_for_user
@@ -69,43 +132,20 @@ def filter_by_permission(*, queryset, user, codename, accept_user_perms=True):
     if user.is_superuser is True:
         return queryset
 
-    if user.is_anonymous:
-        # AnonymousUser does not work with filters
-        user = get_anonymous_user()
-
-    dfk_group_model = get_group_obj_perms_model(queryset.model)
-
-    if dfk_group_model == GroupObjectPermission:
-        raise RuntimeError("DFK group permissions not active for model")
-
-    group_related_query_name = (
-        dfk_group_model.content_object.field.related_query_name()
-    )
-
     permission = Permission.objects.get(
         content_type__app_label=queryset.model._meta.app_label,
         codename=codename,
     )
 
-    group_filter_kwargs = {
-        f"{group_related_query_name}__group__user": user,
-        f"{group_related_query_name}__permission": permission,
-    }
+    filters = get_dfk_permission_filters(
+        model=queryset.model,
+        user=user,
+        permission=permission,
+        accept_user_perms=accept_user_perms,
+    )
 
     if accept_user_perms:
-        dfk_user_model = get_user_obj_perms_model(queryset.model)
-
-        if dfk_user_model == UserObjectPermission:
-            raise RuntimeError("DFK user permissions not active for model")
-
-        user_related_query_name = (
-            dfk_user_model.content_object.field.related_query_name()
-        )
-
-        user_filter_kwargs = {
-            f"{user_related_query_name}__user": user,
-            f"{user_related_query_name}__permission": permission,
-        }
+        user_filter_kwargs, group_filter_kwargs = filters
 
         pks = (
             queryset.filter(**user_filter_kwargs)
@@ -115,4 +155,5 @@ def filter_by_permission(*, queryset, user, codename, accept_user_perms=True):
 
         return queryset.filter(pk__in=pks)
     else:
+        (group_filter_kwargs,) = filters
         return queryset.filter(**group_filter_kwargs)
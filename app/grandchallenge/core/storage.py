@@ -1,8 +1,14 @@
 import copy
 import datetime
+import logging
+import time
 from base64 import b64decode
+from binascii import hexlify
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 from uuid import uuid4
 
+from botocore.exceptions import ClientError
 from botocore.signers import CloudFrontSigner
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
@@ -17,6 +23,8 @@ from django.utils.timezone import now
 from storages.backends.s3boto3 import S3Boto3Storage
 from storages.utils import clean_name
 
+logger = logging.getLogger(__name__)
+
 
 class S3Storage(S3Boto3Storage):
     """
@@ -44,6 +52,107 @@ class S3Storage(S3Boto3Storage):
             Key=to_name,
         )
 
+    def read_range(self, *, name, start, end=None):
+        """
+        Read a range of bytes from an object with a single GET request
+
+        Parameters
+        ----------
+        name
+            The name of the object
+        start
+            The position of the first byte to read
+        end
+            The position of the last byte to read, inclusive. If not
+            set the object is read until the end.
+
+        Returns
+        -------
+            The streaming body of the response and the total size of the
+            object in bytes
+
+        Raises
+        ------
+        FileNotFoundError
+            If the object does not exist
+        EOFError
+            If the range starts after the end of the object
+        """
+        name = self._normalize_name(clean_name(name))
+
+        try:
+            response = self.connection.meta.client.get_object(
+                Bucket=self.bucket_name,
+                Key=name,
+                Range=f"bytes={start}-{'' if end is None else end}",
+            )
+        except ClientError as error:
+            code = error.response["Error"]["Code"]
+            if code in {"NoSuchKey", "404"}:
+                raise FileNotFoundError(f"No file found for {name}")
+            elif code == "InvalidRange":
+                raise EOFError(f"{name} ends before byte {start}")
+            else:
+                raise
+
+        total_size = int(response["ContentRange"].rsplit("/", 1)[1])
+
+        return response["Body"], total_size
+
+    def put(self, *, name, content):
+        """
+        Save content to name without checking if the name is available
+
+        This saves a HEAD request per file so should only be used when
+        the name is known to be unique, such as for the files under the
+        directory of a single model instance.
+        """
+        return self._save(name, content)
+
+    def _list_prefix(self, *, prefix):
+        prefix = self._normalize_name(clean_name(prefix))
+        paginator = self.connection.meta.client.get_paginator(
+            "list_objects_v2"
+        )
+
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            yield from page.get("Contents", ())
+
+    def size_of_prefix(self, *, prefix):
+        """The total size of the objects whose names start with prefix"""
+        return sum(entry["Size"] for entry in self._list_prefix(prefix=prefix))
+
+    def _delete_keys(self, *, keys):
+        self.connection.meta.client.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={"Objects": [{"Key": k} for k in keys], "Quiet": True},
+        )
+        return len(keys)
+
+    def delete_prefix(self, *, prefix):
+        """
+        Delete all of the objects whose names start with prefix
+
+        Returns
+        -------
+            The number of objects that were deleted
+        """
+        n_deleted = 0
+        keys = []
+
+        for entry in self._list_prefix(prefix=prefix):
+            keys.append(entry["Key"])
+
+            # The maximum number of keys per delete request
+            if len(keys) == 1000:
+                n_deleted += self._delete_keys(keys=keys)
+                keys = []
+
+        if keys:
+            n_deleted += self._delete_keys(keys=keys)
+
+        return n_deleted
+
 
 @deconstructible
 class PrivateS3Storage(S3Storage):
@@ -150,13 +259,114 @@ def get_mugshot_path(instance, filename):
     return f"mugshots/{time_prefix}/{uuid4()}.{extension}"
 
 
+# The limits of multipart uploads in S3
+S3_MAX_PARTS = 10_000
+S3_MAX_PART_SIZE = 5 * 1024 * 1024 * 1024
+
+
+class CopiedS3Object(NamedTuple):
+    key: str
+    size: int
+    checksum_sha256: str
+    duration: float
+
+    @property
+    def sha256(self):
+        return sha256_from_checksum(checksum=self.checksum_sha256)
+
+
+def sha256_from_checksum(*, checksum):
+    """Converts a base64 encoded S3 checksum to a prefixed hex digest"""
+    if checksum:
+        return f"sha256:{hexlify(b64decode(checksum)).decode('utf-8')}"
+    else:
+        # The checksums are not calculated on minio
+        return ""
+
+
+def _copy_part_size(*, size):
+    """
+    The part size used to copy an object, as chosen by the boto3 managed copy
+
+    The part size is doubled until the object fits in the maximum number of
+    parts, so that the checksums match those of objects copied before.
+    """
+    part_size = settings.AWS_S3_COPY_PART_SIZE
+
+    while -(-size // part_size) > S3_MAX_PARTS:
+        part_size *= 2
+
+    return min(part_size, S3_MAX_PART_SIZE)
+
+
+def _multipart_copy_s3_object(
+    *, client, copy_source, size, part_size, bucket, key, extra_args
+):
+    """Copies the parts of an object in parallel with UploadPartCopy"""
+    upload_id = client.create_multipart_upload(
+        Bucket=bucket, Key=key, **extra_args
+    )["UploadId"]
+
+    def copy_part(part_number):
+        first_byte = (part_number - 1) * part_size
+        last_byte = min(first_byte + part_size, size) - 1
+
+        result = client.upload_part_copy(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            CopySource=copy_source,
+            CopySourceRange=f"bytes={first_byte}-{last_byte}",
+        )["CopyPartResult"]
+
+        part = {"ETag": result["ETag"], "PartNumber": part_number}
+
+        if "ChecksumSHA256" in result:
+            part["ChecksumSHA256"] = result["ChecksumSHA256"]
+
+        return part
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=settings.AWS_S3_COPY_MAX_CONCURRENCY
+        ) as executor:
+            parts = [
+                *executor.map(copy_part, range(1, -(-size // part_size) + 1))
+            ]
+
+        response = client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except Exception:
+        client.abort_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id
+        )
+        raise
+
+    return response.get("ChecksumSHA256", "")
+
+
 def copy_s3_object(
     *, to_field, dest_filename, src_bucket, src_key, mimetype, save
 ):
-    """Copies an S3 object to a Django file field on a model"""
+    """
+    Copies an S3 object to a Django file field on a model
+
+    Large objects are copied server side in parts that are copied in
+    parallel. The checksum that S3 calculates during the copy is returned,
+    so the object does not need to be read again to get it. For objects
+    that are copied in parts this is the checksum of the checksums of
+    the parts.
+    """
     if not isinstance(to_field, FieldFile):
         raise ValueError("to_field must be a FieldFile")
 
+    start = time.monotonic()
+
     target_client = to_field.storage.connection.meta.client
     target_bucket = to_field.storage.bucket.name
     target_key = to_field.field.generate_filename(
@@ -178,11 +388,44 @@ def copy_s3_object(
             "StorageClass"
         ]
 
-    target_client.copy(
-        CopySource={"Bucket": src_bucket, "Key": src_key},
-        Bucket=target_bucket,
-        Key=target_key,
-        ExtraArgs=extra_args,
+    copy_source = {"Bucket": src_bucket, "Key": src_key}
+    size = target_client.head_object(Bucket=src_bucket, Key=src_key)[
+        "ContentLength"
+    ]
+    part_size = _copy_part_size(size=size)
+
+    if size < settings.AWS_S3_COPY_PART_SIZE:
+        response = target_client.copy_object(
+            CopySource=copy_source,
+            Bucket=target_bucket,
+            Key=target_key,
+            **extra_args,
+        )
+        checksum_sha256 = response.get("CopyObjectResult", {}).get(
+            "ChecksumSHA256", ""
+        )
+    else:
+        checksum_sha256 = _multipart_copy_s3_object(
+            client=target_client,
+            copy_source=copy_source,
+            size=size,
+            part_size=part_size,
+            bucket=target_bucket,
+            key=target_key,
+            extra_args=extra_args,
+        )
+
+    copied = CopiedS3Object(
+        key=target_key,
+        size=size,
+        checksum_sha256=checksum_sha256,
+        duration=time.monotonic() - start,
+    )
+
+    logger.info(
+        f"Copied {copied.size} bytes to {target_bucket}/{target_key} in "
+        f"{copied.duration:.1f} s "
+        f"({copied.size / max(copied.duration, 1e-6) / 1_000_000:.1f} MB/s)"
     )
 
     to_field.name = target_key
@@ -190,3 +433,5 @@ def copy_s3_object(
     # Save the object because it has changed, unless save is False
     if save:
         to_field.instance.save()
+
+    return copied
@@ -8,6 +8,7 @@ from django.utils import timezone
 
 from grandchallenge.algorithms.models import AlgorithmImage, Job
 from grandchallenge.cases.models import RawImageUploadSession
+from grandchallenge.components.models import ComponentJobEvent
 from grandchallenge.evaluation.models import Evaluation, Method
 from grandchallenge.workstations.models import Session
 
@@ -92,6 +93,7 @@ def _get_metrics():
             ]
         ),
         Session.objects.filter(status=Session.QUEUED),
+        ComponentJobEvent.objects.all(),
     ):
         try:
             total_seconds = (
@@ -108,6 +110,14 @@ def _get_metrics():
             }
         )
 
+    component_metric_data.append(
+        {
+            "MetricName": "BufferedComponentJobEvents",
+            "Value": ComponentJobEvent.objects.count(),
+            "Unit": "Count",
+        }
+    )
+
     metric_data.append(
         {
             "Namespace": f"{site.domain}/AsyncTasks",
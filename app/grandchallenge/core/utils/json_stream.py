@@ -0,0 +1,160 @@
+import codecs
+import json
+import re
+from json import JSONDecodeError
+
+_WHITESPACE = " \t\n\r"
+# The characters up to the end of the buffer that could continue a number
+_NUMBER_CONTINUATION = re.compile(r"[0-9.eE+\-]*\Z")
+
+
+class _JSONBuffer:
+    """A window on a JSON document that is read from a file in chunks"""
+
+    def __init__(self, *, file, chunk_size):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._text = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read(self):
+        chunk = self._file.read(self._chunk_size)
+
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+
+        self._eof = not chunk
+        # Drop the text that has been consumed to keep the buffer small
+        self._text = self._text[self._pos :] + self._decoder.decode(
+            chunk, final=self._eof
+        )
+        self._pos = 0
+
+    def peek(self):
+        """Returns the next non-whitespace character, or None at the end"""
+        while True:
+            while (
+                self._pos < len(self._text)
+                and self._text[self._pos] in _WHITESPACE
+            ):
+                self._pos += 1
+
+            if self._pos < len(self._text):
+                return self._text[self._pos]
+            elif self._eof:
+                return None
+            else:
+                self._read()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise JSONDecodeError(f"Expecting {char!r}", self._text, self._pos)
+        self._pos += 1
+
+    def consume(self, char):
+        """Consumes the next character if it matches"""
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        else:
+            return False
+
+    def decode(self):
+        """Decodes the next complete value"""
+        self.peek()
+
+        while True:
+            try:
+                value, end = self._raw_decode(self._text, self._pos)
+            except JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # A number that runs up to the end of the buffer could
+                # continue in the next chunk, e.g. "12." or "3e"
+                if (
+                    self._eof
+                    or not isinstance(value, (int, float))
+                    or isinstance(value, bool)
+                    or not _NUMBER_CONTINUATION.match(self._text, end)
+                ):
+                    self._pos = end
+                    return value
+
+            self._read()
+
+
+def _stream_array(*, buffer, item_callback):
+    buffer.expect("[")
+
+    if buffer.consume("]"):
+        return
+
+    while True:
+        item_callback(buffer.decode())
+
+        if not buffer.consume(","):
+            break
+
+    buffer.expect("]")
+
+
+def _load_object(*, buffer, array_item_callbacks):
+    buffer.expect("{")
+    value = {}
+
+    if buffer.consume("}"):
+        return value
+
+    while True:
+        key = buffer.decode()
+
+        if not isinstance(key, str):
+            raise JSONDecodeError("Expecting property name", "", 0)
+
+        buffer.expect(":")
+
+        if key in array_item_callbacks and buffer.peek() == "[":
+            _stream_array(
+                buffer=buffer, item_callback=array_item_callbacks[key]
+            )
+            value[key] = []
+        else:
+            value[key] = buffer.decode()
+
+        if not buffer.consume(","):
+            break
+
+    buffer.expect("}")
+
+    return value
+
+
+def load_json_streaming(*, file, array_item_callbacks, chunk_size=2**20):
+    """
+    Loads a JSON document from a file, streaming the items of large arrays
+
+    If the document is an object, the items of the arrays under the keys of
+    ``array_item_callbacks`` are passed to the callback of that key one at a
+    time and are not kept, so the memory used is bounded by the largest
+    item rather than the size of the document. These arrays are empty in the
+    returned value, all other values are loaded as usual.
+
+    Raises a ``JSONDecodeError`` if the document is not valid JSON.
+    """
+    buffer = _JSONBuffer(file=file, chunk_size=chunk_size)
+
+    if buffer.peek() == "{":
+        value = _load_object(
+            buffer=buffer, array_item_callbacks=array_item_callbacks
+        )
+    else:
+        value = buffer.decode()
+
+    if buffer.peek() is not None:
+        raise JSONDecodeError("Extra data", "", 0)
+
+    return value
@@ -1,5 +1,6 @@
+import json
 import re
-from functools import cache
+from functools import cache, cached_property, lru_cache
 from pathlib import Path
 
 import magic
@@ -9,9 +10,8 @@ import requests
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.deconstruct import deconstructible
-from jsonschema import SchemaError
-from jsonschema import ValidationError as JSONValidationError
-from jsonschema import validate, validators
+from jsonschema import SchemaError, validators
+from jsonschema.exceptions import best_match
 
 
 @deconstructible
@@ -146,6 +146,66 @@ def get_json_schema_registry():
     return referencing.Registry(retrieve=retrieve)
 
 
+def _inline_node(*, node, definitions, stack):
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+
+        if len(node) == 1 and isinstance(ref, str):
+            name = ref.removeprefix("#/definitions/")
+
+            if name == ref or name in stack:
+                raise ValueError(f"Cannot inline {ref}")
+
+            return _inline_node(
+                node=definitions[name],
+                definitions=definitions,
+                stack=(*stack, name),
+            )
+
+        return {
+            key: _inline_node(node=value, definitions=definitions, stack=stack)
+            for key, value in node.items()
+        }
+    elif isinstance(node, list):
+        return [
+            _inline_node(node=value, definitions=definitions, stack=stack)
+            for value in node
+        ]
+    else:
+        return node
+
+
+def inline_schema_definitions(*, schema):
+    """
+    Replaces the references to the definitions of a schema with their content
+
+    The references then do not need to be resolved for every element that
+    is validated. Schemas with recursive, external or missing references
+    are returned unchanged.
+    """
+    definitions = schema.get("definitions", {})
+    schema = {k: v for k, v in schema.items() if k != "definitions"}
+
+    try:
+        return _inline_node(node=schema, definitions=definitions, stack=())
+    except (KeyError, ValueError):
+        return {**schema, "definitions": definitions}
+
+
+@lru_cache(maxsize=256)
+def _get_compiled_json_validator(*, schema_key):
+    """
+    Get a validator instance for a schema
+
+    The schema is checked and the validator is created once for each
+    distinct schema, which is identified by its canonical serialization.
+    """
+    schema = json.loads(schema_key)
+    cls = validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema, registry=get_json_schema_registry())
+
+
 @deconstructible
 class JSONValidator:
     """Uses jsonschema to validate json fields."""
@@ -157,12 +217,19 @@ class JSONValidator:
         self.registry = get_json_schema_registry()
         super().__init__()
 
+    @cached_property
+    def _validator(self):
+        return _get_compiled_json_validator(
+            schema_key=json.dumps(self.schema, sort_keys=True)
+        )
+
     def __call__(self, value):
-        try:
-            validate(value, self.schema, registry=self.registry)
-        except JSONValidationError as e:
+        # Equivalent to jsonschema.validate with a cached validator
+        error = best_match(self._validator.iter_errors(value))
+
+        if error is not None:
             raise ValidationError(
-                f"JSON does not fulfill schema: instance {e.message.replace(str(e.instance) + ' ', '')}"
+                f"JSON does not fulfill schema: instance {error.message.replace(str(error.instance) + ' ', '')}"
             )
 
     def __eq__(self, other):
@@ -1,62 +1,94 @@
+from collections import defaultdict
+
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
-from django.db.models import Count, F, Q
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from grandchallenge.direct_messages.models import DirectMessageUnreadBy
+from grandchallenge.profiles.models import (
+    NotificationEmailOptions,
+    UserProfile,
+    send_unread_direct_messages_email_batch,
+)
+
+DIGEST_EMAIL_BATCH_SIZE = 1000
 
-from grandchallenge.profiles.models import NotificationEmailOptions
 
+def get_new_unread_direct_messages(*, until):
+    """
+    Returns the user and sender pks of the new unread direct messages of the
+    users that receive a daily summary, ordered by user
 
-def get_users_to_send_new_unread_direct_messages_email():
+    The messages are read from the unread by table rather than per user.
+    """
     return (
-        get_user_model()
-        .objects.prefetch_related(
-            "unread_direct_messages__sender", "user_profile"
+        DirectMessageUnreadBy.objects.filter(
+            direct_message__created__lte=until,
+            unread_by__is_active=True,
+            unread_by__user_profile__notification_email_choice=NotificationEmailOptions.DAILY_SUMMARY,
         )
         .filter(
-            user_profile__notification_email_choice=NotificationEmailOptions.DAILY_SUMMARY,
-            is_active=True,
-        )
-        .annotate(
-            new_unread_message_count=Count(
-                "unread_direct_messages",
-                filter=Q(
-                    user_profile__unread_messages_email_last_sent_at__isnull=True
+            Q(
+                unread_by__user_profile__unread_messages_email_last_sent_at__isnull=True
+            )
+            | Q(
+                direct_message__created__gt=F(
+                    "unread_by__user_profile__unread_messages_email_last_sent_at"
                 )
-                | Q(
-                    unread_direct_messages__created__gt=F(
-                        "user_profile__unread_messages_email_last_sent_at"
-                    )
-                ),
             )
         )
-        .filter(new_unread_message_count__gt=0)
+        .order_by("unread_by", "direct_message__sender")
+        .values_list("unread_by", "direct_message__sender")
     )
 
 
-def get_new_senders(*, user):
-    new_senders = {
-        message.sender
-        for message in user.unread_direct_messages.all()
-        if (
-            user.user_profile.unread_messages_email_last_sent_at is None
-            or message.created
-            > user.user_profile.unread_messages_email_last_sent_at
-        )
-    }
-
-    return sorted(list(new_senders), key=lambda s: s.pk)
-
-
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
 def send_new_unread_direct_messages_emails():
+    """
+    Sends the daily summary of new unread direct messages
+
+    The users that have the same number of new messages from the same
+    senders receive the same email, so these are rendered and sent in
+    batches.
+    """
     site = Site.objects.get_current()
+    sent_at = now()
 
-    for user in get_users_to_send_new_unread_direct_messages_email().iterator(
-        chunk_size=100
-    ):
-        user.user_profile.dispatch_unread_direct_messages_email(
-            site=site,
-            new_unread_message_count=user.new_unread_message_count,
-            new_senders=get_new_senders(user=user),
+    new_messages = defaultdict(list)
+
+    for user_pk, sender_pk in get_new_unread_direct_messages(
+        until=sent_at
+    ).iterator():
+        new_messages[user_pk].append(sender_pk)
+
+    user_pks_by_summary = defaultdict(list)
+
+    for user_pk, sender_pks in new_messages.items():
+        summary = (
+            len(sender_pks),
+            tuple(sorted({pk for pk in sender_pks if pk is not None})),
         )
+        user_pks_by_summary[summary].append(user_pk)
+
+    UserProfile.objects.filter(user__pk__in=[*new_messages]).update(
+        unread_messages_email_last_sent_at=sent_at
+    )
+
+    users = get_user_model().objects.select_related("user_profile")
+    senders = users.in_bulk(
+        {pk for _, sender_pks in user_pks_by_summary for pk in sender_pks}
+    )
+
+    for (count, sender_pks), user_pks in user_pks_by_summary.items():
+        for idx in range(0, len(user_pks), DIGEST_EMAIL_BATCH_SIZE):
+            send_unread_direct_messages_email_batch(
+                site=site,
+                users=users.filter(
+                    pk__in=user_pks[idx : idx + DIGEST_EMAIL_BATCH_SIZE]
+                ).order_by("pk"),
+                new_unread_message_count=count,
+                new_senders=[senders[pk] for pk in sender_pks],
+            )
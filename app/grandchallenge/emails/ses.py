@@ -0,0 +1,92 @@
+import threading
+import time
+import uuid
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+
+
+class TokenBucket:
+    """
+    Limits the rate at which tokens are taken, shared between threads
+
+    The bucket starts empty and refills at ``rate`` tokens per second up to
+    ``capacity`` tokens, callers of ``acquire`` wait until a token is
+    available. With the default capacity of one token the rate is never
+    exceeded, not even after the bucket has been idle.
+    """
+
+    def __init__(self, *, rate, capacity=1, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+
+        self._rate = rate
+        self._capacity = max(1, capacity)
+        self._clock = clock
+        self._tokens = 0
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token and returns 0, or returns the seconds to wait"""
+        with self._lock:
+            current_time = self._clock()
+            self._tokens = min(
+                self._capacity,
+                self._tokens + (current_time - self._updated_at) * self._rate,
+            )
+            self._updated_at = current_time
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            else:
+                return (1 - self._tokens) / self._rate
+
+    def acquire(self):
+        while wait := self._take():
+            time.sleep(wait)
+
+
+# The SES errors after which sending the email can be tried again
+TRANSIENT_SES_ERROR_CODES = frozenset(
+    {
+        "InternalFailure",
+        "RequestTimeout",
+        "ServiceUnavailable",
+        "Throttling",
+        "ThrottlingException",
+    }
+)
+
+
+def is_transient_error(error):
+    """Whether sending an email that failed with error can be tried again"""
+    if isinstance(error, ClientError):
+        return error.response["Error"]["Code"] in TRANSIENT_SES_ERROR_CODES
+    else:
+        # Connection errors and timeouts
+        return isinstance(error, BotoCoreError)
+
+
+class FakeSESClient:
+    """Stands in for the SES client when sending emails locally"""
+
+    def __init__(self, *, max_send_rate=1, latency=0):
+        self.max_send_rate = max_send_rate
+        self.latency = latency
+
+    def get_send_quota(self):
+        return {"MaxSendRate": float(self.max_send_rate)}
+
+    def send_raw_email(self, **kwargs):
+        time.sleep(self.latency)
+        return {"MessageId": f"fake-{uuid.uuid4()}"}
+
+
+def get_ses_client():
+    if settings.DEBUG:
+        return FakeSESClient()
+    else:
+        return boto3.client("ses", region_name=settings.AWS_SES_REGION_NAME)
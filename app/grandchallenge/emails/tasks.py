@@ -1,8 +1,8 @@
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timedelta
 
-import boto3
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -16,6 +16,11 @@ from redis.exceptions import LockError
 from grandchallenge.core.cache import _cache_key_from_method
 from grandchallenge.emails.emails import send_standard_email_batch
 from grandchallenge.emails.models import Email, RawEmail
+from grandchallenge.emails.ses import (
+    TokenBucket,
+    get_ses_client,
+    is_transient_error,
+)
 from grandchallenge.emails.utils import SendActionChoices
 from grandchallenge.profiles.models import EmailSubscriptionTypes
 
@@ -138,45 +143,164 @@ def send_raw_emails():
         return
 
 
-def _send_raw_emails():
-    if settings.DEBUG:
-        client = None
-        min_send_duration = timedelta(seconds=1)
-    else:
-        client = boto3.client("ses", region_name=settings.AWS_SES_REGION_NAME)
-        min_send_duration = timedelta(
-            seconds=1 / int(client.get_send_quota()["MaxSendRate"])
-        )
-
-    # Transaction and locking unnecessary here as a cache lock is being used
-    for raw_email in RawEmail.objects.filter(
+def _unsent_raw_email_batches():
+    """Yields batches of the unsent raw emails ordered by primary key"""
+    unsent_emails = RawEmail.objects.filter(
         sent_at__isnull=True, errored=False
-    ).iterator():
-        start = now()
-
-        try:
-            if settings.DEBUG:
-                response = {"MessageId": "debug"}
-            else:
-                response = client.send_raw_email(
-                    RawMessage={"Data": raw_email.message}
-                )
-        except Exception as error:
-            raw_email.errored = True
-            raw_email.save()
-            logger.error(f"Error sending raw email {raw_email.pk}: {error}")
-            continue
+    ).order_by("pk")
+    cursor = None
+
+    while True:
+        if cursor is not None:
+            batch = unsent_emails.filter(pk__gt=cursor)
         else:
-            raw_email.sent_at = now()
-            raw_email.save()
-            logger.info(
-                f"Sent raw email {raw_email.pk}: {response['MessageId']}"
+            batch = unsent_emails
+
+        batch = [*batch[: settings.AWS_SES_SEND_BATCH_SIZE]]
+
+        if not batch:
+            return
+
+        yield batch
+
+        cursor = batch[-1].pk
+
+
+class _RawEmailStatuses:
+    """
+    Writes the statuses of sent raw emails in small groups
+
+    The statuses are written once ``batch_size`` emails have completed, or
+    once ``interval`` seconds have passed since they were last written.
+    """
+
+    def __init__(self, *, batch_size, interval=1):
+        self._batch_size = batch_size
+        self._interval = interval
+        self._sent_pks = []
+        self._errored_pks = []
+        self._written_at = time.monotonic()
+        self.n_sent = 0
+        self.n_errored = 0
+
+    def add(self, *, pk, sent):
+        if sent:
+            self._sent_pks.append(pk)
+            self.n_sent += 1
+        else:
+            self._errored_pks.append(pk)
+            self.n_errored += 1
+
+        if (
+            len(self._sent_pks) + len(self._errored_pks) >= self._batch_size
+            or time.monotonic() - self._written_at >= self._interval
+        ):
+            self.write()
+
+    def write(self):
+        if self._sent_pks:
+            RawEmail.objects.filter(pk__in=self._sent_pks).update(
+                sent_at=now()
+            )
+        if self._errored_pks:
+            RawEmail.objects.filter(pk__in=self._errored_pks).update(
+                errored=True
             )
 
-        elapsed = now() - start
+        self._sent_pks, self._errored_pks = [], []
+        self._written_at = time.monotonic()
+
+
+def _send_raw_email(raw_email, *, client, bucket):
+    """
+    Sends a raw email
+
+    Returns
+    -------
+        Whether the email was sent, or None if it can be tried again
+    """
+    bucket.acquire()
+
+    try:
+        response = client.send_raw_email(
+            RawMessage={"Data": raw_email.message}
+        )
+    except Exception as error:
+        if is_transient_error(error):
+            logger.warning(
+                f"Could not send raw email {raw_email.pk}, "
+                f"will try again: {error}"
+            )
+            return None
+        else:
+            logger.error(f"Error sending raw email {raw_email.pk}: {error}")
+            return False
+    else:
+        logger.info(f"Sent raw email {raw_email.pk}: {response['MessageId']}")
+        return True
+
+
+def _send_raw_emails(*, client=None):
+    """
+    Sends the unsent raw emails from a pool of threads
+
+    The threads share a token bucket so that the SES send rate is not
+    exceeded. The emails are read in batches ordered by primary key, and the
+    statuses are written in small groups as the emails are sent. Sent and
+    errored emails are no longer selected, so an interrupted run is resumed
+    by the next one, and only the emails whose status had not been written
+    yet could be sent again. Emails that could not be sent because of a
+    transient error, such as throttling, are left unsent so that the next
+    run tries them again.
+
+    Returns
+    -------
+        The number of sent and errored emails, and the messages per second
+    """
+    if client is None:
+        client = get_ses_client()
+
+    bucket = TokenBucket(rate=float(client.get_send_quota()["MaxSendRate"]))
+
+    statuses = _RawEmailStatuses(
+        batch_size=settings.AWS_SES_SEND_STATUS_BATCH_SIZE
+    )
+    start = time.monotonic()
+
+    executor = ThreadPoolExecutor(
+        max_workers=settings.AWS_SES_SEND_MAX_WORKERS
+    )
+
+    # Transaction and locking unnecessary here as a cache lock is being used
+    try:
+        for batch in _unsent_raw_email_batches():
+            futures = {
+                executor.submit(
+                    _send_raw_email, raw_email, client=client, bucket=bucket
+                ): raw_email.pk
+                for raw_email in batch
+            }
+
+            for future in as_completed(futures):
+                if (sent := future.result()) is not None:
+                    statuses.add(pk=futures[future], sent=sent)
+    finally:
+        # Do not send the remaining emails if the status could not be
+        # written, but keep the statuses of the emails that were sent
+        executor.shutdown(cancel_futures=True)
+        statuses.write()
+
+    n_sent, n_errored = statuses.n_sent, statuses.n_errored
+    duration = time.monotonic() - start
+    rate = (n_sent + n_errored) / duration if duration else 0
+
+    if n_sent or n_errored:
+        logger.info(
+            f"Sent {n_sent} raw emails with {n_errored} errors in "
+            f"{duration:.1f}s ({rate:.1f} messages/s)"
+        )
 
-        if elapsed < min_send_duration:
-            time.sleep((min_send_duration - elapsed).total_seconds())
+    return {"sent": n_sent, "errored": n_errored, "messages_per_second": rate}
 
 
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.13 on 2026-10-19 08:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evaluation", "0056_alter_phase_algorithm_time_limit"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EvaluationLogChunk",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("sequence", models.PositiveIntegerField(editable=False)),
+                (
+                    "log_stream_name",
+                    models.CharField(editable=False, max_length=512),
+                ),
+                (
+                    "next_forward_token",
+                    models.CharField(
+                        editable=False,
+                        help_text="The token to continue tailing the log stream from",
+                        max_length=512,
+                    ),
+                ),
+                ("num_lines", models.PositiveIntegerField(editable=False)),
+                (
+                    "content",
+                    models.BinaryField(
+                        help_text="The zlib compressed, newline delimited JSON log lines"
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="log_chunks",
+                        to="evaluation.evaluation",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("sequence",),
+                "abstract": False,
+                "unique_together": {("job", "sequence")},
+            },
+        ),
+    ]
@@ -29,6 +29,7 @@ from grandchallenge.components.models import (
     ComponentImage,
     ComponentInterface,
     ComponentJob,
+    ComponentJobLogChunk,
     ImportStatusChoices,
     Tarball,
 )
@@ -1404,6 +1405,15 @@ class Evaluation(UUIDModel, ComponentJob):
         )
 
 
+class EvaluationLogChunk(ComponentJobLogChunk):
+    job = models.ForeignKey(
+        Evaluation, on_delete=models.CASCADE, related_name="log_chunks"
+    )
+
+    class Meta(ComponentJobLogChunk.Meta):
+        unique_together = (("job", "sequence"),)
+
+
 class EvaluationUserObjectPermission(UserObjectPermissionBase):
     content_object = models.ForeignKey(Evaluation, on_delete=models.CASCADE)
 
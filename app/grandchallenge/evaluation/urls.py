@@ -15,6 +15,7 @@ from grandchallenge.evaluation.views import (
     EvaluationGroundTruthUpdate,
     EvaluationGroundTruthVersionManagement,
     EvaluationList,
+    EvaluationLogs,
     EvaluationUpdate,
     LeaderboardDetail,
     LeaderboardRedirect,
@@ -36,6 +37,7 @@ urlpatterns = [
     path("<uuid:pk>/", EvaluationDetail.as_view(), name="detail"),
     # UUID should be matched before slugs
     path("<uuid:pk>/update/", EvaluationUpdate.as_view(), name="update"),
+    path("<uuid:pk>/logs/", EvaluationLogs.as_view(), name="logs"),
     path("phase/create/", PhaseCreate.as_view(), name="phase-create"),
     path(
         "configure-algorithm-phases/",
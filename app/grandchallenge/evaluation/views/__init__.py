@@ -28,6 +28,7 @@ from grandchallenge.algorithms.forms import AlgorithmForPhaseForm
 from grandchallenge.algorithms.models import Algorithm, Job
 from grandchallenge.archives.models import Archive
 from grandchallenge.components.models import ImportStatusChoices
+from grandchallenge.components.views import JobLogsBaseView
 from grandchallenge.core.fixtures import create_uploaded_image
 from grandchallenge.core.forms import UserFormKwargsMixin
 from grandchallenge.core.guardian import (
@@ -772,6 +773,11 @@ class LeaderboardDetail(TeamContextMixin, PaginatedTableListView):
             return queryset
 
 
+class EvaluationLogs(LoginRequiredMixin, JobLogsBaseView):
+    model = Evaluation
+    permission_required = "change_evaluation"
+
+
 class EvaluationUpdate(
     LoginRequiredMixin,
     ObjectPermissionRequiredMixin,
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.13 on 2026-10-19 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "notifications",
+            "0005_followgroupobjectpermission_followuserobjectpermission_notificationgroupobjectpermission_notificatio",
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "read", "created"],
+                name="notificatio_user_id_682394_idx",
+            ),
+        ),
+    ]
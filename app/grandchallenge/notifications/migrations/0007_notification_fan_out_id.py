@@ -0,0 +1,30 @@
+# Generated by Django 4.2.13 on 2026-10-19 15:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0006_notification_user_read_created_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="fan_out_id",
+            field=models.UUIDField(
+                editable=False,
+                help_text="The fan out of the event that created this notification",
+                null=True,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notification",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("fan_out_id__isnull", False)),
+                fields=("fan_out_id", "user"),
+                name="unique_fan_out_notification",
+            ),
+        ),
+    ]
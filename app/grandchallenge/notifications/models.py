@@ -1,18 +1,21 @@
-from actstream.actions import is_following
+from uuid import uuid4
+
 from actstream.models import Follow, followers
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.humanize.templatetags.humanize import naturaltime
-from django.contrib.sites.models import Site
 from django.db import models
+from django.db.models import Q
+from django.db.transaction import on_commit
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from guardian.models import GroupObjectPermissionBase, UserObjectPermissionBase
 from guardian.shortcuts import assign_perm
 
 from grandchallenge.core.models import UUIDModel
-from grandchallenge.profiles.models import NotificationEmailOptions
 from grandchallenge.profiles.templatetags.profiles import user_profile_link
 from grandchallenge.subdomains.utils import reverse
 
@@ -119,6 +122,22 @@ class Notification(UUIDModel):
         "action_object_content_type", "action_object_object_id"
     )
 
+    fan_out_id = models.UUIDField(
+        null=True,
+        editable=False,
+        help_text="The fan out of the event that created this notification",
+    )
+
+    class Meta(UUIDModel.Meta):
+        indexes = [models.Index(fields=["user", "read", "created"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fan_out_id", "user"],
+                condition=Q(fan_out_id__isnull=False),
+                name="unique_fan_out_notification",
+            )
+        ]
+
     def __str__(self):
         return f"Notification for {self.user}"
 
@@ -135,6 +154,30 @@ class Notification(UUIDModel):
         assign_perm("delete_notification", self.user, self)
         assign_perm("change_notification", self.user, self)
 
+    @staticmethod
+    def assign_permissions_in_bulk(*, notifications):
+        """Assigns the permissions of save() to a set of new notifications"""
+        permissions = Permission.objects.filter(
+            content_type=ContentType.objects.get_for_model(Notification),
+            codename__in=[
+                "view_notification",
+                "delete_notification",
+                "change_notification",
+            ],
+        )
+
+        NotificationUserObjectPermission.objects.bulk_create(
+            [
+                NotificationUserObjectPermission(
+                    content_object=notification,
+                    user_id=notification.user_id,
+                    permission=permission,
+                )
+                for notification in notifications
+                for permission in permissions
+            ]
+        )
+
     @staticmethod
     def send(
         *,
@@ -146,32 +189,48 @@ class Notification(UUIDModel):
         description=None,
         context_class=None,
     ):
-        receivers = Notification.get_receivers(
-            action_object=action_object, actor=actor, kind=kind, target=target
+        """
+        Sends a notification to the receivers of an event
+
+        The receivers are resolved and their notifications are created by
+        a task once the current transaction has been committed. The task is
+        given a unique fan out id so that a redelivered task does not create
+        the notifications again.
+        """
+        from grandchallenge.notifications.tasks import fan_out_notification
+
+        on_commit(
+            fan_out_notification.signature(
+                kwargs={
+                    "fan_out_id": str(uuid4()),
+                    "kind": kind,
+                    "message": message,
+                    "description": description,
+                    "context_class": context_class,
+                    **{
+                        name: (
+                            None
+                            if obj is None
+                            else (
+                                ContentType.objects.get_for_model(obj).pk,
+                                str(obj.pk),
+                            )
+                        )
+                        for name, obj in (
+                            ("actor", actor),
+                            ("action_object", action_object),
+                            ("target", target),
+                        )
+                    },
+                }
+            ).apply_async
         )
-        site = Site.objects.get_current()
-
-        for receiver in receivers:
-            Notification.objects.create(
-                user=receiver,
-                type=kind,
-                message=message,
-                actor=actor,
-                action_object=action_object,
-                target=target,
-                description=description,
-                context_class=context_class,
-            )
-            if (
-                receiver.user_profile.notification_email_choice
-                == NotificationEmailOptions.INSTANT
-            ):
-                receiver.user_profile.dispatch_unread_notifications_email(
-                    site=site, unread_notification_count=1
-                )
 
     @staticmethod
     def get_receivers(*, kind, actor, action_object, target):  # noqa: C901
+        """Returns the queryset of users that receive a notification"""
+        users = get_user_model().objects.all()
+
         if (
             kind == NotificationType.NotificationTypeChoices.FORUM_POST
             or kind
@@ -181,53 +240,49 @@ class Notification(UUIDModel):
             or kind == NotificationType.NotificationTypeChoices.REQUEST_UPDATE
         ):
             if actor:
-                return {
-                    follower
-                    for follower in followers(target)
-                    if follower != actor
-                }
+                return followers(target).exclude(pk=actor.pk)
             else:
                 return followers(target)
         elif (
             kind == NotificationType.NotificationTypeChoices.ACCESS_REQUEST
             and target._meta.model_name == "algorithm"
         ):
-            return {
-                follower
-                for follower in followers(target, flag="access_request")
-                if follower != actor
-            }
+            receivers = followers(target, flag="access_request")
+            if actor:
+                return receivers.exclude(pk=actor.pk)
+            else:
+                return receivers
         elif kind == NotificationType.NotificationTypeChoices.NEW_ADMIN:
-            return {action_object}
+            return users.filter(pk=action_object.pk)
         elif (
             kind == NotificationType.NotificationTypeChoices.EVALUATION_STATUS
         ):
-            receivers = {
-                admin
-                for admin in target.challenge.get_admins()
-                if is_following(admin, target)
-            }
-            if actor and is_following(actor, target):
-                receivers.add(actor)
-            return receivers
+            following = Follow.objects.for_object(target).values("user")
+            receivers = Q(pk__in=target.challenge.get_admins().values("pk"))
+            if actor:
+                receivers |= Q(pk=actor.pk)
+            return users.filter(receivers, pk__in=following)
         elif kind == NotificationType.NotificationTypeChoices.MISSING_METHOD:
-            return {
-                admin
-                for admin in target.challenge.get_admins()
-                if is_following(admin, target)
-            }
+            return users.filter(
+                pk__in=target.challenge.get_admins().values("pk")
+            ).filter(pk__in=Follow.objects.for_object(target).values("user"))
         elif kind == NotificationType.NotificationTypeChoices.JOB_STATUS:
-            if actor and is_following(actor, target, flag="job-active"):
-                return {actor}
+            if actor:
+                return users.filter(
+                    pk=actor.pk,
+                    pk__in=Follow.objects.for_object(target)
+                    .filter(flag="job-active")
+                    .values("user"),
+                )
             else:
-                return set()
+                return users.none()
         elif (
             kind
             == NotificationType.NotificationTypeChoices.IMAGE_IMPORT_STATUS
         ):
             return followers(action_object)
         elif kind == NotificationType.NotificationTypeChoices.FILE_COPY_STATUS:
-            return {actor}
+            return users.filter(pk=actor.pk)
         else:
             raise RuntimeError(f"Unhandled notification type {kind!r}")
 
@@ -1,45 +1,212 @@
+import logging
+import time
+from collections import defaultdict
+
 from celery import shared_task
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.db.models import Count, F, Q
+from django.db.transaction import on_commit
+from django.utils.timezone import now
 
+from grandchallenge.notifications.models import Notification
 from grandchallenge.profiles.models import (
     NotificationEmailOptions,
     UserProfile,
+    dispatch_unread_notifications_emails,
+    send_unread_notifications_email_batch,
 )
 
+logger = logging.getLogger(__name__)
+
+DIGEST_EMAIL_BATCH_SIZE = 1000
+
+
+def _get_object(*, reference):
+    if reference is None:
+        return None
+
+    content_type_pk, object_pk = reference
+
+    return ContentType.objects.get_for_id(
+        content_type_pk
+    ).get_object_for_this_type(pk=object_pk)
+
 
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
-def send_unread_notification_emails():
-    site = Site.objects.get_current()
+def fan_out_notification(
+    *,
+    kind,
+    fan_out_id=None,
+    actor,
+    action_object,
+    target,
+    message,
+    description,
+    context_class,
+):
+    """
+    Creates the notifications of an event for all of its receivers
+
+    The objects of the event are referenced by their content type and
+    primary key. The notifications and their permissions are created in
+    bulk, and the instant emails are sent by a separate task. Receivers that
+    already have a notification from this fan out are skipped, so a
+    redelivered task does not notify or email them again.
+    """
+    start = time.monotonic()
+
+    try:
+        objects = {
+            "actor": _get_object(reference=actor),
+            "action_object": _get_object(reference=action_object),
+            "target": _get_object(reference=target),
+        }
+    except ObjectDoesNotExist:
+        logger.warning(f"Not sending {kind} notification, object deleted")
+        return
+
+    receiver_pks = list(
+        Notification.get_receivers(kind=kind, **objects).values_list(
+            "pk", flat=True
+        )
+    )
+    resolved = time.monotonic()
+
+    with transaction.atomic():
+        if fan_out_id is not None:
+            notified_pks = {
+                *Notification.objects.filter(
+                    fan_out_id=fan_out_id
+                ).values_list("user_id", flat=True)
+            }
+            receiver_pks = [
+                pk for pk in receiver_pks if pk not in notified_pks
+            ]
+
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_pk,
+                    type=kind,
+                    message=message,
+                    description=description,
+                    context_class=context_class,
+                    fan_out_id=fan_out_id,
+                    **objects,
+                )
+                for user_pk in receiver_pks
+            ]
+        )
+        Notification.assign_permissions_in_bulk(notifications=notifications)
+
+        instant_email_user_pks = [
+            str(pk)
+            for pk in UserProfile.objects.filter(
+                user__pk__in=receiver_pks,
+                notification_email_choice=NotificationEmailOptions.INSTANT,
+            ).values_list("user__pk", flat=True)
+        ]
+
+        if instant_email_user_pks:
+            on_commit(
+                send_instant_notification_emails.signature(
+                    kwargs={"user_pks": instant_email_user_pks}
+                ).apply_async
+            )
+
+    end = time.monotonic()
 
-    profiles = (
-        UserProfile.objects.filter(
-            notification_email_choice=NotificationEmailOptions.DAILY_SUMMARY,
+    logger.info(
+        f"Sent {kind} notification to {len(receiver_pks)} users in "
+        f"{end - start:.3f}s (receivers {resolved - start:.3f}s, "
+        f"notifications {end - resolved:.3f}s)"
+    )
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
+def send_instant_notification_emails(*, user_pks):
+    """Emails the users that receive their notifications immediately"""
+    profiles = UserProfile.objects.filter(
+        user__pk__in=user_pks,
+        notification_email_choice=NotificationEmailOptions.INSTANT,
+    ).select_related("user")
+
+    dispatch_unread_notifications_emails(
+        site=Site.objects.get_current(),
+        profiles=list(profiles),
+        unread_notification_count=1,
+    )
+
+
+def get_daily_digest_unread_notification_counts(*, until):
+    """
+    Returns the user pks and counts of new unread notifications for the
+    users that receive a daily summary, ordered by count
+
+    The counts are grouped on the notifications rather than on the users,
+    so only the unread notifications of each user are read from the index.
+    """
+    return (
+        Notification.objects.filter(
+            read=False,
+            created__lte=until,
             user__is_active=True,
+            user__user_profile__notification_email_choice=NotificationEmailOptions.DAILY_SUMMARY,
         )
-        .annotate(
-            unread_notification_count=Count(
-                "user__notification__pk",
-                filter=Q(user__notification__read=False)
-                & (
-                    Q(notification_email_last_sent_at__isnull=True)
-                    | Q(
-                        user__notification__created__gt=F(
-                            "notification_email_last_sent_at"
-                        )
-                    )
-                ),
-                distinct=True,
+        .filter(
+            Q(user__user_profile__notification_email_last_sent_at__isnull=True)
+            | Q(
+                created__gt=F(
+                    "user__user_profile__notification_email_last_sent_at"
+                )
             )
         )
-        .filter(unread_notification_count__gt=0)
-        .distinct()
-        .select_related("user")
+        .values("user")
+        .annotate(unread_notification_count=Count("pk"))
+        .order_by("unread_notification_count", "user")
+        .values_list("user", "unread_notification_count")
     )
 
-    for profile in profiles.iterator():
-        profile.dispatch_unread_notifications_email(
-            site=site,
-            unread_notification_count=profile.unread_notification_count,
-        )
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
+def send_unread_notification_emails():
+    """
+    Sends the daily summary of new unread notifications
+
+    The users that have the same number of new notifications receive the
+    same email, so these are rendered and sent in batches.
+    """
+    site = Site.objects.get_current()
+    sent_at = now()
+
+    user_pks_by_count = defaultdict(list)
+
+    for user_pk, count in get_daily_digest_unread_notification_counts(
+        until=sent_at
+    ).iterator():
+        user_pks_by_count[count].append(user_pk)
+
+    UserProfile.objects.filter(
+        user__pk__in=[
+            user_pk
+            for user_pks in user_pks_by_count.values()
+            for user_pk in user_pks
+        ]
+    ).update(notification_email_last_sent_at=sent_at)
+
+    users = get_user_model().objects.select_related("user_profile")
+
+    for count, user_pks in user_pks_by_count.items():
+        for idx in range(0, len(user_pks), DIGEST_EMAIL_BATCH_SIZE):
+            send_unread_notifications_email_batch(
+                site=site,
+                users=users.filter(
+                    pk__in=user_pks[idx : idx + DIGEST_EMAIL_BATCH_SIZE]
+                ).order_by("pk"),
+                unread_notification_count=count,
+            )
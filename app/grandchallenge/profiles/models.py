@@ -180,30 +180,10 @@ class UserProfile(models.Model):
         self, *, site, unread_notification_count
     ):
         self.notification_email_last_sent_at = now()
-        self.save(update_fields=["notification_email_last_sent_at"])
-
-        subject = format_html(
-            ("You have {unread_notification_count} new notification{suffix}"),
-            unread_notification_count=unread_notification_count,
-            suffix=pluralize(unread_notification_count),
-        )
-
-        msg = format_html(
-            (
-                "You have {unread_notification_count} new notification{suffix}.\n\n"
-                "Read and manage your notifications [here]({url})."
-            ),
-            unread_notification_count=unread_notification_count,
-            suffix=pluralize(unread_notification_count),
-            url=reverse("notifications:list"),
-        )
-
-        send_standard_email_batch(
+        dispatch_unread_notifications_emails(
             site=site,
-            subject=subject,
-            markdown_message=msg,
-            recipients=[self.user],
-            subscription_type=EmailSubscriptionTypes.NOTIFICATION,
+            profiles=[self],
+            unread_notification_count=unread_notification_count,
         )
 
     def dispatch_unread_direct_messages_email(
@@ -212,36 +192,92 @@ class UserProfile(models.Model):
         self.unread_messages_email_last_sent_at = now()
         self.save(update_fields=["unread_messages_email_last_sent_at"])
 
-        new_sender_first_names = [s.first_name for s in new_senders]
-
-        subject = format_html(
-            (
-                "You have {new_unread_message_count} new message{suffix} "
-                "from {new_senders}"
-            ),
+        send_unread_direct_messages_email_batch(
+            site=site,
+            users=[self.user],
             new_unread_message_count=new_unread_message_count,
-            suffix=pluralize(new_unread_message_count),
-            new_senders=oxford_comma(new_sender_first_names),
+            new_senders=new_senders,
         )
 
-        msg = format_html(
-            (
-                "You have {new_unread_message_count} new message{suffix} from {new_senders}.\n\n"
-                "To read and manage your messages, click [here]({url})."
-            ),
-            new_unread_message_count=new_unread_message_count,
-            suffix=pluralize(new_unread_message_count),
-            new_senders=oxford_comma(new_sender_first_names),
-            url=reverse("direct-messages:conversation-list"),
-        )
 
-        send_standard_email_batch(
-            site=site,
-            subject=subject,
-            markdown_message=msg,
-            recipients=[self.user],
-            subscription_type=EmailSubscriptionTypes.NOTIFICATION,
-        )
+def dispatch_unread_notifications_emails(
+    *, site, profiles, unread_notification_count
+):
+    """Sends the same unread notifications email to a batch of users"""
+    UserProfile.objects.filter(
+        pk__in=[profile.pk for profile in profiles]
+    ).update(notification_email_last_sent_at=now())
+
+    send_unread_notifications_email_batch(
+        site=site,
+        users=[profile.user for profile in profiles],
+        unread_notification_count=unread_notification_count,
+    )
+
+
+def send_unread_notifications_email_batch(
+    *, site, users, unread_notification_count
+):
+    """Renders and sends one unread notifications email to each user"""
+    subject = format_html(
+        ("You have {unread_notification_count} new notification{suffix}"),
+        unread_notification_count=unread_notification_count,
+        suffix=pluralize(unread_notification_count),
+    )
+
+    msg = format_html(
+        (
+            "You have {unread_notification_count} new notification{suffix}.\n\n"
+            "Read and manage your notifications [here]({url})."
+        ),
+        unread_notification_count=unread_notification_count,
+        suffix=pluralize(unread_notification_count),
+        url=reverse("notifications:list"),
+    )
+
+    send_standard_email_batch(
+        site=site,
+        subject=subject,
+        markdown_message=msg,
+        recipients=users,
+        subscription_type=EmailSubscriptionTypes.NOTIFICATION,
+    )
+
+
+def send_unread_direct_messages_email_batch(
+    *, site, users, new_unread_message_count, new_senders
+):
+    """Renders and sends one unread direct messages email to each user"""
+    new_sender_first_names = [s.first_name for s in new_senders]
+
+    subject = format_html(
+        (
+            "You have {new_unread_message_count} new message{suffix} "
+            "from {new_senders}"
+        ),
+        new_unread_message_count=new_unread_message_count,
+        suffix=pluralize(new_unread_message_count),
+        new_senders=oxford_comma(new_sender_first_names),
+    )
+
+    msg = format_html(
+        (
+            "You have {new_unread_message_count} new message{suffix} from {new_senders}.\n\n"
+            "To read and manage your messages, click [here]({url})."
+        ),
+        new_unread_message_count=new_unread_message_count,
+        suffix=pluralize(new_unread_message_count),
+        new_senders=oxford_comma(new_sender_first_names),
+        url=reverse("direct-messages:conversation-list"),
+    )
+
+    send_standard_email_batch(
+        site=site,
+        subject=subject,
+        markdown_message=msg,
+        recipients=users,
+        subscription_type=EmailSubscriptionTypes.NOTIFICATION,
+    )
 
 
 class UserProfileUserObjectPermission(UserObjectPermissionBase):
@@ -1,3 +1,5 @@
+from functools import cache
+
 from actstream.models import Follow
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -50,7 +52,10 @@ from grandchallenge.core.utils.access_requests import (
     AccessRequestHandlingOptions,
     process_access_request,
 )
-from grandchallenge.core.validators import JSONValidator
+from grandchallenge.core.validators import (
+    JSONValidator,
+    inline_schema_definitions,
+)
 from grandchallenge.core.vendored.django.validators import StepValueValidator
 from grandchallenge.hanging_protocols.models import (
     HangingProtocolMixin,
@@ -1164,6 +1169,21 @@ IMAGE_PORT_TO_VIEWPORT_NAME = {
 }
 
 
+@cache
+def get_answer_type_validator(*, answer_type, allow_null):
+    """The validator of answers of an answer type"""
+    allowed_types = [{"$ref": f"#/definitions/{answer_type}"}]
+
+    if allow_null:
+        allowed_types.append({"$ref": "#/definitions/null"})
+
+    return JSONValidator(
+        schema=inline_schema_definitions(
+            schema={**ANSWER_TYPE_SCHEMA, "anyOf": allowed_types}
+        )
+    )
+
+
 class Question(UUIDModel, OverlaySegmentsMixin):
     AnswerType = AnswerType
     ImagePort = ImagePort
@@ -1570,18 +1590,13 @@ class Question(UUIDModel, OverlaySegmentsMixin):
         if self.answer_type == Question.AnswerType.HEADING:  # Never valid
             return False
 
-        allowed_types = [{"$ref": f"#/definitions/{self.answer_type}"}]
-
-        if self.empty_answer_value is None:
-            allowed_types.append({"$ref": "#/definitions/null"})
+        validator = get_answer_type_validator(
+            answer_type=self.answer_type,
+            allow_null=self.empty_answer_value is None,
+        )
 
         try:
-            return (
-                JSONValidator(
-                    schema={**ANSWER_TYPE_SCHEMA, "anyOf": allowed_types}
-                )(answer)
-                is None
-            )
+            return validator(answer) is None
         except ValidationError:
             return False
         except Unresolvable:
@@ -10,6 +10,9 @@ from django.db.transaction import on_commit
 from django.dispatch import receiver
 
 from grandchallenge.cases.models import Image
+from grandchallenge.cases.tasks import (
+    schedule_viewer_groups_permissions_update,
+)
 from grandchallenge.reader_studies.models import Answer, DisplaySet
 from grandchallenge.reader_studies.tasks import add_scores_for_display_set
 
@@ -28,32 +31,27 @@ def update_permissions_on_display_set_changed(
         if pk_set is None:
             # When using a _clear action, pk_set is None
             # https://docs.djangoproject.com/en/2.2/ref/signals/#m2m-changed
-            images = [
-                civ.image
-                for civ in instance.values.filter(image__isnull=False)
-            ]
+            images = Image.objects.filter(
+                componentinterfacevalue__in=instance.values.all()
+            )
         else:
             images = Image.objects.filter(
                 componentinterfacevalue__pk__in=pk_set
             )
 
-    def update_permissions():
-        for image in images:
-            image.update_viewer_groups_permissions()
-
-    on_commit(update_permissions)
+    schedule_viewer_groups_permissions_update(
+        image_pks=images.values_list("pk", flat=True)
+    )
 
 
 @receiver(pre_delete, sender=DisplaySet)
 @receiver(post_save, sender=DisplaySet)
 def update_view_image_permissions(*_, instance: DisplaySet, **__):
-    images = [civ.image for civ in instance.values.filter(image__isnull=False)]
-
-    def update_permissions():
-        for image in images:
-            image.update_viewer_groups_permissions()
-
-    on_commit(update_permissions)
+    schedule_viewer_groups_permissions_update(
+        image_pks=instance.values.filter(image__isnull=False).values_list(
+            "image", flat=True
+        )
+    )
 
 
 @receiver(m2m_changed, sender=DisplaySet.values.through)
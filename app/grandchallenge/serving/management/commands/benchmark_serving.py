@@ -0,0 +1,90 @@
+import statistics
+import time
+from urllib.parse import urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from grandchallenge.cases.models import Image
+from grandchallenge.serving.views import image_file_names_cache_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the latency and number of queries of serving the files "
+        "of a stored image, with and without the permission cache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("image", type=str, help="The pk of the image")
+        parser.add_argument(
+            "username", type=str, help="The user that views the image"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="The number of requests to make in each phase",
+        )
+
+    def handle(self, *args, **options):
+        image = Image.objects.get(pk=options["image"])
+        user = get_user_model().objects.get(username=options["username"])
+        urls = [urlparse(f.file.url).path for f in image.files.all()]
+
+        if not urls:
+            raise CommandError("The image does not have any files")
+
+        factory = RequestFactory()
+        cache_key = image_file_names_cache_key(
+            user_pk=user.pk, image_pk=image.pk
+        )
+
+        # The download records of the benchmark are not kept
+        with override_settings(SERVING_BUFFER_DOWNLOADS=False):
+            with transaction.atomic():
+                for phase, clear_cache in (("cold", True), ("warm", False)):
+                    durations = []
+
+                    with CaptureQueriesContext(connection) as queries:
+                        for idx in range(options["requests"]):
+                            if clear_cache:
+                                cache.delete(cache_key)
+
+                            url = urls[idx % len(urls)]
+                            match = resolve(url)
+                            request = factory.get(url)
+                            request.user = user
+
+                            start = time.monotonic()
+                            response = match.func(request, **match.kwargs)
+                            durations.append(time.monotonic() - start)
+
+                            if response.status_code not in {200, 302}:
+                                raise CommandError(
+                                    f"Unexpected response {response}"
+                                )
+
+                    self._report(
+                        phase=phase,
+                        durations=durations,
+                        n_queries=len(queries),
+                    )
+
+                transaction.set_rollback(True)
+
+    def _report(self, *, phase, durations, n_queries):
+        milliseconds = sorted(d * 1000 for d in durations)
+        p95 = milliseconds[int(0.95 * (len(milliseconds) - 1))]
+
+        self.stdout.write(
+            f"{phase}: {len(durations) / sum(durations):.0f} requests/s, "
+            f"mean {statistics.mean(milliseconds):.2f} ms, "
+            f"p95 {p95:.2f} ms, "
+            f"{n_queries / len(durations):.1f} queries/request"
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.13 on 2026-10-19 11:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "serving",
+            "0003_alter_download_unique_together_remove_download_count",
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="download",
+            name="created",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils.timezone import now
 
 from grandchallenge.cases.models import Image
 from grandchallenge.challenges.models import ChallengeRequest
@@ -11,7 +12,8 @@ from grandchallenge.workstations.models import Feedback
 class Download(models.Model):
     """Tracks who downloaded objects."""
 
-    created = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add as buffered downloads are created later
+    created = models.DateTimeField(default=now, editable=False)
     modified = models.DateTimeField(auto_now=True)
 
     creator = models.ForeignKey(
@@ -0,0 +1,83 @@
+import json
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+from redis.exceptions import LockError
+
+from grandchallenge.core.cache import _cache_key_from_method
+from grandchallenge.serving.models import Download
+
+logger = logging.getLogger(__name__)
+
+DOWNLOADS_BUFFER_KEY = "serving.downloads"
+
+
+def buffer_download(**kwargs):
+    """
+    Store a download record to be created later
+
+    The keyword arguments are the primary keys of the related objects,
+    e.g. ``creator_id`` and ``image_id``.
+    """
+    record = {
+        **{key: str(value) for key, value in kwargs.items()},
+        "created": now().isoformat(),
+    }
+    get_redis_connection("default").rpush(
+        DOWNLOADS_BUFFER_KEY, json.dumps(record)
+    )
+
+
+def _create_downloads(*, records):
+    downloads = [
+        Download(**{**record, "created": parse_datetime(record["created"])})
+        for record in records
+    ]
+
+    try:
+        with transaction.atomic():
+            Download.objects.bulk_create(downloads)
+    except IntegrityError:
+        # Some of the related objects have been deleted since
+        for download in downloads:
+            try:
+                with transaction.atomic():
+                    download.save()
+            except IntegrityError:
+                logger.warning(f"Could not create download {download!r}")
+
+
+@shared_task(
+    **settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"],
+    ignore_result=True,
+)
+def create_buffered_downloads():
+    """
+    Creates the buffered download records in batches
+
+    The records are only removed from the buffer once they have been
+    created, the cache lock ensures that there is only one consumer.
+    """
+    connection = get_redis_connection("default")
+    batch_size = settings.SERVING_DOWNLOADS_BATCH_SIZE
+
+    try:
+        with cache.lock(
+            _cache_key_from_method(create_buffered_downloads),
+            timeout=settings.CELERY_TASK_TIME_LIMIT,
+            blocking_timeout=1,
+        ):
+            while records := connection.lrange(
+                DOWNLOADS_BUFFER_KEY, 0, batch_size - 1
+            ):
+                _create_downloads(records=[json.loads(r) for r in records])
+                connection.ltrim(DOWNLOADS_BUFFER_KEY, len(records), -1)
+    except LockError as error:
+        logger.info(f"Could not acquire lock: {error}")
+        return
@@ -1,29 +1,49 @@
+import mimetypes
 import posixpath
 
 from django.conf import settings
-from django.core.exceptions import MultipleObjectsReturned, PermissionDenied
-from django.http import Http404, HttpResponseRedirect
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.utils._os import safe_join
 from guardian.utils import get_anonymous_user
 from knox.auth import TokenAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
-from grandchallenge.cases.models import Image
+from grandchallenge.cases.models import Image, ImageFile
+from grandchallenge.cases.tiles import read_packed_tile
 from grandchallenge.challenges.models import ChallengeRequest
-from grandchallenge.components.models import ComponentInterfaceValue
-from grandchallenge.core.guardian import get_objects_for_user
+from grandchallenge.components.models import (
+    ComponentInterfaceValue,
+    get_viewable_component_interface_values,
+)
 from grandchallenge.core.storage import internal_protected_s3_storage
 from grandchallenge.evaluation.models import Submission
 from grandchallenge.serving.models import Download
+from grandchallenge.serving.tasks import buffer_download
 from grandchallenge.workstations.models import Feedback
 
 
-def protected_storage_redirect(*, name, **kwargs):
+def protected_storage_redirect(*, name, check_exists=True, **kwargs):
+    """
+    Redirects to an object in protected storage and records the download
+
+    Parameters
+    ----------
+    name
+        The name of the object in storage
+    check_exists
+        Whether to check that the object exists with a HEAD request, this
+        can be skipped if the name is known to refer to a stored file
+    kwargs
+        The creator of the download and the primary key of the object that
+        is downloaded, see ``_create_download``
+    """
     _create_download(**kwargs)
 
     # Get the storage with the internal redirect and auth. This will prepend
     # settings.AWS_S3_ENDPOINT_URL to the url
-    if not internal_protected_s3_storage.exists(name=name):
+    if check_exists and not internal_protected_s3_storage.exists(name=name):
         raise Http404("File not found.")
 
     if settings.PROTECTED_S3_STORAGE_USE_CLOUDFRONT:
@@ -40,38 +60,150 @@ def protected_storage_redirect(*, name, **kwargs):
 def _create_download(
     *,
     creator,
-    image=None,
-    submission=None,
-    component_interface_value=None,
-    challenge_request=None,
-    feedback=None,
+    image_pk=None,
+    submission_pk=None,
+    component_interface_value_pk=None,
+    challenge_request_pk=None,
+    feedback_pk=None,
 ):
     if creator.is_anonymous:
         creator = get_anonymous_user()
 
-    kwargs = {"creator": creator}
+    kwargs = {"creator_id": creator.pk}
 
-    if image is not None:
-        kwargs["image"] = image
+    if image_pk is not None:
+        kwargs["image_id"] = image_pk
 
-    if submission is not None:
-        kwargs["submission"] = submission
+    if submission_pk is not None:
+        kwargs["submission_id"] = submission_pk
 
-    if component_interface_value is not None:
-        kwargs["component_interface_value"] = component_interface_value
+    if component_interface_value_pk is not None:
+        kwargs["component_interface_value_id"] = component_interface_value_pk
 
-    if challenge_request is not None:
-        kwargs["challenge_request"] = challenge_request
+    if challenge_request_pk is not None:
+        kwargs["challenge_request_id"] = challenge_request_pk
 
-    if feedback is not None:
-        kwargs["feedback"] = feedback
+    if feedback_pk is not None:
+        kwargs["feedback_id"] = feedback_pk
 
     if len(kwargs) != 2:
         raise RuntimeError(
             "creator and only one other foreign key must be set"
         )
 
-    Download.objects.create(**kwargs)
+    if settings.SERVING_BUFFER_DOWNLOADS:
+        buffer_download(**kwargs)
+    else:
+        Download.objects.create(**kwargs)
+
+
+def image_file_names_cache_key(*, user_pk, image_pk):
+    return f"serving.image-file-names.{user_pk}.{image_pk}"
+
+
+def _get_viewable_image_file_names(*, user, image_pk, refresh=False):
+    """
+    Get the names of the files of an image that the user can view
+
+    The result is cached for each user and image, so that the many requests
+    for the files and tiles of an image do not each need to look up the
+    image and check the permissions.
+
+    Raises
+    ------
+    Http404
+        If the image does not exist
+    PermissionDenied
+        If the user cannot view the image
+    """
+    key = image_file_names_cache_key(user_pk=user.pk, image_pk=image_pk)
+    names = None if refresh else cache.get(key)
+
+    if names is None:
+        try:
+            image = Image.objects.get(pk=image_pk)
+        except Image.DoesNotExist:
+            raise Http404("Image not found.")
+
+        if not user.has_perm("view_image", image):
+            raise PermissionDenied
+
+        names = [
+            *ImageFile.objects.filter(image=image).values_list(
+                "file", flat=True
+            )
+        ]
+        cache.set(
+            key, names, timeout=settings.SERVING_PERMISSION_CACHE_TIMEOUT
+        )
+
+    return names
+
+
+def _is_image_file(*, name, image_file_names):
+    """Is the name one of the files, or a tile of a DZI file, of an image"""
+    return any(
+        name == file_name
+        or (
+            file_name.endswith(".dzi")
+            and name.startswith(f"{file_name.removesuffix('.dzi')}_files/")
+        )
+        for file_name in image_file_names
+    )
+
+
+def component_interface_value_file_name_cache_key(
+    *, user_pk, component_interface_value_pk
+):
+    return (
+        "serving.component-interface-value-file-name."
+        f"{user_pk}.{component_interface_value_pk}"
+    )
+
+
+def _get_viewable_component_interface_value_file_name(
+    *, user, component_interface_value_pk
+):
+    """
+    Get the name of the file of a component interface value for a user
+
+    The permissions are resolved in a single query and the result is cached
+    for each user and value, as workstations request the files of many
+    values for each case.
+
+    Raises
+    ------
+    Http404
+        If the component interface value does not exist
+    PermissionDenied
+        If the user cannot view the component interface value
+    """
+    key = component_interface_value_file_name_cache_key(
+        user_pk=user.pk,
+        component_interface_value_pk=component_interface_value_pk,
+    )
+    name = cache.get(key)
+
+    if name is None:
+        try:
+            name = (
+                get_viewable_component_interface_values(
+                    user=user, pks=[component_interface_value_pk]
+                )
+                .values_list("file", flat=True)
+                .get()
+            )
+        except ComponentInterfaceValue.DoesNotExist:
+            if ComponentInterfaceValue.objects.filter(
+                pk=component_interface_value_pk
+            ).exists():
+                raise PermissionDenied
+            else:
+                raise Http404("No ComponentInterfaceValue found.")
+
+        cache.set(key, name, timeout=settings.SERVING_PERMISSION_CACHE_TIMEOUT)
+
+    return name
 
 
 def serve_images(request, *, pk, path, pa="", pb=""):
@@ -79,22 +211,54 @@ def serve_images(request, *, pk, path, pa="", pb=""):
         f"/{settings.IMAGE_FILES_SUBDIRECTORY}", pa, pb, str(pk)
     )
     path = posixpath.normpath(path).lstrip("/")
-    name = safe_join(document_root, path)
-
-    try:
-        image = Image.objects.get(pk=pk)
-    except Image.DoesNotExist:
-        raise Http404("Image not found.")
+    name = safe_join(document_root, path).lstrip("/")
 
     try:
         user, _ = TokenAuthentication().authenticate(request)
     except (AuthenticationFailed, TypeError):
         user = request.user
 
-    if user.has_perm("view_image", image):
-        return protected_storage_redirect(name=name, creator=user, image=image)
+    image_file_names = _get_viewable_image_file_names(user=user, image_pk=pk)
 
-    raise PermissionDenied
+    if not _is_image_file(name=name, image_file_names=image_file_names):
+        # The files of the image could have changed since they were cached
+        image_file_names = _get_viewable_image_file_names(
+            user=user, image_pk=pk, refresh=True
+        )
+
+        if not _is_image_file(name=name, image_file_names=image_file_names):
+            raise Http404("File not found.")
+
+    if settings.CASES_PACK_DZI_TILES and "_files/" in name:
+        response = _packed_tile_response(name=name)
+
+        if response is not None:
+            _create_download(creator=user, image_pk=pk)
+            return response
+
+    # The files of images are known to be in storage
+    return protected_storage_redirect(
+        name=name, check_exists=False, creator=user, image_pk=pk
+    )
+
+
+def _packed_tile_response(*, name):
+    destination, relative_path = name.split("_files/", 1)
+
+    tile = read_packed_tile(
+        storage=internal_protected_s3_storage,
+        destination=f"{destination}_files",
+        relative_path=relative_path,
+    )
+
+    if tile is None:
+        return None
+
+    content_type, _ = mimetypes.guess_type(name)
+
+    return HttpResponse(
+        tile, content_type=content_type or "application/octet-stream"
+    )
 
 
 def serve_submissions(request, *, submission_pk, **_):
@@ -107,7 +271,7 @@ def serve_submissions(request, *, submission_pk, **_):
         return protected_storage_redirect(
             name=submission.predictions_file.name,
             creator=request.user,
-            submission=submission,
+            submission_pk=submission.pk,
         )
 
     raise PermissionDenied
@@ -121,34 +285,15 @@ def serve_component_interface_value(
     except (AuthenticationFailed, TypeError):
         user = request.user
 
-    try:
-        civ = ComponentInterfaceValue.objects.get(
-            pk=component_interface_value_pk
-        )
-    except (MultipleObjectsReturned, ComponentInterfaceValue.DoesNotExist):
-        raise Http404("No ComponentInterfaceValue found.")
-
-    for perm, lookup in (
-        ("algorithms.view_job", "outputs"),
-        ("algorithms.view_job", "inputs"),
-        ("archives.view_archiveitem", "values"),
-        ("reader_studies.view_displayset", "values"),
-    ):
-        # Q | Q filters are very slow, this potentially does several db calls
-        # but each is quite performant. Could be optimised later.
-        if (
-            get_objects_for_user(
-                user=user,
-                perms=perm,
-            )
-            .filter(**{lookup: civ})
-            .exists()
-        ):
-            return protected_storage_redirect(
-                name=civ.file.name, creator=user, component_interface_value=civ
-            )
+    name = _get_viewable_component_interface_value_file_name(
+        user=user, component_interface_value_pk=component_interface_value_pk
+    )
 
-    raise PermissionDenied
+    return protected_storage_redirect(
+        name=name,
+        creator=user,
+        component_interface_value_pk=component_interface_value_pk,
+    )
 
 
 def serve_structured_challenge_submission_form(
@@ -165,7 +310,7 @@ def serve_structured_challenge_submission_form(
         return protected_storage_redirect(
             name=challenge_request.structured_challenge_submission_form.name,
             creator=request.user,
-            challenge_request=challenge_request,
+            challenge_request_pk=challenge_request.pk,
         )
     else:
         raise PermissionDenied
@@ -181,7 +326,7 @@ def serve_session_feedback_screenshot(request, *, feedback_pk, **_):
         return protected_storage_redirect(
             name=feedback.screenshot.name,
             creator=request.user,
-            feedback=feedback,
+            feedback_pk=feedback.pk,
         )
     else:
         raise PermissionDenied
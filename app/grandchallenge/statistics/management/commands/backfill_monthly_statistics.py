@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management import BaseCommand
+
+from grandchallenge.statistics.tasks import update_monthly_statistics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the monthly site statistics, including the closed months "
+        "that are not updated by the periodic task"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=str,
+            default=None,
+            help="Only recompute from this month onwards, e.g. 2024-01",
+        )
+
+    def handle(self, *args, **options):
+        if options["since"] is None:
+            since = None
+        else:
+            since = date.fromisoformat(f"{options['since']}-01")
+
+        update_monthly_statistics(since=since)
+
+        self.stdout.write(self.style.SUCCESS("Monthly statistics updated"))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from grandchallenge.statistics.tasks import (
+    _aggregate_monthly_metric,
+    _monthly_metrics,
+    update_site_statistics_cache,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time taken to aggregate the monthly site statistics "
+        "over all rows and to update them incrementally"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeats",
+            type=int,
+            default=3,
+            help="The number of times each method is run",
+        )
+
+    def handle(self, *args, **options):
+        def full():
+            for metric in _monthly_metrics().values():
+                list(_aggregate_monthly_metric(metric=metric, since=None))
+
+        # The statistics of the benchmark are not kept
+        with transaction.atomic():
+            for name, func in (
+                ("full", full),
+                ("incremental", update_site_statistics_cache),
+            ):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.monotonic()
+                    for _ in range(options["repeats"]):
+                        func()
+                    duration = (time.monotonic() - start) / options["repeats"]
+
+                self.stdout.write(
+                    f"{name}: {duration * 1000:.0f} ms, "
+                    f"{len(queries) / options['repeats']:.0f} queries"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.13 on 2026-10-19 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyStatistic",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("USERS", "Users"),
+                            ("CHALLENGES", "Challenges"),
+                            ("SUBMISSIONS", "Submissions"),
+                            ("ALGORITHMS", "Algorithms"),
+                            ("JOBS", "Jobs"),
+                            ("ARCHIVES", "Archives"),
+                            ("IMAGES", "Images"),
+                            ("READER_STUDIES", "Reader Studies"),
+                            ("ANSWERS", "Answers"),
+                            ("SESSIONS", "Sessions"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "month",
+                    models.DateField(help_text="The first day of the month"),
+                ),
+                (
+                    "facet",
+                    models.JSONField(
+                        help_text="The value of the field that the objects are grouped by",
+                        null=True,
+                    ),
+                ),
+                ("object_count", models.PositiveBigIntegerField()),
+                ("duration_sum", models.DurationField(null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["metric", "month"],
+                        name="statistics__metric_806d85_idx",
+                    )
+                ],
+            },
+        ),
+    ]
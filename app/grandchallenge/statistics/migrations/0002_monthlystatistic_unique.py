@@ -0,0 +1,41 @@
+# Generated by Django 4.2.13 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+def delete_monthly_statistics(apps, _schema_editor):
+    # The rows may contain duplicates and SQL NULL facets. They are
+    # recomputed for all months by the next site statistics update.
+    MonthlyStatistic = apps.get_model(  # noqa: N806
+        "statistics", "MonthlyStatistic"
+    )
+    MonthlyStatistic.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("statistics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_monthly_statistics,
+            migrations.RunPython.noop,
+            elidable=True,
+        ),
+        migrations.AlterField(
+            model_name="monthlystatistic",
+            name="facet",
+            field=models.JSONField(
+                help_text="The value of the field that the objects are grouped by"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="monthlystatistic",
+            constraint=models.UniqueConstraint(
+                fields=("metric", "month", "facet"),
+                name="unique_monthly_statistic",
+            ),
+        ),
+    ]
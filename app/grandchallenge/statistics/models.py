@@ -0,0 +1,41 @@
+from django.db import models
+
+
+class MetricChoices(models.TextChoices):
+    USERS = "USERS", "Users"
+    CHALLENGES = "CHALLENGES", "Challenges"
+    SUBMISSIONS = "SUBMISSIONS", "Submissions"
+    ALGORITHMS = "ALGORITHMS", "Algorithms"
+    JOBS = "JOBS", "Jobs"
+    ARCHIVES = "ARCHIVES", "Archives"
+    IMAGES = "IMAGES", "Images"
+    READER_STUDIES = "READER_STUDIES", "Reader Studies"
+    ANSWERS = "ANSWERS", "Answers"
+    SESSIONS = "SESSIONS", "Sessions"
+
+
+class MonthlyStatistic(models.Model):
+    """
+    The number of objects of a kind that were created in a month
+
+    The rows of closed months are not updated, only the current and
+    previous months are recomputed. The facet is never SQL NULL so that the
+    rows can be upserted, a missing facet is stored as a JSON null.
+    """
+
+    metric = models.CharField(max_length=16, choices=MetricChoices.choices)
+    month = models.DateField(help_text="The first day of the month")
+    facet = models.JSONField(
+        help_text="The value of the field that the objects are grouped by",
+    )
+    object_count = models.PositiveBigIntegerField()
+    duration_sum = models.DurationField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["metric", "month"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["metric", "month", "facet"],
+                name="unique_monthly_statistic",
+            )
+        ]
@@ -1,9 +1,15 @@
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.cache import cache
-from django.db.models import Count, Sum
+from django.db import transaction
+from django.db.models import Count, DateField, JSONField, Sum, Value
+from django.db.models.functions import TruncMonth
+from django.utils.timezone import localdate, make_aware
 
 from grandchallenge.algorithms.models import Algorithm, Job
 from grandchallenge.archives.models import Archive
@@ -11,24 +17,178 @@ from grandchallenge.cases.models import Image
 from grandchallenge.challenges.models import Challenge
 from grandchallenge.evaluation.models import Submission
 from grandchallenge.reader_studies.models import Answer, ReaderStudy
+from grandchallenge.statistics.models import MetricChoices, MonthlyStatistic
 from grandchallenge.workstations.models import Session
 
 
+class _MonthlyMetric(NamedTuple):
+    queryset: object
+    date_field: str = "created"
+    facet: str | None = None
+    duration: str | None = None
+
+
+def _monthly_metrics():
+    return {
+        MetricChoices.USERS: _MonthlyMetric(
+            queryset=get_user_model().objects.filter(
+                is_active=True, last_login__isnull=False
+            ),
+            date_field="date_joined",
+        ),
+        MetricChoices.CHALLENGES: _MonthlyMetric(
+            queryset=Challenge.objects.all(), facet="hidden"
+        ),
+        MetricChoices.SUBMISSIONS: _MonthlyMetric(
+            queryset=Submission.objects.all(), facet="phase__submission_kind"
+        ),
+        MetricChoices.ALGORITHMS: _MonthlyMetric(
+            queryset=Algorithm.objects.all(), facet="public"
+        ),
+        MetricChoices.JOBS: _MonthlyMetric(
+            queryset=Job.objects.with_duration(), duration="duration"
+        ),
+        MetricChoices.ARCHIVES: _MonthlyMetric(
+            queryset=Archive.objects.all(), facet="public"
+        ),
+        MetricChoices.IMAGES: _MonthlyMetric(queryset=Image.objects.all()),
+        MetricChoices.READER_STUDIES: _MonthlyMetric(
+            queryset=ReaderStudy.objects.all(), facet="public"
+        ),
+        MetricChoices.ANSWERS: _MonthlyMetric(queryset=Answer.objects.all()),
+        MetricChoices.SESSIONS: _MonthlyMetric(
+            queryset=Session.objects.all(), duration="maximum_duration"
+        ),
+    }
+
+
+def _aggregate_monthly_metric(*, metric, since):
+    """Counts the objects of a metric per month from a month onwards"""
+    queryset = metric.queryset
+
+    if since is not None:
+        # Filter on the field rather than the month so that its index is used
+        queryset = queryset.filter(
+            **{
+                f"{metric.date_field}__gte": make_aware(
+                    datetime.combine(since, time.min)
+                )
+            }
+        )
+
+    aggregates = {
+        # Rows with a null facet are grouped but not counted
+        "object_count": Count(metric.facet or "pk"),
+    }
+    if metric.duration is not None:
+        aggregates["duration_sum"] = Sum(metric.duration)
+
+    return (
+        queryset.annotate(
+            month=TruncMonth(metric.date_field, output_field=DateField())
+        )
+        .values("month", *([metric.facet] if metric.facet else []))
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+
+def _update_monthly_metric(*, name, metric, since):
+    statistics = {
+        (row["month"], row[metric.facet] if metric.facet else None): row
+        for row in _aggregate_monthly_metric(metric=metric, since=since)
+    }
+
+    with transaction.atomic():
+        existing = MonthlyStatistic.objects.filter(metric=name)
+
+        if since is not None:
+            existing = existing.filter(month__gte=since)
+
+        # Remove the rows of groups that no longer have any objects
+        existing.filter(
+            pk__in=[
+                pk
+                for pk, month, facet in existing.values_list(
+                    "pk", "month", "facet"
+                )
+                if (month, facet) not in statistics
+            ]
+        ).delete()
+
+        MonthlyStatistic.objects.bulk_create(
+            [
+                MonthlyStatistic(
+                    metric=name,
+                    month=month,
+                    # Store a missing facet as a JSON null
+                    facet=Value(facet, output_field=JSONField()),
+                    object_count=row["object_count"],
+                    duration_sum=row.get("duration_sum"),
+                )
+                for (month, facet), row in statistics.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["metric", "month", "facet"],
+            update_fields=["object_count", "duration_sum"],
+        )
+
+
+def update_monthly_statistics(*, since=None):
+    """
+    Recomputes the monthly statistics from the month of ``since`` onwards
+
+    All months are recomputed if ``since`` is None. The rows are upserted,
+    so concurrent updates cannot create duplicate rows.
+    """
+    if since is not None:
+        since = since.replace(day=1)
+
+    for name, metric in _monthly_metrics().items():
+        _update_monthly_metric(name=name, metric=metric, since=since)
+
+
+def get_monthly_statistics():
+    """Returns the rows of each metric ordered by month and facet"""
+    statistics = {name: [] for name in MetricChoices}
+
+    for statistic in MonthlyStatistic.objects.order_by("month").values(
+        "metric", "month", "facet", "object_count", "duration_sum"
+    ):
+        statistics[statistic.pop("metric")].append(statistic)
+
+    for rows in statistics.values():
+        rows.sort(key=lambda row: (row["month"], str(row["facet"])))
+
+    return statistics
+
+
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
 def update_site_statistics_cache():
+    """
+    Updates the site statistics
+
+    Only the monthly statistics of the current and previous month are
+    recomputed, the rows of the closed months are kept. All months of a
+    metric are computed if it does not have any closed months yet.
+    """
+    previous_month = localdate().replace(day=1) - timedelta(days=1)
+    since = previous_month.replace(day=1)
+
+    for name, metric in _monthly_metrics().items():
+        if MonthlyStatistic.objects.filter(
+            metric=name, month__lt=since
+        ).exists():
+            _update_monthly_metric(name=name, metric=metric, since=since)
+        else:
+            # The closed months have not been computed yet
+            _update_monthly_metric(name=name, metric=metric, since=None)
+
     public_challenges = Challenge.objects.filter(hidden=False)
+    monthly = get_monthly_statistics()
 
     stats = {
-        "users": (
-            get_user_model()
-            .objects.filter(is_active=True, last_login__isnull=False)
-            .values(
-                "date_joined__year",
-                "date_joined__month",
-            )
-            .annotate(object_count=Count("date_joined__month"))
-            .order_by("date_joined__year", "date_joined__month")
-        ),
+        "users": monthly[MetricChoices.USERS],
         "countries": (
             get_user_model()
             .objects.exclude(user_profile__country="")
@@ -37,68 +197,15 @@ def update_site_statistics_cache():
             .order_by("-country_count")
             .values_list("user_profile__country", "country_count")
         ),
-        "challenges": (
-            Challenge.objects.values(
-                "hidden", "created__year", "created__month"
-            )
-            .annotate(object_count=Count("hidden"))
-            .order_by("created__year", "created__month", "hidden")
-        ),
-        "submissions": (
-            Submission.objects.values(
-                "phase__submission_kind", "created__year", "created__month"
-            )
-            .annotate(object_count=Count("phase__submission_kind"))
-            .order_by(
-                "created__year", "created__month", "phase__submission_kind"
-            )
-        ),
-        "algorithms": (
-            Algorithm.objects.values(
-                "public", "created__year", "created__month"
-            )
-            .annotate(object_count=Count("public"))
-            .order_by("created__year", "created__month", "public")
-        ),
-        "jobs": (
-            Job.objects.with_duration()
-            .values("created__year", "created__month")
-            .annotate(
-                object_count=Count("created__month"),
-                duration_sum=Sum("duration"),
-            )
-            .order_by("created__year", "created__month", "duration_sum")
-        ),
-        "archives": (
-            Archive.objects.values("public", "created__year", "created__month")
-            .annotate(object_count=Count("public"))
-            .order_by("created__year", "created__month", "public")
-        ),
-        "images": (
-            Image.objects.values("created__year", "created__month")
-            .annotate(object_count=Count("created__month"))
-            .order_by("created__year", "created__month")
-        ),
-        "reader_studies": (
-            ReaderStudy.objects.values(
-                "public", "created__year", "created__month"
-            )
-            .annotate(object_count=Count("public"))
-            .order_by("created__year", "created__month", "public")
-        ),
-        "answers": (
-            Answer.objects.values("created__year", "created__month")
-            .annotate(object_count=Count("created__month"))
-            .order_by("created__year", "created__month")
-        ),
-        "sessions": (
-            Session.objects.values("created__year", "created__month")
-            .annotate(
-                duration_sum=Sum("maximum_duration"),
-                object_count=Count("created__month"),
-            )
-            .order_by("created__year", "created__month")
-        ),
+        "challenges": monthly[MetricChoices.CHALLENGES],
+        "submissions": monthly[MetricChoices.SUBMISSIONS],
+        "algorithms": monthly[MetricChoices.ALGORITHMS],
+        "jobs": monthly[MetricChoices.JOBS],
+        "archives": monthly[MetricChoices.ARCHIVES],
+        "images": monthly[MetricChoices.IMAGES],
+        "reader_studies": monthly[MetricChoices.READER_STUDIES],
+        "answers": monthly[MetricChoices.ANSWERS],
+        "sessions": monthly[MetricChoices.SESSIONS],
         "most_popular_challenge_group": (
             Group.objects.filter(
                 participants_of_challenge__in=public_challenges
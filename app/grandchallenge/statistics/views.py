@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -58,11 +58,7 @@ class StatisticsDetail(TemplateView):
                 "users": bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["date_joined__year"],
-                                datum["date_joined__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Users": datum["object_count"],
                         }
                         for datum in stats["users"]
@@ -82,13 +78,9 @@ class StatisticsDetail(TemplateView):
                 "challenges": stacked_bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Challenges": datum["object_count"],
-                            "Visibility": not datum["hidden"],
+                            "Visibility": not datum["facet"],
                         }
                         for datum in stats["challenges"]
                     ],
@@ -100,13 +92,9 @@ class StatisticsDetail(TemplateView):
                 "submissions": stacked_bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Submissions": datum["object_count"],
-                            "Challenge Type": datum["phase__submission_kind"],
+                            "Challenge Type": datum["facet"],
                         }
                         for datum in stats["submissions"]
                     ],
@@ -121,13 +109,9 @@ class StatisticsDetail(TemplateView):
                 "algorithms": stacked_bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Algorithms": datum["object_count"],
-                            "Visibility": datum["public"],
+                            "Visibility": datum["facet"],
                         }
                         for datum in stats["algorithms"]
                     ],
@@ -139,11 +123,7 @@ class StatisticsDetail(TemplateView):
                 "jobs": bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "Inference Jobs": datum["object_count"],
                         }
                         for datum in stats["jobs"]
@@ -154,11 +134,7 @@ class StatisticsDetail(TemplateView):
                 "job_durations": bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "Inference Hours": (
                                 datum["duration_sum"].total_seconds()
                                 // (60 * 60)
@@ -174,13 +150,9 @@ class StatisticsDetail(TemplateView):
                 "archives": stacked_bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Archives": datum["object_count"],
-                            "Visibility": datum["public"],
+                            "Visibility": datum["facet"],
                         }
                         for datum in stats["archives"]
                     ],
@@ -192,11 +164,7 @@ class StatisticsDetail(TemplateView):
                 "images": bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Images": datum["object_count"],
                         }
                         for datum in stats["images"]
@@ -207,13 +175,9 @@ class StatisticsDetail(TemplateView):
                 "reader_studies": stacked_bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Reader Studies": datum["object_count"],
-                            "Visibility": datum["public"],
+                            "Visibility": datum["facet"],
                         }
                         for datum in stats["reader_studies"]
                     ],
@@ -225,11 +189,7 @@ class StatisticsDetail(TemplateView):
                 "answers": bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "New Answers": datum["object_count"],
                         }
                         for datum in stats["answers"]
@@ -240,11 +200,7 @@ class StatisticsDetail(TemplateView):
                 "sessions": bar(
                     values=[
                         {
-                            "Month": datetime(
-                                datum["created__year"],
-                                datum["created__month"],
-                                1,
-                            ).isoformat(),
+                            "Month": datum["month"].isoformat(),
                             "Total Hours": datum[
                                 "duration_sum"
                             ].total_seconds()
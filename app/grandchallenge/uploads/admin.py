@@ -8,6 +8,7 @@ from grandchallenge.core.admin import (
 from grandchallenge.uploads.models import (
     UserUpload,
     UserUploadGroupObjectPermission,
+    UserUploadStorageUsage,
     UserUploadUserObjectPermission,
 )
 
@@ -18,7 +19,15 @@ class UserUploadAdmin(GuardedModelAdmin):
     list_filter = ("status",)
     ordering = ("-created",)
     search_fields = ("pk", "creator__username", "filename", "s3_upload_id")
-    readonly_fields = ("creator", "status", "s3_upload_id")
+    readonly_fields = ("creator", "status", "s3_upload_id", "size_in_storage")
+
+
+@admin.register(UserUploadStorageUsage)
+class UserUploadStorageUsageAdmin(admin.ModelAdmin):
+    list_display = ("pk", "user", "size_in_storage", "reconciled_at")
+    ordering = ("-size_in_storage",)
+    search_fields = ("user__username",)
+    readonly_fields = ("user", "size_in_storage", "reconciled_at")
 
 
 admin.site.register(UserUploadUserObjectPermission, UserObjectPermissionAdmin)
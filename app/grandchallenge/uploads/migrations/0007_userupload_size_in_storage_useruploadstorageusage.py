@@ -0,0 +1,58 @@
+# Generated by Django 4.2.13 on 2026-10-19 11:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("uploads", "0006_userupload_mimetype"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userupload",
+            name="size_in_storage",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                editable=False,
+                help_text="The number of bytes stored in the storage backend",
+            ),
+        ),
+        migrations.CreateModel(
+            name="UserUploadStorageUsage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "size_in_storage",
+                    models.PositiveBigIntegerField(
+                        default=0,
+                        help_text="The number of bytes in the completed uploads of the user",
+                    ),
+                ),
+                (
+                    "reconciled_at",
+                    models.DateTimeField(editable=False, null=True),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="user_upload_storage_usage",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,10 +1,13 @@
 import os
+from collections import Counter
 
 import boto3
 import magic
 from botocore.config import Config
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 from django.utils.text import get_valid_filename
@@ -81,16 +84,33 @@ class UserUpload(UUIDModel):
     mimetype = models.CharField(
         max_length=255, editable=False, default="application/octet-stream"
     )
+    size_in_storage = models.PositiveBigIntegerField(
+        editable=False,
+        default=0,
+        help_text="The number of bytes stored in the storage backend",
+    )
 
     class Meta(UUIDModel.Meta):
         pass
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._storage_usage_recorded = self.is_completed
+
     def save(self, *args, **kwargs):
         adding = self._state.adding
         if adding:
             self.create_multipart_upload()
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if self.is_completed and not self._storage_usage_recorded:
+                UserUploadStorageUsage.add(
+                    user_pk=self.creator_id,
+                    size_in_storage=self.size_in_storage,
+                )
+                self._storage_usage_recorded = True
 
         if adding:
             self.assign_permissions()
@@ -120,7 +140,7 @@ class UserUpload(UUIDModel):
     def creators_key_prefix(self):
         # Prefix to objects that the user has uploaded
         # Do not change this
-        return f"uploads/{self.creator.pk}/"
+        return f"uploads/{self.creator_id}/"
 
     @property
     def can_upload_more(self):
@@ -136,7 +156,12 @@ class UserUpload(UUIDModel):
         else:
             upload_limit = settings.UPLOADS_MAX_SIZE_UNVERIFIED
 
-        uploaded_size = self.size + self.size_of_creators_completed_uploads
+        uploaded_size = (
+            self.size
+            + UserUploadStorageUsage.get(
+                user_pk=self.creator_id
+            ).size_in_storage
+        )
 
         return uploaded_size < upload_limit
 
@@ -276,6 +301,7 @@ class UserUpload(UUIDModel):
         )
         self.status = self.StatusChoices.COMPLETED
         self.mimetype = self.mimetype_from_file
+        self.size_in_storage = self.completed_size
 
     def abort_multipart_upload(self):
         if self.status != self.StatusChoices.INITIALIZED:
@@ -297,7 +323,7 @@ class UserUpload(UUIDModel):
 
     def copy_object(self, *, to_field, save=True):
         """Copies the object to a Django file field on a model"""
-        copy_s3_object(
+        return copy_s3_object(
             to_field=to_field,
             dest_filename=self.filename,
             src_key=self.key,
@@ -313,10 +339,83 @@ class UserUpload(UUIDModel):
         self._client.delete_object(Bucket=self.bucket, Key=self.key)
         self.status = self.StatusChoices.ABORTED
 
-    def read_object(self):
+    def open_object(self):
+        """Returns the streaming body of the uploaded object"""
         obj = self._client.get_object(Bucket=self.bucket, Key=self.key)
-        body = obj["Body"]
-        return body.read().decode("utf-8")
+        return obj["Body"]
+
+    def read_object(self):
+        return self.open_object().read().decode("utf-8")
+
+
+class UserUploadStorageUsage(models.Model):
+    """
+    The number of bytes stored in the completed uploads of a user
+
+    This is updated when uploads are completed or deleted so that the
+    upload limits can be checked without listing the objects of the user,
+    and is periodically reconciled with the objects in storage.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="user_upload_storage_usage",
+    )
+    size_in_storage = models.PositiveBigIntegerField(
+        default=0,
+        help_text="The number of bytes in the completed uploads of the user",
+    )
+    reconciled_at = models.DateTimeField(null=True, editable=False)
+
+    def __str__(self):
+        return f"{self.user} ({self.size_in_storage} bytes)"
+
+    @classmethod
+    def get(cls, *, user_pk):
+        """Get the storage usage of a user, initialising it from storage"""
+        usage, _ = cls.objects.get_or_create(
+            user_id=user_pk,
+            defaults={
+                "size_in_storage": lambda: sum(
+                    o["Size"]
+                    for o in UserUpload(
+                        creator_id=user_pk
+                    ).get_creators_completed_uploads()
+                ),
+                "reconciled_at": now,
+            },
+        )
+        return usage
+
+    @classmethod
+    def add(cls, *, user_pk, size_in_storage):
+        """Add the size of a completed, or remove a deleted, upload"""
+        updated = cls.objects.filter(user_id=user_pk).update(
+            size_in_storage=Greatest(F("size_in_storage") + size_in_storage, 0)
+        )
+
+        if not updated:
+            # The initial usage is read from storage, which already
+            # includes this change
+            cls.get(user_pk=user_pk)
+
+
+def get_creators_completed_uploads_sizes():
+    """The number of bytes of the completed uploads in storage per user pk"""
+    sizes = Counter()
+
+    paginator = _UPLOADS_CLIENT.get_paginator("list_objects_v2")
+
+    for page in paginator.paginate(
+        Bucket=settings.UPLOADS_S3_BUCKET_NAME, Prefix="uploads/"
+    ):
+        for obj in page.get("Contents", []):
+            # The keys are of the form uploads/<creator pk>/<upload pk>
+            _, creator_pk, *_ = obj["Key"].split("/")
+            sizes[int(creator_pk)] += obj["Size"]
+
+    return sizes
 
 
 @receiver(post_delete, sender=UserUpload)
@@ -328,7 +427,20 @@ def delete_objects_hook(*_, instance: UserUpload, **__):
     bulk_delete.
     """
     if instance.status == UserUpload.StatusChoices.COMPLETED:
+        if instance.size_in_storage:
+            size_in_storage = instance.size_in_storage
+        else:
+            # Uploads completed before their size was recorded have a size
+            # of 0, but are included in the usage as it is read from storage
+            try:
+                size_in_storage = instance.completed_size
+            except instance._client.exceptions.ClientError:
+                size_in_storage = 0
+
         instance.delete_object()
+        UserUploadStorageUsage.add(
+            user_pk=instance.creator_id, size_in_storage=-size_in_storage
+        )
     elif instance.status == UserUpload.StatusChoices.INITIALIZED:
         instance.abort_multipart_upload()
 
@@ -2,10 +2,15 @@ from datetime import timedelta
 
 from celery import shared_task
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator
 from django.utils.timezone import now
 
-from grandchallenge.uploads.models import UserUpload
+from grandchallenge.uploads.models import (
+    UserUpload,
+    UserUploadStorageUsage,
+    get_creators_completed_uploads_sizes,
+)
 
 
 @shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
@@ -24,3 +29,38 @@ def delete_old_user_uploads():
         UserUpload.objects.filter(
             pk__in=page.object_list.values_list("pk", flat=True)
         ).delete()
+
+
+@shared_task(**settings.CELERY_TASK_DECORATOR_KWARGS["acks-late-micro-short"])
+def reconcile_user_upload_storage_usage():
+    """
+    Sets the storage usage of the users to the size of their objects
+
+    Uploads that are completed or deleted while the objects are listed can
+    be missed, these are corrected on the next run.
+    """
+    reconciled_at = now()
+    sizes = get_creators_completed_uploads_sizes()
+    user_pks = {
+        *get_user_model()
+        .objects.filter(pk__in=sizes.keys())
+        .values_list("pk", flat=True)
+    }
+
+    UserUploadStorageUsage.objects.bulk_create(
+        [
+            UserUploadStorageUsage(
+                user_id=user_pk,
+                size_in_storage=sizes[user_pk],
+                reconciled_at=reconciled_at,
+            )
+            for user_pk in user_pks
+        ],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["size_in_storage", "reconciled_at"],
+        batch_size=1000,
+    )
+    UserUploadStorageUsage.objects.exclude(user__in=user_pks).update(
+        size_in_storage=0, reconciled_at=reconciled_at
+    )
@@ -7,21 +7,28 @@ from tests.utils import get_view_for_user
 
 
 @pytest.mark.django_db
-def test_admins_add(client, two_challenge_sets):
+def test_admins_add(
+    client, two_challenge_sets, settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     user = UserFactory()
     assert not two_challenge_sets.challenge_set_1.challenge.is_admin(user=user)
     assert not two_challenge_sets.challenge_set_2.challenge.is_admin(user=user)
     # clear all notifications for easier testing below
     Notification.objects.all().delete()
 
-    response = get_view_for_user(
-        viewname="admins:update",
-        client=client,
-        method=client.post,
-        challenge=two_challenge_sets.challenge_set_1.challenge,
-        data={"user": user.pk, "action": AdminsForm.ADD},
-        user=two_challenge_sets.challenge_set_1.admin,
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        response = get_view_for_user(
+            viewname="admins:update",
+            client=client,
+            method=client.post,
+            challenge=two_challenge_sets.challenge_set_1.challenge,
+            data={"user": user.pk, "action": AdminsForm.ADD},
+            user=two_challenge_sets.challenge_set_1.admin,
+        )
     assert response.status_code == 302
     # adding an admin results in a notification for the new admin only
     assert Notification.objects.count() == 1
@@ -396,6 +396,13 @@ class TestObjectPermissionRequiredViews:
                 j,
                 None,
             ),
+            (
+                "job-logs",
+                {"slug": ai.algorithm.slug, "pk": j.pk},
+                "view_logs",
+                j,
+                None,
+            ),
             (
                 "job-update",
                 {"slug": ai.algorithm.slug, "pk": j.pk},
@@ -1367,3 +1374,45 @@ def test_algorithm_model_version_management(settings, client):
     assert not m2.is_desired_version
     del alg.active_model
     assert not alg.active_model
+
+
+@pytest.mark.django_db
+def test_job_logs_are_streamed(client):
+    job = AlgorithmJobFactory(time_limit=60)
+    user = UserFactory()
+    assign_perm("algorithms.view_logs", user, job)
+
+    job.log_chunks.create(
+        sequence=0,
+        log_stream_name="stream",
+        next_forward_token="f/2",
+        lines=[
+            {
+                "timestamp": "2024-01-01T00:00:00+00:00",
+                "source": "stdout",
+                "message": "hello",
+            },
+            {
+                "timestamp": "2024-01-01T00:00:01+00:00",
+                "source": "stderr",
+                "message": "world",
+            },
+        ],
+    )
+
+    response = get_view_for_user(
+        client=client,
+        viewname="algorithms:job-logs",
+        reverse_kwargs={
+            "slug": job.algorithm_image.algorithm.slug,
+            "pk": job.pk,
+        },
+        user=user,
+    )
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/plain; charset=utf-8"
+    assert b"".join(response.streaming_content).decode("utf-8") == (
+        "2024-01-01T00:00:00+00:00 stdout hello\n"
+        "2024-01-01T00:00:01+00:00 stderr world\n"
+    )
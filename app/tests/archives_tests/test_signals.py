@@ -14,8 +14,11 @@ from tests.factories import ImageFactory
 @pytest.mark.django_db
 @pytest.mark.parametrize("reverse", [True, False])
 def test_archive_item_permissions_signal(
-    client, reverse, django_capture_on_commit_callbacks
+    settings, client, reverse, django_capture_on_commit_callbacks
 ):
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     ai1, ai2 = ArchiveItemFactory.create_batch(2)
     im1, im2, im3, im4 = ImageFactory.create_batch(4)
 
@@ -67,8 +70,11 @@ def test_archive_item_permissions_signal(
 
 @pytest.mark.django_db
 def test_deleting_archive_item_removes_permissions(
-    django_capture_on_commit_callbacks,
+    settings, django_capture_on_commit_callbacks
 ):
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     ai1, ai2 = ArchiveItemFactory.create_batch(2)
     im = ImageFactory()
     civ = ComponentInterfaceValueFactory(image=im)
@@ -98,8 +104,11 @@ def test_deleting_archive_item_removes_permissions(
 
 @pytest.mark.django_db
 def test_changing_archive_updates_permissions(
-    django_capture_on_commit_callbacks,
+    settings, django_capture_on_commit_callbacks
 ):
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     ai = ArchiveItemFactory()
     im = ImageFactory()
     civ = ComponentInterfaceValueFactory(image=im)
@@ -1,9 +1,14 @@
 from pathlib import Path
 
 import pytest
+from django.core.cache import cache
+from guardian.shortcuts import assign_perm
 
 from grandchallenge.archives.models import ArchiveItem
-from grandchallenge.cases.models import RawImageUploadSession
+from grandchallenge.cases.models import (
+    RawImageUploadSession,
+    image_metadata_cache_key,
+)
 from grandchallenge.components.models import ComponentInterface
 from tests.algorithms_tests.factories import (
     AlgorithmFactory,
@@ -16,7 +21,7 @@ from tests.components_tests.factories import (
     ComponentInterfaceFactory,
     ComponentInterfaceValueFactory,
 )
-from tests.factories import ImageFactory, UserFactory
+from tests.factories import ImageFactory, ImageFileFactory, UserFactory
 from tests.reader_studies_tests.factories import (
     DisplaySetFactory,
     ReaderStudyFactory,
@@ -213,8 +218,11 @@ def test_filter_origin_images_api_view(client):
 
 @pytest.mark.django_db
 def test_filter_reader_study_images_api_view(
-    client, django_capture_on_commit_callbacks
+    client, settings, django_capture_on_commit_callbacks
 ):
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     rs1, rs2 = ReaderStudyFactory(), ReaderStudyFactory()
     user = UserFactory()
     rs1.add_editor(user)
@@ -558,3 +566,72 @@ def test_user_upload_to_display_set_without_interface(
         "An interface needs to be defined to upload to a display set."
         in response.json()["non_field_errors"]
     )
+
+
+@pytest.mark.django_db
+def test_image_etag(client):
+    user = UserFactory()
+    im = ImageFactory()
+    assign_perm("view_image", user, im)
+
+    response = get_view_for_user(
+        client=client,
+        user=user,
+        viewname="api:image-detail",
+        reverse_kwargs={"pk": im.pk},
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    response = get_view_for_user(
+        client=client,
+        user=user,
+        viewname="api:image-detail",
+        reverse_kwargs={"pk": im.pk},
+        content_type="application/json",
+        HTTP_IF_NONE_MATCH=etag,
+    )
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    # Adding a file invalidates the cached metadata
+    ImageFileFactory(image=im)
+
+    response = get_view_for_user(
+        client=client,
+        user=user,
+        viewname="api:image-detail",
+        reverse_kwargs={"pk": im.pk},
+        content_type="application/json",
+        HTTP_IF_NONE_MATCH=etag,
+    )
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert len(response.json()["files"]) == 1
+
+
+@pytest.mark.django_db
+def test_image_list_by_pks(client):
+    user = UserFactory()
+    im1, im2, im3 = ImageFactory.create_batch(3)
+    for im in (im1, im2, im3):
+        assign_perm("view_image", user, im)
+
+    response = get_view_for_user(
+        client=client,
+        user=user,
+        viewname="api:image-list",
+        data={"pk__in": f"{im1.pk},{im3.pk}"},
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert {r["pk"] for r in response.json()["results"]} == {
+        str(im1.pk),
+        str(im3.pk),
+    }
+
+    # Only the metadata of the listed images are cached
+    assert cache.get(image_metadata_cache_key(image_pk=im1.pk)) is not None
+    assert cache.get(image_metadata_cache_key(image_pk=im2.pk)) is None
+    assert cache.get(image_metadata_cache_key(image_pk=im3.pk)) is not None
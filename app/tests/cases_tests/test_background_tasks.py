@@ -1,22 +1,33 @@
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest import mock
 
 import pytest
 from actstream.actions import is_following
 from billiard.exceptions import SoftTimeLimitExceeded
+from django.db import (
+    OperationalError,
+    close_old_connections,
+    connection,
+    transaction,
+)
 from panimg.image_builders.metaio_utils import (
     ADDITIONAL_HEADERS,
     EXPECTED_HEADERS,
     HEADERS_MATCHING_NUM_TIMEPOINTS,
     parse_mh_header,
 )
+from panimg.models import PanImgResult
 
+from grandchallenge.cases import tasks
 from grandchallenge.cases.models import Image, RawImageUploadSession
 from grandchallenge.cases.tasks import (
     build_images,
     check_compressed_and_extract,
+    extract_files_concurrently,
+    is_zip_file,
 )
 from grandchallenge.notifications.models import Notification
 from grandchallenge.uploads.models import UserUpload
@@ -99,6 +110,12 @@ def test_image_file_creation(settings, django_capture_on_commit_callbacks):
         "image10x10x10.zraw",
     }
     assert {*session.import_result["file_errors"]} == {*invalid_images}
+    assert {*session.import_result["timings"]} == {
+        "provisioning",
+        "extraction",
+        "conversion",
+        "storage",
+    }
 
 
 @pytest.mark.django_db
@@ -303,6 +320,31 @@ def test_check_compressed_and_extract_same_name(
     assert actual == expected
 
 
+def test_is_zip_file(tmp_path):
+    assert is_zip_file(path=RESOURCE_PATH / "test.zip")
+    assert not is_zip_file(path=RESOURCE_PATH / "test.tar")
+    assert not is_zip_file(path=RESOURCE_PATH / "image10x10x10.mha")
+    assert not is_zip_file(path=tmp_path)
+
+
+def test_extract_files_concurrently(tmp_path, settings):
+    settings.CASES_EXTRACTION_MAX_WORKERS = 2
+
+    for file_name in ("test.zip", "same_name.zip", "image10x10x10.mha"):
+        shutil.copy(RESOURCE_PATH / file_name, tmp_path)
+
+    extract_files_concurrently(source_path=tmp_path)
+
+    assert (tmp_path / "image10x10x10.mha").is_file()
+    assert (
+        tmp_path / "test.zip" / "folder-1/folder-2/folder-3.zip/file-3.txt"
+    ).is_file()
+    assert {
+        p.relative_to(tmp_path / "same_name.zip")
+        for p in (tmp_path / "same_name.zip").rglob("*.png")
+    } == {Path(f"{x}/1/test_grayscale.png") for x in range(1, 11)}
+
+
 @pytest.mark.django_db
 def test_build_zip_file(settings, django_capture_on_commit_callbacks):
     settings.task_eager_propagates = (True,)
@@ -338,7 +380,7 @@ def test_build_zip_file(settings, django_capture_on_commit_callbacks):
 
 @pytest.mark.django_db
 @mock.patch(
-    "grandchallenge.cases.tasks._handle_raw_image_files",
+    "grandchallenge.cases.tasks._convert_images",
     side_effect=SoftTimeLimitExceeded(),
 )
 def test_soft_time_limit(_):
@@ -351,15 +393,85 @@ def test_soft_time_limit(_):
     assert session.error_message == "Time limit exceeded."
 
 
+@pytest.mark.django_db(transaction=True)
+def test_session_is_not_locked_while_converting_images(monkeypatch):
+    session = UploadSessionFactory()
+    locked_while_converting = []
+
+    def try_lock():
+        close_old_connections()
+        try:
+            with transaction.atomic():
+                RawImageUploadSession.objects.select_for_update(
+                    nowait=True
+                ).get(pk=session.pk)
+        except OperationalError:
+            return True
+        else:
+            return False
+        finally:
+            connection.close()
+
+    def convert_images(**_):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            locked_while_converting.append(pool.submit(try_lock).result())
+
+        return PanImgResult(
+            new_images=set(),
+            new_image_files=set(),
+            consumed_files=set(),
+            file_errors={},
+        )
+
+    monkeypatch.setattr(tasks, "_convert_images", convert_images)
+
+    build_images(upload_session_pk=session.pk)
+
+    session.refresh_from_db()
+    assert session.status == session.SUCCESS
+    assert locked_while_converting == [False]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "status",
+    (
+        RawImageUploadSession.STARTED,
+        RawImageUploadSession.SUCCESS,
+        RawImageUploadSession.FAILURE,
+    ),
+)
+def test_claimed_session_is_not_imported_again(monkeypatch, status):
+    session = UploadSessionFactory(status=status)
+
+    def convert_images(**_):
+        raise RuntimeError("The session should not be imported")
+
+    monkeypatch.setattr(tasks, "_convert_images", convert_images)
+
+    build_images(upload_session_pk=session.pk)
+
+    session.refresh_from_db()
+    assert session.status == status
+    assert session.error_message is None
+
+
 @pytest.mark.django_db
-def test_failed_image_import_notification(django_capture_on_commit_callbacks):
+def test_failed_image_import_notification(
+    settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     image = ["corrupt.png"]
     session, _ = create_raw_upload_image_session(
         django_capture_on_commit_callbacks=django_capture_on_commit_callbacks,
         images=image,
     )
 
-    build_images(upload_session_pk=session.pk)
+    with django_capture_on_commit_callbacks(execute=True):
+        build_images(upload_session_pk=session.pk)
     session.refresh_from_db()
 
     assert RawImageUploadSession.objects.count() == 1
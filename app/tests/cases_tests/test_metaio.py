@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+import SimpleITK
+from django.core.files.base import ContentFile
+from panimg.exceptions import ValidationError
+
+from grandchallenge.cases import metaio
+from grandchallenge.cases.metaio import parse_header, stream_metaimage
+from tests.cases_tests import RESOURCE_PATH
+from tests.factories import ImageFileFactory
+
+
+def _upload(*, path=None, content=None, name=None):
+    if path is not None:
+        content, name = path.read_bytes(), path.name
+    return ImageFileFactory(file=ContentFile(content, name=name)).file
+
+
+def _expected_array(*, path):
+    return SimpleITK.GetArrayFromImage(SimpleITK.ReadImage(str(path)))
+
+
+def test_parse_header():
+    data = (
+        b"ObjectType = Image\n"
+        b"NDims = 3\n"
+        b"BinaryDataByteOrderMSB = True\n"
+        b"DimSize = 5 6 7\n"
+        b"ElementNumberOfChannels = 3\n"
+        b"ElementType = MET_USHORT_ARRAY\n"
+        b"ElementDataFile = LOCAL\n"
+    )
+
+    header = parse_header(data=data + b"\x00\x01")
+
+    assert header.is_local
+    assert not header.is_compressed
+    assert header.shape == (7, 6, 5, 3)
+    assert header.dtype == np.dtype(">u2")
+    assert header.n_bytes == 7 * 6 * 5 * 3 * 2
+    assert header.size == len(data)
+
+
+def test_parse_header_incomplete():
+    assert parse_header(data=b"ObjectType = Image\nNDims = 3\n") is None
+
+
+def test_parse_header_long_line():
+    with pytest.raises(ValidationError):
+        parse_header(data=b"ObjectType = " + b"a" * 10000)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "header,data",
+    (
+        ("image10x10x10.mha", None),
+        ("1x2int16.mha", None),
+        ("image5x6x7.mhd", "image5x6x7.zraw"),
+        ("image128x256x3RGB.mhd", "image128x256x3RGB.zraw"),
+    ),
+)
+def test_stream_compressed_metaimage(header, data, monkeypatch):
+    # Force the header to be read with several requests
+    monkeypatch.setattr(metaio, "HEADER_READ_SIZE", 16)
+
+    with stream_metaimage(
+        header_file=_upload(path=RESOURCE_PATH / header),
+        data_file=None if data is None else _upload(path=RESOURCE_PATH / data),
+    ) as metaimage:
+        expected = _expected_array(path=RESOURCE_PATH / header)
+
+        assert isinstance(metaimage.pixel_data, np.memmap)
+        np.testing.assert_array_equal(metaimage.pixel_data, expected)
+        np.testing.assert_array_equal(
+            SimpleITK.GetArrayFromImage(
+                SimpleITK.ReadImage(str(metaimage.path))
+            ),
+            expected,
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("extension", ("mha", "mhd"))
+def test_stream_uncompressed_metaimage(tmp_path, settings, extension):
+    settings.CASES_IMAGE_READ_CHUNK_SIZE = 1000
+    settings.CASES_IMAGE_READ_MAX_WORKERS = 4
+
+    image = SimpleITK.GetImageFromArray(
+        np.arange(20 * 30 * 40, dtype=np.float32).reshape((20, 30, 40))
+    )
+    path = tmp_path / f"image.{extension}"
+    SimpleITK.WriteImage(image, str(path), useCompression=False)
+
+    with stream_metaimage(
+        header_file=_upload(path=path),
+        data_file=(
+            _upload(path=tmp_path / "image.raw")
+            if extension == "mhd"
+            else None
+        ),
+    ) as metaimage:
+        assert not metaimage.header.is_compressed
+        np.testing.assert_array_equal(
+            metaimage.pixel_data, SimpleITK.GetArrayFromImage(image)
+        )
+
+
+@pytest.mark.django_db
+def test_stream_truncated_metaimage():
+    content = (RESOURCE_PATH / "image10x10x10.mha").read_bytes()
+
+    with pytest.raises(ValidationError):
+        with stream_metaimage(
+            header_file=_upload(content=content[:-10], name="image.mha")
+        ):
+            pass
+
+
+@pytest.mark.django_db
+def test_stream_metaimage_max_size():
+    header_file = _upload(path=RESOURCE_PATH / "image10x10x10.mha")
+
+    with pytest.raises(OSError) as error:
+        with stream_metaimage(
+            header_file=header_file, max_size=header_file.size - 1
+        ):
+            pass
+
+    assert "File exceeds maximum file size." in str(error.value)
+
+
+@pytest.mark.django_db
+def test_stream_missing_metaimage():
+    header_file = _upload(path=RESOURCE_PATH / "image10x10x10.mha")
+    header_file.storage.delete(header_file.name)
+
+    with pytest.raises(FileNotFoundError):
+        with stream_metaimage(header_file=header_file):
+            pass
@@ -1,12 +1,16 @@
+import factory
 import pytest
 from django.conf import settings
 from django.contrib.auth.models import Group
-from guardian.shortcuts import get_perms
+from guardian.shortcuts import assign_perm, get_perms, remove_perm
 
+from grandchallenge.cases.models import update_viewer_groups_permissions
+from grandchallenge.cases.tasks import update_image_permissions
 from tests.algorithms_tests.factories import AlgorithmJobFactory
 from tests.archives_tests.factories import ArchiveFactory, ArchiveItemFactory
 from tests.components_tests.factories import ComponentInterfaceValueFactory
-from tests.factories import ImageFactory
+from tests.evaluation_tests.test_permissions import get_groups_with_set_perms
+from tests.factories import GroupFactory, ImageFactory
 from tests.reader_studies_tests.factories import (
     DisplaySetFactory,
     ReaderStudyFactory,
@@ -142,9 +146,12 @@ def test_change_job_image():
 @pytest.mark.parametrize("in_rs", (True, False))
 @pytest.mark.parametrize("in_archive", (True, False))
 def test_view_permission_when_reused(
-    in_archive, in_rs, in_job, django_capture_on_commit_callbacks
+    settings, in_archive, in_rs, in_job, django_capture_on_commit_callbacks
 ):
     """When an image is reused it should have view_image set correctly"""
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     im = ImageFactory()
 
     job = AlgorithmJobFactory()
@@ -173,3 +180,48 @@ def test_view_permission_when_reused(
 
     for g in job.viewer_groups.all():
         assert ("view_image" in get_perms(g, im)) is in_job
+
+
+@pytest.mark.django_db
+def test_update_viewer_groups_permissions_in_bulk(
+    django_assert_max_num_queries,
+):
+    archive = ArchiveFactory()
+    ai = ArchiveItemFactory(archive=archive)
+    images = ImageFactory.create_batch(5)
+    ai.values.set([ComponentInterfaceValueFactory(image=im) for im in images])
+
+    other_group = GroupFactory()
+    assign_perm("view_image", other_group, images[0])
+    remove_perm("view_image", archive.users_group, images[1])
+
+    with django_assert_max_num_queries(14):
+        update_viewer_groups_permissions(image_pks=[im.pk for im in images])
+
+    for im in images:
+        assert get_groups_with_set_perms(im) == {
+            archive.editors_group: {"view_image"},
+            archive.uploaders_group: {"view_image"},
+            archive.users_group: {"view_image"},
+        }
+
+
+@pytest.mark.django_db
+def test_permissions_updates_are_coalesced(
+    mocker, django_capture_on_commit_callbacks
+):
+    ai1, ai2 = ArchiveItemFactory.create_batch(2)
+    civ1, civ2 = ComponentInterfaceValueFactory.create_batch(
+        2, image=factory.SubFactory(ImageFactory)
+    )
+    spy = mocker.patch.object(update_image_permissions, "apply_async")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ai1.values.add(civ1)
+        ai2.values.add(civ2)
+
+    spy.assert_called_once()
+    # Images from rolled back transactions can also be included
+    assert {str(civ1.image.pk), str(civ2.image.pk)} <= {
+        *spy.call_args.kwargs["kwargs"]["image_pks"]
+    }
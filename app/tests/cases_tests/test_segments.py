@@ -0,0 +1,182 @@
+import numpy as np
+import pytest
+import SimpleITK
+from panimg.models import MAXIMUM_SEGMENTS_LENGTH, SimpleITKImage
+
+from grandchallenge.cases.metaio import MetaImage, MetaImageHeader
+from grandchallenge.cases.models import Image
+from grandchallenge.cases.segments import (
+    count_voxel_values,
+    segment_voxel_counts,
+)
+from grandchallenge.cases.tasks import post_process_image
+from tests.cases_tests import RESOURCE_PATH
+from tests.cases_tests.factories import (
+    ImageFactoryWithImageFile4D,
+    ImageFactoryWithoutImageFile,
+)
+from tests.factories import ImageFileFactory
+
+
+def _metaimage(*, pixel_data, n_dims=None):
+    return MetaImage(
+        header=MetaImageHeader(
+            fields={"NDims": str(n_dims or pixel_data.ndim)},
+            lines=[],
+            size=0,
+        ),
+        path=None,
+        pixel_data=pixel_data,
+    )
+
+
+@pytest.mark.parametrize("dtype", (np.int8, np.uint8))
+def test_count_voxel_values(dtype):
+    pixel_data = np.array([[0, 1, 1], [2, 127, 0], [0, 0, 1]], dtype=dtype)
+
+    assert count_voxel_values(pixel_data=pixel_data, block_size=2) == {
+        0: 4,
+        1: 3,
+        2: 1,
+        127: 1,
+    }
+
+
+def test_count_negative_voxel_values():
+    pixel_data = np.array([-128, -1, -1, 0], dtype=np.int8)
+
+    assert count_voxel_values(pixel_data=pixel_data, block_size=3) == {
+        -128: 1,
+        -1: 2,
+        0: 1,
+    }
+
+
+def test_segment_voxel_counts_3d():
+    pixel_data = np.zeros((4, 5, 6), dtype=np.uint8)
+    pixel_data[1, 2, 3] = 3
+    pixel_data[0, :, :] = 1
+
+    assert segment_voxel_counts(
+        metaimage=_metaimage(pixel_data=pixel_data), block_size=7
+    ) == {0: 89, 1: 30, 3: 1}
+
+
+def test_segment_voxel_counts_4d():
+    pixel_data = np.zeros((3, 2, 2, 2), dtype=np.uint8)
+    pixel_data[0, 0, 0, :] = 1
+
+    assert segment_voxel_counts(
+        metaimage=_metaimage(pixel_data=pixel_data), block_size=3
+    ) == {1: 2, 2: 0, 3: 0}
+
+    pixel_data[2, 0, 0, 0] = 2
+
+    assert (
+        segment_voxel_counts(
+            metaimage=_metaimage(pixel_data=pixel_data), block_size=3
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "pixel_data,n_dims",
+    (
+        (np.zeros((2, 2), dtype=np.uint16), 2),
+        (np.zeros((2, 2), dtype=np.float32), 2),
+        # Multi channel
+        (np.zeros((2, 2, 3), dtype=np.uint8), 2),
+        # Too many segments
+        (np.arange(MAXIMUM_SEGMENTS_LENGTH + 1, dtype=np.uint8), 1),
+    ),
+)
+def test_segment_voxel_counts_not_a_segmentation(pixel_data, n_dims):
+    assert (
+        segment_voxel_counts(
+            metaimage=_metaimage(pixel_data=pixel_data, n_dims=n_dims),
+            block_size=4,
+        )
+        is None
+    )
+
+
+@pytest.mark.django_db
+def test_update_segments_matches_panimg(settings):
+    settings.CASES_SEGMENTS_BLOCK_SIZE = 1000
+
+    image = ImageFactoryWithoutImageFile(segments=None)
+    ImageFileFactory(
+        image=image,
+        file__from_path=RESOURCE_PATH / "mask.mha",
+    )
+
+    image.update_segments()
+    image.refresh_from_db()
+
+    sitk_image = SimpleITK.ReadImage(str(RESOURCE_PATH / "mask.mha"))
+    expected = SimpleITKImage(
+        image=sitk_image,
+        name="mask.mha",
+        consumed_files=set(),
+        spacing_valid=True,
+    ).segments
+    values, counts = np.unique(
+        SimpleITK.GetArrayViewFromImage(sitk_image), return_counts=True
+    )
+
+    assert image.segments == sorted(expected)
+    assert image.segment_voxel_counts == {
+        str(value): int(count)
+        for value, count in zip(values, counts, strict=True)
+    }
+
+
+@pytest.mark.django_db
+def test_update_segments_4d():
+    image = ImageFactoryWithImageFile4D(segments=None)
+
+    image.update_segments()
+    image.refresh_from_db()
+
+    assert image.segments == [*range(1, 14)]
+    assert image.segment_voxel_counts.keys() == {
+        str(segment) for segment in range(1, 14)
+    }
+
+
+@pytest.mark.django_db
+def test_update_segments_checks_header_first(monkeypatch):
+    image = ImageFactoryWithoutImageFile(segments=[0, 1])
+    ImageFileFactory(
+        image=image,
+        file__from_path=RESOURCE_PATH / "image16bit.mha",
+    )
+
+    def open_metaimage(self, **kwargs):
+        raise AssertionError("The pixel data should not be fetched")
+
+    monkeypatch.setattr(Image, "open_metaimage", open_metaimage)
+
+    image.update_segments()
+    image.refresh_from_db()
+
+    assert image.segments is None
+    assert image.segment_voxel_counts is None
+
+
+@pytest.mark.django_db
+def test_segment_voxel_counts_are_set_on_post_processing():
+    image = ImageFactoryWithoutImageFile(segments=[0, 1])
+    ImageFileFactory(
+        image=image,
+        file__from_path=RESOURCE_PATH / "mask.mha",
+    )
+
+    post_process_image(image_pk=image.pk)
+    image.refresh_from_db()
+
+    assert image.segment_voxel_counts is not None
+    assert sum(image.segment_voxel_counts.values()) == np.prod(
+        SimpleITK.ReadImage(str(RESOURCE_PATH / "mask.mha")).GetSize()
+    )
@@ -1,19 +1,28 @@
 import shutil
+import time
 from pathlib import Path
 from uuid import uuid4
 
 import pytest
 from celery import shared_task
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from panimg.models import ImageType, PanImgFile, PostProcessorResult
 from panimg.post_processors import DEFAULT_POST_PROCESSORS
 
-from grandchallenge.cases.models import ImageFile
+from grandchallenge.cases import tasks
+from grandchallenge.cases.models import Image, ImageFile
 from grandchallenge.cases.tasks import (
     POST_PROCESSORS,
     _check_post_processor_result,
+    _convert_images,
     import_images,
+    partition_input_directory,
     post_process_image,
+    post_process_images,
 )
+from grandchallenge.core.cache import _cache_key_from_method
 from grandchallenge.core.storage import protected_s3_storage
 from tests.cases_tests import RESOURCE_PATH
 from tests.factories import UploadSessionFactory
@@ -105,7 +114,7 @@ def test_check_post_processor_result():
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "filename, expected_bytes",
-    [("valid_tiff.tif", 246717), ("no_dzi.tif", 258038)],
+    [("valid_tiff.tif", 255328), ("no_dzi.tif", 258038)],
 )
 def test_post_processing(
     filename,
@@ -174,3 +183,240 @@ def test_post_processing(
         sum(file.size_in_storage for file in ImageFile.objects.all())
         == expected_bytes
     )
+
+
+@pytest.mark.django_db
+def test_import_images_in_bulk(
+    tmp_path, settings, django_capture_on_commit_callbacks
+):
+    settings.CASES_POST_PROCESSING_CHUNK_SIZE = 2
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
+    filenames = [
+        "image10x10x10.mha",
+        "1x2int16.mha",
+        "image16bit.mha",
+        "mask.mha",
+        "image10x11x12x13.mha",
+    ]
+    for filename in filenames:
+        shutil.copy(RESOURCE_PATH / filename, tmp_path / filename)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        with CaptureQueriesContext(connection) as queries:
+            result = import_images(input_directory=tmp_path)
+
+    inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 2
+    assert len(queries) == 2
+
+    assert Image.objects.count() == len(filenames)
+    for image_file in ImageFile.objects.all():
+        assert image_file.size_in_storage == image_file.file.size
+        assert not image_file.post_processed
+
+    assert len(callbacks) == 1
+    callbacks[0]()
+
+    assert len(result.new_images) == len(filenames)
+    assert ImageFile.objects.filter(post_processed=True).count() == len(
+        filenames
+    )
+
+
+@pytest.mark.django_db
+def test_post_process_images_continues_after_errors(monkeypatch):
+    processed = []
+
+    def _post_process_image(*, image_pk):
+        if image_pk == "b":
+            raise RuntimeError("Failed")
+        processed.append(image_pk)
+
+    monkeypatch.setattr(tasks, "post_process_image", _post_process_image)
+
+    post_process_images(image_pks=["a", "b", "c"])
+
+    assert processed == ["a", "c"]
+
+
+def test_partition_input_directory(tmp_path):
+    for filename in [
+        "image10x10x10.mha",
+        "image5x6x7.mhd",
+        "image5x6x7.zraw",
+        "valid_tiff.tif",
+    ]:
+        shutil.copy(RESOURCE_PATH / filename, tmp_path / filename)
+
+    shutil.copytree(RESOURCE_PATH / "dicom", tmp_path / "dicom")
+    (tmp_path / "dicom" / "notes.txt").write_text("Not an image")
+
+    groups = partition_input_directory(input_directory=tmp_path)
+
+    root = tmp_path.resolve()
+    dicom_files = {f for f in (root / "dicom").iterdir() if f.suffix == ".dcm"}
+    assert groups == [
+        dicom_files,
+        {root / "dicom" / "notes.txt"},
+        {root / "image10x10x10.mha"},
+        {root / "valid_tiff.tif"},
+        {root / "image5x6x7.mhd", root / "image5x6x7.zraw"},
+    ]
+
+
+def test_convert_images_concurrently(tmp_path):
+    input_directory = tmp_path / "input"
+    input_directory.mkdir()
+
+    for filename in [
+        "image10x10x10.mha",
+        "image5x6x7.mhd",
+        "image5x6x7.zraw",
+        "valid_tiff.tif",
+        "corrupt.png",
+    ]:
+        shutil.copy(RESOURCE_PATH / filename, input_directory / filename)
+
+    shutil.copytree(RESOURCE_PATH / "dicom", input_directory / "dicom")
+
+    serial = _convert_images(
+        input_directory=input_directory,
+        output_directory=tmp_path / "serial",
+    )
+    concurrent = _convert_images(
+        input_directory=input_directory,
+        output_directory=tmp_path / "concurrent",
+        max_workers=4,
+    )
+
+    def _summary(result):
+        return sorted(
+            (im.name, im.width, im.height, im.depth)
+            for im in result.new_images
+        )
+
+    assert len(concurrent.new_images) == 4
+    assert _summary(concurrent) == _summary(serial)
+    assert len(concurrent.new_image_files) == len(serial.new_image_files)
+    assert concurrent.consumed_files == serial.consumed_files
+    assert concurrent.file_errors == serial.file_errors
+    assert [*concurrent.file_errors] == sorted(concurrent.file_errors)
+
+
+def _import_valid_tiff(*, tmp_path):
+    shutil.copy(RESOURCE_PATH / "valid_tiff.tif", tmp_path / "valid_tiff.tif")
+    return import_images(input_directory=tmp_path).new_images.pop()
+
+
+@pytest.mark.django_db
+def test_post_processing_resumes_after_upload(tmp_path, monkeypatch):
+    image = _import_valid_tiff(tmp_path=tmp_path)
+    store = tasks._store_post_processed_images
+
+    def crash(**_):
+        raise RuntimeError("Worker lost")
+
+    monkeypatch.setattr(tasks, "_store_post_processed_images", crash)
+
+    with pytest.raises(RuntimeError):
+        post_process_image(image_pk=image.pk)
+
+    assert not ImageFile.objects.filter(post_processed=True).exists()
+    assert ImageFile.objects.filter(image=image).count() == 1
+
+    # The retry should resume from the upload
+    monkeypatch.setattr(tasks, "_store_post_processed_images", store)
+    monkeypatch.setattr(tasks, "post_process", crash)
+
+    post_process_image(image_pk=image.pk)
+
+    dzi = ImageFile.objects.get(image=image, image_type=ImageType.DZI)
+    assert protected_s3_storage.exists(dzi.file.name)
+    assert dzi.size_in_storage > 0
+    assert (
+        ImageFile.objects.filter(image=image, post_processed=True).count() == 1
+    )
+
+
+@pytest.mark.django_db
+def test_post_processing_overwrites_earlier_uploads(tmp_path, monkeypatch):
+    image = _import_valid_tiff(tmp_path=tmp_path)
+    store = tasks._store_post_processed_images
+    upload = tasks._upload_post_processed_images
+    uploaded = []
+
+    def record_upload(**kwargs):
+        new_image_files = upload(**kwargs)
+        uploaded.append(sorted(f.file.name for f in new_image_files))
+        return new_image_files
+
+    def crash(**_):
+        raise RuntimeError("Worker lost")
+
+    monkeypatch.setattr(tasks, "_upload_post_processed_images", record_upload)
+    monkeypatch.setattr(tasks, "_store_post_processed_images", crash)
+
+    with pytest.raises(RuntimeError):
+        post_process_image(image_pk=image.pk)
+
+    # The worker was lost before the checkpoint was saved
+    cache.delete(f"cases.post_process_image.checkpoint.{image.pk}")
+    monkeypatch.setattr(tasks, "_store_post_processed_images", store)
+
+    post_process_image(image_pk=image.pk)
+
+    assert len(uploaded) == 2
+    assert uploaded[0] == uploaded[1]
+
+    dzi = ImageFile.objects.get(image=image, image_type=ImageType.DZI)
+    assert dzi.file.name in uploaded[0]
+    assert protected_s3_storage.exists(dzi.file.name)
+    assert protected_s3_storage.size_of_prefix(prefix=dzi.tiles_prefix) > 0
+
+
+@pytest.mark.django_db
+def test_post_processing_is_retried_when_claimed(
+    tmp_path, django_capture_on_commit_callbacks
+):
+    image = _import_valid_tiff(tmp_path=tmp_path)
+
+    with (
+        cache.lock(
+            f"{_cache_key_from_method(post_process_image)}.{image.pk}",
+            timeout=60,
+        ),
+        django_capture_on_commit_callbacks() as callbacks,
+    ):
+        post_process_image(image_pk=image.pk)
+
+    assert ImageFile.objects.filter(image=image).count() == 1
+    assert not ImageFile.objects.filter(post_processed=True).exists()
+
+    retry = callbacks[0].__self__
+    assert retry.options["queue"] == "acks-late-2xlarge-delay"
+    assert retry.kwargs == {"image_pk": str(image.pk), "retries": 1}
+
+    post_process_image(image_pk=image.pk)
+
+    assert ImageFile.objects.filter(image=image).count() == 2
+
+
+@pytest.mark.django_db
+def test_post_processing_claim_is_extended(settings, monkeypatch):
+    settings.CASES_POST_PROCESSING_LOCK_TIMEOUT = 0.3
+    image_pk = str(uuid4())
+    name = f"{_cache_key_from_method(post_process_image)}.{image_pk}"
+    claimed = []
+
+    def _post_process_image(*, image_pk):
+        time.sleep(1)
+        claimed.append(cache.lock(name).locked())
+
+    monkeypatch.setattr(tasks, "_post_process_image", _post_process_image)
+
+    post_process_image(image_pk=image_pk)
+
+    assert claimed == [True]
+    assert not cache.lock(name).locked()
@@ -0,0 +1,140 @@
+from uuid import uuid4
+
+import pytest
+from django.core.files.base import ContentFile
+
+from grandchallenge.cases.models import ImageFile
+from grandchallenge.cases.tiles import (
+    pack_tiles,
+    read_packed_tile,
+    upload_packed_tiles,
+    upload_tiles,
+)
+from grandchallenge.core.storage import protected_s3_storage
+from tests.cases_tests.factories import ImageFactoryWithoutImageFile
+
+TILES = {
+    "0/0_0.jpeg": b"a",
+    "1/0_0.jpeg": b"bc",
+    "1/0_1.jpeg": b"",
+    "1/1_0.jpeg": b"def",
+}
+
+
+@pytest.fixture
+def tiles_directory(tmp_path):
+    directory = tmp_path / "image_files"
+
+    for relative_path, content in TILES.items():
+        path = directory / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    return directory
+
+
+def test_upload_tiles(tiles_directory, settings):
+    settings.CASES_TILE_UPLOAD_MAX_WORKERS = 2
+    destination = f"test-tiles/{uuid4()}/image_files"
+
+    n_bytes = upload_tiles(
+        storage=protected_s3_storage,
+        directory=tiles_directory,
+        destination=destination,
+    )
+
+    assert n_bytes == 6
+    for relative_path, content in TILES.items():
+        with protected_s3_storage.open(f"{destination}/{relative_path}") as f:
+            assert f.read() == content
+
+    assert protected_s3_storage.size_of_prefix(prefix=destination) == 6
+    assert protected_s3_storage.delete_prefix(prefix=destination) == 4
+    assert protected_s3_storage.size_of_prefix(prefix=destination) == 0
+
+
+def test_pack_tiles(tiles_directory, tmp_path):
+    with open(tmp_path / "archive", "wb") as archive:
+        index = pack_tiles(directory=tiles_directory, archive=archive)
+
+    assert index == {
+        "0/0_0.jpeg": [0, 1],
+        "1/0_0.jpeg": [1, 2],
+        "1/0_1.jpeg": [3, 0],
+        "1/1_0.jpeg": [3, 3],
+    }
+    assert (tmp_path / "archive").read_bytes() == b"abcdef"
+
+
+def test_read_packed_tiles(tiles_directory):
+    destination = f"test-tiles/{uuid4()}/image_files"
+
+    n_bytes = upload_packed_tiles(
+        storage=protected_s3_storage,
+        directory=tiles_directory,
+        destination=destination,
+    )
+
+    assert n_bytes == protected_s3_storage.size_of_prefix(prefix=destination)
+
+    for relative_path, content in TILES.items():
+        assert (
+            read_packed_tile(
+                storage=protected_s3_storage,
+                destination=destination,
+                relative_path=relative_path,
+            )
+            == content
+        )
+
+    assert (
+        read_packed_tile(
+            storage=protected_s3_storage,
+            destination=destination,
+            relative_path="2/0_0.jpeg",
+        )
+        is None
+    )
+    assert (
+        read_packed_tile(
+            storage=protected_s3_storage,
+            destination=f"test-tiles/{uuid4()}/image_files",
+            relative_path="0/0_0.jpeg",
+        )
+        is None
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("pack_tiles", (True, False))
+def test_dzi_tiles_lifecycle(
+    tiles_directory, settings, pack_tiles, django_capture_on_commit_callbacks
+):
+    settings.CASES_PACK_DZI_TILES = pack_tiles
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
+    image_file = ImageFile(
+        image=ImageFactoryWithoutImageFile(),
+        image_type=ImageFile.IMAGE_TYPE_DZI,
+        file=ContentFile(b"<Image/>", name="image.dzi"),
+        directory=tiles_directory,
+    )
+    image_file.save()
+
+    stored_bytes = protected_s3_storage.size_of_prefix(
+        prefix=image_file.tiles_prefix
+    )
+    assert stored_bytes > 0
+    assert image_file.size_in_storage == 8 + stored_bytes
+
+    image_file.update_size_in_storage()
+    assert image_file.size_in_storage == 8 + stored_bytes
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image_file.delete()
+
+    assert (
+        protected_s3_storage.size_of_prefix(prefix=image_file.tiles_prefix)
+        == 0
+    )
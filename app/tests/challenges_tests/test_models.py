@@ -75,7 +75,13 @@ def test_participants_follow_forum(group):
 
 @pytest.mark.django_db
 @pytest.mark.parametrize("group", ("participant", "admin"))
-def test_non_posters_notified(group):
+def test_non_posters_notified(
+    group, settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     p = UserFactory()
     u = UserFactory()
     c = ChallengeFactory()
@@ -87,7 +93,8 @@ def test_non_posters_notified(group):
     # delete all notifications for easier testing below
     Notification.objects.all().delete()
 
-    TopicFactory(forum=c.forum, poster=p, type=Topic.TOPIC_ANNOUNCE)
+    with django_capture_on_commit_callbacks(execute=True):
+        TopicFactory(forum=c.forum, poster=p, type=Topic.TOPIC_ANNOUNCE)
 
     assert u.user_profile.has_unread_notifications is True
     assert p.user_profile.has_unread_notifications is False
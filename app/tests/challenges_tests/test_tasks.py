@@ -1,9 +1,36 @@
+from datetime import timedelta
+
 import pytest
+from django.utils.timezone import now
 
-from grandchallenge.challenges.models import Challenge, ChallengeRequest
-from grandchallenge.challenges.tasks import update_challenge_results_cache
-from tests.evaluation_tests.factories import EvaluationFactory
-from tests.factories import ChallengeFactory, ChallengeRequestFactory
+from grandchallenge.challenges.costs import recompute_ledger_totals
+from grandchallenge.challenges.models import (
+    Challenge,
+    ChallengeCostEntry,
+    ChallengeRequest,
+)
+from grandchallenge.challenges.tasks import (
+    update_challenge_results_cache,
+    update_compute_costs_and_storage_size,
+)
+from grandchallenge.components.models import ImportStatusChoices
+from tests.algorithms_tests.factories import (
+    AlgorithmImageFactory,
+    AlgorithmJobFactory,
+)
+from tests.archives_tests.factories import ArchiveFactory, ArchiveItemFactory
+from tests.components_tests.factories import ComponentInterfaceValueFactory
+from tests.evaluation_tests.factories import (
+    EvaluationFactory,
+    MethodFactory,
+    PhaseFactory,
+    SubmissionFactory,
+)
+from tests.factories import (
+    ChallengeFactory,
+    ChallengeRequestFactory,
+    ImageFileFactory,
+)
 
 
 @pytest.mark.django_db
@@ -118,3 +145,160 @@ def test_challenge_request_budget_calculation(settings):
         + challenge_request.budget["Docker storage cost"]
         + challenge_request.budget["Base cost"]
     )
+
+
+@pytest.mark.django_db
+def test_cost_ledger_is_updated(settings, django_capture_on_commit_callbacks):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
+    phase = PhaseFactory(archive=ArchiveFactory())
+    challenge = phase.challenge
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image_file = ImageFileFactory(file__data=b"x" * 100)
+        civ = ComponentInterfaceValueFactory(image=image_file.image)
+        item = ArchiveItemFactory(archive=phase.archive)
+        item.values.add(civ)
+
+        algorithm_image = AlgorithmImageFactory(size_in_registry=100)
+        SubmissionFactory(phase=phase, algorithm_image=algorithm_image)
+        MethodFactory(
+            phase=phase,
+            size_in_registry=10,
+            import_status=ImportStatusChoices.COMPLETED,
+        )
+
+        job = AlgorithmJobFactory(
+            algorithm_image=algorithm_image,
+            files=[civ],
+            time_limit=60,
+        )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        job.status = job.SUCCESS
+        job.started_at = now() - timedelta(minutes=2)
+        job.completed_at = now()
+        job.compute_cost_euro_millicents = 1000
+        job.save()
+
+        evaluation = EvaluationFactory(submission__phase=phase, time_limit=60)
+        evaluation.compute_cost_euro_millicents = 500
+        evaluation.save()
+
+    challenge.refresh_from_db()
+    phase.refresh_from_db()
+
+    assert challenge.compute_cost_euro_millicents == 1500
+    assert challenge.size_in_registry == 110
+    assert phase.compute_cost_euro_millicents == 1500
+    assert phase.average_algorithm_job_duration == (
+        job.completed_at - job.started_at
+    )
+
+    assert challenge.size_in_storage > 0
+    assert recompute_ledger_totals(challenge=challenge) == {
+        "compute_cost_euro_millicents": 1500,
+        "size_in_storage": challenge.size_in_storage,
+        "size_in_registry": 110,
+    }
+
+    with django_capture_on_commit_callbacks(execute=True):
+        item.values.remove(civ)
+
+    challenge.refresh_from_db()
+
+    assert challenge.compute_cost_euro_millicents == 500
+    assert challenge.size_in_registry == 10
+
+
+@pytest.mark.django_db
+def test_cost_ledger_drift_is_reconciled():
+    evaluation = EvaluationFactory(time_limit=60)
+    challenge = evaluation.submission.phase.challenge
+
+    # Bulk updates are not signalled
+    type(evaluation).objects.filter(pk=evaluation.pk).update(
+        compute_cost_euro_millicents=700
+    )
+    ChallengeCostEntry.objects.filter(challenge=challenge).delete()
+
+    update_compute_costs_and_storage_size()
+
+    challenge.refresh_from_db()
+    evaluation.submission.phase.refresh_from_db()
+
+    assert challenge.compute_cost_euro_millicents == 700
+    assert evaluation.submission.phase.compute_cost_euro_millicents == 700
+    assert (
+        challenge.cost_entries.filter(object_id=str(evaluation.pk)).count()
+        == 2
+    )
+
+
+@pytest.mark.django_db
+def test_cost_ledger_is_updated_when_archive_item_deleted(
+    settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
+    phase = PhaseFactory(archive=ArchiveFactory())
+    challenge = phase.challenge
+
+    with django_capture_on_commit_callbacks(execute=True):
+        image_file = ImageFileFactory(file__data=b"x" * 100)
+        civ = ComponentInterfaceValueFactory(image=image_file.image)
+        item = ArchiveItemFactory(archive=phase.archive)
+        item.values.add(civ)
+
+    challenge.refresh_from_db()
+    assert challenge.size_in_storage > 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        item.delete()
+
+    challenge.refresh_from_db()
+    assert challenge.size_in_storage == 0
+    assert not challenge.cost_entries.exists()
+
+
+@pytest.mark.django_db
+def test_cost_ledger_totals_wait_for_reconciliation(
+    settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
+    phase = PhaseFactory()
+    challenge = phase.challenge
+
+    # A challenge from before the ledger, with the totals of a full recompute
+    Challenge.objects.filter(pk=challenge.pk).update(
+        cost_ledger_reconciled_at=None, compute_cost_euro_millicents=1000
+    )
+    EvaluationFactory.create_batch(
+        2,
+        submission__phase=phase,
+        time_limit=60,
+        compute_cost_euro_millicents=500,
+    )
+    ChallengeCostEntry.objects.filter(challenge=challenge).delete()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        evaluation = EvaluationFactory(submission__phase=phase, time_limit=60)
+        evaluation.compute_cost_euro_millicents = 700
+        evaluation.save()
+
+    challenge.refresh_from_db()
+    assert challenge.cost_ledger_reconciled_at is None
+    assert challenge.compute_cost_euro_millicents == 1000
+
+    update_compute_costs_and_storage_size()
+
+    challenge.refresh_from_db()
+    assert challenge.cost_ledger_reconciled_at is not None
+    assert challenge.compute_cost_euro_millicents == 1700
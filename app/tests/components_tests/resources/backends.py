@@ -8,12 +8,19 @@ from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 
 from grandchallenge.components.backends import docker_client
+from grandchallenge.components.backends.amazon_sagemaker_training import (
+    AmazonSageMakerTrainingExecutor,
+)
 from grandchallenge.components.backends.base import Executor
 from grandchallenge.components.backends.docker import (
     DockerConnectionMixin,
     logger,
 )
-from grandchallenge.components.backends.exceptions import ComponentException
+from grandchallenge.components.backends.exceptions import (
+    ComponentException,
+    RetryStep,
+    TaskCancelled,
+)
 from grandchallenge.components.backends.utils import (
     LOGLINES,
     SourceChoices,
@@ -249,3 +256,28 @@ class InsecureDockerExecutor(DockerConnectionMixin, Executor):
 
         self._stdout = stdout
         self._stderr = stderr
+
+
+class FakeSageMakerTrainingExecutor(AmazonSageMakerTrainingExecutor):
+    """
+    Handles SageMaker training job events without calling AWS
+
+    The outcome is determined by the status in the event, an
+    ``InProgress`` status requests that the event is handled again later.
+    """
+
+    CAN_TAIL_LOGS = False
+
+    def handle_event(self, *, event):
+        job_status = self._get_job_status(event=event)
+
+        if job_status == "Completed":
+            return
+        elif job_status == "Stopped":
+            raise TaskCancelled
+        elif job_status == "Failed":
+            raise ComponentException(event["FailureReason"])
+        elif job_status == "InProgress":
+            raise RetryStep("Job is still running")
+        else:
+            raise ValueError("Invalid job status")
@@ -0,0 +1,149 @@
+from subprocess import CalledProcessError
+
+from django.core.exceptions import ObjectDoesNotExist
+
+from grandchallenge.components.backends.utils import SourceChoices
+
+
+class InMemoryDockerClient:
+    """
+    A docker client that keeps its state in memory
+
+    Allows the docker backend and workstation sessions to be exercised
+    without a docker daemon. Containers are never actually executed, set
+    ``exit_codes`` or ``logs`` to control what a container does.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.containers = {}
+        self.events = []
+        self.exit_codes = {}
+        self.logs = {}
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def _emit(self, *, type, action, actor_id, attributes=None):
+        self.events.append(
+            {
+                "Type": type,
+                "Action": action,
+                "Actor": {"ID": actor_id, "Attributes": attributes or {}},
+            }
+        )
+
+    def pull_image(self, *, repo_tag, authenticate=False):
+        self.images.setdefault(repo_tag, {"Id": f"sha256:{repo_tag}"})
+        self._emit(type="image", action="pull", actor_id=repo_tag)
+
+    def build_image(self, *, repo_tag, path):
+        self.images[repo_tag] = {"Id": f"sha256:{repo_tag}", "Path": path}
+
+    def save_image(self, *, repo_tag, output):
+        self.inspect_image(repo_tag=repo_tag)
+
+        with open(output, "wb"):
+            pass
+
+    def load_image(self, *, input):
+        self.images.setdefault(str(input), {"Id": f"sha256:{input}"})
+
+    def inspect_image(self, *, repo_tag):
+        try:
+            return self.images[repo_tag]
+        except KeyError as error:
+            raise ObjectDoesNotExist from error
+
+    def inspect_network(self, *, name):
+        return {"Name": name, "IPAM": {"Config": [{"Gateway": "172.17.0.1"}]}}
+
+    def stop_container(self, *, name):
+        if name in self.containers:
+            self.containers[name]["State"]["Status"] = "exited"
+            self._emit(type="container", action="stop", actor_id=name)
+
+    def remove_container(self, *, name):
+        if self.containers.pop(name, None) is not None:
+            self._emit(type="container", action="destroy", actor_id=name)
+
+    def get_container_id(self, *, name):
+        return self.inspect_container(name=name)["Id"]
+
+    def inspect_container(self, *, name):
+        try:
+            return self.containers[name]
+        except KeyError as error:
+            raise ObjectDoesNotExist from error
+
+    def get_logs(self, *, name, tail=None):
+        self.inspect_container(name=name)
+        loglines = [
+            line
+            for source in (SourceChoices.STDOUT, SourceChoices.STDERR)
+            for s, line in self.logs.get(name, [])
+            if s == source
+        ]
+        return loglines if tail is None else loglines[-tail:]
+
+    def stream_logs(self, *, name, since=None, follow=True):
+        self.inspect_container(name=name)
+        yield from self.logs.get(name, [])
+
+    def stream_events(self, *, filters=None, since=None, until=None):
+        filters = filters or {}
+
+        for event in self.events:
+            if "type" in filters and event["Type"] not in filters["type"]:
+                continue
+            if "event" in filters and event["Action"] not in filters["event"]:
+                continue
+
+            yield event
+
+    def run_container(
+        self,
+        *,
+        repo_tag,
+        name,
+        labels,
+        environment,
+        network,
+        mem_limit,
+        ports=None,
+        extra_hosts=None,
+        command=None,
+        remove=False,
+        detach=True,
+    ):
+        self.inspect_image(repo_tag=repo_tag)
+
+        self.containers[name] = {
+            "Id": name,
+            "Name": name,
+            "Config": {
+                "Image": repo_tag,
+                "Labels": labels,
+                "Env": [f"{k}={v}" for k, v in environment.items()],
+                "Cmd": command,
+            },
+            "HostConfig": {
+                "NetworkMode": network,
+                "Memory": mem_limit * 1024**3,
+                "ExtraHosts": extra_hosts,
+                "PortBindings": ports,
+                "AutoRemove": remove,
+            },
+            "State": {"Status": "running"},
+        }
+        self._emit(type="container", action="start", actor_id=name)
+
+        if not detach:
+            self.stop_container(name=name)
+            exit_code = self.exit_codes.get(name, 0)
+
+            if exit_code != 0:
+                raise CalledProcessError(returncode=exit_code, cmd=command)
+
+        return name
@@ -0,0 +1,54 @@
+import json
+
+
+class FakeLogsClient:
+    """
+    A CloudWatch Logs client that keeps its log streams in memory
+
+    Implements the subset of the boto3 logs client that is used by the
+    SageMaker executors. ``get_log_events`` pages through the events
+    ``page_size`` at a time, returning the same ``nextForwardToken`` that
+    was passed in once the end of the stream is reached, as CloudWatch does.
+    """
+
+    def __init__(self, *, page_size=2):
+        self.page_size = page_size
+        self.streams = {}
+        self.calls = []
+
+    def put_log_lines(self, *, log_stream_name, lines, timestamp=0):
+        events = self.streams.setdefault(log_stream_name, [])
+
+        for source, message in lines:
+            events.append(
+                {
+                    "timestamp": timestamp,
+                    "message": json.dumps(
+                        {"log": message, "source": source, "internal": False}
+                    ),
+                }
+            )
+
+    def describe_log_streams(self, **kwargs):
+        self.calls.append("describe_log_streams")
+        return {
+            "logStreams": [
+                {"logStreamName": name}
+                for name in sorted(self.streams)
+                if name.startswith(kwargs["logStreamNamePrefix"])
+            ]
+        }
+
+    def get_log_events(self, **kwargs):
+        self.calls.append("get_log_events")
+        events = self.streams[kwargs["logStreamName"]]
+
+        if not kwargs["startFromHead"]:
+            events = events[-kwargs.get("limit", len(events)) :]
+            return {"events": events, "nextForwardToken": f"f/{len(events)}"}
+
+        next_token = kwargs.get("nextToken", "f/0")
+        start = int(next_token.split("/")[1])
+        end = min(start + self.page_size, len(events))
+
+        return {"events": events[start:end], "nextForwardToken": f"f/{end}"}
@@ -19,7 +19,9 @@ from grandchallenge.components.backends.exceptions import (
 )
 from grandchallenge.components.backends.utils import LOGLINES
 from grandchallenge.components.models import GPUTypeChoices
+from grandchallenge.components.runtime_metrics import decode_series
 from grandchallenge.evaluation.models import Evaluation, Method
+from tests.components_tests.resources.logs_client import FakeLogsClient
 
 
 @pytest.mark.parametrize(
@@ -455,34 +457,38 @@ def test_set_runtime_metrics(settings):
             }
         )
 
-    assert executor.runtime_metrics == {
-        "instance": {
-            "cpu": 2,
-            "gpu_type": None,
-            "gpus": 0,
-            "memory": 8,
-            "name": "ml.m5.large",
-        },
-        "metrics": [
-            {
-                "label": "CPUUtilization",
-                "status": "Complete",
-                "timestamps": [
-                    "2022-06-09T09:38:00+00:00",
-                    "2022-06-09T09:37:00+00:00",
-                ],
-                "values": [0.677884, 0.130367],
-            },
-            {
-                "label": "MemoryUtilization",
-                "status": "Complete",
-                "timestamps": [
-                    "2022-06-09T09:38:00+00:00",
-                    "2022-06-09T09:37:00+00:00",
-                ],
-                "values": [1.14447, 0.875619],
-            },
+    runtime_metrics = executor.runtime_metrics
+
+    assert runtime_metrics["instance"] == {
+        "cpu": 2,
+        "gpu_type": None,
+        "gpus": 0,
+        "memory": 8,
+        "name": "ml.m5.large",
+    }
+    assert [
+        (metric["label"], metric["status"], metric["start"])
+        for metric in runtime_metrics["metrics"]
+    ] == [
+        ("CPUUtilization", "Complete", 1654767480),
+        ("MemoryUtilization", "Complete", 1654767480),
+    ]
+    assert decode_series(metric=runtime_metrics["metrics"][0]) == (
+        [
+            datetime(2022, 6, 9, 9, 38, tzinfo=timezone.utc),
+            datetime(2022, 6, 9, 9, 37, tzinfo=timezone.utc),
         ],
+        [pytest.approx(0.677884), pytest.approx(0.130367)],
+    )
+    assert runtime_metrics["summary"] == {
+        "CPUUtilization": {
+            "max": 0.677884,
+            "mean": pytest.approx((0.677884 + 0.130367) / 2),
+        },
+        "MemoryUtilization": {
+            "max": 1.14447,
+            "mean": pytest.approx((1.14447 + 0.875619) / 2),
+        },
     }
 
 
@@ -639,3 +645,61 @@ def test_deprovision(settings):
             )
 
         assert error.value.response["Error"]["Message"] == "Not Found"
+
+
+def test_tail_logs(settings, monkeypatch):
+    settings.COMPONENTS_AMAZON_ECR_REGION = "us-east-1"
+
+    executor = AmazonSageMakerTrainingExecutor(
+        job_id=f"algorithms-job-{uuid4()}",
+        exec_image_repo_tag="",
+        memory_limit=4,
+        time_limit=60,
+        requires_gpu=False,
+        desired_gpu_type=GPUTypeChoices.T4,
+    )
+
+    logs_client = FakeLogsClient(page_size=2)
+    logs_client.put_log_lines(
+        log_stream_name=f"{executor._sagemaker_job_name}/i-whatever",
+        lines=[
+            ("stdout", "one"),
+            ("stderr", "two"),
+            ("stdout", "three"),
+        ],
+    )
+    monkeypatch.setattr(
+        AmazonSageMakerTrainingExecutor, "_logs_client", logs_client
+    )
+
+    pages = [*executor.tail_logs()]
+
+    assert [[line["message"] for line in page.lines] for page in pages] == [
+        ["one", "two"],
+        ["three"],
+        [],
+    ]
+    assert pages[-1].next_token == "f/3"
+
+    logs_client.put_log_lines(
+        log_stream_name=pages[-1].log_stream_name,
+        lines=[("stdout", "four")],
+    )
+
+    pages = [
+        *executor.tail_logs(
+            log_stream_name=pages[-1].log_stream_name,
+            next_token=pages[-1].next_token,
+        )
+    ]
+
+    assert [[line["message"] for line in page.lines] for page in pages] == [
+        ["four"],
+        [],
+    ]
+
+    executor.preload_task_logs(lines=pages[0].lines)
+    executor._set_task_logs()
+
+    assert executor.stdout == "1970-01-01T00:00:00+00:00 four"
+    assert logs_client.calls.count("describe_log_streams") == 1
@@ -0,0 +1,220 @@
+import json
+import pickle
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler
+from io import BytesIO
+from subprocess import CalledProcessError
+
+import pytest
+from django.core.exceptions import ObjectDoesNotExist
+
+from grandchallenge.components.backends import docker_client
+from grandchallenge.components.backends.docker_cli import DockerCLIClient
+from grandchallenge.components.backends.docker_engine import (
+    LOG_FRAME_HEADER,
+    DockerEngineAPIClient,
+    DockerEngineAPIError,
+)
+from grandchallenge.components.backends.utils import SourceChoices
+from tests.components_tests.resources.docker_client import InMemoryDockerClient
+
+
+@pytest.fixture
+def in_memory_docker_client(settings):
+    settings.COMPONENTS_DOCKER_CLIENT = (
+        "tests.components_tests.resources.docker_client.InMemoryDockerClient"
+    )
+    docker_client._get_client.cache_clear()
+    yield docker_client.get_client()
+    docker_client._get_client.cache_clear()
+
+
+class DockerDaemonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        return "docker"
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+    def _send_json(self, *, status, content):
+        body = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        self.server.requests.append(self.path)
+        self.server.connections.add(id(self.connection))
+
+        if self.path == "/v1.41/images/alpine%3A3.16/json":
+            self._send_json(status=200, content={"Id": "sha256:1234"})
+        else:
+            self._send_json(status=404, content={"message": "No such image"})
+
+
+class UnixDockerDaemon(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    daemon_threads = True
+
+
+@pytest.fixture
+def docker_daemon(settings, tmp_path):
+    socket_path = str(tmp_path / "docker.sock")
+    server = UnixDockerDaemon(socket_path, DockerDaemonHandler)
+    server.requests = []
+    server.connections = set()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.COMPONENTS_DOCKER_SOCKET = socket_path
+    settings.COMPONENTS_DOCKER_API_VERSION = "1.41"
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_engine_client_reuses_connection(docker_daemon):
+    client = DockerEngineAPIClient()
+
+    for _ in range(3):
+        assert client.inspect_image(repo_tag="alpine:3.16") == {
+            "Id": "sha256:1234"
+        }
+
+    with pytest.raises(ObjectDoesNotExist):
+        client.inspect_image(repo_tag="alpine:3.15")
+
+    assert len(docker_daemon.requests) == 4
+    assert len(docker_daemon.connections) == 1
+
+
+def test_client_falls_back_to_cli(settings, tmp_path):
+    settings.COMPONENTS_DOCKER_CLIENT = "grandchallenge.components.backends.docker_engine.DockerEngineAPIClient"
+    settings.COMPONENTS_DOCKER_SOCKET = str(tmp_path / "missing.sock")
+    docker_client._get_client.cache_clear()
+
+    try:
+        assert isinstance(docker_client.get_client(), DockerCLIClient)
+    finally:
+        docker_client._get_client.cache_clear()
+
+
+def test_demultiplex_logs():
+    def frame(stream_type, payload):
+        return LOG_FRAME_HEADER.pack(stream_type, len(payload)) + payload
+
+    response = BytesIO(
+        frame(1, b"2020-01-01T00:00:00Z foo\n2020-01-01T00:00:01Z b")
+        + frame(2, b"2020-01-01T00:00:02Z err\n")
+        + frame(1, b"ar\n")
+        + frame(2, b"2020-01-01T00:00:03Z partial")
+    )
+
+    assert [*DockerEngineAPIClient._demultiplex_logs(response)] == [
+        (SourceChoices.STDOUT, "2020-01-01T00:00:00Z foo"),
+        (SourceChoices.STDERR, "2020-01-01T00:00:02Z err"),
+        (SourceChoices.STDOUT, "2020-01-01T00:00:01Z bar"),
+        (SourceChoices.STDERR, "2020-01-01T00:00:03Z partial"),
+    ]
+
+
+def test_engine_api_error_pickles():
+    error = pickle.loads(pickle.dumps(DockerEngineAPIError(404, "Not found")))
+
+    assert error.status == 404
+    assert error.message == "Not found"
+    assert str(error) == "404: Not found"
+
+
+def test_container_config(settings):
+    settings.COMPONENTS_DOCKER_KEEP_CAPS_UNSAFE = False
+    settings.COMPONENTS_DOCKER_RUNTIME = None
+    settings.COMPONENTS_CPUSET_CPUS = "0"
+
+    config = DockerEngineAPIClient()._get_container_config(
+        repo_tag="alpine:3.16",
+        labels={"job": "foo"},
+        environment={"FOO": "bar"},
+        network="components",
+        mem_limit=4,
+        ports={8080: ("127.0.0.1", None)},
+        extra_hosts={"gc.localhost": "172.17.0.1"},
+        command=["serve"],
+        remove=True,
+    )
+
+    assert config["Image"] == "alpine:3.16"
+    assert config["Cmd"] == ["serve"]
+    assert config["Env"] == ["FOO=bar"]
+    assert config["Labels"] == {"job": "foo"}
+    assert config["ExposedPorts"] == {"8080/tcp": {}}
+    assert config["HostConfig"]["Memory"] == 4 * 1024**3
+    assert config["HostConfig"]["MemorySwap"] == 4 * 1024**3
+    assert config["HostConfig"]["CpusetCpus"] == "0"
+    assert config["HostConfig"]["CapDrop"] == ["all"]
+    assert config["HostConfig"]["AutoRemove"] is True
+    assert config["HostConfig"]["ExtraHosts"] == ["gc.localhost:172.17.0.1"]
+    assert config["HostConfig"]["PortBindings"] == {
+        "8080/tcp": [{"HostIp": "127.0.0.1", "HostPort": ""}]
+    }
+    assert "Runtime" not in config["HostConfig"]
+
+
+def test_in_memory_client_lifecycle(in_memory_docker_client):
+    assert isinstance(in_memory_docker_client, InMemoryDockerClient)
+
+    with pytest.raises(ObjectDoesNotExist):
+        docker_client.inspect_image(repo_tag="alpine:3.16")
+
+    docker_client.pull_image(repo_tag="alpine:3.16")
+    docker_client.run_container(
+        repo_tag="alpine:3.16",
+        name="foo",
+        labels={},
+        environment={},
+        network="components",
+        mem_limit=1,
+    )
+
+    assert (
+        docker_client.inspect_container(name="foo")["State"]["Status"]
+        == "running"
+    )
+
+    docker_client.stop_container(name="foo")
+    docker_client.remove_container(name="foo")
+
+    with pytest.raises(ObjectDoesNotExist):
+        docker_client.get_container_id(name="foo")
+
+    assert [
+        e["Action"]
+        for e in docker_client.stream_events(filters={"type": ["container"]})
+    ] == ["start", "stop", "destroy"]
+
+
+def test_in_memory_client_attached_exit_code(in_memory_docker_client):
+    docker_client.pull_image(repo_tag="alpine:3.16")
+    in_memory_docker_client.exit_codes["foo"] = 7
+
+    with pytest.raises(CalledProcessError) as error:
+        docker_client.run_container(
+            repo_tag="alpine:3.16",
+            name="foo",
+            labels={},
+            environment={},
+            network="components",
+            mem_limit=1,
+            detach=False,
+        )
+
+    assert error.value.returncode == 7
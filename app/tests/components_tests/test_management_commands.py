@@ -1,13 +1,17 @@
+import json
+
 import pytest
 from celery.result import AsyncResult
 from django.core.management import CommandError, call_command
 
-from grandchallenge.components.models import InterfaceKind
+from grandchallenge.components.models import ComponentJobEvent, InterfaceKind
+from tests.algorithms_tests.factories import AlgorithmJobFactory
 from tests.cases_tests.factories import ImageFactoryWithImageFile4D
 from tests.components_tests.factories import (
     ComponentInterfaceFactory,
     ComponentInterfaceValueFactory,
 )
+from tests.evaluation_tests.factories import EvaluationFactory
 
 
 @pytest.mark.django_db
@@ -55,3 +59,84 @@ def test_add_overlay_segments(settings, django_capture_on_commit_callbacks):
         call_command("add_overlay_segments", "foo", '{"255": "seg"}')
     im.refresh_from_db()
     assert im.segments == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13]
+
+
+@pytest.mark.django_db
+def test_compact_runtime_metrics():
+    legacy_metrics = {
+        "instance": {"name": "ml.m5.large"},
+        "metrics": [
+            {
+                "label": "CPUUtilization",
+                "status": "Complete",
+                "timestamps": ["2022-06-09T09:38:00+00:00"],
+                "values": [50.0],
+            }
+        ],
+    }
+    job = AlgorithmJobFactory(time_limit=60, runtime_metrics=legacy_metrics)
+    evaluation = EvaluationFactory(
+        time_limit=60, runtime_metrics=legacy_metrics
+    )
+    untouched = AlgorithmJobFactory(time_limit=60)
+
+    call_command("compact_runtime_metrics", batch_size=1)
+
+    for obj in (job, evaluation):
+        obj.refresh_from_db()
+        assert obj.runtime_metrics["summary"] == {
+            "CPUUtilization": {"max": 50.0, "mean": 50.0}
+        }
+        assert "timestamps" not in obj.runtime_metrics["metrics"][0]
+
+    untouched.refresh_from_db()
+    assert untouched.runtime_metrics == {}
+
+
+@pytest.mark.django_db
+def test_replay_job_events(tmp_path, django_capture_on_commit_callbacks):
+    backend = "tests.components_tests.resources.backends.FakeSageMakerTrainingExecutor"
+    jobs = [AlgorithmJobFactory(time_limit=60) for _ in range(2)]
+
+    events = []
+    for job in jobs:
+        job.status = job.EXECUTING
+        job.save()
+        events.append(
+            {
+                "TrainingJobName": job.get_executor(
+                    backend=backend
+                )._sagemaker_job_name,
+                "TrainingJobStatus": "Completed",
+            }
+        )
+
+    recording = tmp_path / "events.jsonl"
+    recording.write_text(
+        "\n".join(
+            [
+                json.dumps({"backend": backend, "event": events[0]}),
+                json.dumps(events[1]),
+                "",
+            ]
+        )
+    )
+
+    call_command("replay_job_events", str(recording), backend=backend)
+
+    assert ComponentJobEvent.objects.count() == 2
+
+    with django_capture_on_commit_callbacks():
+        call_command(
+            "replay_job_events",
+            str(recording),
+            backend=backend,
+            handle=True,
+            batch_size=1,
+        )
+
+    assert not ComponentJobEvent.objects.exists()
+
+    for job in jobs:
+        job.refresh_from_db()
+        assert job.status == job.EXECUTED
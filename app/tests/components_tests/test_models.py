@@ -1,12 +1,15 @@
 import json
 import uuid
 from contextlib import nullcontext
-from datetime import timedelta
+from datetime import datetime, timedelta
+from io import BytesIO
 
 import pytest
+from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
 from django.utils import timezone
+from guardian.shortcuts import assign_perm
 from panimg.models import MAXIMUM_SEGMENTS_LENGTH
 
 from grandchallenge.algorithms.models import AlgorithmImage, Job
@@ -17,6 +20,12 @@ from grandchallenge.components.models import (
     InterfaceKind,
     InterfaceKindChoices,
     InterfaceSuperKindChoices,
+    get_interface_kind_item_validators,
+    get_viewable_component_interface_values,
+)
+from grandchallenge.components.runtime_metrics import (
+    encode_series,
+    summarise_series,
 )
 from grandchallenge.components.schemas import INTERFACE_VALUE_SCHEMA
 from grandchallenge.components.tasks import (
@@ -38,8 +47,9 @@ from tests.components_tests.factories import (
     ComponentInterfaceFactory,
     ComponentInterfaceValueFactory,
 )
+from tests.components_tests.resources.logs_client import FakeLogsClient
 from tests.evaluation_tests.factories import EvaluationFactory, MethodFactory
-from tests.factories import ImageFactory, WorkstationImageFactory
+from tests.factories import ImageFactory, UserFactory, WorkstationImageFactory
 from tests.reader_studies_tests.factories import (
     DisplaySetFactory,
     QuestionFactory,
@@ -675,6 +685,33 @@ def test_default_validation(kind, value, expectation, use_file):
         v.full_clean()
 
 
+@pytest.mark.parametrize(
+    "point,expectation",
+    (
+        ([1, 2, 3], nullcontext()),
+        ([1, 2], pytest.raises(ValidationError)),
+    ),
+)
+def test_file_validation_streams_array_items(point, expectation):
+    ci = ComponentInterface(
+        kind=InterfaceKindChoices.MULTIPLE_POINTS, store_in_database=False
+    )
+    value = {
+        "type": "Multiple points",
+        "points": [{"point": [0, 0, 0]}] * 1000 + [{"point": point}],
+        "version": {"major": 1, "minor": 0},
+    }
+
+    assert get_interface_kind_item_validators(kind=ci.kind).keys() == {
+        "points"
+    }
+
+    with expectation:
+        ci.validate_file_against_schema(
+            file=BytesIO(json.dumps(value).encode("utf-8"))
+        )
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("use_file", [True, False])
 @pytest.mark.parametrize(
@@ -1058,6 +1095,95 @@ def test_runtime_metrics_chart():
     }
 
 
+def test_runtime_metrics_chart_is_downsampled(settings):
+    settings.COMPONENTS_RUNTIME_METRICS_CHART_POINTS = 10
+
+    start = datetime.fromisoformat("2022-06-09T09:37:00+00:00")
+    job = Job(
+        runtime_metrics={
+            "instance": {
+                "cpu": 2,
+                "gpu_type": None,
+                "gpus": 0,
+                "memory": 8,
+                "name": "ml.m5.large",
+            },
+            "metrics": [
+                {
+                    "label": "CPUUtilization",
+                    "status": "Complete",
+                    **encode_series(
+                        timestamps=[
+                            start + timedelta(minutes=m) for m in range(100)
+                        ],
+                        values=[float(m) for m in range(100)],
+                    ),
+                }
+            ],
+        }
+    )
+
+    values = job.runtime_metrics_chart["data"]["values"]
+
+    assert len(values) == 10
+    assert values[0] == {
+        "Metric": "CPUUtilization",
+        "Timestamp": "2022-06-09T09:37:00+00:00",
+        "Percent": 0.0,
+    }
+    assert values[-1] == {
+        "Metric": "CPUUtilization",
+        "Timestamp": "2022-06-09T11:16:00+00:00",
+        "Percent": 0.99,
+    }
+
+
+@pytest.mark.django_db
+def test_runtime_metrics_summary():
+    def runtime_metrics(*, instance_name, cpu, memory):
+        return {
+            "instance": {"name": instance_name},
+            "metrics": [],
+            "summary": {
+                "CPUUtilization": summarise_series(values=cpu),
+                "MemoryUtilization": summarise_series(values=memory),
+            },
+        }
+
+    AlgorithmJobFactory(
+        time_limit=60,
+        runtime_metrics=runtime_metrics(
+            instance_name="ml.m5.large", cpu=[10, 30], memory=[50, 90]
+        ),
+    )
+    AlgorithmJobFactory(
+        time_limit=60,
+        runtime_metrics=runtime_metrics(
+            instance_name="ml.m5.large", cpu=[40], memory=[20]
+        ),
+    )
+    AlgorithmJobFactory(
+        time_limit=60,
+        runtime_metrics=runtime_metrics(
+            instance_name="ml.g4dn.xlarge", cpu=[5], memory=[10]
+        ),
+    )
+    AlgorithmJobFactory(time_limit=60)
+
+    summary = {
+        s["instance_name"]: s for s in Job.objects.runtime_metrics_summary()
+    }
+
+    assert summary.keys() == {"ml.m5.large", "ml.g4dn.xlarge"}
+    assert summary["ml.m5.large"]["num_jobs"] == 2
+    assert summary["ml.m5.large"]["CPUUtilization_max"] == 40
+    assert summary["ml.m5.large"]["CPUUtilization_mean"] == 30
+    assert summary["ml.m5.large"]["MemoryUtilization_max"] == 90
+    assert summary["ml.m5.large"]["MemoryUtilization_mean"] == 45
+    assert summary["ml.m5.large"]["GPUUtilization_max"] is None
+    assert summary["ml.g4dn.xlarge"]["num_jobs"] == 1
+
+
 @pytest.mark.django_db
 def test_clean_overlay_segments_with_values():
     ci = ComponentInterfaceFactory(kind=InterfaceKindChoices.SEGMENTATION)
@@ -1406,3 +1532,83 @@ def test_correct_storage_set(factory, expected_storage, download_context):
 
     with download_context:
         _ = instance.image.url
+
+
+@pytest.mark.django_db
+def test_update_log_chunks(settings, monkeypatch):
+    settings.COMPONENTS_AMAZON_ECR_REGION = "us-east-1"
+
+    job = AlgorithmJobFactory(time_limit=60)
+    executor = job.get_executor(
+        backend="grandchallenge.components.backends.amazon_sagemaker_training.AmazonSageMakerTrainingExecutor"
+    )
+
+    logs_client = FakeLogsClient(page_size=2)
+    log_stream_name = f"{executor._sagemaker_job_name}/i-whatever"
+    logs_client.put_log_lines(
+        log_stream_name=log_stream_name,
+        lines=[("stdout", "one"), ("stderr", "two"), ("stdout", "three")],
+    )
+    monkeypatch.setattr(type(executor), "_logs_client", logs_client)
+
+    job.update_log_chunks(executor=executor)
+
+    assert job.log_chunks.count() == 2
+    assert [line["message"] for line in job.iter_log_lines()] == [
+        "one",
+        "two",
+        "three",
+    ]
+
+    logs_client.put_log_lines(
+        log_stream_name=log_stream_name, lines=[("stdout", "four")]
+    )
+    job.update_log_chunks(executor=executor)
+
+    assert [chunk.sequence for chunk in job.log_chunks.all()] == [0, 1, 2]
+    assert [line["message"] for line in job.get_log_lines(tail=2)] == [
+        "three",
+        "four",
+    ]
+    assert logs_client.calls.count("describe_log_streams") == 1
+
+
+@pytest.mark.django_db
+def test_get_viewable_component_interface_values(django_assert_num_queries):
+    job_input, job_output, archived, displayed, unrelated = (
+        ComponentInterfaceValueFactory.create_batch(5)
+    )
+    user, admin = UserFactory(), UserFactory(is_superuser=True)
+
+    job = AlgorithmJobFactory(creator=user)
+    job.inputs.add(job_input)
+    job.outputs.add(job_output)
+
+    archive_item = ArchiveItemFactory()
+    archive_item.values.add(archived)
+    archive_item.archive.add_user(user)
+
+    display_set = DisplaySetFactory()
+    display_set.values.add(displayed)
+    assign_perm("view_displayset", user, display_set)
+
+    pks = [c.pk for c in (job_input, job_output, archived, displayed)]
+
+    with django_assert_num_queries(1):
+        assert {
+            *get_viewable_component_interface_values(
+                user=user, pks=[*pks, unrelated.pk]
+            ).values_list("pk", flat=True)
+        } == {*pks}
+
+    assert {
+        *get_viewable_component_interface_values(
+            user=admin, pks=[*pks, unrelated.pk]
+        ).values_list("pk", flat=True)
+    } == {*pks}
+    assert not get_viewable_component_interface_values(
+        user=UserFactory(), pks=pks
+    ).exists()
+    assert not get_viewable_component_interface_values(
+        user=AnonymousUser(), pks=pks
+    ).exists()
@@ -0,0 +1,108 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from grandchallenge.components.runtime_metrics import (
+    compact_runtime_metrics,
+    decode_series,
+    downsample_series,
+    encode_series,
+    largest_triangle_three_buckets,
+)
+
+
+def test_series_round_trip():
+    start = datetime(2022, 6, 9, 9, 37, tzinfo=timezone.utc)
+    timestamps = [start + timedelta(minutes=m) for m in (2, 1, 0, 3)]
+    values = [0.5, 12.25, 100.0, 350.75]
+
+    encoded = encode_series(timestamps=timestamps, values=values)
+
+    assert encoded["start"] == int(timestamps[0].timestamp())
+    assert decode_series(metric=encoded) == (timestamps, values)
+
+
+def test_empty_series_round_trip():
+    assert decode_series(metric=encode_series(timestamps=[], values=[])) == (
+        [],
+        [],
+    )
+
+
+def test_decode_legacy_series():
+    assert decode_series(
+        metric={
+            "timestamps": ["2022-06-09T09:38:00+00:00"],
+            "values": [0.677884],
+        }
+    ) == ([datetime(2022, 6, 9, 9, 38, tzinfo=timezone.utc)], [0.677884])
+
+
+@pytest.mark.parametrize("threshold", (3, 10, 100))
+def test_largest_triangle_three_buckets(threshold):
+    x = [*range(1000)]
+    y = [math.sin(i / 50) for i in x]
+    y[500] = 10
+
+    indices = largest_triangle_three_buckets(x=x, y=y, threshold=threshold)
+
+    assert len(indices) == threshold
+    assert indices == sorted(indices)
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    if threshold > 3:
+        # The peak should be preserved
+        assert 500 in indices
+
+
+def test_largest_triangle_three_buckets_below_threshold():
+    assert largest_triangle_three_buckets(
+        x=[0, 1, 2], y=[0, 1, 0], threshold=10
+    ) == [0, 1, 2]
+
+
+def test_downsample_series_is_ordered_by_time():
+    start = datetime(2022, 6, 9, 9, 37, tzinfo=timezone.utc)
+    # CloudWatch returns the most recent values first
+    timestamps = [start + timedelta(minutes=m) for m in reversed(range(100))]
+    values = [float(m) for m in reversed(range(100))]
+
+    timestamps, values = downsample_series(
+        timestamps=timestamps, values=values, threshold=10
+    )
+
+    assert len(timestamps) == 10
+    assert timestamps == sorted(timestamps)
+    assert values == [(t - start).total_seconds() / 60 for t in timestamps]
+
+
+def test_compact_runtime_metrics():
+    runtime_metrics = compact_runtime_metrics(
+        runtime_metrics={
+            "instance": {"name": "ml.m5.large"},
+            "metrics": [
+                {
+                    "label": "CPUUtilization",
+                    "status": "Complete",
+                    "timestamps": [
+                        "2022-06-09T09:38:00+00:00",
+                        "2022-06-09T09:37:00+00:00",
+                    ],
+                    "values": [50.0, 150.0],
+                }
+            ],
+        }
+    )
+
+    assert runtime_metrics["instance"] == {"name": "ml.m5.large"}
+    assert runtime_metrics["summary"] == {
+        "CPUUtilization": {"max": 150.0, "mean": 100.0}
+    }
+    assert decode_series(metric=runtime_metrics["metrics"][0]) == (
+        [
+            datetime(2022, 6, 9, 9, 38, tzinfo=timezone.utc),
+            datetime(2022, 6, 9, 9, 37, tzinfo=timezone.utc),
+        ],
+        [50.0, 150.0],
+    )
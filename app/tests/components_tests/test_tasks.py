@@ -1,29 +1,46 @@
+import hashlib
 import json
+import os
 import subprocess
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
 
 import pytest
+from botocore.exceptions import ClientError
 from celery.exceptions import MaxRetriesExceededError
+from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from django.utils.timezone import now
 from requests import put
 
-from grandchallenge.algorithms.models import AlgorithmImage
+from grandchallenge.algorithms.models import AlgorithmImage, Job
 from grandchallenge.cases.models import RawImageUploadSession
+from grandchallenge.components import tasks
 from grandchallenge.components.models import (
     ComponentInterfaceValue,
+    ComponentJobEvent,
     ImportStatusChoices,
 )
 from grandchallenge.components.tasks import (
+    MAX_RETRIES,
     _get_image_config_and_sha256,
+    _handle_event_batch,
     _repo_login_and_run,
     _retry,
+    _stream_container_image,
     add_file_to_object,
     add_image_to_object,
     assign_tarball_from_upload,
+    buffer_event,
     civ_value_to_file,
     encode_b64j,
     execute_job,
+    handle_event,
     remove_inactive_container_images,
+    tail_job_logs,
     update_container_image_shim,
     upload_to_registry_and_sagemaker,
     validate_docker_image,
@@ -32,6 +49,7 @@ from grandchallenge.notifications.models import Notification
 from tests.algorithms_tests.factories import (
     AlgorithmFactory,
     AlgorithmImageFactory,
+    AlgorithmJobFactory,
     AlgorithmModelFactory,
 )
 from tests.archives_tests.factories import ArchiveItemFactory
@@ -382,7 +400,10 @@ def test_add_image_to_object(settings, object_type):
     "object_type", [DisplaySetFactory, ArchiveItemFactory]
 )
 @pytest.mark.django_db
-def test_add_file_to_object(settings, object_type):
+def test_add_file_to_object(
+    settings, object_type, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
     settings.task_eager_propagates = (True,)
     settings.task_always_eager = (True,)
 
@@ -405,13 +426,14 @@ def test_add_file_to_object(settings, object_type):
         },
     )
 
-    add_file_to_object(
-        app_label=obj._meta.app_label,
-        model_name=obj._meta.model_name,
-        object_pk=obj.pk,
-        user_upload_pk=us.pk,
-        interface_pk=ci.pk,
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        add_file_to_object(
+            app_label=obj._meta.app_label,
+            model_name=obj._meta.model_name,
+            object_pk=obj.pk,
+            user_upload_pk=us.pk,
+            interface_pk=ci.pk,
+        )
 
     assert ComponentInterfaceValue.objects.filter(interface=ci).count() == 0
     us.refresh_from_db()
@@ -429,13 +451,14 @@ def test_add_file_to_object(settings, object_type):
     )
     us2.save()
 
-    add_file_to_object(
-        app_label=obj._meta.app_label,
-        model_name=obj._meta.model_name,
-        user_upload_pk=us2.pk,
-        object_pk=obj.pk,
-        interface_pk=ci.pk,
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        add_file_to_object(
+            app_label=obj._meta.app_label,
+            model_name=obj._meta.model_name,
+            user_upload_pk=us2.pk,
+            object_pk=obj.pk,
+            interface_pk=ci.pk,
+        )
     assert ComponentInterfaceValue.objects.filter(interface=ci).count() == 1
 
 
@@ -461,6 +484,112 @@ def test_get_image_config_and_sha256(container_image_file):
     )
 
 
+@pytest.mark.parametrize(
+    "container_image_file",
+    (
+        "hello-scratch-docker-v2.tar.gz",
+        "hello-scratch-oci.tar.gz",
+    ),
+)
+def test_stream_container_image_decompresses(container_image_file):
+    resource_dir = Path(__file__).parent / "resources"
+
+    with (
+        open(resource_dir / container_image_file, "rb") as f,
+        BytesIO() as out,
+    ):
+        result = _stream_container_image(in_fileobj=f, out_fileobj=out)
+
+        out.seek(0)
+        with tarfile.open(fileobj=out, mode="r:") as tf:
+            decompressed_files = {
+                m.name for m in tf.getmembers() if m.isfile()
+            }
+
+    assert decompressed_files == set(result["digests"])
+    assert (
+        result["bytes_read"]
+        == (resource_dir / container_image_file).stat().st_size
+    )
+
+
+def _create_container_image_tarball(*, members):
+    out = BytesIO()
+
+    with tarfile.open(fileobj=out, mode="w:gz") as tf:
+        for name, content in members:
+            tarinfo = tarfile.TarInfo(name=name)
+            tarinfo.size = len(content)
+            tf.addfile(tarinfo, BytesIO(content))
+
+    out.seek(0)
+    return out
+
+
+def test_stream_container_image_stops_at_config():
+    config = b'{"architecture": "amd64", "config": {"User": "1000"}}'
+    config_name = f"{hashlib.sha256(config).hexdigest()}.json"
+    manifest = json.dumps([{"Config": config_name, "Layers": []}]).encode()
+
+    tarball = _create_container_image_tarball(
+        members=[
+            (config_name, config),
+            ("manifest.json", manifest),
+            ("layer/layer.tar", os.urandom(10 * 1024 * 1024)),
+        ]
+    )
+
+    result = _stream_container_image(in_fileobj=tarball)
+
+    assert result["container_image_files"] == {
+        config_name: config,
+        "manifest.json": manifest,
+    }
+    assert "layer/layer.tar" not in result["digests"]
+    assert result["bytes_read"] < len(tarball.getvalue())
+
+
+def test_stream_container_image_rereads_dropped_config(monkeypatch):
+    monkeypatch.setattr(tasks, "MAX_CONTAINER_IMAGE_CANDIDATES_SIZE", 1024)
+
+    config = b'{"architecture": "amd64", "config": {"User": "1000"}}'
+    config_name = f"blobs/sha256/{hashlib.sha256(config).hexdigest()}"
+    manifest = json.dumps([{"Config": config_name, "Layers": []}]).encode()
+    blobs = [
+        (f"blobs/sha256/{hashlib.sha256(blob).hexdigest()}", blob)
+        for blob in (os.urandom(1024) for _ in range(3))
+    ]
+
+    tarball = _create_container_image_tarball(
+        members=[*blobs, (config_name, config), ("manifest.json", manifest)]
+    )
+
+    result = _stream_container_image(in_fileobj=tarball)
+
+    assert result["container_image_files"] == {
+        config_name: config,
+        "manifest.json": manifest,
+    }
+    assert {*result["digests"]} == {
+        *(name for name, _ in blobs),
+        config_name,
+        "manifest.json",
+    }
+
+
+def test_stream_container_image_invalid_digest():
+    config = b'{"architecture": "amd64", "config": {"User": "1000"}}'
+    config_name = f"blobs/sha256/{'0' * 64}"
+    manifest = json.dumps([{"Config": config_name, "Layers": []}]).encode()
+
+    tarball = _create_container_image_tarball(
+        members=[(config_name, config), ("manifest.json", manifest)]
+    )
+
+    with pytest.raises(ValidationError):
+        _stream_container_image(in_fileobj=tarball)
+
+
 @pytest.mark.parametrize(
     "factory,related_factory,related_model_lookup,field_to_copy",
     [
@@ -528,3 +657,273 @@ def test_assign_tarball_from_upload(
     assert not obj2.user_upload
     with pytest.raises(ValueError):
         getattr(obj2, field_to_copy).file
+
+
+FAKE_BACKEND = (
+    "tests.components_tests.resources.backends.FakeSageMakerTrainingExecutor"
+)
+
+
+def _training_event(*, job, status):
+    executor = job.get_executor(backend=FAKE_BACKEND)
+    return {
+        "TrainingJobName": executor._sagemaker_job_name,
+        "TrainingJobStatus": status,
+        "FailureReason": "Oops",
+    }
+
+
+def _executing_job(**kwargs):
+    job = AlgorithmJobFactory(time_limit=60, **kwargs)
+    job.status = job.EXECUTING
+    job.save()
+    return job
+
+
+@pytest.mark.django_db
+def test_handle_event_buffers_events(settings):
+    settings.COMPONENTS_BATCH_EVENTS = True
+    job = _executing_job()
+
+    handle_event(
+        event=_training_event(job=job, status="Completed"),
+        backend=FAKE_BACKEND,
+    )
+
+    event = ComponentJobEvent.objects.get()
+    assert event.job_key == (FAKE_BACKEND, "algorithms", "job", job.pk)
+    assert event.attempt == job.attempt
+
+    job.refresh_from_db()
+    assert job.status == job.EXECUTING
+
+
+@pytest.mark.django_db
+def test_handle_event_batch(django_capture_on_commit_callbacks):
+    completed, failed, cancelled, superseded = (
+        _executing_job() for _ in range(4)
+    )
+    provisioned = AlgorithmJobFactory(time_limit=60)
+
+    for job, status in (
+        (completed, "Completed"),
+        (failed, "Failed"),
+        (cancelled, "Stopped"),
+        (superseded, "Failed"),
+        (superseded, "Completed"),
+        (provisioned, "Completed"),
+    ):
+        buffer_event(
+            event=_training_event(job=job, status=status),
+            backend=FAKE_BACKEND,
+        )
+
+    with django_capture_on_commit_callbacks():
+        stats = _handle_event_batch(batch_size=10)
+
+    assert stats.received == 6
+    assert stats.handled == 4
+    assert stats.superseded == 1
+    assert stats.stale == 1
+    assert stats.remaining == 0
+    assert stats.oldest_remaining is None
+
+    for job, status in (
+        (completed, Job.EXECUTED),
+        (failed, Job.FAILURE),
+        (cancelled, Job.CANCELLED),
+        (superseded, Job.EXECUTED),
+        (provisioned, Job.PENDING),
+    ):
+        job.refresh_from_db()
+        assert job.status == status
+
+    assert failed.error_message == "Oops"
+
+
+@pytest.mark.django_db
+def test_handle_event_batch_ignores_other_attempts():
+    job = _executing_job()
+    buffer_event(
+        event=_training_event(job=job, status="Completed"),
+        backend=FAKE_BACKEND,
+    )
+    job.attempt += 1
+    job.save()
+
+    stats = _handle_event_batch(batch_size=10)
+
+    assert stats.stale == 1
+    assert not ComponentJobEvent.objects.exists()
+
+    job.refresh_from_db()
+    assert job.status == job.EXECUTING
+
+
+@pytest.mark.django_db
+def test_handle_event_batch_retries_events():
+    job = _executing_job()
+    event = buffer_event(
+        event=_training_event(job=job, status="InProgress"),
+        backend=FAKE_BACKEND,
+    )
+
+    stats = _handle_event_batch(batch_size=10)
+
+    assert stats.retried == 1
+    assert stats.remaining == 1
+
+    event.refresh_from_db()
+    assert event.retries == 1
+    assert event.retry_at > now()
+
+    # The event is not due yet
+    assert _handle_event_batch(batch_size=10).received == 0
+
+    event.retry_at = now()
+    event.event["TrainingJobStatus"] = "Completed"
+    event.save()
+
+    assert _handle_event_batch(batch_size=10).handled == 1
+
+    job.refresh_from_db()
+    assert job.status == job.EXECUTED
+
+
+@pytest.mark.django_db
+def test_handle_event_batch_fails_job_after_max_retries():
+    job = _executing_job()
+    event = buffer_event(
+        event=_training_event(job=job, status="InProgress"),
+        backend=FAKE_BACKEND,
+    )
+    event.retries = MAX_RETRIES
+    event.save()
+
+    assert _handle_event_batch(batch_size=10).handled == 1
+
+    job.refresh_from_db()
+    assert job.status == job.FAILURE
+    assert not ComponentJobEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_handle_event_batch_isolates_failing_events(monkeypatch):
+    broken, working = _executing_job(), _executing_job()
+    update_status = Job.update_status
+
+    def update_status_unless_broken(self, *args, **kwargs):
+        if self.pk == broken.pk:
+            raise RuntimeError("Database unavailable")
+        return update_status(self, *args, **kwargs)
+
+    monkeypatch.setattr(Job, "update_status", update_status_unless_broken)
+
+    for job in (broken, working):
+        buffer_event(
+            event=_training_event(job=job, status="Completed"),
+            backend=FAKE_BACKEND,
+        )
+
+    stats = _handle_event_batch(batch_size=10)
+
+    assert stats.handled == 1
+    assert stats.deferred == 1
+    assert stats.remaining == 1
+    assert ComponentJobEvent.objects.get().job_pk == broken.pk
+
+    working.refresh_from_db()
+    assert working.status == working.EXECUTED
+
+
+TAILING_BACKEND = "grandchallenge.components.backends.amazon_sagemaker_training.AmazonSageMakerTrainingExecutor"
+
+
+class UnavailableLogsClient:
+    def describe_log_streams(self, **kwargs):
+        raise ClientError(
+            {"Error": {"Code": "ThrottlingException"}}, "DescribeLogStreams"
+        )
+
+
+def _tail_job_logs(*, job):
+    tail_job_logs(
+        job_pk=job.pk,
+        job_app_label=job._meta.app_label,
+        job_model_name=job._meta.model_name,
+        backend=TAILING_BACKEND,
+    )
+
+
+@pytest.mark.django_db
+def test_tail_job_logs_tolerates_log_errors(settings, monkeypatch):
+    settings.COMPONENTS_AMAZON_ECR_REGION = "us-east-1"
+    job = _executing_job()
+    executor = job.get_executor(backend=TAILING_BACKEND)
+    scheduled = []
+
+    monkeypatch.setattr(
+        type(executor), "_logs_client", UnavailableLogsClient()
+    )
+    monkeypatch.setattr(tasks, "on_commit", scheduled.append)
+
+    _tail_job_logs(job=job)
+
+    job.refresh_from_db()
+    assert job.status == job.EXECUTING
+    assert not job.log_chunks.exists()
+    assert len(scheduled) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_tail_job_logs_reschedules_locked_jobs(settings, monkeypatch):
+    settings.COMPONENTS_AMAZON_ECR_REGION = "us-east-1"
+    job = _executing_job()
+    scheduled = []
+
+    monkeypatch.setattr(tasks, "on_commit", scheduled.append)
+
+    def tail():
+        close_old_connections()
+        try:
+            _tail_job_logs(job=job)
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        Job.objects.select_for_update().get(pk=job.pk)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(tail).result()
+
+    assert len(scheduled) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_handle_event_batch_defers_locked_jobs():
+    job = _executing_job()
+    buffer_event(
+        event=_training_event(job=job, status="Completed"),
+        backend=FAKE_BACKEND,
+    )
+
+    def handle_batch():
+        close_old_connections()
+        try:
+            return _handle_event_batch(batch_size=10)
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        Job.objects.select_for_update().get(pk=job.pk)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            stats = pool.submit(handle_batch).result()
+
+    assert stats.deferred == 1
+    assert stats.remaining == 1
+
+    assert _handle_event_batch(batch_size=10).handled == 1
+
+    job.refresh_from_db()
+    assert job.status == job.EXECUTED
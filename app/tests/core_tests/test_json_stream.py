@@ -0,0 +1,87 @@
+import json
+from io import BytesIO, StringIO
+from json import JSONDecodeError
+
+import pytest
+
+from grandchallenge.core.utils.json_stream import load_json_streaming
+
+
+@pytest.mark.parametrize("chunk_size", (1, 3, 2**20))
+@pytest.mark.parametrize(
+    "value",
+    (
+        {"name": "héllo", "points": [[1, 2.5, 3e4], [-1, 0, 12345]]},
+        {"points": [], "empty": {}, "nested": {"points": [1]}},
+        {"points": "not an array"},
+        {},
+        [1, 2, 3],
+        123456,
+        None,
+    ),
+)
+def test_load_json_streaming(value, chunk_size):
+    items = []
+
+    loaded = load_json_streaming(
+        file=BytesIO(json.dumps(value, indent=2).encode("utf-8")),
+        array_item_callbacks={"points": items.append},
+        chunk_size=chunk_size,
+    )
+
+    if isinstance(value, dict) and isinstance(value.get("points"), list):
+        assert loaded == {**value, "points": []}
+        assert items == value["points"]
+    else:
+        assert loaded == value
+        assert items == []
+
+
+@pytest.mark.parametrize(
+    "document",
+    ('{"a": 12.5, "b": 3e-7}', '{"points": [1.25, 2e-3]}', "-0.5E+10"),
+)
+def test_load_json_streaming_split_numbers(document):
+    expected = json.loads(document)
+
+    for chunk_size in range(1, len(document) + 1):
+        items = []
+
+        loaded = load_json_streaming(
+            file=BytesIO(document.encode("utf-8")),
+            array_item_callbacks={"points": items.append},
+            chunk_size=chunk_size,
+        )
+
+        if isinstance(expected, dict) and "points" in expected:
+            assert loaded == {**expected, "points": []}
+            assert items == expected["points"]
+        else:
+            assert loaded == expected
+
+
+def test_load_json_streaming_text_file():
+    assert load_json_streaming(
+        file=StringIO('{"a": [1, 2]}'), array_item_callbacks={}
+    ) == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize(
+    "document",
+    (
+        "",
+        '{"points": [1, 2,]}',
+        '{"points": [1, 2}',
+        '{"a": 1,}',
+        "{1: 2}",
+        '{"a": 1} {}',
+        '{"a" 1}',
+    ),
+)
+def test_load_json_streaming_invalid(document):
+    with pytest.raises(JSONDecodeError):
+        load_json_streaming(
+            file=BytesIO(document.encode("utf-8")),
+            array_item_callbacks={"points": lambda item: None},
+            chunk_size=2,
+        )
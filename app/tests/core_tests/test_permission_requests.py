@@ -223,8 +223,18 @@ def test_permission_request_workflow(
     ),
 )
 def test_permission_request_notifications_flow_for_manual_review(
-    client, factory, namespace, request_model, request_attr
+    client,
+    factory,
+    namespace,
+    request_model,
+    request_attr,
+    settings,
+    django_capture_on_commit_callbacks,
 ):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     base_object = factory(
         access_request_handling=AccessRequestHandlingOptions.MANUAL_REVIEW
     )
@@ -252,9 +262,13 @@ def test_permission_request_notifications_flow_for_manual_review(
     assert is_following(user=editor, obj=base_object)
 
     # Create the permission request
-    _ = get_view_for_user(
-        client=client, user=user, url=permission_create_url, method=client.post
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = get_view_for_user(
+            client=client,
+            user=user,
+            url=permission_create_url,
+            method=client.post,
+        )
 
     pr = request_model.objects.get()
     assert pr.status == request_model.PENDING
@@ -287,13 +301,14 @@ def test_permission_request_notifications_flow_for_manual_review(
         )
 
     # accepting the permission request
-    _ = get_view_for_user(
-        client=client,
-        user=editor,
-        url=permission_update_url,
-        method=client.post,
-        data={"status": pr.ACCEPTED},
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = get_view_for_user(
+            client=client,
+            user=editor,
+            url=permission_update_url,
+            method=client.post,
+            data={"status": pr.ACCEPTED},
+        )
 
     pr.refresh_from_db()
     assert pr.status == request_model.ACCEPTED
@@ -308,13 +323,14 @@ def test_permission_request_notifications_flow_for_manual_review(
     )
 
     # reject permission request
-    _ = get_view_for_user(
-        client=client,
-        user=editor,
-        url=permission_update_url,
-        method=client.post,
-        data={"status": pr.REJECTED},
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = get_view_for_user(
+            client=client,
+            user=editor,
+            url=permission_update_url,
+            method=client.post,
+            data={"status": pr.REJECTED},
+        )
 
     pr.refresh_from_db()
     assert pr.status == request_model.REJECTED
@@ -409,8 +425,18 @@ def test_permission_request_notifications_flow_for_accept_all(
     ),
 )
 def test_permission_request_notifications_flow_for_accept_verified_users(
-    client, factory, namespace, request_model, request_attr
+    client,
+    factory,
+    namespace,
+    request_model,
+    request_attr,
+    settings,
+    django_capture_on_commit_callbacks,
 ):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     base_object = factory(
         access_request_handling=AccessRequestHandlingOptions.ACCEPT_VERIFIED_USERS
     )
@@ -437,12 +463,13 @@ def test_permission_request_notifications_flow_for_accept_verified_users(
     Verification.objects.create(user=verified_user, is_verified=True)
 
     # the verified users gets accepted automatically, no follows and no notifcations
-    _ = get_view_for_user(
-        client=client,
-        user=verified_user,
-        url=permission_create_url,
-        method=client.post,
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = get_view_for_user(
+            client=client,
+            user=verified_user,
+            url=permission_create_url,
+            method=client.post,
+        )
     pr = request_model.objects.get()
     assert pr.status == request_model.ACCEPTED
     assert pr.user == verified_user
@@ -452,12 +479,13 @@ def test_permission_request_notifications_flow_for_accept_verified_users(
 
     # for the not verified user, a follow is created, the request is pending and
     # the admin gets a notification
-    _ = get_view_for_user(
-        client=client,
-        user=not_verified_user,
-        url=permission_create_url,
-        method=client.post,
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = get_view_for_user(
+            client=client,
+            user=not_verified_user,
+            url=permission_create_url,
+            method=client.post,
+        )
     pr = request_model.objects.get()
     assert pr.status == request_model.PENDING
     assert pr.user == not_verified_user
@@ -467,7 +495,13 @@ def test_permission_request_notifications_flow_for_accept_verified_users(
 
 
 @pytest.mark.django_db
-def test_algorithm_permission_request_notification_for_admins_only(client):
+def test_algorithm_permission_request_notification_for_admins_only(
+    client, settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     base_object = AlgorithmFactory()
     editor = UserFactory()
     user = UserFactory()
@@ -484,9 +518,13 @@ def test_algorithm_permission_request_notification_for_admins_only(client):
     )
 
     # Create the permission request
-    _ = get_view_for_user(
-        client=client, user=user, url=permission_create_url, method=client.post
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = get_view_for_user(
+            client=client,
+            user=user,
+            url=permission_create_url,
+            method=client.post,
+        )
 
     assert Notification.objects.count() == 1
     assert Notification.objects.get().user == editor
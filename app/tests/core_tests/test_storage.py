@@ -119,3 +119,19 @@ def test_private_storage_url_generation_fails():
 
     with pytest.raises(NotImplementedError):
         storage.url(name="test.jpg")
+
+
+@pytest.mark.parametrize(
+    "size,expected",
+    (
+        (0, 8 * 1024 * 1024),
+        (8 * 1024 * 1024 * 10_000, 8 * 1024 * 1024),
+        (8 * 1024 * 1024 * 10_000 + 1, 16 * 1024 * 1024),
+        (100 * 1024 * 1024 * 1024, 16 * 1024 * 1024),
+        (5 * 1024 * 1024 * 1024 * 1024, 1024 * 1024 * 1024),
+    ),
+)
+def test_copy_part_size(size, expected):
+    # The part sizes of the boto3 managed copy are used so that the
+    # checksums of copied objects do not change
+    assert grandchallenge.core.storage._copy_part_size(size=size) == expected
@@ -212,6 +212,16 @@ def test_get_metrics():
                     "Unit": "Seconds",
                     "Value": 0,
                 },
+                {
+                    "MetricName": "OldestActiveComponentJobEvent",
+                    "Unit": "Seconds",
+                    "Value": 0,
+                },
+                {
+                    "MetricName": "BufferedComponentJobEvents",
+                    "Unit": "Count",
+                    "Value": 0,
+                },
             ],
         },
     ]
@@ -5,8 +5,7 @@ from django.core import mail
 from django.utils.timezone import now
 
 from grandchallenge.direct_messages.tasks import (
-    get_new_senders,
-    get_users_to_send_new_unread_direct_messages_email,
+    get_new_unread_direct_messages,
     send_new_unread_direct_messages_emails,
 )
 from grandchallenge.profiles.models import NotificationEmailOptions
@@ -19,7 +18,7 @@ from tests.utils import get_view_for_user
 
 
 @pytest.mark.django_db
-def test_get_users_to_send_new_unread_direct_messages_email(
+def test_get_new_unread_direct_messages(
     django_assert_max_num_queries,
 ):
     users = UserFactory.create_batch(7)
@@ -74,57 +73,31 @@ def test_get_users_to_send_new_unread_direct_messages_email(
     opt_out_user.user_profile.save()
     DirectMessageFactory().unread_by.add(opt_out_user)
 
-    with django_assert_max_num_queries(4):
-        users_to_email = [
-            {
-                "user": user,
-                "new_unread_message_count": user.new_unread_message_count,
-                "new_senders": get_new_senders(user=user),
-            }
-            for user in get_users_to_send_new_unread_direct_messages_email().order_by(
-                "pk"
-            )
-        ]
-
-    assert users_to_email == [
-        {
-            "user": users[1],
-            "new_unread_message_count": 1,
-            "new_senders": [dm1.sender],
-        },
-        {
-            "user": users[2],
-            "new_unread_message_count": 2,
-            "new_senders": [dm2a.sender, dm2b.sender],
-        },
-        {
-            "user": users[3],
-            "new_unread_message_count": 2,
-            "new_senders": [sender],
-        },
-        {
-            "user": users[5],
-            "new_unread_message_count": 1,
-            "new_senders": [dm5b.sender],
-        },
-        {
-            "user": users[6],
-            "new_unread_message_count": 1,
-            "new_senders": [dm6.sender],
-        },
+    with django_assert_max_num_queries(1):
+        new_messages = [*get_new_unread_direct_messages(until=now())]
+
+    assert new_messages == [
+        (users[1].pk, dm1.sender.pk),
+        *sorted(
+            [(users[2].pk, dm2a.sender.pk), (users[2].pk, dm2b.sender.pk)]
+        ),
+        (users[3].pk, sender.pk),
+        (users[3].pk, sender.pk),
+        (users[5].pk, dm5b.sender.pk),
+        (users[6].pk, dm6.sender.pk),
     ]
 
     assert len(mail.outbox) == 0
 
     with django_assert_max_num_queries(
-        10
-    ):  # Extra queries to update the users profile
+        9
+    ):  # One query to update the profiles and one per email batch
         send_new_unread_direct_messages_emails()
 
     assert len(mail.outbox) == 5
-    assert {*get_users_to_send_new_unread_direct_messages_email()} == set()
+    assert [*get_new_unread_direct_messages(until=now())] == []
 
-    with django_assert_max_num_queries(2):
+    with django_assert_max_num_queries(4):
         send_new_unread_direct_messages_emails()
 
     assert len(mail.outbox) == 5
@@ -138,6 +111,26 @@ def test_get_users_to_send_new_unread_direct_messages_email(
     ]
 
 
+@pytest.mark.django_db
+def test_new_unread_direct_messages_emails_are_batched(
+    django_assert_max_num_queries,
+):
+    users = UserFactory.create_batch(3)
+    DirectMessageFactory().unread_by.add(*users)
+
+    with django_assert_max_num_queries(5):
+        send_new_unread_direct_messages_emails()
+
+    assert sorted(m.to[0] for m in mail.outbox) == sorted(
+        u.email for u in users
+    )
+    assert len({m.subject for m in mail.outbox}) == 1
+
+    for user in users:
+        user.user_profile.refresh_from_db()
+        assert user.user_profile.unread_messages_email_last_sent_at
+
+
 @pytest.mark.django_db
 def test_instant_email_when_opted_in(client):
     u1, u2, u3, u4, u5 = UserFactory.create_batch(5)
@@ -0,0 +1,68 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from grandchallenge.emails.ses import TokenBucket, is_transient_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, clock=clock)
+
+    # The bucket starts empty
+    assert bucket._take() == 0.5
+
+    clock.time = 0.5
+
+    assert bucket._take() == 0
+    assert bucket._take() == 0.5
+
+    # The bucket does not fill beyond its capacity
+    clock.time = 100
+
+    assert bucket._take() == 0
+    assert bucket._take() == 0.5
+
+
+def test_token_bucket_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+    clock.time = 100
+
+    # A full bucket allows a burst of its capacity
+    assert bucket._take() == 0
+    assert bucket._take() == 0
+    assert bucket._take() == 0.5
+
+
+@pytest.mark.parametrize(
+    "error,expected",
+    (
+        (
+            ClientError(
+                error_response={"Error": {"Code": "Throttling"}},
+                operation_name="SendRawEmail",
+            ),
+            True,
+        ),
+        (
+            ClientError(
+                error_response={"Error": {"Code": "MessageRejected"}},
+                operation_name="SendRawEmail",
+            ),
+            False,
+        ),
+        (EndpointConnectionError(endpoint_url="https://example.com"), True),
+        (RuntimeError("Rejected"), False),
+    ),
+)
+def test_is_transient_error(error, expected):
+    assert is_transient_error(error) is expected
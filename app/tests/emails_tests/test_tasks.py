@@ -1,7 +1,10 @@
 import pytest
+from botocore.exceptions import ClientError
 from django.contrib.sites.models import Site
 from django.core import mail
 from django.core.mail import get_connection
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from grandchallenge.emails.emails import (
@@ -9,7 +12,9 @@ from grandchallenge.emails.emails import (
     send_standard_email_batch,
 )
 from grandchallenge.emails.models import RawEmail
+from grandchallenge.emails.ses import FakeSESClient
 from grandchallenge.emails.tasks import (
+    _send_raw_emails,
     cleanup_sent_raw_emails,
     get_receivers,
     send_bulk_email,
@@ -378,3 +383,121 @@ def test_send_raw_emails(settings):
 
     assert RawEmail.objects.filter(sent_at__isnull=True).count() == 0
     assert RawEmail.objects.get(pk=e1.pk).sent_at == sent_at_time
+
+
+class FailingSESClient(FakeSESClient):
+    def send_raw_email(self, *, RawMessage):  # noqa: N803
+        if RawMessage["Data"] == "fail":
+            raise RuntimeError("Rejected")
+        return super().send_raw_email(RawMessage=RawMessage)
+
+
+@pytest.mark.django_db
+def test_send_raw_emails_in_batches(settings):
+    settings.AWS_SES_SEND_BATCH_SIZE = 3
+
+    sent = RawEmailFactory.create_batch(6, message="ok")
+    failed = RawEmailFactory(message="fail")
+
+    result = _send_raw_emails(client=FailingSESClient(max_send_rate=1000))
+
+    assert result["sent"] == 6
+    assert result["errored"] == 1
+    assert result["messages_per_second"] > 0
+
+    assert all(
+        e.sent_at is not None
+        for e in RawEmail.objects.filter(pk__in=[e.pk for e in sent])
+    )
+    failed.refresh_from_db()
+    assert failed.errored is True
+    assert failed.sent_at is None
+
+    # Sent and errored emails are not picked up again
+    assert _send_raw_emails(client=FailingSESClient())["sent"] == 0
+
+
+class CrashingSESClient(FakeSESClient):
+    def send_raw_email(self, *, RawMessage):  # noqa: N803
+        if RawMessage["Data"] == "crash":
+            raise SystemExit
+        return super().send_raw_email(RawMessage=RawMessage)
+
+
+@pytest.mark.django_db
+def test_send_raw_emails_writes_status_as_sent(settings):
+    settings.AWS_SES_SEND_MAX_WORKERS = 1
+
+    emails = sorted(
+        RawEmailFactory.create_batch(5, message="ok"), key=lambda e: e.pk
+    )
+    sent, crashed = emails[:2], emails[2]
+    crashed.message = "crash"
+    crashed.save()
+
+    with pytest.raises(SystemExit):
+        _send_raw_emails(client=CrashingSESClient(max_send_rate=1000))
+
+    # The emails sent before the crash are not sent again
+    assert all(
+        e.sent_at is not None
+        for e in RawEmail.objects.filter(pk__in=[e.pk for e in sent])
+    )
+    crashed.refresh_from_db()
+    assert crashed.sent_at is None
+    assert crashed.errored is False
+
+
+class ThrottlingSESClient(FakeSESClient):
+    def send_raw_email(self, *, RawMessage):  # noqa: N803
+        if RawMessage["Data"] == "throttled":
+            raise ClientError(
+                error_response={
+                    "Error": {
+                        "Code": "Throttling",
+                        "Message": "Maximum sending rate exceeded.",
+                    }
+                },
+                operation_name="SendRawEmail",
+            )
+        return super().send_raw_email(RawMessage=RawMessage)
+
+
+@pytest.mark.django_db
+def test_send_raw_emails_leaves_throttled_emails_unsent():
+    sent = RawEmailFactory(message="ok")
+    throttled = RawEmailFactory(message="throttled")
+
+    result = _send_raw_emails(client=ThrottlingSESClient(max_send_rate=1000))
+
+    assert result["sent"] == 1
+    assert result["errored"] == 0
+
+    sent.refresh_from_db()
+    throttled.refresh_from_db()
+    assert sent.sent_at is not None
+    assert throttled.sent_at is None
+    assert throttled.errored is False
+
+
+@pytest.mark.django_db
+def test_send_raw_emails_writes_statuses_in_groups(settings):
+    settings.AWS_SES_SEND_STATUS_BATCH_SIZE = 3
+
+    RawEmailFactory.create_batch(6, message="ok")
+
+    with CaptureQueriesContext(connection) as context:
+        result = _send_raw_emails(client=FailingSESClient(max_send_rate=1000))
+
+    assert result["sent"] == 6
+    assert (
+        len(
+            [
+                q
+                for q in context.captured_queries
+                if q["sql"].startswith("UPDATE")
+            ]
+        )
+        == 2
+    )
+    assert not RawEmail.objects.filter(sent_at__isnull=True).exists()
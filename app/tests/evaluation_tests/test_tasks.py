@@ -388,7 +388,8 @@ def test_evaluation_notifications(
 
     # update evaluation status to failed
     evaluation = submission.evaluation_set.first()
-    evaluation.update_status(status=evaluation.FAILURE)
+    with django_capture_on_commit_callbacks(execute=True):
+        evaluation.update_status(status=evaluation.FAILURE)
     assert evaluation.status == evaluation.FAILURE
     # notifications for admin and creator of submission
     assert Notification.objects.count() == len(recipients)
@@ -7,6 +7,7 @@ from grandchallenge.core.validators import (
     ExtensionValidator,
     JSONValidator,
     MimeTypeValidator,
+    inline_schema_definitions,
 )
 
 
@@ -75,3 +76,40 @@ def test_json_validator():
         schema={"type": "object", "properties": {"name": {"type": "string"}}}
     )
     assert json_validator is not JSONValidator(schema=schema)
+    assert (
+        json_validator._validator
+        is JSONValidator(schema=dict(reversed(schema.items())))._validator
+    )
+
+
+def test_inline_schema_definitions():
+    schema = {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "definitions": {
+            "name": {"type": "string"},
+            "person": {
+                "type": "object",
+                "properties": {"name": {"$ref": "#/definitions/name"}},
+            },
+            "tree": {
+                "type": "array",
+                "items": {"$ref": "#/definitions/tree"},
+            },
+        },
+    }
+
+    assert inline_schema_definitions(
+        schema={**schema, "anyOf": [{"$ref": "#/definitions/person"}]}
+    ) == {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "anyOf": [
+            {
+                "type": "object",
+                "properties": {"name": {"type": "string"}},
+            }
+        ],
+    }
+
+    for ref in ("#/definitions/tree", "#/definitions/missing"):
+        recursive = {**schema, "anyOf": [{"$ref": ref}]}
+        assert inline_schema_definitions(schema=recursive) == recursive
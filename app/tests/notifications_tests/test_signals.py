@@ -19,12 +19,20 @@ from tests.notifications_tests.factories import (
 @pytest.mark.parametrize(
     "kind", (Topic.TOPIC_ANNOUNCE, Topic.TOPIC_POST, Topic.TOPIC_STICKY)
 )
-def test_notification_sent_on_new_topic(kind):
+def test_notification_sent_on_new_topic(
+    kind, settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     p = UserFactory()
     u = UserFactory()
     f = ForumFactory(type=Forum.FORUM_POST)
     follow(user=u, obj=f)
-    t = TopicFactory(forum=f, poster=p, type=kind)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        t = TopicFactory(forum=f, poster=p, type=kind)
 
     notification = Notification.objects.get()
     topic_string = format_html('<a href="{}">{}</a>', t.get_absolute_url(), t)
@@ -42,13 +50,23 @@ def test_notification_sent_on_new_topic(kind):
 @pytest.mark.parametrize(
     "kind", (Topic.TOPIC_ANNOUNCE, Topic.TOPIC_POST, Topic.TOPIC_STICKY)
 )
-def test_notification_sent_on_new_post(kind):
+def test_notification_sent_on_new_post(
+    kind, settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     u1 = UserFactory()
     u2 = UserFactory()
     f = ForumFactory(type=Forum.FORUM_POST)
     follow(user=u2, obj=f)
-    t = TopicFactory(forum=f, poster=u1, type=kind)
-    PostFactory(topic=t, poster=u2)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        t = TopicFactory(forum=f, poster=u1, type=kind)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        PostFactory(topic=t, poster=u2)
 
     notifications = Notification.objects.all()
     topic_string = format_html('<a href="{}">{}</a>', t.get_absolute_url(), t)
@@ -89,7 +107,13 @@ def test_follow_if_post_in_topic():
 
 
 @pytest.mark.django_db
-def test_notification_created_for_target_followers_on_action_creation():
+def test_notification_created_for_target_followers_on_action_creation(
+    settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     user1 = UserFactory()
     user2 = UserFactory()
     f = ForumFactory(type=Forum.FORUM_POST)
@@ -97,7 +121,8 @@ def test_notification_created_for_target_followers_on_action_creation():
     follow(user2, f, send_action=False)
 
     # creating a post creates an action automatically
-    _ = TopicFactory(forum=f, poster=user1, type=Topic.TOPIC_POST)
+    with django_capture_on_commit_callbacks(execute=True):
+        _ = TopicFactory(forum=f, poster=user1, type=Topic.TOPIC_POST)
     assert len(Notification.objects.all()) == 1
 
     notification = Notification.objects.get()
@@ -150,7 +175,13 @@ def test_follow_clean_up_after_forum_removal():
 
 
 @pytest.mark.django_db
-def test_notification_for_new_admin_only():
+def test_notification_for_new_admin_only(
+    settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     user = UserFactory()
     admin = UserFactory()
     challenge = ChallengeFactory(creator=admin)
@@ -159,7 +190,8 @@ def test_notification_for_new_admin_only():
     Notification.objects.all().delete()
 
     # add user as admin to challenge
-    challenge.add_admin(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        challenge.add_admin(user)
 
     assert Notification.objects.count() == 1
     assert Notification.objects.get().user == user
@@ -1,12 +1,25 @@
+from uuid import uuid4
+
 import pytest
+from actstream.actions import follow
+from django.contrib.contenttypes.models import ContentType
 from django.core import mail
 from django.utils.timezone import now
+from machina.apps.forum.models import Forum
+from machina.apps.forum_conversation.models import Topic
 
 from grandchallenge.notifications.models import Notification
-from grandchallenge.notifications.tasks import send_unread_notification_emails
+from grandchallenge.notifications.tasks import (
+    fan_out_notification,
+    send_unread_notification_emails,
+)
 from grandchallenge.profiles.models import NotificationEmailOptions
 from tests.factories import UserFactory
-from tests.notifications_tests.factories import NotificationFactory
+from tests.notifications_tests.factories import (
+    ForumFactory,
+    NotificationFactory,
+    TopicFactory,
+)
 
 
 @pytest.mark.django_db
@@ -88,7 +101,47 @@ def test_notification_email_counts():
 
 
 @pytest.mark.django_db
-def test_instant_email_notification_opt_in():
+def test_daily_notification_email_digest_is_batched(
+    django_assert_max_num_queries,
+):
+    users = UserFactory.create_batch(6)
+
+    for user in users[:4]:
+        NotificationFactory(user=user, type=Notification.Type.GENERIC)
+
+    for user in users[4:]:
+        NotificationFactory.create_batch(
+            2, user=user, type=Notification.Type.GENERIC
+        )
+
+    with django_assert_max_num_queries(10):
+        send_unread_notification_emails()
+
+    assert [m.to[0] for m in mail.outbox] == [u.email for u in users]
+    assert all(
+        "You have 1 new notification." in m.body for m in mail.outbox[:4]
+    )
+    assert all(
+        "You have 2 new notifications." in m.body for m in mail.outbox[4:]
+    )
+
+    for user in users:
+        user.user_profile.refresh_from_db()
+
+    assert (
+        len({u.user_profile.notification_email_last_sent_at for u in users})
+        == 1
+    )
+
+
+@pytest.mark.django_db
+def test_instant_email_notification_opt_in(
+    settings, django_capture_on_commit_callbacks
+):
+    # Override the celery settings
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     inactive_user, user_no_email, user_instant_email, user_daily_email = (
         UserFactory.create_batch(4)
     )
@@ -111,19 +164,111 @@ def test_instant_email_notification_opt_in():
     )
     user_daily_email.user_profile.save()
 
-    Notification.send(
-        kind=Notification.Type.FILE_COPY_STATUS, actor=inactive_user
-    )
-    Notification.send(
-        kind=Notification.Type.FILE_COPY_STATUS, actor=user_no_email
-    )
-    Notification.send(
-        kind=Notification.Type.FILE_COPY_STATUS, actor=user_instant_email
-    )
-    Notification.send(
-        kind=Notification.Type.FILE_COPY_STATUS, actor=user_daily_email
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        Notification.send(
+            kind=Notification.Type.FILE_COPY_STATUS, actor=inactive_user
+        )
+        Notification.send(
+            kind=Notification.Type.FILE_COPY_STATUS, actor=user_no_email
+        )
+        Notification.send(
+            kind=Notification.Type.FILE_COPY_STATUS, actor=user_instant_email
+        )
+        Notification.send(
+            kind=Notification.Type.FILE_COPY_STATUS, actor=user_daily_email
+        )
 
     # only the user with instant notification emails enabled gets an email
     assert len(mail.outbox) == 1
     assert mail.outbox[0].to == [user_instant_email.email]
+
+
+@pytest.mark.django_db
+def test_notification_fan_out_is_bulk(django_assert_max_num_queries):
+    poster = UserFactory()
+    forum = ForumFactory(type=Forum.FORUM_POST)
+    followers = UserFactory.create_batch(10)
+
+    for user in [poster, *followers]:
+        follow(user=user, obj=forum, send_action=False)
+
+    followers[0].user_profile.notification_email_choice = (
+        NotificationEmailOptions.INSTANT
+    )
+    followers[0].user_profile.save()
+
+    topic = TopicFactory(forum=forum, poster=poster, type=Topic.TOPIC_POST)
+    Notification.objects.all().delete()
+
+    content_type = ContentType.objects.get_for_model
+
+    with django_assert_max_num_queries(11):
+        fan_out_notification(
+            kind=Notification.Type.FORUM_POST,
+            actor=(content_type(poster).pk, str(poster.pk)),
+            action_object=(content_type(topic).pk, str(topic.pk)),
+            target=(content_type(forum).pk, str(forum.pk)),
+            message="posted",
+            description=None,
+            context_class=None,
+        )
+
+    notifications = Notification.objects.all()
+
+    assert {n.user for n in notifications} == {*followers}
+    assert all(
+        n.user.has_perms(
+            [
+                "view_notification",
+                "change_notification",
+                "delete_notification",
+            ],
+            n,
+        )
+        for n in notifications
+    )
+
+
+@pytest.mark.django_db
+def test_notification_fan_out_is_idempotent(
+    django_capture_on_commit_callbacks,
+):
+    poster = UserFactory()
+    forum = ForumFactory(type=Forum.FORUM_POST)
+    followers = UserFactory.create_batch(3)
+
+    for user in [poster, *followers]:
+        follow(user=user, obj=forum, send_action=False)
+
+    followers[0].user_profile.notification_email_choice = (
+        NotificationEmailOptions.INSTANT
+    )
+    followers[0].user_profile.save()
+
+    topic = TopicFactory(forum=forum, poster=poster, type=Topic.TOPIC_POST)
+    Notification.objects.all().delete()
+
+    content_type = ContentType.objects.get_for_model
+    kwargs = {
+        "fan_out_id": str(uuid4()),
+        "kind": Notification.Type.FORUM_POST,
+        "actor": (content_type(poster).pk, str(poster.pk)),
+        "action_object": (content_type(topic).pk, str(topic.pk)),
+        "target": (content_type(forum).pk, str(forum.pk)),
+        "message": "posted",
+        "description": None,
+        "context_class": None,
+    }
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        fan_out_notification(**kwargs)
+
+    assert len(callbacks) == 1
+    assert Notification.objects.count() == 3
+
+    # A redelivered task does not notify or email the receivers again
+    with django_capture_on_commit_callbacks() as callbacks:
+        fan_out_notification(**kwargs)
+
+    assert callbacks == []
+    assert Notification.objects.count() == 3
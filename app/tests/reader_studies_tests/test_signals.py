@@ -116,8 +116,11 @@ def test_assert_modification_allowed():
 @pytest.mark.django_db
 @pytest.mark.parametrize("reverse", [True, False])
 def test_display_set_permissions_signal(
-    client, reverse, django_capture_on_commit_callbacks
+    settings, client, reverse, django_capture_on_commit_callbacks
 ):
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     ds1, ds2 = DisplaySetFactory.create_batch(2)
     im1, im2, im3, im4 = ImageFactory.create_batch(4)
 
@@ -167,8 +170,11 @@ def test_display_set_permissions_signal(
 
 @pytest.mark.django_db
 def test_deleting_display_set_removes_permissions(
-    django_capture_on_commit_callbacks,
+    settings, django_capture_on_commit_callbacks
 ):
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     ds1, ds2 = DisplaySetFactory.create_batch(2)
     im = ImageFactory()
     civ = ComponentInterfaceValueFactory(image=im)
@@ -195,8 +201,11 @@ def test_deleting_display_set_removes_permissions(
 
 @pytest.mark.django_db
 def test_changing_reader_study_updates_permissions(
-    django_capture_on_commit_callbacks,
+    settings, django_capture_on_commit_callbacks
 ):
+    settings.task_eager_propagates = (True,)
+    settings.task_always_eager = (True,)
+
     ds = DisplaySetFactory()
     im = ImageFactory()
     civ = ComponentInterfaceValueFactory(image=im)
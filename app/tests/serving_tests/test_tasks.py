@@ -0,0 +1,32 @@
+import pytest
+from django_redis import get_redis_connection
+
+from grandchallenge.serving.models import Download
+from grandchallenge.serving.tasks import (
+    DOWNLOADS_BUFFER_KEY,
+    buffer_download,
+    create_buffered_downloads,
+)
+from tests.factories import ImageFactory, UserFactory
+
+
+@pytest.mark.django_db
+def test_create_buffered_downloads(settings):
+    settings.SERVING_DOWNLOADS_BATCH_SIZE = 2
+
+    connection = get_redis_connection("default")
+    connection.delete(DOWNLOADS_BUFFER_KEY)
+
+    user = UserFactory()
+    images = ImageFactory.create_batch(3)
+
+    for image in images:
+        buffer_download(creator_id=user.pk, image_id=image.pk)
+
+    assert not Download.objects.filter(creator=user).exists()
+
+    create_buffered_downloads()
+
+    downloads = Download.objects.filter(creator=user)
+    assert {d.image for d in downloads} == {*images}
+    assert connection.llen(DOWNLOADS_BUFFER_KEY) == 0
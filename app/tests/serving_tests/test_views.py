@@ -1,18 +1,28 @@
 import json
 from pathlib import Path
+from urllib.parse import urlparse
 
 import pytest
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
 from django.core.files.base import ContentFile
 from django.core.files.images import ImageFile
+from django.http import Http404
+from django.urls import resolve
 from guardian.shortcuts import assign_perm
+from panimg.models import ImageType
 
 from grandchallenge.components.models import (
     ComponentInterface,
     ComponentInterfaceValue,
 )
+from grandchallenge.serving.views import (
+    component_interface_value_file_name_cache_key,
+)
 from tests.algorithms_tests.factories import AlgorithmJobFactory
 from tests.archives_tests.factories import ArchiveFactory, ArchiveItemFactory
 from tests.cases_tests import RESOURCE_PATH
+from tests.components_tests.factories import ComponentInterfaceValueFactory
 from tests.evaluation_tests.factories import (
     EvaluationFactory,
     SubmissionFactory,
@@ -98,6 +108,40 @@ def test_image_response(client, settings, cloudfront, tmpdir):
         assert "Expires" in redirect
 
 
+@pytest.mark.django_db
+def test_packed_tile_response(client, settings, tmp_path):
+    settings.CASES_PACK_DZI_TILES = True
+
+    tiles = tmp_path / "image_files"
+    (tiles / "0").mkdir(parents=True)
+    (tiles / "0" / "0_0.jpeg").write_bytes(b"tile")
+
+    image_file = ImageFileFactory(
+        image_type=ImageType.DZI.value,
+        file=ContentFile(b"<Image/>", name="image.dzi"),
+        directory=tiles,
+    )
+    user = UserFactory()
+    assign_perm("view_image", user, image_file.image)
+
+    response = get_view_for_user(
+        url=image_file.file.url.replace(".dzi", "_files/0/0_0.jpeg"),
+        client=client,
+        user=user,
+    )
+
+    assert response.status_code == 200
+    assert response.content == b"tile"
+    assert response["Content-Type"] == "image/jpeg"
+
+    # Files that are not tiles are still redirected
+    response = get_view_for_user(
+        url=image_file.file.url, client=client, user=user
+    )
+
+    assert response.status_code == 302
+
+
 @pytest.mark.django_db
 def test_submission_download(client, two_challenge_sets):
     """Only the challenge admin should be able to download submissions."""
@@ -161,9 +205,24 @@ def test_civ_file_download(client):
     )
     user1, user2 = UserFactory(), UserFactory()
 
+    def clear_permission_cache():
+        # Permissions are cached for a short time, so changes are not seen
+        # by the view immediately
+        cache.delete_many(
+            [
+                component_interface_value_file_name_cache_key(
+                    user_pk=user.pk,
+                    component_interface_value_pk=output_civ.pk,
+                )
+                for user in (user1, user2)
+            ]
+        )
+
     def has_correct_access(user_allowed, user_denied, url):
         tests = [(403, None), (302, user_allowed), (403, user_denied)]
 
+        clear_permission_cache()
+
         for test in tests:
             response = get_view_for_user(url=url, client=client, user=test[1])
             assert response.status_code == test[0]
@@ -184,6 +243,7 @@ def test_civ_file_download(client):
     group = GroupFactory()
     group.user_set.add(user1)
     assign_perm("view_evaluation", group, evaluation)
+    clear_permission_cache()
 
     # Evaluation inputs and outputs should always be denied
     assert (
@@ -279,3 +339,72 @@ def test_session_feedback_screenshot_download(client):
             user=test[1],
         )
         assert response.status_code == test[0]
+
+
+@pytest.mark.django_db
+def test_image_permission_is_cached(rf, django_assert_num_queries):
+    image_file = ImageFileFactory()
+    user = UserFactory()
+    match = resolve(urlparse(image_file.file.url).path)
+
+    request = rf.get("/")
+    request.user = user
+
+    with pytest.raises(PermissionDenied):
+        match.func(request, **match.kwargs)
+
+    assign_perm("view_image", user, image_file.image)
+
+    # The permission check is not cached when it is denied
+    response = match.func(request, **match.kwargs)
+    assert response.status_code == 302
+
+    with django_assert_num_queries(0):
+        response = match.func(request, **match.kwargs)
+
+    assert response.status_code == 302
+
+    # Other files of the image are not found, without a request to storage
+    with pytest.raises(Http404):
+        match.func(request, **{**match.kwargs, "path": "unknown.mha"})
+
+
+@pytest.mark.django_db
+def test_civ_permission_is_cached(rf, django_assert_num_queries):
+    civ = ComponentInterfaceValueFactory(
+        interface__kind=ComponentInterface.Kind.ANY,
+        interface__store_in_database=False,
+    )
+    civ.file.save("results.json", ContentFile(b"{}"))
+    user = UserFactory()
+    match = resolve(urlparse(civ.file.url).path)
+
+    request = rf.get("/")
+    request.user = user
+
+    with pytest.raises(PermissionDenied):
+        match.func(request, **match.kwargs)
+
+    job = AlgorithmJobFactory(creator=user)
+    job.outputs.add(civ)
+
+    # The permissions are resolved in one query
+    with django_assert_num_queries(1):
+        response = match.func(request, **match.kwargs)
+
+    assert response.status_code == 302
+
+    with django_assert_num_queries(0):
+        response = match.func(request, **match.kwargs)
+
+    assert response.status_code == 302
+
+    deleted_civ = ComponentInterfaceValueFactory()
+    deleted_civ_pk = deleted_civ.pk
+    deleted_civ.delete()
+
+    with pytest.raises(Http404):
+        match.func(
+            request,
+            **{**match.kwargs, "component_interface_value_pk": deleted_civ_pk},
+        )
@@ -0,0 +1,100 @@
+from datetime import date, datetime
+
+import pytest
+from django.utils.timezone import localdate, make_aware, now
+
+from grandchallenge.challenges.models import Challenge
+from grandchallenge.statistics.models import MetricChoices, MonthlyStatistic
+from grandchallenge.statistics.tasks import (
+    update_monthly_statistics,
+    update_site_statistics_cache,
+)
+from tests.factories import ChallengeFactory, UserFactory
+
+
+def _challenge_counts():
+    return {
+        (s.month, s.facet): s.object_count
+        for s in MonthlyStatistic.objects.filter(
+            metric=MetricChoices.CHALLENGES
+        )
+    }
+
+
+@pytest.mark.django_db
+def test_closed_months_are_frozen(settings):
+    settings.STATISTICS_SITE_CACHE_KEY = "tests/statistics/monthly"
+
+    old_challenge, _ = ChallengeFactory(), ChallengeFactory(hidden=False)
+    Challenge.objects.filter(pk=old_challenge.pk).update(
+        created=make_aware(datetime(2020, 1, 15))
+    )
+
+    update_monthly_statistics()
+
+    this_month = localdate().replace(day=1)
+
+    assert _challenge_counts() == {
+        (date(2020, 1, 1), True): 1,
+        (this_month, False): 1,
+    }
+
+    new_challenge = ChallengeFactory()
+    Challenge.objects.filter(pk=new_challenge.pk).update(
+        created=make_aware(datetime(2020, 1, 20))
+    )
+    ChallengeFactory(hidden=False)
+
+    update_site_statistics_cache()
+
+    # The closed month is not recomputed
+    assert _challenge_counts() == {
+        (date(2020, 1, 1), True): 1,
+        (this_month, False): 2,
+    }
+
+    update_monthly_statistics(since=date(2020, 1, 1))
+
+    assert _challenge_counts() == {
+        (date(2020, 1, 1), True): 2,
+        (this_month, False): 2,
+    }
+
+
+@pytest.mark.django_db
+def test_closed_months_are_backfilled(settings):
+    settings.STATISTICS_SITE_CACHE_KEY = "tests/statistics/monthly"
+
+    old_challenge = ChallengeFactory()
+    Challenge.objects.filter(pk=old_challenge.pk).update(
+        created=make_aware(datetime(2020, 1, 15))
+    )
+
+    update_site_statistics_cache()
+
+    assert _challenge_counts() == {(date(2020, 1, 1), True): 1}
+
+
+@pytest.mark.django_db
+def test_monthly_statistics_are_upserted():
+    challenge = ChallengeFactory()
+    UserFactory(last_login=now())
+    this_month = localdate().replace(day=1)
+
+    update_monthly_statistics()
+    update_monthly_statistics(since=this_month)
+
+    assert _challenge_counts() == {(this_month, True): 1}
+
+    Challenge.objects.filter(pk=challenge.pk).update(hidden=False)
+
+    update_monthly_statistics(since=this_month)
+
+    # The row of the group without objects is removed
+    assert _challenge_counts() == {(this_month, False): 1}
+    assert (
+        MonthlyStatistic.objects.get(
+            metric=MetricChoices.USERS, month=this_month
+        ).facet
+        is None
+    )
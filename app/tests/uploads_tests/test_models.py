@@ -1,3 +1,4 @@
+import os
 from urllib.parse import quote
 
 import pytest
@@ -5,7 +6,7 @@ from botocore.stub import Stubber
 from django.conf import settings
 from requests import put
 
-from grandchallenge.uploads.models import UserUpload
+from grandchallenge.uploads.models import UserUpload, UserUploadStorageUsage
 from tests.algorithms_tests.factories import (
     AlgorithmImageFactory,
     AlgorithmModelFactory,
@@ -155,6 +156,132 @@ def test_upload_copy():
         assert f.read() == b"123"
 
 
+@pytest.mark.django_db
+def test_upload_copy_multipart(settings):
+    settings.AWS_S3_COPY_PART_SIZE = 5 * 1024 * 1024
+    data = os.urandom(2 * settings.AWS_S3_COPY_PART_SIZE + 3)
+
+    user = UserFactory()
+    upload = UserUpload.objects.create(creator=user, filename="test.tar.gz")
+    presigned_urls = upload.generate_presigned_urls(part_numbers=[1])
+    response = put(presigned_urls["1"], data=data)
+    upload.complete_multipart_upload(
+        parts=[{"ETag": response.headers["ETag"], "PartNumber": 1}]
+    )
+    upload.save()
+    ai = AlgorithmImageFactory(creator=user, image=None)
+
+    copied = upload.copy_object(to_field=ai.image)
+
+    assert copied.key == ai.image.name
+    assert copied.size == len(data)
+
+    with ai.image.open() as f:
+        assert f.read() == data
+
+    # The object is in 3 parts
+    assert (
+        ai.image.storage.connection.meta.client.head_object(
+            Bucket=ai.image.storage.bucket.name,
+            Key=ai.image.name,
+            PartNumber=1,
+        )["PartsCount"]
+        == 3
+    )
+
+
+@pytest.mark.django_db
+def test_upload_copy_multipart_returns_checksum(settings):
+    settings.AWS_S3_COPY_PART_SIZE = 5 * 1024 * 1024
+    settings.AWS_S3_COPY_MAX_CONCURRENCY = 1
+    size = settings.AWS_S3_COPY_PART_SIZE + 1
+
+    upload = UserUpload.objects.create(
+        creator=UserFactory(), filename="test.tar.gz"
+    )
+    am = AlgorithmModelFactory(model=None)
+    key = f"models/algorithms/algorithmmodel/{am.pk}/test.tar.gz"
+    bucket = am.model.storage.bucket.name
+    copy_source = {"Bucket": upload.bucket, "Key": upload.key}
+
+    with Stubber(am.model.storage.connection.meta.client) as stubber:
+        stubber.add_client_error(
+            method="head_object",
+            service_error_code="404",
+            http_status_code=404,
+            expected_params={"Bucket": bucket, "Key": key},
+        )
+        stubber.add_response(
+            method="head_object",
+            service_response={"ContentLength": size},
+            expected_params={"Bucket": upload.bucket, "Key": upload.key},
+        )
+        stubber.add_response(
+            method="create_multipart_upload",
+            service_response={"UploadId": "upload-id"},
+            expected_params={
+                "Bucket": bucket,
+                "Key": key,
+                "ContentType": "application/octet-stream",
+                "ChecksumAlgorithm": "SHA256",
+            },
+        )
+        for part_number, copy_source_range in (
+            (1, f"bytes=0-{size - 2}"),
+            (2, f"bytes={size - 1}-{size - 1}"),
+        ):
+            stubber.add_response(
+                method="upload_part_copy",
+                service_response={
+                    "CopyPartResult": {
+                        "ETag": f"etag-{part_number}",
+                        "ChecksumSHA256": f"checksum-{part_number}",
+                    }
+                },
+                expected_params={
+                    "Bucket": bucket,
+                    "Key": key,
+                    "UploadId": "upload-id",
+                    "PartNumber": part_number,
+                    "CopySource": copy_source,
+                    "CopySourceRange": copy_source_range,
+                },
+            )
+        stubber.add_response(
+            method="complete_multipart_upload",
+            service_response={
+                "ChecksumSHA256": "LXEWQrcmsEQBYnyp+6wy9chTD7GQPMTbAiWHF5IaSIE=-2"
+            },
+            expected_params={
+                "Bucket": bucket,
+                "Key": key,
+                "UploadId": "upload-id",
+                "MultipartUpload": {
+                    "Parts": [
+                        {
+                            "ETag": f"etag-{n}",
+                            "PartNumber": n,
+                            "ChecksumSHA256": f"checksum-{n}",
+                        }
+                        for n in (1, 2)
+                    ]
+                },
+            },
+        )
+        stubber.add_response(
+            method="head_object",
+            service_response={"ContentLength": size},
+            expected_params={"Bucket": bucket, "Key": key},
+        )
+
+        copied = upload.copy_object(to_field=am.model)
+
+    assert copied.sha256 == (
+        "sha256:"
+        "2d711642b726b04401627ca9fbac32f5c8530fb1903cc4db02258717921a4881"
+    )
+
+
 @pytest.mark.django_db
 def test_upload_copy_sets_sha256():
     upload = UserUpload.objects.create(
@@ -352,11 +479,101 @@ def test_can_upload_more_other_objects(settings):
     upload.complete_multipart_upload(
         parts=[{"ETag": response.headers["ETag"], "PartNumber": 1}]
     )
+    upload.save()
 
     assert upload.can_upload_more is False
     assert new_upload.can_upload_more is False
 
 
+@pytest.mark.django_db
+def test_storage_usage_is_updated(django_assert_num_queries):
+    user = UserFactory()
+
+    def upload_file():
+        upload = UserUpload.objects.create(creator=user)
+        presigned_urls = upload.generate_presigned_urls(part_numbers=[1])
+        response = put(presigned_urls["1"], data=b"123")
+        upload.complete_multipart_upload(
+            parts=[{"ETag": response.headers["ETag"], "PartNumber": 1}]
+        )
+        upload.save()
+        return upload
+
+    initial_size = UserUpload(creator=user).size_of_creators_completed_uploads
+
+    # The usage is initialised from storage, which includes this upload
+    first_upload = upload_file()
+    usage = UserUploadStorageUsage.objects.get(user=user)
+    assert usage.size_in_storage == initial_size + 3
+    assert usage.reconciled_at is not None
+
+    second_upload = upload_file()
+    assert first_upload.size_in_storage == second_upload.size_in_storage == 3
+    usage.refresh_from_db()
+    assert usage.size_in_storage == initial_size + 6
+
+    # Saving the upload again does not change the usage
+    second_upload.save()
+    usage.refresh_from_db()
+    assert usage.size_in_storage == initial_size + 6
+
+    first_upload.delete()
+    usage.refresh_from_db()
+    assert usage.size_in_storage == initial_size + 3
+
+    # Checking the limit does not list the objects of the user
+    new_upload = UserUpload.objects.create(creator=user)
+
+    with Stubber(new_upload._client) as stubber:
+        stubber.add_response(
+            "list_parts",
+            {"Parts": [], "IsTruncated": False},
+            {
+                "Bucket": new_upload.bucket,
+                "Key": new_upload.key,
+                "UploadId": new_upload.s3_upload_id,
+                "MaxParts": new_upload.LIST_MAX_ITEMS,
+                "PartNumberMarker": 0,
+            },
+        )
+
+        with django_assert_num_queries(2):
+            assert new_upload.can_upload_more is True
+
+
+@pytest.mark.django_db
+def test_storage_usage_of_uploads_without_size():
+    user = UserFactory()
+    usage = UserUploadStorageUsage.objects.create(
+        user=user, size_in_storage=10
+    )
+
+    # Mimic an upload that was completed before its size was recorded
+    upload = UserUpload.objects.create(creator=user)
+    UserUpload.objects.filter(pk=upload.pk).update(
+        status=UserUpload.StatusChoices.COMPLETED
+    )
+    upload.refresh_from_db()
+    assert upload.size_in_storage == 0
+
+    with Stubber(upload._client) as stubber:
+        stubber.add_response(
+            "head_object",
+            {"ContentLength": 3},
+            {"Bucket": upload.bucket, "Key": upload.key},
+        )
+        stubber.add_response(
+            "delete_object", {}, {"Bucket": upload.bucket, "Key": upload.key}
+        )
+
+        upload.delete()
+
+        stubber.assert_no_pending_responses()
+
+    usage.refresh_from_db()
+    assert usage.size_in_storage == 7
+
+
 @pytest.mark.parametrize(
     "content,expected_mimetype",
     (
@@ -3,9 +3,16 @@ from datetime import timedelta
 import pytest
 from django.core.exceptions import ObjectDoesNotExist
 
-from grandchallenge.uploads.models import UserUpload
-from grandchallenge.uploads.tasks import delete_old_user_uploads
-from tests.uploads_tests.factories import UserUploadFactory
+from grandchallenge.uploads.models import UserUpload, UserUploadStorageUsage
+from grandchallenge.uploads.tasks import (
+    delete_old_user_uploads,
+    reconcile_user_upload_storage_usage,
+)
+from tests.factories import UserFactory
+from tests.uploads_tests.factories import (
+    UserUploadFactory,
+    create_upload_from_file,
+)
 
 
 @pytest.mark.django_db
@@ -27,3 +34,31 @@ def test_uploads_removed():
             old_upload.refresh_from_db()
 
     new_upload.refresh_from_db()
+
+
+@pytest.mark.django_db
+def test_storage_usage_reconciled(tmp_path):
+    file = tmp_path / "test.txt"
+    file.write_bytes(b"123")
+    user, other_user = UserFactory.create_batch(2)
+
+    create_upload_from_file(file_path=file, creator=user)
+    usage = UserUploadStorageUsage.objects.get(user=user)
+    other_usage = UserUploadStorageUsage.objects.create(
+        user=other_user, size_in_storage=42
+    )
+
+    UserUploadStorageUsage.objects.filter(pk=usage.pk).update(
+        size_in_storage=1
+    )
+
+    reconcile_user_upload_storage_usage()
+
+    usage.refresh_from_db()
+    other_usage.refresh_from_db()
+    assert usage.size_in_storage == (
+        UserUpload(creator=user).size_of_creators_completed_uploads
+    )
+    assert usage.size_in_storage >= 3
+    assert other_usage.size_in_storage == 0
+    assert other_usage.reconciled_at is not None